@@ -1,13 +1,19 @@
 # coding=utf-8
 from __future__ import absolute_import
 
-from octoprint_accelerometer import plugin
+import time
+
+_import_start_ts = time.perf_counter()
+from octoprint_accelerometer import plugin  # noqa: E402
+
+_import_duration_s = time.perf_counter() - _import_start_ts
 
 __plugin_pythoncompat__ = ">=3,<4"
 
 
 def __plugin_load__():
     implementation: plugin.OctoprintAccelerometerPlugin = plugin.OctoprintAccelerometerPlugin()
+    implementation.import_duration_s = _import_duration_s
     global __plugin_implementation__
     __plugin_implementation__ = implementation
 
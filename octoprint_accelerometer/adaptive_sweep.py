@@ -0,0 +1,99 @@
+import os
+from dataclasses import dataclass
+from logging import Logger
+from typing import Dict, List, Optional
+
+import numpy as np
+from py3dpaxxel.storage.filename_meta import FilenameMetaStream
+
+from octoprint_accelerometer.data_io import load_stream_meta, output_data_rate_hz_from_str, uncompressed_name
+from octoprint_accelerometer.fft_variants import compute_fft_variants_chunked
+
+RESPONSE_ALGORITHM: str = "flattop"
+"the flat-top window measures the amplitude at the excitation frequency most accurately"
+
+
+@dataclass
+class SweepRange:
+    start_frequency_hz: int
+    stop_frequency_hz: int
+    step_frequency_hz: int
+
+    def frequencies_count(self) -> int:
+        return (self.stop_frequency_hz - self.start_frequency_hz) // self.step_frequency_hz + 1
+
+
+def stream_response(path: str, axis: str, frequency_hz: float) -> Optional[float]:
+    """
+    :param path: stream recorded while exciting the printer at frequency_hz along axis
+    :return: amplitude of the acceleration at the excitation frequency; None if the stream is incomplete
+    """
+    meta = load_stream_meta(path)
+    if "rate" not in meta:
+        return None
+    variants = compute_fft_variants_chunked(path, output_data_rate_hz_from_str(meta["rate"]), [RESPONSE_ALGORITHM])
+    amplitude = variants.amplitudes[RESPONSE_ALGORITHM][axis]
+    if len(amplitude) == 0:
+        return None
+    # the excitation may fall in between two bins
+    idx = int(np.searchsorted(variants.frequency_hz, frequency_hz))
+    return float(np.max(amplitude[max(0, idx - 1):idx + 2]))
+
+
+def sweep_responses(logger: Logger, data_dir: str, stream_files: List[str]) -> Dict[str, Dict[int, float]]:
+    """
+    Each stream's response is measured on the axis it excited.
+    Axes are kept apart, so that a resonance of one axis is not averaged away by the responses of another one.
+
+    :param stream_files: streams of a sweep, i.e. all streams of one run
+    :return: excited axis -> excitation frequency -> response, averaged over sequences and zeta values
+    """
+    responses: Dict[str, Dict[int, List[float]]] = {}
+    for stream_file in stream_files:
+        meta = FilenameMetaStream().from_filename(uncompressed_name(stream_file))
+        try:
+            response = stream_response(os.path.join(data_dir, stream_file), meta.sequence_axis, meta.sequence_frequency_hz)
+        except (OSError, ValueError) as e:
+            logger.warning(f"skip response of stream {stream_file}: {e}")
+            continue
+        if response is not None:
+            responses.setdefault(meta.sequence_axis, {}).setdefault(meta.sequence_frequency_hz, []).append(response)
+    return {axis: {frequency_hz: float(np.mean(values)) for frequency_hz, values in axis_responses.items()}
+            for axis, axis_responses in responses.items()}
+
+
+def find_resonances(responses: Dict[int, float], count: int) -> List[int]:
+    """
+    :param responses: excitation frequency -> response of a coarse sweep along one axis
+    :param count: upper bound of resonances to return
+    :return: frequencies of the strongest local maxima, strongest first
+    """
+    frequencies = sorted(responses.keys())
+    values = [responses[f] for f in frequencies]
+    maxima = [f for idx, f in enumerate(frequencies)
+              if (idx == 0 or values[idx] >= values[idx - 1]) and (idx == len(values) - 1 or values[idx] > values[idx + 1])]
+    return sorted(maxima, key=lambda f: responses[f], reverse=True)[:count]
+
+
+def plan_refinement(resonances: List[int],
+                    coarse_step_frequency_hz: int,
+                    fine_step_frequency_hz: int,
+                    min_frequency_hz: int,
+                    max_frequency_hz: int) -> List[SweepRange]:
+    """
+    A resonance found by the coarse sweep lies within one coarse step around the coarse maximum.
+    That interval is swept again at fine resolution; overlapping intervals are merged.
+
+    :return: fine sweeps in ascending order; empty if the fine step is not finer than the coarse one
+    """
+    if fine_step_frequency_hz <= 0 or fine_step_frequency_hz >= coarse_step_frequency_hz:
+        return []
+    intervals = sorted((max(min_frequency_hz, f - coarse_step_frequency_hz + fine_step_frequency_hz),
+                        min(max_frequency_hz, f + coarse_step_frequency_hz - fine_step_frequency_hz)) for f in resonances)
+    merged: List[List[int]] = []
+    for start, stop in intervals:
+        if merged and start <= merged[-1][1] + fine_step_frequency_hz:
+            merged[-1][1] = max(merged[-1][1], stop)
+        else:
+            merged.append([start, stop])
+    return [SweepRange(start, start + (stop - start) // fine_step_frequency_hz * fine_step_frequency_hz, fine_step_frequency_hz) for start, stop in merged]
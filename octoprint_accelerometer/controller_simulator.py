@@ -0,0 +1,355 @@
+import ctypes
+import errno
+import math
+import os
+import random
+import threading
+import time
+import tty
+from dataclasses import dataclass
+from enum import IntEnum
+from logging import Logger
+from typing import Dict, Optional, Tuple, Type
+
+from py3dpaxxel.controller.constants import OutputDataRateFromHz
+
+
+@dataclass(frozen=True)
+class ControllerTransport:
+    """
+    Frames of the controller's host transport as defined by py3dpaxxel, i.e. as encoded and decoded by its serial client.
+
+    Each frame is a packed ctypes structure whose first field is the header id, followed by the payload fields.
+    """
+
+    header_id: Type[IntEnum]
+    requests: Dict[int, Type[ctypes.Structure]]
+    "host request header id -> frame"
+    responses: Dict[int, Type[ctypes.Structure]]
+    "device response header id -> frame"
+
+    def request_size(self, header_id: int) -> int:
+        return ctypes.sizeof(self.requests[header_id])
+
+    def decode_request(self, header_id: int, data: bytes) -> Tuple:
+        """
+        :return: payload fields in declaration order
+        """
+        frame_type = self.requests[header_id]
+        frame = frame_type.from_buffer_copy(data[:ctypes.sizeof(frame_type)])
+        return tuple(getattr(frame, name) for name, *_ in frame_type._fields_[1:])
+
+    def encode_response(self, header_id: int, *payload) -> bytes:
+        return bytes(self.responses[header_id](header_id, *payload))
+
+
+def load_controller_transport() -> ControllerTransport:
+    """
+    Imported on first use: py3dpaxxel's transport definitions are only needed while the simulator runs.
+
+    :raises ImportError: if the installed py3dpaxxel does not provide the transport definitions
+    """
+    try:
+        from py3dpaxxel.controller import transfer_types as tt
+
+        h = tt.TransportHeaderId
+        return ControllerTransport(
+            header_id=h,
+            requests={h.RX_SET_OUTPUT_DATA_RATE: tt.RxSetOutputDataRate,
+                      h.RX_GET_OUTPUT_DATA_RATE: tt.RxGetOutputDataRate,
+                      h.RX_SET_RANGE: tt.RxSetRange,
+                      h.RX_GET_RANGE: tt.RxGetRange,
+                      h.RX_SET_SCALE: tt.RxSetScale,
+                      h.RX_GET_SCALE: tt.RxGetScale,
+                      h.RX_DEVICE_SETUP: tt.RxDeviceSetup,
+                      h.RX_DEVICE_REBOOT: tt.RxDeviceReboot,
+                      h.RX_SAMPLING_START: tt.RxSamplingStart,
+                      h.RX_SAMPLING_STOP: tt.RxSamplingStop},
+            responses={h.TX_OUTPUT_DATA_RATE: tt.TxOutputDataRate,
+                       h.TX_RANGE: tt.TxRange,
+                       h.TX_SCALE: tt.TxScale,
+                       h.TX_DEVICE_SETUP: tt.TxDeviceSetup,
+                       h.TX_SAMPLING_STARTED: tt.TxSamplingStarted,
+                       h.TX_SAMPLING_FINISHED: tt.TxSamplingFinished,
+                       h.TX_SAMPLING_STOPPED: tt.TxSamplingStopped,
+                       h.TX_SAMPLING_ABORTED: tt.TxSamplingAborted,
+                       h.TX_ACCELERATION: tt.TxAcceleration,
+                       h.TX_FIFO_OVERFLOW: tt.TxFifoOverflow,
+                       h.TX_FAULT: tt.TxFault})
+    except AttributeError as e:
+        raise ImportError(f"py3dpaxxel does not provide the controller transport definitions: {e}") from e
+
+
+@dataclass
+class ControllerSimulatorStatistics:
+    samples_sent: int = 0
+    bytes_sent: int = 0
+    fifo_overruns: int = 0
+    garbage_responses: int = 0
+    sampling_started_ts: Optional[float] = None
+    sampling_stopped_ts: Optional[float] = None
+
+    @property
+    def samples_per_s(self) -> Optional[float]:
+        if self.sampling_started_ts is None:
+            return None
+        elapsed_s = (self.sampling_stopped_ts or time.time()) - self.sampling_started_ts
+        return self.samples_sent / elapsed_s if elapsed_s > 0 else None
+
+
+class ControllerSimulator:
+    """
+    Simulates the accelerometer controller on a pseudo terminal so that recordings can be run without hardware.
+
+    The slave side of the pty (see :attr:`device`) is meant to be used as ``controller_serial_device``.
+    Frames are encoded with py3dpaxxel's transport definitions, so its serial client talks to the simulator as to the controller.
+    Samples are emitted paced at the configured output data rate.
+    If the host does not keep up with reading, the emulated FiFo fills up and an overflow is reported, just as the controller would.
+    Overflows and garbage responses can also be injected deliberately after a given number of samples.
+    """
+
+    MILLI_G_PER_LSB: float = 3.9
+    "full resolution mode"
+    PACING_INTERVAL_S: float = 0.005
+    GARBAGE_FRAME_SIZE: int = 8
+
+    def __init__(self,
+                 logger: Logger,
+                 output_data_rate_hz: int = 3200,
+                 fifo_capacity_samples: int = 1024,
+                 fifo_overflow_after_samples: int = 0,
+                 garbage_response_after_samples: int = 0) -> None:
+        """
+        :param output_data_rate_hz: initial rate, see :attr:`output_data_rate_hz`; the host may change it later
+        :param fifo_capacity_samples: samples that may be pending (not yet read by the host) before an overflow is reported
+        :param fifo_overflow_after_samples: inject a FiFo overflow after n samples of each sampling run; 0 to disable
+        :param garbage_response_after_samples: inject an unknown frame after n samples of each sampling run; 0 to disable
+        """
+        self.logger: Logger = logger
+        self.fifo_capacity_samples: int = fifo_capacity_samples
+        self.fifo_overflow_after_samples: int = fifo_overflow_after_samples
+        self.garbage_response_after_samples: int = garbage_response_after_samples
+        self.statistics: ControllerSimulatorStatistics = ControllerSimulatorStatistics()
+        self._odr_code_to_hz: Dict[int, int] = {odr.value: hz for hz, odr in OutputDataRateFromHz.items()}
+        self._output_data_rate_hz: int = 0
+        self.output_data_rate_hz = output_data_rate_hz
+        self._range: int = 3
+        self._scale: int = 1
+        self._transport: Optional[ControllerTransport] = None
+        self._fd_lock: threading.Lock = threading.Lock()
+        self._master_fd: Optional[int] = None
+        self._slave_fd: Optional[int] = None
+        self._device: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._do_stop_flag: threading.Event = threading.Event()
+        self._rx_buffer: bytearray = bytearray()
+        self._tx_pending: bytearray = bytearray()
+        self._is_sampling: bool = False
+        self._max_samples: int = 0
+        self._sample_index: int = 0
+        self._samples_due_ts: float = 0.0
+
+    @property
+    def device(self) -> Optional[str]:
+        """
+        :return: path of the pty slave (i.e. "/dev/pts/3") if running, None otherwise
+        """
+        return self._device
+
+    @property
+    def output_data_rate_hz(self) -> int:
+        return self._output_data_rate_hz
+
+    @output_data_rate_hz.setter
+    def output_data_rate_hz(self, output_data_rate_hz: int):
+        """
+        Rates not supported by the sensor fall back to the nearest supported one, just as the settings would be clamped.
+        """
+        if output_data_rate_hz not in OutputDataRateFromHz.keys():
+            supported_hz = min(OutputDataRateFromHz.keys(), key=lambda hz: abs(hz - output_data_rate_hz))
+            self.logger.warning(f"controller simulator: unsupported output data rate {output_data_rate_hz}Hz, using {supported_hz}Hz")
+            output_data_rate_hz = supported_hz
+        self._output_data_rate_hz = output_data_rate_hz
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        :raises ImportError: if the installed py3dpaxxel does not provide the transport definitions
+        """
+        if self.is_running():
+            return
+        if self._transport is None:
+            self._transport = load_controller_transport()
+        self._close()
+        self._master_fd, self._slave_fd = os.openpty()
+        tty.setraw(self._slave_fd)
+        os.set_blocking(self._master_fd, False)
+        self._device = os.ttyname(self._slave_fd)
+        self._rx_buffer.clear()
+        self._tx_pending.clear()
+        self._is_sampling = False
+        self._do_stop_flag.clear()
+        self._thread = threading.Thread(name="controller_simulator", target=self._serve)
+        self._thread.daemon = True
+        self._thread.start()
+        self.logger.info(f"controller simulator listening on {self._device}")
+
+    def stop(self) -> None:
+        self._do_stop_flag.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self._close()
+
+    def _close(self) -> None:
+        """
+        Closes the pty once; called by :meth:`stop` and by the serving thread if the pty failed.
+        """
+        with self._fd_lock:
+            for fd in [self._master_fd, self._slave_fd]:
+                if fd is not None:
+                    os.close(fd)
+            self._master_fd, self._slave_fd, self._device = None, None, None
+
+    def _serve(self) -> None:
+        try:
+            while not self._do_stop_flag.is_set():
+                self._receive()
+                if self._is_sampling:
+                    self._produce_samples()
+                self._flush()
+                time.sleep(self.PACING_INTERVAL_S)
+        except OSError as e:
+            self.logger.error(f"controller simulator: pty {self._device} failed, shutting down: {e}")
+            self._is_sampling = False
+            self._do_stop_flag.set()
+            self._close()
+
+    def _receive(self) -> None:
+        try:
+            self._rx_buffer.extend(os.read(self._master_fd, 4096))
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError as e:
+            # EIO: no process holds the slave side open
+            if e.errno != errno.EIO:
+                raise
+
+        header_id_type = self._transport.header_id
+        while len(self._rx_buffer) > 0:
+            header_id = self._rx_buffer[0]
+            if header_id not in self._transport.requests.keys():
+                self.logger.warning(f"controller simulator: dropping unknown request byte {header_id}")
+                del self._rx_buffer[0]
+                self._send(header_id_type.TX_FAULT)
+                continue
+            frame_size = self._transport.request_size(header_id)
+            if len(self._rx_buffer) < frame_size:
+                break
+            payload = self._transport.decode_request(header_id, bytes(self._rx_buffer[:frame_size]))
+            del self._rx_buffer[:frame_size]
+            self._handle_request(header_id_type(header_id), payload)
+
+    def _handle_request(self, header_id: IntEnum, payload: tuple) -> None:
+        h = self._transport.header_id
+        if header_id == h.RX_SET_OUTPUT_DATA_RATE:
+            if payload[0] in self._odr_code_to_hz.keys():
+                self._output_data_rate_hz = self._odr_code_to_hz[payload[0]]
+            else:
+                self._send(h.TX_FAULT)
+        elif header_id == h.RX_GET_OUTPUT_DATA_RATE:
+            self._send(h.TX_OUTPUT_DATA_RATE, OutputDataRateFromHz[self._output_data_rate_hz].value)
+        elif header_id == h.RX_SET_RANGE:
+            self._range = payload[0]
+        elif header_id == h.RX_GET_RANGE:
+            self._send(h.TX_RANGE, self._range)
+        elif header_id == h.RX_SET_SCALE:
+            self._scale = payload[0]
+        elif header_id == h.RX_GET_SCALE:
+            self._send(h.TX_SCALE, self._scale)
+        elif header_id == h.RX_DEVICE_SETUP:
+            self._send(h.TX_DEVICE_SETUP, OutputDataRateFromHz[self._output_data_rate_hz].value, self._range, self._scale)
+        elif header_id == h.RX_DEVICE_REBOOT:
+            self._is_sampling = False
+            self._tx_pending.clear()
+        elif header_id == h.RX_SAMPLING_START:
+            self._start_sampling(payload[0])
+        elif header_id == h.RX_SAMPLING_STOP:
+            if self._is_sampling:
+                self._stop_sampling(h.TX_SAMPLING_STOPPED)
+
+    def _start_sampling(self, max_samples: int) -> None:
+        self._max_samples = max_samples
+        self._sample_index = 0
+        self._samples_due_ts = time.time()
+        self._is_sampling = True
+        self.statistics = ControllerSimulatorStatistics(sampling_started_ts=self._samples_due_ts)
+        self._send(self._transport.header_id.TX_SAMPLING_STARTED, max_samples)
+
+    def _stop_sampling(self, reason: IntEnum) -> None:
+        self._is_sampling = False
+        self.statistics.sampling_stopped_ts = time.time()
+        self._send(reason)
+        self.logger.info(f"controller simulator: sampling ended ({reason.name}) "
+                         f"samples={self.statistics.samples_sent} rate={self.statistics.samples_per_s}")
+
+    def _produce_samples(self) -> None:
+        now = time.time()
+        due_count = int((now - self._samples_due_ts) * self._output_data_rate_hz)
+        if due_count <= 0:
+            return
+        self._samples_due_ts += due_count / self._output_data_rate_hz
+
+        h = self._transport.header_id
+        acceleration_frame_size = ctypes.sizeof(self._transport.responses[h.TX_ACCELERATION])
+        for _ in range(due_count):
+            if self._max_samples != 0 and self._sample_index >= self._max_samples:
+                self._stop_sampling(h.TX_SAMPLING_FINISHED)
+                return
+
+            pending_samples = len(self._tx_pending) // acceleration_frame_size
+            if pending_samples >= self.fifo_capacity_samples or \
+                    (self.fifo_overflow_after_samples != 0 and self._sample_index == self.fifo_overflow_after_samples):
+                self.statistics.fifo_overruns += 1
+                self._send(h.TX_FIFO_OVERFLOW)
+                self._stop_sampling(h.TX_SAMPLING_ABORTED)
+                return
+
+            if self.garbage_response_after_samples != 0 and self._sample_index == self.garbage_response_after_samples:
+                self.statistics.garbage_responses += 1
+                unknown_id = max(int(i) for i in h) + 1
+                self._tx_pending.extend(bytes([unknown_id & 0xff]) + random.randbytes(self.GARBAGE_FRAME_SIZE - 1))
+
+            x, y, z = self._sample(self._sample_index / self._output_data_rate_hz)
+            self._send(h.TX_ACCELERATION, self._sample_index & 0xffff, x, y, z)
+            self._sample_index += 1
+            self.statistics.samples_sent += 1
+
+    def _sample(self, t_s: float) -> tuple:
+        """
+        Damped ringing at a fixed resonance plus noise; gravity on z.
+        """
+
+        def to_lsb(milli_g: float) -> int:
+            return max(-32768, min(32767, int(milli_g / self.MILLI_G_PER_LSB)))
+
+        ringing_mg = 400 * math.exp(-3.0 * (t_s % 0.5)) * math.sin(2 * math.pi * 42.0 * t_s)
+        return (to_lsb(ringing_mg + random.gauss(0, 8)),
+                to_lsb(0.3 * ringing_mg + random.gauss(0, 8)),
+                to_lsb(1000 + random.gauss(0, 8)))
+
+    def _send(self, header_id: IntEnum, *payload) -> None:
+        self._tx_pending.extend(self._transport.encode_response(header_id, *payload))
+
+    def _flush(self) -> None:
+        if len(self._tx_pending) == 0:
+            return
+        try:
+            written = os.write(self._master_fd, self._tx_pending)
+            self.statistics.bytes_sent += written
+            del self._tx_pending[:written]
+        except (BlockingIOError, InterruptedError):
+            # host is not reading: keep the data pending, the emulated FiFo may overflow
+            pass
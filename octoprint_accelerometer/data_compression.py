@@ -0,0 +1,91 @@
+import gzip
+import os
+import shutil
+import threading
+from logging import Logger
+from typing import Optional, Tuple
+
+from py3dpaxxel.storage.file_filter import FileSelector
+
+from octoprint_accelerometer.data_io import COMPRESSED_FILE_EXT, data_file_stem
+from octoprint_accelerometer.progress import ProgressTracker
+from octoprint_accelerometer.worker import PauseGate
+
+COMPRESSION_CHUNK_SIZE_BYTES: int = 256 * 1024
+
+
+def compress_file(path: str, compression_level: int = 6) -> str:
+    """
+    Replaces a file by its gzip compressed counterpart ``<path>.gz``.
+    The file is compressed chunk by chunk into a temporary file first; the original is removed only once the
+    compressed file is complete, so an interruption never loses data.
+
+    :param path: file to compress
+    :param compression_level: gzip level 1 (fast) to 9 (small)
+    :return: path of the compressed file
+    """
+    compressed_path = f"{path}{COMPRESSED_FILE_EXT}"
+    temp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(compressed_path)}.tmp")
+    with open(path, "rb") as source, gzip.open(temp_path, "wb", compresslevel=compression_level) as target:
+        shutil.copyfileobj(source, target, COMPRESSION_CHUNK_SIZE_BYTES)
+    shutil.copystat(path, temp_path)
+    os.replace(temp_path, compressed_path)
+    os.remove(path)
+    return compressed_path
+
+
+class DataCompressRunner:
+    """
+    Compresses stream files together with their FFT files once the FFTs of all three axes exist.
+    Streams without complete FFTs stay uncompressed so that the FFT decomposition still finds them.
+    Meant to be the last step of the post-processing task, after every other step has read the plain files.
+    """
+
+    def __init__(self,
+                 logger: Logger,
+                 input_dir: str,
+                 stream_file_prefix: str,
+                 fft_file_prefix: str,
+                 compression_level: int,
+                 do_abort_flag: threading.Event,
+                 pause_gate: Optional[PauseGate] = None,
+                 progress: Optional[ProgressTracker] = None):
+        self.logger: Logger = logger
+        self.input_dir: str = input_dir
+        self.stream_file_prefix: str = stream_file_prefix
+        self.fft_file_prefix: str = fft_file_prefix
+        self.compression_level: int = compression_level
+        self.do_abort_flag: threading.Event = do_abort_flag
+        self.pause_gate: Optional[PauseGate] = pause_gate
+        self.progress: Optional[ProgressTracker] = progress
+
+    def __call__(self) -> Tuple[int, int, int, int]:
+        """
+        :return: tuple of return code (0 on success, -1 if aborted), total, processed and skipped stream count
+        """
+        streams = FileSelector(os.path.join(self.input_dir, f"{self.stream_file_prefix}-.*\\.tsv$")).filter()
+        if self.progress is not None:
+            self.progress.set_files_total(len(streams))
+        processed, skipped = 0, 0
+
+        for stream in streams:
+            if self.pause_gate is not None:
+                self.pause_gate.wait(self.do_abort_flag)
+            if self.do_abort_flag.is_set():
+                return -1, len(streams), processed, skipped
+            if self.progress is not None:
+                self.progress.advance(stream.filename_ext, os.path.join(self.input_dir, stream.filename_ext))
+
+            stem = data_file_stem(stream.filename_ext).removeprefix(f"{self.stream_file_prefix}-")
+            fft_paths = [os.path.join(self.input_dir, f"{self.fft_file_prefix}-{stem}-{axis}.tsv") for axis in ["x", "y", "z"]]
+            fft_compressed = [os.path.isfile(f"{p}{COMPRESSED_FILE_EXT}") for p in fft_paths]
+            if not all(os.path.isfile(p) or compressed for p, compressed in zip(fft_paths, fft_compressed)):
+                skipped += 1
+                continue
+
+            for path in [p for p, compressed in zip(fft_paths, fft_compressed) if not compressed]:
+                compress_file(path, self.compression_level)
+            compress_file(os.path.join(self.input_dir, stream.filename_ext), self.compression_level)
+            processed += 1
+
+        return 0, len(streams), processed, skipped
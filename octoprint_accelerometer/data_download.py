@@ -0,0 +1,240 @@
+import os
+import re
+import zlib
+from typing import Callable, Iterator, Optional, Tuple
+
+import tornado.web
+from tornado import httputil
+from tornado.ioloop import IOLoop
+from tornado.iostream import StreamClosedError
+
+from octoprint_accelerometer.data_io import COMPRESSED_FILE_EXT, open_data_file
+
+DOWNLOAD_CHUNK_SIZE_BYTES: int = 64 * 1024
+
+
+def _read_chunks(path: str, decompress: bool, start: int = 0, length: Optional[int] = None) -> Iterator[bytes]:
+    """
+    :param decompress: whether to decompress a compressed file while reading
+    :param start: byte offset to start at
+    :param length: count of bytes to read; until the end if None
+    """
+    with (open_data_file(path, "rb") if decompress else open(path, "rb")) as file:
+        file.seek(start)
+        remaining = length
+        while remaining is None or remaining > 0:
+            chunk = file.read(DOWNLOAD_CHUNK_SIZE_BYTES if remaining is None else min(DOWNLOAD_CHUNK_SIZE_BYTES, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def _parse_byte_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    :param range_header: value of the Range header, i.e. "bytes=0-499", "bytes=500-" or "bytes=-500"
+    :param size: size of the file
+    :return: first and last byte (inclusive); None if the header is not a single byte range, the file is served as a whole then
+    :raises ValueError: if the range is not satisfiable
+    """
+    match = re.fullmatch(r"\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*", range_header)
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+    if match.group(1) == "":
+        first, last = max(0, size - int(match.group(2))), size - 1
+    else:
+        first = int(match.group(1))
+        last = min(size - 1, int(match.group(2))) if match.group(2) != "" else size - 1
+    if first > last or first >= size:
+        raise ValueError(f"range {range_header} not satisfiable for {size} bytes")
+    return first, last
+
+
+def _prepend(first: bytes, rest: Iterator[bytes]) -> Iterator[bytes]:
+    yield first
+    yield from rest
+
+
+class DataFileHandler(tornado.web.RequestHandler):
+    """
+    Serves the files of the data folder as text, i.e. GET ``download/axxel-30f9c95c-20231127-235625233-s000-ax-f010-z015.tsv.gz``.
+
+    Transfer is gzip encoded whenever the client accepts it:
+      - compressed files (``*.gz``) are sent as stored with ``Content-Encoding: gzip``, otherwise decompressed on the fly
+      - plain files are compressed on the fly with a fast compression level
+
+    A single byte range (``Range: bytes=...``) of a plain file is served as partial content without encoding.
+    Compressed files are always served as a whole.
+
+    HEAD requests get the same headers as GET requests, without content.
+
+    Arguments for stream files:
+      - start_ms, end_ms: optional time window; only the samples within are read and sent, framed by header and meta data line
+
+    Files are sent chunk by chunk, so a file is never held in memory as a whole.
+    Chunks are read and compressed on an executor, only sending runs on the web server's thread.
+    Files not in the folder are fetched first if a fetch callback is given.
+    """
+
+    def initialize(self,
+                   path: str,
+                   access_validation: Optional[Callable] = None,
+                   path_validation: Optional[Callable] = None,
+                   on_file_served: Optional[Callable[[str], None]] = None,
+                   fetch_missing: Optional[Callable[[str], Optional[str]]] = None):
+        """
+        :param on_file_served: invoked with the file name of each file about to be sent
+        :param fetch_missing: invoked off the web server's thread with the file name of a file not in the folder, i.e. from shared storage;
+                              returns its path once fetched, None if unknown
+        """
+        self._root: str = os.path.abspath(path)
+        self._access_validation: Optional[Callable] = access_validation
+        self._path_validation: Optional[Callable] = path_validation
+        self._on_file_served: Optional[Callable[[str], None]] = on_file_served
+        self._fetch_missing: Optional[Callable[[str], Optional[str]]] = fetch_missing
+
+    def _accepts_gzip(self) -> bool:
+        encodings = [e.split(";")[0].strip() for e in self.request.headers.get("Accept-Encoding", "").split(",")]
+        return "gzip" in encodings
+
+    @staticmethod
+    def _next_data(chunks: Iterator[bytes], compressor) -> Optional[bytes]:
+        """
+        :return: the next chunk, compressed if a compressor is given (may be empty then); None once all chunks are read
+        """
+        chunk = next(chunks, None)
+        if chunk is None:
+            return None
+        return compressor.compress(chunk) if compressor is not None else chunk
+
+    async def _send(self, chunks: Iterator[bytes], gzip_encode: bool = False) -> None:
+        loop = IOLoop.current()
+        compressor = zlib.compressobj(1, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if gzip_encode else None
+        while True:
+            data = await loop.run_in_executor(None, self._next_data, chunks, compressor)
+            if data is None:
+                break
+            if data:
+                self.write(data)
+                await self.flush()
+        if compressor is not None:
+            self.write(await loop.run_in_executor(None, compressor.flush))
+            await self.flush()
+
+    async def _resolve(self, path: str) -> str:
+        """
+        :return: absolute path of the requested file, fetched first if missing
+        :raises tornado.web.HTTPError: 404 if the file is neither in the folder nor could be fetched
+        """
+        if self._access_validation is not None:
+            self._access_validation(self.request)
+        if self._path_validation is not None:
+            self._path_validation(path)
+
+        abs_path = os.path.abspath(os.path.join(self._root, path))
+        if os.path.dirname(abs_path) != self._root:
+            raise tornado.web.HTTPError(404)
+        if not os.path.isfile(abs_path):
+            if self._fetch_missing is None or await IOLoop.current().run_in_executor(None, self._fetch_missing, os.path.basename(abs_path)) is None:
+                raise tornado.web.HTTPError(404)
+        return abs_path
+
+    def _time_window(self) -> Tuple[Optional[float], Optional[float]]:
+        """
+        :return: start_ms and end_ms arguments, None if not given
+        :raises tornado.web.HTTPError: 400 if an argument is not a number
+        """
+        try:
+            start_ms: Optional[float] = float(self.get_argument("start_ms")) if self.get_argument("start_ms", None) is not None else None
+            end_ms: Optional[float] = float(self.get_argument("end_ms")) if self.get_argument("end_ms", None) is not None else None
+        except ValueError:
+            raise tornado.web.HTTPError(400, "invalid time window")
+        return start_ms, end_ms
+
+    def _set_headers(self, abs_path: str, is_time_window: bool) -> Optional[Tuple[int, int]]:
+        """
+        Sets status and headers of the response, the same for GET and HEAD.
+        Status is 416 if the requested byte range is not satisfiable, no content is sent then.
+
+        :return: byte range served as partial content; None if the file is served as a whole
+        """
+        is_compressed = abs_path.endswith(COMPRESSED_FILE_EXT)
+        accepts_gzip = self._accepts_gzip()
+        size = os.path.getsize(abs_path)
+        last_modified = httputil.format_timestamp(os.path.getmtime(abs_path))
+        self.set_header("Content-Type", "text/plain")
+        self.set_header("Vary", "Accept-Encoding")
+        self.set_header("Last-Modified", last_modified)
+        if not is_compressed:
+            self.set_header("Accept-Ranges", "bytes")
+
+        # a stale If-Range validator means the client's partial copy is outdated: serve the whole file
+        range_header = self.request.headers.get("Range")
+        if range_header is not None and not is_compressed and not is_time_window \
+                and self.request.headers.get("If-Range", last_modified) == last_modified:
+            try:
+                byte_range = _parse_byte_range(range_header, size)
+            except ValueError:
+                self.set_status(416)
+                self.set_header("Content-Range", f"bytes */{size}")
+                self.set_header("Content-Length", 0)
+                return None
+            if byte_range is not None:
+                first, last = byte_range
+                self.set_status(206)
+                self.set_header("Content-Range", f"bytes {first}-{last}/{size}")
+                self.set_header("Content-Length", last - first + 1)
+                return byte_range
+
+        if accepts_gzip:
+            self.set_header("Content-Encoding", "gzip")
+        # the length is known unless the content is encoded or sliced on the fly
+        if not is_time_window and is_compressed == accepts_gzip:
+            self.set_header("Content-Length", size)
+        return None
+
+    async def head(self, path: str):
+        abs_path = await self._resolve(path)
+        start_ms, end_ms = self._time_window()
+        self._set_headers(abs_path, start_ms is not None or end_ms is not None)
+        # headers are sent as they are; finishing right away would declare the empty body's length instead
+        await self.flush()
+        self.finish()
+
+    async def get(self, path: str):
+        abs_path = await self._resolve(path)
+        start_ms, end_ms = self._time_window()
+        is_time_window = start_ms is not None or end_ms is not None
+
+        if self._on_file_served is not None:
+            self._on_file_served(os.path.basename(abs_path))
+
+        byte_range = self._set_headers(abs_path, is_time_window)
+        if 416 == self.get_status():
+            self.finish()
+            return
+        accepts_gzip = self._accepts_gzip()
+
+        try:
+            if is_time_window:
+                # numpy is imported on the first time window request rather than when the route is registered
+                from octoprint_accelerometer.stream_slice import read_stream_slice
+                chunks = read_stream_slice(abs_path, start_ms, end_ms)
+                try:
+                    # the first chunk looks up or builds the stream's offset index, which scans the whole stream
+                    first_chunk = await IOLoop.current().run_in_executor(None, next, chunks)
+                except ValueError as e:
+                    raise tornado.web.HTTPError(400, str(e))
+                await self._send(_prepend(first_chunk, chunks), gzip_encode=accepts_gzip)
+            elif byte_range is not None:
+                first, last = byte_range
+                await self._send(_read_chunks(abs_path, False, first, last - first + 1))
+            elif abs_path.endswith(COMPRESSED_FILE_EXT):
+                # sent as stored if the client accepts gzip, decompressed otherwise
+                await self._send(_read_chunks(abs_path, not accepts_gzip))
+            else:
+                await self._send(_read_chunks(abs_path, False), gzip_encode=accepts_gzip)
+        except StreamClosedError:
+            return
+        self.finish()
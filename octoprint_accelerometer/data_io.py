@@ -0,0 +1,171 @@
+import gzip
+import itertools
+import json
+import os
+from typing import IO, TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DATA_FILE_PATTERN: str = "\\.tsv(\\.gz)?$"
+"matches stream and FFT files, stored either as plain text or gzip compressed"
+
+COMPRESSED_FILE_EXT: str = ".gz"
+
+FFT_ALGORITHMS: List[str] = ["blackman", "hann", "flattop", "dft"]
+"names of the FFT variants, the keys of :data:`octoprint_accelerometer.fft_variants.FFT_WINDOWS`; listed here, so that they are known without numpy"
+
+FileVersion = Tuple[str, int, float]
+"path, size, modification time: identifies one version of a file for caching"
+
+
+def file_version(path: str) -> FileVersion:
+    stat = os.stat(path)
+    return path, stat.st_size, stat.st_mtime
+
+
+def uncompressed_name(file_name: str) -> str:
+    """
+    :return: file name without the compression extension, i.e. "axxel-...-z015.tsv" for "axxel-...-z015.tsv.gz"
+    """
+    return file_name.removesuffix(COMPRESSED_FILE_EXT)
+
+
+def data_file_stem(file_name: str) -> str:
+    """
+    :return: file name without data file extensions, i.e. "axxel-...-z015" for "axxel-...-z015.tsv" and "axxel-...-z015.tsv.gz"
+    """
+    return os.path.splitext(uncompressed_name(file_name))[0]
+
+
+def resolve_data_file(path: str) -> str:
+    """
+    :param path: path of a data file as written uncompressed
+    :return: the given path, or the path of its compressed counterpart if only that one exists
+    """
+    compressed = f"{path}{COMPRESSED_FILE_EXT}"
+    return compressed if not os.path.exists(path) and os.path.exists(compressed) else path
+
+
+def open_data_file(path: str, mode: str = "r") -> IO:
+    """
+    Opens plain and gzip compressed data files alike.
+
+    :param mode: "r" for text, "rb" for bytes
+    """
+    if path.endswith(COMPRESSED_FILE_EXT):
+        return gzip.open(path, "rt" if mode == "r" else mode)
+    return open(path, mode)
+
+
+STREAM_CHUNK_ROWS: int = 8192
+"rows parsed at once by :func:`iter_columns`; bounds the parser's memory independent of the file's length"
+
+
+def iter_columns(path: str, names: Optional[List[str]] = None, chunk_rows: int = STREAM_CHUNK_ROWS) -> Iterator[Dict[str, "np.ndarray"]]:
+    """
+    Reads the named columns of a space separated data file (stream or FFT) as float arrays, chunk by chunk.
+
+    The first non-comment line is expected to be the header with the column names.
+    Comment lines (i.e. the trailing meta data line of streams) are skipped.
+
+    :param path: file to read
+    :param names: column names to read, i.e. ["freq_hz", "fft"]; all columns if None
+    :param chunk_rows: upper bound of the rows per chunk
+    :return: one array per requested column name and chunk; the chunks of a file without data rows are empty
+    """
+    with open_data_file(path, "r") as file:
+        header: List[str] = []
+        for line in file:
+            if line.strip() and not line.lstrip().startswith("#"):
+                header = line.split()
+                break
+        names = header if names is None else names
+        missing = [n for n in names if n not in header]
+        if missing:
+            raise ValueError(f"columns {missing} not found in {path}, header is {header}")
+        # imported on first use, so that the plugin does not load numpy on startup
+        import numpy as np
+
+        usecols = [header.index(n) for n in names]
+        yielded = False
+        while True:
+            raw_lines = list(itertools.islice(file, chunk_rows))
+            if not raw_lines:
+                break
+            lines = [line for line in raw_lines if line.strip() and not line.lstrip().startswith("#")]
+            if not lines:
+                continue
+            data = np.loadtxt(lines, ndmin=2, usecols=usecols, dtype=np.float64)
+            yielded = True
+            yield {name: data[:, idx] for idx, name in enumerate(names)}
+        if not yielded:
+            yield {name: np.empty(0, dtype=np.float64) for name in names}
+
+
+def load_columns(path: str, names: Optional[List[str]] = None) -> Dict[str, "np.ndarray"]:
+    """
+    Loads the named columns of a space separated data file as a whole, see :func:`iter_columns`.
+
+    :return: one array per requested column name
+    """
+    import numpy as np
+
+    chunks = list(iter_columns(path, names))
+    return {name: np.concatenate([c[name] for c in chunks]) for name in chunks[0].keys()}
+
+
+def load_fft(path: str) -> Dict[str, "np.ndarray"]:
+    """
+    :param path: FFT file as written by the data decomposition
+    :return: arrays "freq_hz" and "fft"
+    """
+    return load_columns(path, ["freq_hz", "fft"])
+
+
+def load_stream(path: str) -> Dict[str, "np.ndarray"]:
+    """
+    :param path: stream file as written by the recording
+    :return: arrays "seq", "sample", "x", "y" and "z"
+    """
+    return load_columns(path, ["seq", "sample", "x", "y", "z"])
+
+
+def load_stream_meta(path: str, tail_bytes: int = 4096) -> Dict[str, Any]:
+    """
+    Reads the meta data of a stream which is stored as JSON comment in the very last line, i.e. ``# {"rate": "ODR800", ...}``.
+    Only the file's tail is read, except for compressed files which have to be decompressed as a whole.
+
+    :param path: stream file as written by the recording
+    :param tail_bytes: how many bytes to read from the end of the file
+    :return: meta data; empty if the stream is incomplete and has no meta data line
+    """
+    with open_data_file(path, "rb") as file:
+        if path.endswith(COMPRESSED_FILE_EXT):
+            chunk, tail_raw = file.read(tail_bytes), b""
+            while chunk:
+                tail_raw = (tail_raw + chunk)[-tail_bytes:]
+                chunk = file.read(tail_bytes)
+        else:
+            file.seek(0, os.SEEK_END)
+            file.seek(max(0, file.tell() - tail_bytes))
+            tail_raw = file.read()
+        tail = tail_raw.decode("utf-8", errors="replace")
+    for line in reversed(tail.splitlines()):
+        line = line.strip()
+        if line.startswith("#"):
+            try:
+                return json.loads(line.lstrip("#").strip())
+            except json.JSONDecodeError:
+                return {}
+        if line:
+            return {}
+    return {}
+
+
+def output_data_rate_hz_from_str(rate: str) -> float:
+    """
+    :param rate: output data rate as stored in the stream meta data, i.e. "ODR800" or "ODR12_5"
+    :return: rate in Hz, i.e. 800.0 or 12.5
+    """
+    return float(rate.removeprefix("ODR").replace("_", "."))
@@ -1,69 +1,196 @@
+import os
+import shutil
 import threading
 import time
 import traceback
+from concurrent.futures import Future
 from logging import Logger
-from typing import Callable, Optional, Tuple
+from typing import TYPE_CHECKING, Callable, List, Optional, Set, Tuple
 
-from py3dpaxxel.data_decomposition.decompose_runner import DataDecomposeRunner
-from py3dpaxxel.sampling_tasks.exception_task_wrapper import ExceptionTaskWrapper
+from py3dpaxxel.storage.file_filter import File, FileSelector
 
+from octoprint_accelerometer.data_compression import DataCompressRunner
+from octoprint_accelerometer.data_io import DATA_FILE_PATTERN, data_file_stem
 from octoprint_accelerometer.event_types import DataProcessingEventType
+from octoprint_accelerometer.progress import ProgressTracker
+from octoprint_accelerometer.transfer_types import ProcessingProgress
+from octoprint_accelerometer.worker import PauseGate, Worker
 
+if TYPE_CHECKING:
+    from octoprint_accelerometer.feature_catalog import FeatureCatalog
 
-class DataPostProcessTask(Callable[[], None]):
+PROCESSING_WORKER_NICENESS: int = 10
+"data processing yields the CPU to the web server and the printer communication whenever they need it"
+
+DECOMPOSE_STAGING_DIR_NAME: str = ".decompose"
+"hidden subfolder of the data folder a stream is staged in for its FFT decomposition"
+
+
+class DataPostProcessTask(Callable[[], Tuple[DataProcessingEventType, Optional[int], Optional[int], Optional[int]]]):
     """
-    Wrapper that handles callbacks on task finished. Meant to be run by :class:`threading.Thread`.
+    Task run by a :class:`Worker`.
+
+    Runners are invoked one after the other, file counts are summed up.
+    The first runner not returning 0 terminates the task.
     """
 
     def __init__(self,
                  logger: Logger,
-                 runner: Callable,
-                 on_event_callback: Optional[Callable[[DataProcessingEventType.PROCESSING, int, int, int], None]]) -> None:
+                 runners: List[Tuple[str, Callable[[], Tuple[int, int, int, int]]]],
+                 pause_gate: Optional[PauseGate] = None,
+                 do_abort_flag: Optional[threading.Event] = None,
+                 progress: Optional[ProgressTracker] = None) -> None:
+        """
+        :param runners: processing step names and their runners
+        :param pause_gate: waited for before each runner, in addition to the runners waiting in between files
+        :param progress: tracks the steps; the runners report their files to the same tracker
+        """
         self.logger: Logger = logger
-        self.runner: Callable[[], Tuple[int, int, int, int]] = runner
-        self.on_event_callback: Optional[Callable[[DataProcessingEventType.PROCESSING, int, int, int], None]] = on_event_callback
+        self.runners: List[Tuple[str, Callable[[], Tuple[int, int, int, int]]]] = runners
+        self.pause_gate: Optional[PauseGate] = pause_gate
+        self.do_abort_flag: Optional[threading.Event] = do_abort_flag
+        self.progress: Optional[ProgressTracker] = progress
 
-    def __call__(self) -> None:
+    def __call__(self) -> Tuple[DataProcessingEventType, Optional[int], Optional[int], Optional[int]]:
+        """
+        :return: final event, total, processed and skipped file count (counts are None unless finished)
+        """
+        if self.progress is not None:
+            self.progress.start(len(self.runners))
         try:
-            ret, total, processed, skipped = self.runner()
+            ret, total, processed, skipped = 0, 0, 0, 0
+            for index, (step, runner) in enumerate(self.runners):
+                if self.pause_gate is not None:
+                    self.pause_gate.wait(self.do_abort_flag)
+                if self.do_abort_flag is not None and self.do_abort_flag.is_set():
+                    ret = -1
+                    break
+                if self.progress is not None:
+                    self.progress.begin_step(step, index)
+                ret, runner_total, runner_processed, runner_skipped = runner()
+                total, processed, skipped = total + runner_total, processed + runner_processed, skipped + runner_skipped
+                if 0 != ret:
+                    break
+
             if 0 == ret:
-                self._send_on_event_callback(DataProcessingEventType.PROCESSING_FINISHED, total, processed, skipped)
+                return DataProcessingEventType.PROCESSING_FINISHED, total, processed, skipped
             elif -1 == ret:
-                self._send_on_event_callback(DataProcessingEventType.ABORTED)
+                return DataProcessingEventType.ABORTED, None, None, None
             else:
-                self._send_on_event_callback(DataProcessingEventType.UNHANDLED_EXCEPTION)
+                return DataProcessingEventType.UNHANDLED_EXCEPTION, None, None, None
 
         except Exception as e:
             self.logger.error("unknown post processing error")
             self.logger.error(str(e))
             traceback.print_exception(e)
-            self._send_on_event_callback(DataProcessingEventType.UNHANDLED_EXCEPTION)
-
-    def _send_on_event_callback(self, event: DataProcessingEventType, total: Optional[int] = None, processed: Optional[int] = None, skipped: Optional[int] = None):
-        if self.on_event_callback:
-            self.on_event_callback(event, total, processed, skipped)
+            return DataProcessingEventType.UNHANDLED_EXCEPTION, None, None, None
+        finally:
+            if self.progress is not None:
+                self.progress.finish()
 
 
-class DataPostProcessBackgroundTask:
+class StreamDecomposeRunner:
     """
-    Task wrapper to catch exceptions when a task is run by :class:`threading.Thread` so that exceptions can be exposed to the parent thread.
+    Runs py3dpaxxel's FFT decomposition stream by stream, so that it can be paused and aborted in between streams.
+
+    py3dpaxxel decomposes all streams of a folder, thus each stream without FFT is staged alone in a hidden subfolder
+    of the output folder and decomposed from there. Streams with FFT are determined once from one listing of each kind.
     """
 
-    def __init__(self, logger: Logger, task: DataPostProcessTask) -> None:
+    def __init__(self,
+                 logger: Logger,
+                 input_dir: str,
+                 input_file_prefix: str,
+                 algorithm_d1: str,
+                 output_dir: str,
+                 output_file_prefix: str,
+                 do_abort_flag: threading.Event,
+                 pause_gate: Optional[PauseGate] = None,
+                 progress: Optional[ProgressTracker] = None):
         self.logger: Logger = logger
-        self.task: DataPostProcessTask = task
-        self.exception_wrapper: ExceptionTaskWrapper = ExceptionTaskWrapper(target=task)
-        self.thread: threading.Thread = threading.Thread(name="fft_decomposition", target=self.exception_wrapper)
-        self.thread.daemon = True
+        self.input_dir: str = input_dir
+        self.input_file_prefix: str = input_file_prefix
+        self.algorithm_d1: str = algorithm_d1
+        self.output_dir: str = output_dir
+        self.output_file_prefix: str = output_file_prefix
+        self.do_abort_flag: threading.Event = do_abort_flag
+        self.pause_gate: Optional[PauseGate] = pause_gate
+        self.progress: Optional[ProgressTracker] = progress
+
+    def _decomposed_stems(self) -> Set[str]:
+        """
+        :return: stems of all streams with FFT, without the stream file prefix
+        """
+        ffts = FileSelector(os.path.join(self.output_dir, f"{self.output_file_prefix}-.*{DATA_FILE_PATTERN}")).filter()
+        return {data_file_stem(f.filename_ext)[len(self.output_file_prefix) + 1:].rsplit("-", 1)[0] for f in ffts}
 
-    def is_alive(self):
-        return self.thread.is_alive()
+    def _fft_path(self, stream_stem: str) -> str:
+        """
+        :return: path of the x axis FFT the decomposition writes for a stream, it is present for every decomposed stream
+        """
+        return os.path.join(self.output_dir, f"{self.output_file_prefix}-{stream_stem[len(self.input_file_prefix) + 1:]}-x.tsv")
 
-    def start(self) -> None:
-        self.thread.start()
+    @staticmethod
+    def _stage(source_path: str, staged_path: str) -> None:
+        try:
+            os.link(source_path, staged_path)
+        except OSError:
+            # file systems without hard links
+            shutil.copy2(source_path, staged_path)
 
-    def join(self) -> None:
-        self.thread.join()
+    def _decompose(self, staging_dir: str, stream: File) -> int:
+        from py3dpaxxel.data_decomposition.decompose_runner import DataDecomposeRunner
+
+        staged_path = os.path.join(staging_dir, stream.filename_ext)
+        self._stage(stream.full_path, staged_path)
+        try:
+            ret, _total, _processed, _skipped = DataDecomposeRunner(
+                command="algo",
+                input_dir=staging_dir,
+                input_file_prefix=self.input_file_prefix,
+                algorithm_d1=self.algorithm_d1,
+                output_dir=self.output_dir,
+                output_file_prefix=self.output_file_prefix,
+                output_overwrite=False)()
+        finally:
+            os.remove(staged_path)
+        return ret
+
+    def __call__(self) -> Tuple[int, int, int, int]:
+        """
+        :return: tuple of return code (0 on success, -1 if aborted), total, processed and skipped stream count
+        """
+        # compressed streams are compressed after their FFTs are computed
+        streams = FileSelector(os.path.join(self.input_dir, f"{self.input_file_prefix}-.*\\.tsv$")).filter()
+        if self.progress is not None:
+            self.progress.set_files_total(len(streams))
+        decomposed_stems = self._decomposed_stems()
+        staging_dir = os.path.join(self.output_dir, DECOMPOSE_STAGING_DIR_NAME)
+        processed, skipped = 0, 0
+
+        for stream in streams:
+            if self.pause_gate is not None:
+                self.pause_gate.wait(self.do_abort_flag)
+            if self.do_abort_flag.is_set():
+                return -1, len(streams), processed, skipped
+            if self.progress is not None:
+                self.progress.advance(stream.filename_ext, os.path.join(self.input_dir, stream.filename_ext))
+
+            stem = data_file_stem(stream.filename_ext)
+            if stem[len(self.input_file_prefix) + 1:] in decomposed_stems:
+                skipped += 1
+                continue
+
+            os.makedirs(staging_dir, exist_ok=True)
+            ret = self._decompose(staging_dir, stream)
+            if 0 != ret:
+                return ret, len(streams), processed, skipped
+            if os.path.exists(self._fft_path(stem)):
+                processed += 1
+            else:
+                self.logger.warning(f"decomposition wrote no FFT for {stream.filename_ext}")
+
+        return 0, len(streams), processed, skipped
 
 
 class DataPostProcessRunner:
@@ -80,7 +207,21 @@ class DataPostProcessRunner:
                  output_file_prefix: str,
                  output_overwrite: bool,
                  do_dry_run: bool,
-                 do_abort_flag: threading.Event = threading.Event()):
+                 summary_output_file_prefix: str,
+                 spectrogram_output_file_prefix: str,
+                 spectrogram_window_size: int,
+                 spectrogram_hop_size: int,
+                 fft_variants_output_file_prefix: str,
+                 fft_algorithms: List[str],
+                 feature_catalog: Optional["FeatureCatalog"],
+                 compression_enabled: bool,
+                 compression_level: int,
+                 do_abort_flag: Optional[threading.Event] = None,
+                 on_progress_callback: Optional[Callable[[ProcessingProgress], None]] = None):
+        """
+        :param fft_algorithms: windows the FFT variants are computed for, see :data:`FFT_WINDOWS`; none if empty
+        :param on_progress_callback: invoked from the processing thread with the progress, a few times per second at most
+        """
         self.logger: Logger = logger
         self.on_event_callback: Optional[Callable[[DataProcessingEventType], None]] = on_event_callback
         self._input_dir: str = input_dir
@@ -90,8 +231,19 @@ class DataPostProcessRunner:
         self._output_file_prefix: str = output_file_prefix
         self._output_overwrite: bool = output_overwrite
         self._do_dry_run: bool = do_dry_run
-        self._do_abort_flag: threading.Event = do_abort_flag
-        self._background_task: Optional[DataPostProcessBackgroundTask] = None
+        self._summary_output_file_prefix: str = summary_output_file_prefix
+        self._spectrogram_output_file_prefix: str = spectrogram_output_file_prefix
+        self._spectrogram_window_size: int = spectrogram_window_size
+        self._spectrogram_hop_size: int = spectrogram_hop_size
+        self._fft_variants_output_file_prefix: str = fft_variants_output_file_prefix
+        self._fft_algorithms: List[str] = fft_algorithms
+        self._feature_catalog: Optional["FeatureCatalog"] = feature_catalog
+        self._compression_enabled: bool = compression_enabled
+        self._compression_level: int = compression_level
+        self._do_abort_flag: threading.Event = do_abort_flag if do_abort_flag is not None else threading.Event()
+        self._pause_gate: PauseGate = PauseGate()
+        self._progress: ProgressTracker = ProgressTracker(on_progress=on_progress_callback)
+        self._worker: Worker = Worker(logger=logger, name="fft_decomposition", abort_flag=self._do_abort_flag, niceness=PROCESSING_WORKER_NICENESS)
         self._background_task_start_timestamp: Optional[float] = None
         self._background_task_stop_timestamp: Optional[float] = None
         self._files_total: Optional[int] = None
@@ -154,96 +306,212 @@ class DataPostProcessRunner:
     def do_dry_run(self, do_dry_run: bool):
         self._do_dry_run = do_dry_run
 
+    @property
+    def summary_output_file_prefix(self) -> str:
+        return self._summary_output_file_prefix
+
+    @summary_output_file_prefix.setter
+    def summary_output_file_prefix(self, summary_output_file_prefix: str):
+        self._summary_output_file_prefix = summary_output_file_prefix
+
+    @property
+    def spectrogram_output_file_prefix(self) -> str:
+        return self._spectrogram_output_file_prefix
+
+    @spectrogram_output_file_prefix.setter
+    def spectrogram_output_file_prefix(self, spectrogram_output_file_prefix: str):
+        self._spectrogram_output_file_prefix = spectrogram_output_file_prefix
+
+    @property
+    def spectrogram_window_size(self) -> int:
+        return self._spectrogram_window_size
+
+    @spectrogram_window_size.setter
+    def spectrogram_window_size(self, spectrogram_window_size: int):
+        self._spectrogram_window_size = spectrogram_window_size
+
+    @property
+    def spectrogram_hop_size(self) -> int:
+        return self._spectrogram_hop_size
+
+    @spectrogram_hop_size.setter
+    def spectrogram_hop_size(self, spectrogram_hop_size: int):
+        self._spectrogram_hop_size = spectrogram_hop_size
+
+    @property
+    def fft_variants_output_file_prefix(self) -> str:
+        return self._fft_variants_output_file_prefix
+
+    @fft_variants_output_file_prefix.setter
+    def fft_variants_output_file_prefix(self, fft_variants_output_file_prefix: str):
+        self._fft_variants_output_file_prefix = fft_variants_output_file_prefix
+
+    @property
+    def fft_algorithms(self) -> List[str]:
+        return self._fft_algorithms
+
+    @fft_algorithms.setter
+    def fft_algorithms(self, fft_algorithms: List[str]):
+        self._fft_algorithms = fft_algorithms
+
+    @property
+    def feature_catalog(self) -> Optional["FeatureCatalog"]:
+        return self._feature_catalog
+
+    @feature_catalog.setter
+    def feature_catalog(self, feature_catalog: Optional["FeatureCatalog"]):
+        self._feature_catalog = feature_catalog
+
+    @property
+    def compression_enabled(self) -> bool:
+        return self._compression_enabled
+
+    @compression_enabled.setter
+    def compression_enabled(self, compression_enabled: bool):
+        self._compression_enabled = compression_enabled
+
+    @property
+    def compression_level(self) -> int:
+        return self._compression_level
+
+    @compression_level.setter
+    def compression_level(self, compression_level: int):
+        self._compression_level = compression_level
+
     def is_running(self) -> bool:
-        return True if self._background_task is not None and self._background_task.is_alive() else False
+        return self._worker.is_busy()
+
+    def pause(self) -> None:
+        """
+        Suspends processing before the next file; a running FFT decomposition completes its stream first.
+        """
+        self._pause_gate.pause()
+
+    def resume(self) -> None:
+        self._pause_gate.resume()
+
+    def is_paused(self) -> bool:
+        return self._pause_gate.is_paused()
 
     def _send_on_event_callback(self, event: DataProcessingEventType):
         if self.on_event_callback:
             self.on_event_callback(event)
 
-    def _send_on_thread_event_callback(self,
-                                       event: DataProcessingEventType,
-                                       total: Optional[int] = None,
-                                       processed: Optional[int] = None,
-                                       skipped: Optional[int] = None):
+    def _on_task_done(self, future: Future) -> None:
+        """
+        Invoked by the worker thread once the task returned; the worker is not running anymore at this point.
+        """
+        self._background_task_stop_timestamp = time.time()
+        try:
+            event, total, processed, skipped = future.result()
+        except Exception as _e:
+            event, total, processed, skipped = DataProcessingEventType.UNHANDLED_EXCEPTION, None, None, None
 
         self._files_total = total
         self._files_processed = processed
         self._files_skipped = skipped
-
-        if event == DataProcessingEventType.PROCESSING_FINISHED:
-            self._thread_stop_timestamp = time.time()
-
-        if self.on_event_callback:
-            self.on_event_callback(event)
-
-        # TODO: force an early thread termination not by just terminating run().
-        #  Reason: Thread.is_alive() takes up to 30 seconds after run() terminated
-        #  to report not-alive. This works but sounds like a bug though.
-        if event in [DataProcessingEventType.PROCESSING_FINISHED,
-                     DataProcessingEventType.UNHANDLED_EXCEPTION,
-                     DataProcessingEventType.ABORTED]:
-            self.logger.info("data post processing thread terminated")
-            raise SystemExit()
+        self.logger.info(f"data post processing done: {event.name}")
+        self._send_on_event_callback(event)
 
     def stop(self) -> None:
-        self._do_abort_flag.set()
+        """
+        Requests the task to abort and returns immediately; ABORTED is sent once the task returned.
+        """
         self._send_on_event_callback(DataProcessingEventType.ABORTING)
-        if self._background_task:
-            try:
-                self._background_task.join()
-            except RuntimeError as _e:
-                self.logger.info("no running thread that can be stopped")
-            self._background_task = None
-        self._background_task_stop_timestamp = time.time()
-        self._send_on_event_callback(DataProcessingEventType.ABORTED)
+        if not self._worker.abort():
+            self.logger.info("no running task that can be stopped")
+            self._send_on_event_callback(DataProcessingEventType.ABORTED)
 
     def get_last_run_duration_s(self) -> Optional[float]:
         """
-        Returns the last known duration.
-
-        Note: Whenever this method is called, make sure to assert that the thread is not running.
-
-        This is-running check is skipped here on purpose.
-        Normally the child thread is the caller itself.
-        The call propagated indirectly through the plugin's callback that most likely called this method again.
-        In that case the thread is always running.
-
-        :return: the last known duration; None if unknown of thread is still running
+        :return: the last known duration; None if unknown or still running
         """
-        return None if not self._thread_stop_timestamp or not self._background_task_start_timestamp else self._thread_stop_timestamp - self._background_task_start_timestamp
+        return None if not self._background_task_stop_timestamp or not self._background_task_start_timestamp else self._background_task_stop_timestamp - self._background_task_start_timestamp
 
     def get_last_processed_count(self) -> Tuple[Optional[int], Optional[int], Optional[int]]:
         return self._files_total, self._files_processed, self._files_skipped
 
+    def get_progress(self) -> ProcessingProgress:
+        """
+        :return: progress of the running processing; of the last one if not running
+        """
+        return self._progress.snapshot()
+
     def run(self) -> None:
-        self._do_abort_flag.clear()
         self._background_task_stop_timestamp = None
         self._files_total = None
         self._files_processed = None
         self._files_skipped = None
 
         try:
+            # the processing steps pull in numpy and the decomposition libraries, they are imported with the first run
+            from octoprint_accelerometer.feature_catalog import FeatureCatalogUpdateRunner
+            from octoprint_accelerometer.stream_spectra import StreamSpectraRunner
+            from octoprint_accelerometer.stream_summary import StreamSummaryRunner
+
             self.logger.info("start data processing ...")
-            self._background_task = DataPostProcessBackgroundTask(
-                logger=self.logger,
-                task=DataPostProcessTask(
+            runners: List[Tuple[str, Callable[[], Tuple[int, int, int, int]]]] = [
+                ("summaries", StreamSummaryRunner(
                     logger=self.logger,
-                    runner=DataDecomposeRunner(
-                        command="algo",
-                        input_dir=self.input_dir,
-                        input_file_prefix=self.input_file_prefix,
-                        algorithm_d1=self.algorithm_d1,
-                        output_dir=self.output_dir,
-                        output_file_prefix=self.output_file_prefix,
-                        output_overwrite=False),
-                    on_event_callback=self._send_on_thread_event_callback))
+                    input_dir=self.input_dir,
+                    input_file_prefix=self.input_file_prefix,
+                    output_dir=self.output_dir,
+                    output_file_prefix=self.summary_output_file_prefix,
+                    do_abort_flag=self._do_abort_flag,
+                    pause_gate=self._pause_gate,
+                    progress=self._progress)),
+                ("ffts", StreamDecomposeRunner(
+                    logger=self.logger,
+                    input_dir=self.input_dir,
+                    input_file_prefix=self.input_file_prefix,
+                    algorithm_d1=self.algorithm_d1,
+                    output_dir=self.output_dir,
+                    output_file_prefix=self.output_file_prefix,
+                    do_abort_flag=self._do_abort_flag,
+                    pause_gate=self._pause_gate,
+                    progress=self._progress)),
+                ("spectra", StreamSpectraRunner(
+                    logger=self.logger,
+                    input_dir=self.input_dir,
+                    input_file_prefix=self.input_file_prefix,
+                    output_dir=self.output_dir,
+                    spectrogram_output_file_prefix=self.spectrogram_output_file_prefix,
+                    window_size=self.spectrogram_window_size,
+                    hop_size=self.spectrogram_hop_size,
+                    fft_variants_output_file_prefix=self.fft_variants_output_file_prefix,
+                    algorithms=self.fft_algorithms,
+                    do_abort_flag=self._do_abort_flag,
+                    pause_gate=self._pause_gate,
+                    progress=self._progress))]
+            if self.feature_catalog is not None:
+                runners.append(("feature catalog", FeatureCatalogUpdateRunner(
+                    logger=self.logger,
+                    catalog=self.feature_catalog,
+                    input_dir=self.output_dir,
+                    stream_file_prefix=self.input_file_prefix,
+                    fft_file_prefix=self.output_file_prefix,
+                    do_abort_flag=self._do_abort_flag,
+                    pause_gate=self._pause_gate,
+                    progress=self._progress)))
+            if self.compression_enabled:
+                # must be last: all other runners read the streams and FFTs before they are compressed
+                runners.append(("compression", DataCompressRunner(
+                    logger=self.logger,
+                    input_dir=self.output_dir,
+                    stream_file_prefix=self.input_file_prefix,
+                    fft_file_prefix=self.output_file_prefix,
+                    compression_level=self.compression_level,
+                    do_abort_flag=self._do_abort_flag,
+                    pause_gate=self._pause_gate,
+                    progress=self._progress)))
+
+            task = DataPostProcessTask(logger=self.logger, runners=runners, pause_gate=self._pause_gate, do_abort_flag=self._do_abort_flag, progress=self._progress)
 
             self._send_on_event_callback(DataProcessingEventType.PROCESSING)
             self._background_task_start_timestamp = time.time()
-            self._background_task.start()
+            self._worker.submit(task).add_done_callback(self._on_task_done)
 
         except Exception as e:
-            self.logger.error("railed to start data processing thread")
+            self.logger.error("railed to start data processing task")
             self.logger.error(str(e))
             self._send_on_event_callback(DataProcessingEventType.UNHANDLED_EXCEPTION)
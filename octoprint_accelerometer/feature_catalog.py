@@ -0,0 +1,220 @@
+import datetime
+import json
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from dataclasses import dataclass
+from logging import Logger
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from py3dpaxxel.storage.file_filter import FileSelector
+from py3dpaxxel.storage.filename_meta import FilenameMetaFft
+
+from octoprint_accelerometer.data_io import DATA_FILE_PATTERN, data_file_stem, load_fft, load_stream_meta, output_data_rate_hz_from_str, resolve_data_file, uncompressed_name
+from octoprint_accelerometer.progress import ProgressTracker
+from octoprint_accelerometer.transfer_types import FeatureTrends
+from octoprint_accelerometer.worker import PauseGate
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_SCHEMA: List[str] = [
+    """CREATE TABLE IF NOT EXISTS streams (
+        stream_file TEXT PRIMARY KEY,
+        run_hash TEXT NOT NULL,
+        recorded_ts REAL NOT NULL,
+        sequence_nr INTEGER NOT NULL,
+        sequence_axis TEXT NOT NULL,
+        sequence_frequency_hz INTEGER NOT NULL,
+        sequence_zeta_em2 INTEGER NOT NULL,
+        output_data_rate_hz REAL,
+        meta TEXT)""",
+    """CREATE TABLE IF NOT EXISTS features (
+        stream_file TEXT NOT NULL REFERENCES streams(stream_file) ON DELETE CASCADE,
+        axis TEXT NOT NULL,
+        peak_frequency_hz REAL,
+        peak_amplitude REAL,
+        damping_ratio REAL,
+        PRIMARY KEY (stream_file, axis))""",
+    "CREATE INDEX IF NOT EXISTS streams_recorded_ts ON streams(recorded_ts)",
+    "CREATE INDEX IF NOT EXISTS streams_run_hash ON streams(run_hash)",
+    "CREATE INDEX IF NOT EXISTS features_axis ON features(axis, stream_file)",
+]
+
+
+@dataclass
+class PeakFeatures:
+    peak_frequency_hz: Optional[float] = None
+    peak_amplitude: Optional[float] = None
+    damping_ratio: Optional[float] = None
+    "estimated by the half-power bandwidth: ζ ≈ (f2 - f1) / (2 f_peak); None if a flank leaves the spectrum"
+
+
+def extract_peak_features(frequency_hz: "np.ndarray", amplitude: "np.ndarray", min_frequency_hz: float = 1.0) -> PeakFeatures:
+    """
+    Finds the dominant resonance of a spectrum.
+
+    :param frequency_hz: ascending bin frequencies
+    :param amplitude: amplitude per bin
+    :param min_frequency_hz: bins below are ignored, so that the DC component is not reported as peak
+    :return: peak frequency, amplitude and damping ratio
+    """
+    # imported on first use, the catalog itself is opened on startup
+    import numpy as np
+
+    candidates = np.nonzero(frequency_hz >= min_frequency_hz)[0]
+    if len(candidates) == 0:
+        return PeakFeatures()
+
+    peak = int(candidates[np.argmax(amplitude[candidates])])
+    peak_frequency_hz, peak_amplitude = float(frequency_hz[peak]), float(amplitude[peak])
+    half_power = peak_amplitude / np.sqrt(2.0)
+
+    def crossing(indices: np.ndarray) -> Optional[float]:
+        """
+        :param indices: bins walking outwards from the peak
+        :return: interpolated frequency where the amplitude first drops below half power; None if it never does
+        """
+        below = np.nonzero(amplitude[indices] < half_power)[0]
+        if len(below) == 0:
+            return None
+        outer = int(indices[below[0]])
+        inner = int(indices[below[0] - 1]) if below[0] > 0 else peak
+        ratio = (amplitude[inner] - half_power) / (amplitude[inner] - amplitude[outer])
+        return float(frequency_hz[inner] + ratio * (frequency_hz[outer] - frequency_hz[inner]))
+
+    f1 = crossing(np.arange(peak - 1, candidates[0] - 1, -1))
+    f2 = crossing(np.arange(peak + 1, len(frequency_hz)))
+    damping_ratio = (f2 - f1) / (2.0 * peak_frequency_hz) if f1 is not None and f2 is not None and peak_frequency_hz > 0 else None
+    return PeakFeatures(peak_frequency_hz, peak_amplitude, damping_ratio)
+
+
+class FeatureCatalog:
+    """
+    Embedded SQLite catalog of per-stream features (dominant resonance per FFT axis plus recording parameters).
+
+    The catalog outlives the stream files it was populated from, so that trends stay available after old data was removed.
+    Each call opens its own connection, thus the catalog can be written by the post-processing thread while being queried by the API.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path: str = db_path
+        with closing(self._connect()) as connection, connection:
+            for statement in _SCHEMA:
+                connection.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=10.0)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        return connection
+
+    def cataloged_streams(self) -> Set[str]:
+        with closing(self._connect()) as connection:
+            return {row[0] for row in connection.execute("SELECT stream_file FROM streams")}
+
+    def insert(self, stream_file: str, fft_meta: FilenameMetaFft, output_data_rate_hz: Optional[float], meta: Dict, features: Dict[str, PeakFeatures]) -> None:
+        """
+        :param stream_file: stream file name, i.e. "axxel-30f9c95c-20231127-235625233-s000-ax-f010-z015.tsv"
+        :param fft_meta: file name meta data of any of the stream's FFT files
+        :param output_data_rate_hz: rate as recorded in the stream's meta data; None if unknown
+        :param meta: the stream's meta data as is
+        :param features: per FFT axis
+        """
+        recorded_ts = datetime.datetime(fft_meta.year, fft_meta.month, fft_meta.day,
+                                        fft_meta.hour, fft_meta.minute, fft_meta.second, fft_meta.milli_second * 1000).timestamp()
+        with closing(self._connect()) as connection, connection:
+            connection.execute("INSERT OR REPLACE INTO streams VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               (stream_file, fft_meta.run_hash, recorded_ts, fft_meta.sequence_nr, fft_meta.sequence_axis,
+                                fft_meta.sequence_frequency_hz, fft_meta.sequence_zeta_em2, output_data_rate_hz, json.dumps(meta)))
+            connection.executemany("INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?, ?)",
+                                   [(stream_file, axis, f.peak_frequency_hz, f.peak_amplitude, f.damping_ratio) for axis, f in features.items()])
+
+    def query_trends(self, axis: str, since_ts: Optional[float] = None, until_ts: Optional[float] = None, run_hash: Optional[str] = None) -> FeatureTrends:
+        """
+        :param axis: FFT axis the features were extracted from
+        :param since_ts: earliest recording time (seconds since epoch); unbound if None
+        :param until_ts: latest recording time (seconds since epoch); unbound if None
+        :param run_hash: restrict to one run; all runs if None
+        :return: columnar time series ordered by recording time
+        """
+        where, parameters = ["f.axis = ?"], [axis]
+        for clause, value in [("s.recorded_ts >= ?", since_ts), ("s.recorded_ts <= ?", until_ts), ("s.run_hash = ?", run_hash)]:
+            if value is not None:
+                where.append(clause)
+                parameters.append(value)
+
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT s.recorded_ts, s.run_hash, s.stream_file, s.sequence_axis, s.sequence_frequency_hz, s.sequence_zeta_em2, s.output_data_rate_hz,"
+                " f.peak_frequency_hz, f.peak_amplitude, f.damping_ratio"
+                " FROM streams s JOIN features f ON f.stream_file = s.stream_file"
+                f" WHERE {' AND '.join(where)} ORDER BY s.recorded_ts", parameters).fetchall()
+
+        columns = list(zip(*rows)) if rows else [[] for _ in range(10)]
+        return FeatureTrends(*[list(c) for c in columns])
+
+
+class FeatureCatalogUpdateRunner:
+    """
+    Adds the features of all streams to the catalog whose FFTs are complete but which are not cataloged yet.
+    Meant to be run after the FFT decomposition within the same post-processing task.
+    """
+
+    def __init__(self,
+                 logger: Logger,
+                 catalog: FeatureCatalog,
+                 input_dir: str,
+                 stream_file_prefix: str,
+                 fft_file_prefix: str,
+                 do_abort_flag: threading.Event,
+                 pause_gate: Optional[PauseGate] = None,
+                 progress: Optional[ProgressTracker] = None):
+        self.logger: Logger = logger
+        self.catalog: FeatureCatalog = catalog
+        self.input_dir: str = input_dir
+        self.stream_file_prefix: str = stream_file_prefix
+        self.fft_file_prefix: str = fft_file_prefix
+        self.do_abort_flag: threading.Event = do_abort_flag
+        self.pause_gate: Optional[PauseGate] = pause_gate
+        self.progress: Optional[ProgressTracker] = progress
+
+    def __call__(self) -> Tuple[int, int, int, int]:
+        """
+        :return: tuple of return code (0 on success, -1 if aborted), total, processed and skipped stream count
+        """
+        ffts_by_stream: Dict[str, Dict[str, Tuple[str, FilenameMetaFft]]] = {}
+        for f in FileSelector(os.path.join(self.input_dir, f"{self.fft_file_prefix}-.*{DATA_FILE_PATTERN}")).filter():
+            meta = FilenameMetaFft().from_filename(uncompressed_name(f.filename_ext))
+            stem = data_file_stem(f.filename_ext).removeprefix(f"{self.fft_file_prefix}-").removesuffix(f"-{meta.fft_axis}")
+            stream_file = f"{self.stream_file_prefix}-{stem}.tsv"
+            ffts_by_stream.setdefault(stream_file, {})[meta.fft_axis] = (f.filename_ext, meta)
+
+        cataloged = self.catalog.cataloged_streams()
+        if self.progress is not None:
+            self.progress.set_files_total(len(ffts_by_stream))
+        processed, skipped = 0, 0
+        for stream_file, ffts in ffts_by_stream.items():
+            if self.pause_gate is not None:
+                self.pause_gate.wait(self.do_abort_flag)
+            if self.do_abort_flag.is_set():
+                return -1, len(ffts_by_stream), processed, skipped
+            if self.progress is not None:
+                self.progress.advance(stream_file)
+            if stream_file in cataloged or len(ffts) < 3:
+                skipped += 1
+                continue
+
+            stream_path = resolve_data_file(os.path.join(self.input_dir, stream_file))
+            stream_meta = load_stream_meta(stream_path) if os.path.isfile(stream_path) else {}
+            output_data_rate_hz = output_data_rate_hz_from_str(stream_meta["rate"]) if "rate" in stream_meta else None
+            features: Dict[str, PeakFeatures] = {}
+            for axis, (fft_file, _meta) in ffts.items():
+                columns = load_fft(os.path.join(self.input_dir, fft_file))
+                features[axis] = extract_peak_features(columns["freq_hz"], columns["fft"])
+            self.catalog.insert(stream_file, next(iter(ffts.values()))[1], output_data_rate_hz, stream_meta, features)
+            processed += 1
+
+        self.logger.debug(f"feature catalog: {processed} streams added, {skipped} skipped")
+        return 0, len(ffts_by_stream), processed, skipped
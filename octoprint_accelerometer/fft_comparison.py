@@ -0,0 +1,60 @@
+import functools
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from octoprint_accelerometer.data_io import FileVersion, file_version, load_fft
+
+
+@dataclass
+class FftComparison:
+    frequency_hz: List[float] = field(default_factory=lambda: ([]))
+    series: Dict[str, List[Optional[float]]] = field(default_factory=lambda: ({}))
+    "amplitudes per series on the frequency_hz grid; None where a series has no data"
+
+
+MIN_FFT_COMPARISON_RESOLUTION_HZ: float = 0.01
+
+
+def compare_spectra(series: Dict[str, List[str]], frequency_resolution_hz: Optional[float] = None) -> FftComparison:
+    """
+    Resamples the spectra of several FFT files onto one shared frequency grid.
+
+    Runs recorded with different output data rate or recording timespan have different frequency bins.
+    The shared grid starts at 0 Hz, ends at the lowest maximum frequency among all files and uses the coarsest bin width
+    (or the requested resolution), so no series is extrapolated.
+
+    :param series: maps series name to absolute paths of FFT files; multiple files per series are averaged
+    :param frequency_resolution_hz: grid step; coarsest bin width of all files if None
+    :return: columnar result, frequency grid plus one amplitude column per series
+    """
+    key = tuple((name, tuple(file_version(p) for p in sorted(paths))) for name, paths in sorted(series.items()))
+    frequency_hz, amplitudes = _compare_spectra_cached(key, frequency_resolution_hz)
+    return FftComparison(frequency_hz.tolist(),
+                         {name: [None if np.isnan(v) else v for v in values.tolist()] for name, values in amplitudes.items()})
+
+
+@functools.lru_cache(maxsize=32)
+def _load_fft_cached(version: FileVersion) -> Tuple[np.ndarray, np.ndarray]:
+    columns = load_fft(version[0])
+    return columns["freq_hz"], columns["fft"]
+
+
+@functools.lru_cache(maxsize=16)
+def _compare_spectra_cached(key: Tuple[Tuple[str, Tuple[FileVersion, ...]], ...],
+                            frequency_resolution_hz: Optional[float]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    spectra: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {name: [_load_fft_cached(v) for v in versions] for name, versions in key}
+    all_spectra = [s for spectra_of_series in spectra.values() for s in spectra_of_series if len(s[0]) > 1]
+    if len(all_spectra) == 0:
+        return np.empty(0), {name: np.empty(0) for name in spectra.keys()}
+
+    f_max = min(f[-1] for f, _ in all_spectra)
+    step = frequency_resolution_hz if frequency_resolution_hz else max(float(np.max(np.diff(f))) for f, _ in all_spectra)
+    grid = np.arange(0.0, f_max + step * 0.5, step)
+
+    amplitudes: Dict[str, np.ndarray] = {}
+    for name, spectra_of_series in spectra.items():
+        resampled = [np.interp(grid, f, a) for f, a in spectra_of_series if len(f) > 1]
+        amplitudes[name] = np.mean(np.vstack(resampled), axis=0) if resampled else np.full(grid.shape, np.nan)
+    return grid, amplitudes
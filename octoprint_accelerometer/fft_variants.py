@@ -0,0 +1,215 @@
+import functools
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from octoprint_accelerometer.data_io import FileVersion, data_file_stem, file_version, iter_columns
+from octoprint_accelerometer.stream_quality import UniformWindowSlicer, resample_uniform
+
+
+def _flattop(size: int) -> np.ndarray:
+    """
+    Flat-top window (coefficients as in scipy.signal.windows.flattop): wide main lobe but amplitude errors below 0.1%.
+    """
+    n = np.arange(size)
+    coefficients = [0.21557895, 0.41663158, 0.277263158, 0.083578947, 0.006947368]
+    return np.sum([(-1) ** k * a * np.cos(2.0 * np.pi * k * n / max(1, size - 1)) for k, a in enumerate(coefficients)], axis=0)
+
+
+FFT_WINDOWS: Dict[str, Callable[[int], np.ndarray]] = {
+    "blackman": np.blackman,
+    "hann": np.hanning,
+    "flattop": _flattop,
+    "dft": np.ones,
+}
+"window per decomposition algorithm, keyed by :data:`octoprint_accelerometer.data_io.FFT_ALGORITHMS`; dft is the plain transform without window (rectangular)"
+
+FFT_VARIANT_AXES: List[str] = ["x", "y", "z"]
+
+FFT_MAX_SAMPLES_IN_MEMORY: int = 65536
+"streams up to that many samples are transformed as a whole, longer ones are averaged over segments while being read"
+
+FFT_SEGMENT_SIZE: int = 16384
+"samples per segment of long streams; consecutive segments overlap by half"
+
+
+@dataclass
+class FftVariants:
+    frequency_hz: np.ndarray
+    "bin frequencies, shape (bins,)"
+    amplitudes: Dict[str, Dict[str, np.ndarray]] = field(default_factory=lambda: ({}))
+    "algorithm -> axis -> single sided amplitude spectrum, shape (bins,)"
+    segments_count: int = 1
+    "count of segments the spectra were averaged over; 1 if the stream was transformed as a whole"
+
+
+@dataclass
+class FftVariantsResult:
+    frequency_hz: List[float] = field(default_factory=lambda: ([]))
+    amplitudes: Dict[str, Dict[str, List[float]]] = field(default_factory=lambda: ({}))
+    "algorithm -> axis -> amplitudes on the frequency_hz grid"
+    segments_count: int = 1
+
+
+def compute_fft_variants(columns: Dict[str, np.ndarray], sample_rate_hz: float, algorithms: List[str]) -> FftVariants:
+    """
+    Amplitude spectra of all axes for several windows, computed from the same samples.
+    Each algorithm takes one transform of all axes at once.
+
+    :param columns: uniformly sampled acceleration per axis, see :func:`resample_uniform`
+    :param sample_rate_hz: output data rate the samples were recorded at
+    :param algorithms: keys of :data:`FFT_WINDOWS`
+    :return: spectra scaled by the window's coherent gain, so that amplitudes of different windows are comparable
+    """
+    samples = np.vstack([columns[axis] for axis in FFT_VARIANT_AXES])
+    samples = samples - np.mean(samples, axis=1, keepdims=True)
+    variants = FftVariants(np.fft.rfftfreq(samples.shape[1], d=1.0 / sample_rate_hz).astype(np.float32))
+    for algorithm in algorithms:
+        window = FFT_WINDOWS[algorithm](samples.shape[1])
+        magnitude = np.abs(np.fft.rfft(samples * window, axis=1)) * (2.0 / np.sum(window))
+        variants.amplitudes[algorithm] = {axis: magnitude[idx].astype(np.float32) for idx, axis in enumerate(FFT_VARIANT_AXES)}
+    return variants
+
+
+class SegmentAverager:
+    """
+    Welch's method: averages the power spectra of half overlapping segments, fed chunk by chunk.
+    Only the samples of one segment are kept in between chunks, so memory does not grow with the stream's length.
+    """
+
+    def __init__(self, segment_size: int, algorithms: List[str]):
+        self.segment_size: int = segment_size
+        self.windows: Dict[str, np.ndarray] = {algorithm: FFT_WINDOWS[algorithm](segment_size) for algorithm in algorithms}
+        self.power_sums: Dict[str, np.ndarray] = {algorithm: np.zeros((len(FFT_VARIANT_AXES), segment_size // 2 + 1)) for algorithm in algorithms}
+        self.segments_count: int = 0
+        self._slicer: UniformWindowSlicer = UniformWindowSlicer(FFT_VARIANT_AXES, segment_size, segment_size // 2)
+
+    def feed(self, columns: Dict[str, np.ndarray]) -> None:
+        """
+        :param columns: next rows of the stream, at least "sample" and the axes; need not be uniformly sampled
+        """
+        segments = self._slicer.feed(columns)
+        for index in range(segments.shape[1]):
+            segment = segments[:, index]
+            segment = segment - np.mean(segment, axis=1, keepdims=True)
+            for algorithm, window in self.windows.items():
+                self.power_sums[algorithm] += np.square(np.abs(np.fft.rfft(segment * window, axis=1)))
+            self.segments_count += 1
+
+    def result(self, sample_rate_hz: float) -> FftVariants:
+        """
+        :return: averaged spectra scaled like :func:`compute_fft_variants`; all zero if not even one segment was fed
+        """
+        variants = FftVariants(np.fft.rfftfreq(self.segment_size, d=1.0 / sample_rate_hz).astype(np.float32), segments_count=self.segments_count)
+        for algorithm, power_sum in self.power_sums.items():
+            magnitude = np.sqrt(power_sum / max(1, self.segments_count)) * (2.0 / np.sum(self.windows[algorithm]))
+            variants.amplitudes[algorithm] = {axis: magnitude[idx].astype(np.float32) for idx, axis in enumerate(FFT_VARIANT_AXES)}
+        return variants
+
+
+class FftVariantsAccumulator:
+    """
+    Spectra of a stream fed chunk by chunk: streams of up to max_samples_in_memory samples are transformed as a whole
+    (see :func:`compute_fft_variants`), longer ones are averaged over segments (see :class:`SegmentAverager`).
+    Peak memory is thus bound by max_samples_in_memory rather than by the recording's length.
+    """
+
+    def __init__(self,
+                 sample_rate_hz: float,
+                 algorithms: List[str],
+                 max_samples_in_memory: int = FFT_MAX_SAMPLES_IN_MEMORY,
+                 segment_size: int = FFT_SEGMENT_SIZE):
+        """
+        :param max_samples_in_memory: must be larger than segment_size
+        """
+        self.sample_rate_hz: float = sample_rate_hz
+        self.algorithms: List[str] = algorithms
+        self.max_samples_in_memory: int = max_samples_in_memory
+        self.segment_size: int = segment_size
+        self._buffered: List[Dict[str, np.ndarray]] = []
+        self._buffered_count: int = 0
+        self._averager: Optional[SegmentAverager] = None
+
+    def feed(self, columns: Dict[str, np.ndarray]) -> None:
+        """
+        :param columns: next rows of the stream, at least "sample" and the axes; need not be uniformly sampled
+        """
+        if self._averager is not None:
+            self._averager.feed(columns)
+            return
+        self._buffered.append(columns)
+        self._buffered_count += len(columns["sample"])
+        if self._buffered_count > self.max_samples_in_memory:
+            self._averager = SegmentAverager(self.segment_size, self.algorithms)
+            self._averager.feed({name: np.concatenate([c[name] for c in self._buffered]) for name in ["sample", *FFT_VARIANT_AXES]})
+            self._buffered = []
+
+    def result(self) -> FftVariants:
+        if self._averager is not None:
+            return self._averager.result(self.sample_rate_hz)
+        columns = {name: np.concatenate([c[name] for c in self._buffered]) for name in ["sample", *FFT_VARIANT_AXES]}
+        return compute_fft_variants(resample_uniform(columns, FFT_VARIANT_AXES), self.sample_rate_hz, self.algorithms)
+
+
+def compute_fft_variants_chunked(path: str,
+                                 sample_rate_hz: float,
+                                 algorithms: List[str],
+                                 max_samples_in_memory: int = FFT_MAX_SAMPLES_IN_MEMORY,
+                                 segment_size: int = FFT_SEGMENT_SIZE) -> FftVariants:
+    """
+    Reads a stream chunk by chunk into a :class:`FftVariantsAccumulator`.
+
+    :param path: stream file
+    :param max_samples_in_memory: must be larger than segment_size
+    """
+    accumulator = FftVariantsAccumulator(sample_rate_hz, algorithms, max_samples_in_memory, segment_size)
+    for chunk in iter_columns(path, ["sample", *FFT_VARIANT_AXES]):
+        accumulator.feed(chunk)
+    return accumulator.result()
+
+
+def save_fft_variants(path: str, variants: FftVariants) -> None:
+    """
+    Stores all variants in one file, keyed "<algorithm>-<axis>".
+    Writes to a temporary file first, so that an interrupted write never leaves a file that counts as already processed.
+    """
+    arrays = {f"{algorithm}-{axis}": values for algorithm, per_axis in variants.amplitudes.items() for axis, values in per_axis.items()}
+    temp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    with open(temp_path, "wb") as file:
+        np.savez_compressed(file, frequency_hz=variants.frequency_hz, segments_count=variants.segments_count, **arrays)
+    os.replace(temp_path, path)
+
+
+def load_fft_variants(path: str) -> FftVariants:
+    return _load_fft_variants_cached(file_version(path))
+
+
+@functools.lru_cache(maxsize=8)
+def _load_fft_variants_cached(version: FileVersion) -> FftVariants:
+    with np.load(version[0]) as data:
+        variants = FftVariants(data["frequency_hz"], segments_count=int(data["segments_count"]) if "segments_count" in data.files else 1)
+        for key in [k for k in data.files if k not in ["frequency_hz", "segments_count"]]:
+            algorithm, axis = key.rsplit("-", 1)
+            variants.amplitudes.setdefault(algorithm, {})[axis] = data[key]
+    return variants
+
+
+def get_fft_variants(path: str, algorithms: Optional[List[str]] = None) -> FftVariantsResult:
+    """
+    :param algorithms: algorithms to include; all stored ones if None
+    """
+    variants = load_fft_variants(path)
+    return FftVariantsResult(frequency_hz=variants.frequency_hz.tolist(),
+                             amplitudes={algorithm: {axis: values.tolist() for axis, values in per_axis.items()}
+                                         for algorithm, per_axis in variants.amplitudes.items() if algorithms is None or algorithm in algorithms},
+                             segments_count=variants.segments_count)
+
+
+def fft_variants_file_name(output_file_prefix: str, stream_file_name: str, input_file_prefix: str) -> str:
+    """
+    :return: i.e. "fftv-30f9c95c-20231127-235625233-s000-ax-f010-z015.npz" for stream "axxel-30f9c95c-20231127-235625233-s000-ax-f010-z015.tsv"
+    """
+    stem = data_file_stem(stream_file_name).removeprefix(f"{input_file_prefix}-")
+    return f"{output_file_prefix}-{stem}.npz"
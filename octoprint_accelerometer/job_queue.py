@@ -0,0 +1,273 @@
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from enum import IntEnum
+from logging import Logger
+from typing import Any, Callable, Dict, List, Optional
+
+JOB_HISTORY_LENGTH: int = 20
+"count of finished jobs kept for status requests"
+
+
+class JobKind(IntEnum):
+    RECORDING = 1
+    DATA_PROCESSING = 2
+
+
+class JobState(IntEnum):
+    QUEUED = 1
+    RUNNING = 2
+    FINISHED = 3
+    "job returned sane"
+    FAILED = 4
+    "job returned with error"
+    ABORTED = 5
+    "running job stopped upon user request"
+    CANCELLED = 6
+    "queued job removed upon user request"
+    INTERRUPTED = 7
+    "job was running when the plugin was shut down"
+
+
+DEFAULT_JOB_PRIORITY: Dict[JobKind, int] = {
+    JobKind.RECORDING: 10,
+    JobKind.DATA_PROCESSING: 20,
+}
+"lower values run first; recordings occupy the printer, thus are preferred over (re-)processing"
+
+
+@dataclass
+class Job:
+    job_id: str
+    kind: JobKind
+    priority: int
+    order: int
+    "position among queued jobs of the same priority"
+    parameters: Dict[str, Any] = field(default_factory=lambda: ({}))
+    "snapshot of the parameters at the time the job was queued"
+    state: JobState = JobState.QUEUED
+    created_ts: float = 0.0
+    started_ts: Optional[float] = None
+    finished_ts: Optional[float] = None
+    result: str = ""
+    "name of the event the job finished with"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(job_id=self.job_id,
+                    kind=self.kind.name,
+                    priority=self.priority,
+                    order=self.order,
+                    parameters=self.parameters,
+                    state=self.state.name,
+                    created_ts=self.created_ts,
+                    started_ts=self.started_ts,
+                    finished_ts=self.finished_ts,
+                    result=self.result)
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "Job":
+        return Job(job_id=str(data["job_id"]),
+                   kind=JobKind[data["kind"]],
+                   priority=int(data["priority"]),
+                   order=int(data["order"]),
+                   parameters=dict(data.get("parameters", {})),
+                   state=JobState[data["state"]],
+                   created_ts=float(data.get("created_ts", 0.0)),
+                   started_ts=data.get("started_ts"),
+                   finished_ts=data.get("finished_ts"),
+                   result=str(data.get("result", "")))
+
+
+class JobQueue:
+    """
+    Persistent queue of recording and data processing jobs.
+
+    Queued jobs are ordered by priority, then by the order they were queued or moved to.
+    At most one job is running at a time; jobs that were running when the plugin was shut down are marked interrupted
+    on load, queued jobs are resumed.
+    Every change is written to a hidden JSON file in the data folder and reported via ``on_change``.
+    """
+
+    def __init__(self, logger: Logger, path: str, on_change: Optional[Callable[[List[Job]], None]] = None):
+        """
+        :param path: file that persists the queue
+        :param on_change: invoked with all jobs (see :meth:`jobs`) after each change
+        """
+        self.logger: Logger = logger
+        self.path: str = path
+        self.on_change: Optional[Callable[[List[Job]], None]] = on_change
+        self._lock: threading.RLock = threading.RLock()
+        self._jobs: List[Job] = self._load()
+        self._next_order: int = max([j.order for j in self._jobs], default=0) + 1
+
+    def _load(self) -> List[Job]:
+        try:
+            with open(self.path, "r") as file:
+                jobs = [Job.from_dict(j) for j in json.load(file)]
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            self.logger.warning(f"failed to load job queue, starting empty: {e}")
+            return []
+        for job in [j for j in jobs if j.state == JobState.RUNNING]:
+            job.state = JobState.INTERRUPTED
+            job.finished_ts = time.time()
+        return jobs
+
+    def _persist(self) -> None:
+        temp_path = os.path.join(os.path.dirname(self.path), f".{os.path.basename(self.path)}.tmp")
+        try:
+            with open(temp_path, "w") as file:
+                json.dump([j.to_dict() for j in self._jobs], file)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f"failed to persist job queue: {e}")
+
+    def _changed(self) -> None:
+        """
+        Trims the history and persists the jobs; must be called with the lock held.
+        """
+        finished = sorted([j for j in self._jobs if j.state not in [JobState.QUEUED, JobState.RUNNING]], key=lambda j: j.finished_ts or 0.0)
+        for job in finished[:max(0, len(finished) - JOB_HISTORY_LENGTH)]:
+            self._jobs.remove(job)
+        self._persist()
+
+    def _notify(self) -> None:
+        if self.on_change is not None:
+            self.on_change(self.jobs())
+
+    def _queued(self) -> List[Job]:
+        return sorted([j for j in self._jobs if j.state == JobState.QUEUED], key=lambda j: (j.priority, j.order))
+
+    def _get(self, job_id: str) -> Job:
+        for job in self._jobs:
+            if job.job_id == job_id:
+                return job
+        raise KeyError(job_id)
+
+    def jobs(self) -> List[Job]:
+        """
+        :return: the running job, queued jobs in execution order, then finished jobs with the latest first
+        """
+        with self._lock:
+            running = [j for j in self._jobs if j.state == JobState.RUNNING]
+            finished = sorted([j for j in self._jobs if j.state not in [JobState.QUEUED, JobState.RUNNING]], key=lambda j: j.finished_ts or 0.0, reverse=True)
+            return running + self._queued() + finished
+
+    def running(self) -> Optional[Job]:
+        with self._lock:
+            return next((j for j in self._jobs if j.state == JobState.RUNNING), None)
+
+    def pending(self, kind: JobKind) -> Optional[Job]:
+        """
+        :return: the running or the next queued job of the given kind; None if there is none
+        """
+        with self._lock:
+            return next((j for j in [self.running(), *self._queued()] if j is not None and j.kind == kind), None)
+
+    def enqueue(self, kind: JobKind, parameters: Dict[str, Any], priority: Optional[int] = None, unique: bool = False) -> Job:
+        """
+        :param parameters: snapshot the job is executed with
+        :param priority: lower values run first; the kind's default priority if None
+        :param unique: if a job of the same kind is queued already, that job is returned instead of queueing another one
+        """
+        with self._lock:
+            if unique:
+                queued = next((j for j in self._queued() if j.kind == kind), None)
+                if queued is not None:
+                    return queued
+            job = Job(job_id=uuid.uuid4().hex[:8],
+                      kind=kind,
+                      priority=DEFAULT_JOB_PRIORITY[kind] if priority is None else priority,
+                      order=self._next_order,
+                      parameters=parameters,
+                      created_ts=time.time())
+            self._next_order += 1
+            self._jobs.append(job)
+            self._changed()
+        self.logger.info(f"queued job {job.job_id} {job.kind.name}")
+        self._notify()
+        return job
+
+    def cancel(self, job_id: str) -> Job:
+        """
+        Removes a queued job from the queue.
+
+        :raises KeyError: if there is no such job
+        :raises ValueError: if the job is not queued anymore
+        """
+        with self._lock:
+            job = self._get(job_id)
+            if job.state != JobState.QUEUED:
+                raise ValueError(f"job {job_id} is {job.state.name.lower()}")
+            job.state = JobState.CANCELLED
+            job.finished_ts = time.time()
+            self._changed()
+        self._notify()
+        return job
+
+    def move(self, job_id: str, index: int) -> Job:
+        """
+        Moves a queued job to another position in the execution order.
+        The job takes over the priority of the job it is placed next to.
+
+        :param index: new position among the queued jobs, 0 runs next
+        :raises KeyError: if there is no such job
+        :raises ValueError: if the job is not queued anymore
+        """
+        with self._lock:
+            job = self._get(job_id)
+            if job.state != JobState.QUEUED:
+                raise ValueError(f"job {job_id} is {job.state.name.lower()}")
+            queued = [j for j in self._queued() if j is not job]
+            index = min(max(0, index), len(queued))
+            if queued:
+                job.priority = queued[index].priority if index < len(queued) else queued[-1].priority
+            queued.insert(index, job)
+            for order, queued_job in enumerate(queued, start=self._next_order):
+                queued_job.order = order
+            self._next_order += len(queued)
+            self._changed()
+        self._notify()
+        return job
+
+    def start_next(self, is_runnable: Callable[[Job], bool]) -> Optional[Job]:
+        """
+        Marks the first runnable queued job as running.
+
+        :param is_runnable: whether a job can be started now; jobs that cannot are skipped and stay queued
+        :return: the job to be started by the caller; None if a job is running already or no job is runnable
+        """
+        with self._lock:
+            if self.running() is not None:
+                return None
+            job = next((j for j in self._queued() if is_runnable(j)), None)
+            if job is None:
+                return None
+            job.state = JobState.RUNNING
+            job.started_ts = time.time()
+            self._changed()
+        self.logger.info(f"started job {job.job_id} {job.kind.name}")
+        self._notify()
+        return job
+
+    def finish(self, kind: JobKind, state: JobState, result: str) -> Optional[Job]:
+        """
+        Marks the running job as finished, if it is of the given kind.
+
+        :return: the finished job; None if no job of that kind was running
+        """
+        with self._lock:
+            job = self.running()
+            if job is None or job.kind != kind:
+                return None
+            job.state = state
+            job.result = result
+            job.finished_ts = time.time()
+            self._changed()
+        self.logger.info(f"finished job {job.job_id} {job.kind.name}: {state.name}")
+        self._notify()
+        return job
@@ -0,0 +1,89 @@
+import asyncio
+import dataclasses
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import tornado.web
+
+Listing = Callable[[Dict[str, str]], Dict[str, Any]]
+"computes a listing from the request arguments; may raise :class:`ListingError`"
+
+
+class ListingError(Exception):
+    def __init__(self, status_code: int, description: str):
+        super().__init__(description)
+        self.status_code: int = status_code
+        self.description: str = description
+
+
+class CoalescingExecutor:
+    """
+    Bounded thread pool where concurrent submissions of the same key share one execution and its result.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = ""):
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock: threading.Lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+
+    def submit(self, key: Hashable, fn: Callable[[], Any]) -> Future:
+        """
+        :param key: identifies the work; fn is not invoked if work of the same key is still pending or running
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(fn)
+            self._in_flight[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _forget(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+
+def _to_json(obj: Any) -> Any:
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+class ListingHandler(tornado.web.RequestHandler):
+    """
+    Serves data folder listings, i.e. GET ``get_run_listing?run=30f9c95c``, and other read-only views of the data folder
+    that scan it, i.e. the FFT comparison.
+
+    Directory scans and file name parsing run on a bounded executor, so a slow SD card never stalls the web server
+    and thus unrelated API requests. Identical requests arriving while a scan is in progress share its result.
+    """
+
+    def initialize(self, listings: Dict[str, Listing], executor: CoalescingExecutor, access_validation: Optional[Callable] = None):
+        self._listings: Dict[str, Listing] = listings
+        self._executor: CoalescingExecutor = executor
+        self._access_validation: Optional[Callable] = access_validation
+
+    async def get(self, name: str):
+        if self._access_validation is not None:
+            self._access_validation(self.request)
+
+        listing = self._listings.get(name)
+        if listing is None:
+            raise tornado.web.HTTPError(404)
+
+        args: Dict[str, str] = {key: self.get_argument(key) for key in self.request.arguments}
+        self.set_header("Content-Type", "application/json")
+        try:
+            result = await asyncio.wrap_future(self._executor.submit((name, tuple(sorted(args.items()))), lambda: listing(args)))
+        except ListingError as e:
+            self.set_status(e.status_code)
+            self.finish(json.dumps({"error": e.description}))
+            return
+        self.finish(json.dumps(result, default=_to_json))
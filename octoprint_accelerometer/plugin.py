@@ -1,9 +1,17 @@
+import dataclasses
+import json
 import os
+import re
+import threading
+import time
 from typing import Any, Dict, List, Literal, Optional, Tuple
 
 import flask
 import octoprint.plugin
-from octoprint.server.util.tornado import LargeResponseHandler, path_validation_factory
+from octoprint.access.permissions import Permissions
+from octoprint.events import Events
+from octoprint.server.util.flask import permission_validator
+from octoprint.server.util.tornado import access_validation_factory, path_validation_factory
 from octoprint.util import is_hidden_path
 from py3dpaxxel.cli.args import convert_axis_from_str
 from py3dpaxxel.controller.api import Py3dpAxxel
@@ -12,10 +20,22 @@ from py3dpaxxel.storage.file_filter import FileSelector, File
 from py3dpaxxel.storage.filename import timestamp_from_args
 from py3dpaxxel.storage.filename_meta import FilenameMetaStream, FilenameMetaFft
 
+from octoprint_accelerometer.controller_simulator import ControllerSimulator
+from octoprint_accelerometer.data_download import DataFileHandler
+from octoprint_accelerometer.data_io import DATA_FILE_PATTERN, FFT_ALGORITHMS, data_file_stem, resolve_data_file, uncompressed_name
 from octoprint_accelerometer.data_post_process import DataPostProcessRunner
 from octoprint_accelerometer.event_types import DataProcessingEventType, RecordingEventType
+from octoprint_accelerometer.feature_catalog import FeatureCatalog
+from octoprint_accelerometer.job_queue import Job, JobKind, JobQueue, JobState
+from octoprint_accelerometer.listing import CoalescingExecutor, ListingError, ListingHandler
 from octoprint_accelerometer.record_step_series import RecordStepSeriesRunner
-from octoprint_accelerometer.transfer_types import RunMeta, SequenceMeta, StreamMeta, DataSets, FftMeta, Timestamp
+from octoprint_accelerometer.resource_usage import format_resource_usage
+from octoprint_accelerometer.retention import RetentionManager
+from octoprint_accelerometer.run_export import RunExportHandler
+from octoprint_accelerometer.storage import StorageError, StorageSync, create_storage_backend
+from octoprint_accelerometer.transfer_types import RunMeta, SequenceMeta, StreamMeta, DataSets, FftMeta, Timestamp, FileStat, RunSummary, StoredRunSummary, StreamSummary
+from octoprint_accelerometer.ui_event_bus import UiEventBus
+from octoprint_accelerometer.worker import PauseGate
 
 
 class Point3D:
@@ -29,12 +49,26 @@ class Point3D:
 
 
 class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
+                                   octoprint.plugin.ShutdownPlugin,
                                    octoprint.plugin.SettingsPlugin,
                                    octoprint.plugin.AssetPlugin,
                                    octoprint.plugin.TemplatePlugin,
-                                   octoprint.plugin.BlueprintPlugin):
+                                   octoprint.plugin.BlueprintPlugin,
+                                   octoprint.plugin.EventHandlerPlugin):
     OUTPUT_STREAM_FILE_NAME_PREFIX: str = "axxel"
     OUTPUT_FFT_FILE_NAME_PREFIX: str = "fft"
+    OUTPUT_SPECTROGRAM_FILE_NAME_PREFIX: str = "stft"
+    OUTPUT_FFT_VARIANTS_FILE_NAME_PREFIX: str = "fftv"
+    OUTPUT_SUMMARY_FILE_NAME_PREFIX: str = "summary"
+    FEATURE_CATALOG_FILE_NAME: str = ".feature_catalog.sqlite3"
+    RETENTION_VIEWS_FILE_NAME: str = ".retention_views.json"
+    JOB_QUEUE_FILE_NAME: str = ".job_queue.json"
+    PROCESSED_STREAMS_FILE_NAME: str = ".processed_streams.json"
+    STORAGE_MANIFEST_FILE_NAME: str = ".storage_manifest.json"
+    UI_TOPIC_MIN_INTERVALS_S: Dict[str, float] = {"DATA_PROCESSING_PROGRESS": 0.25, "JOB_QUEUE": 0.5}
+    "plugin messages of frequently updated topics are sent at most that often"
+    UI_EVENT_TOPICS: List[str] = [RecordingEventType.__name__, DataProcessingEventType.__name__, "RUN_DELETED", "RUN_FETCHED", "RUNS_EVICTED"]
+    "plugin message topics of which every message is sent in order; all other topics carry state, of which only the latest is sent"
 
     # noinspection PyMissingConstructor
     def __init__(self):
@@ -71,6 +105,27 @@ class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
         self.sequence_separation_s: float = 0
         self.step_separation_s: float = 0
         self.do_dry_run: bool = False
+        self.controller_simulator_enabled: bool = False
+        self.controller_simulator_fifo_overflow_after_samples: int = 0
+        self.controller_simulator_garbage_response_after_samples: int = 0
+        self.spectrogram_window_size: int = 0
+        self.spectrogram_hop_size: int = 0
+        self.fft_algorithms: List[str] = []
+        self.data_compression_enabled: bool = False
+        self.data_compression_level: int = 0
+        self.retention_max_size_mb: int = 0
+        self.retention_max_age_days: int = 0
+        self.data_processing_pause_while_printing: bool = False
+        self.adaptive_sweep_fine_step_frequency_hz: int = 0
+        self.adaptive_sweep_resonances_count: int = 0
+        self.storage_backend: str = "none"
+        self.storage_directory_path: str = ""
+        self.storage_s3_bucket: str = ""
+        self.storage_s3_key_prefix: str = ""
+        self.storage_s3_endpoint_url: str = ""
+        self.storage_s3_region: str = ""
+        self.storage_s3_access_key_id: str = ""
+        self.storage_s3_secret_access_key: str = ""
 
         # other parameters shared with UI
 
@@ -89,6 +144,41 @@ class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
         self.data_recording_runner: Optional[RecordStepSeriesRunner] = None
         self.data_processing_runner: Optional[DataPostProcessRunner] = None
 
+        # resonance features of all processed streams; constructed once the data folder is known
+        self.feature_catalog: Optional[FeatureCatalog] = None
+
+        # evicts raw data according to quota and age; constructed once the data folder is known
+        self.retention_manager: Optional[RetentionManager] = None
+
+        # recordings and data processing requested but not started yet; constructed once the data folder is known
+        self.job_queue: Optional[JobQueue] = None
+        self._job_dispatch_lock: threading.Lock = threading.Lock()
+
+        # runs the directory scans of listing requests; bounded, so that concurrent requests cannot exhaust threads
+        self.listing_executor: CoalescingExecutor = CoalescingExecutor(max_workers=2, thread_name_prefix="axxel-listing")
+
+        # batches plugin messages to the UI; constructed once logger and plugin manager are injected
+        self.ui_event_bus: Optional[UiEventBus] = None
+
+        # mirrors the data folder to shared storage; only constructed if a backend is configured
+        self.storage_sync: Optional[StorageSync] = None
+        self._storage_settings: Optional[Tuple[str, ...]] = None
+        # closed while recording, so that uploads never compete with capturing
+        self.storage_pause_gate: PauseGate = PauseGate()
+
+        # duration of importing the plugin module, measured by the plugin loader
+        self.import_duration_s: Optional[float] = None
+
+        # hardware-free stand-in for the controller; only constructed if enabled in settings
+        self.controller_simulator: Optional[ControllerSimulator] = None
+
+    def initialize(self):
+        self.ui_event_bus = UiEventBus(
+            logger=self._logger,
+            send=lambda data: self._plugin_manager.send_plugin_message(self._identifier, data),
+            min_intervals_s=self.UI_TOPIC_MIN_INTERVALS_S,
+            event_topics=self.UI_EVENT_TOPICS)
+
     @staticmethod
     def _get_devices() -> Tuple[str, List[str]]:
         """
@@ -100,6 +190,9 @@ class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
 
     def _update_seen_devices(self):
         primary, seen_devices = self._get_devices()
+        if self.controller_simulator is not None and self.controller_simulator.device:
+            primary = self.controller_simulator.device
+            seen_devices.insert(0, primary)
         self._logger.debug(f"seen devices: primary={primary}, seen={seen_devices}")
         self.devices_seen = seen_devices
         self.device = primary if primary is not None else ""
@@ -114,8 +207,26 @@ class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
 
     @octoprint.plugin.BlueprintPlugin.route("/start_recording", methods=["POST"])
     def on_api_start_recording(self):
-        self._start_recording()
-        response = flask.jsonify(message="OK")
+        """
+        Queues a recording; it is started as soon as no other job is running and the printer is ready.
+
+        Arguments (JSON):
+          - parameters: optional, recording parameters that differ from the current ones, i.e. {"do_sample_x": true, "do_sample_y": false}
+          - priority: optional, lower values run first
+          - adaptive: optional, if true the frequency sweep is a coarse pass; once recorded, fine sweeps around its
+                      strongest resonances are queued (see :meth:`_refine_adaptive_sweep`)
+        """
+        data = flask.request.json or {}
+        try:
+            parameters = self._get_recording_parameters_snapshot(data.get("parameters", {}))
+            priority: Optional[int] = int(data["priority"]) if data.get("priority") is not None else None
+        except (KeyError, TypeError, ValueError) as e:
+            flask.abort(400, description=f"invalid recording parameters: {e}")
+        if data.get("adaptive", False):
+            parameters["adaptive_sweep"] = dict(fine_step_frequency_hz=self.adaptive_sweep_fine_step_frequency_hz,
+                                                resonances_count=self.adaptive_sweep_resonances_count)
+        job = self._queue_job(JobKind.RECORDING, parameters, priority)
+        response = flask.jsonify(message="OK", job=job.to_dict())
         response.status_code = 202
         return response
 
@@ -128,11 +239,97 @@ class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
 
     @octoprint.plugin.BlueprintPlugin.route("/start_data_processing", methods=["POST"])
     def on_api_start_data_processing(self):
-        self._start_data_processing()
+        """
+        Queues data processing unless it is queued already.
+
+        Arguments (JSON):
+          - priority: optional, lower values run first
+        """
+        data = flask.request.json or {}
+        try:
+            priority: Optional[int] = int(data["priority"]) if data.get("priority") is not None else None
+        except (TypeError, ValueError) as e:
+            flask.abort(400, description=f"invalid priority: {e}")
+        job = self._queue_job(JobKind.DATA_PROCESSING, self._get_data_processing_parameters_snapshot(), priority)
+        response = flask.jsonify(message="OK", job=job.to_dict())
+        response.status_code = 202
+        return response
+
+    @octoprint.plugin.BlueprintPlugin.route("/get_processing_progress", methods=["GET"])
+    def on_api_get_processing_progress(self):
+        """
+        :return: step, files done out of total, current file, throughput and ETA of the running data processing;
+                 of the last one if not running
+        """
+        if self.data_processing_runner is None:
+            flask.abort(503, description="data processing not available yet")
+        return flask.jsonify({"progress": dataclasses.asdict(self.data_processing_runner.get_progress())})
+
+    @octoprint.plugin.BlueprintPlugin.route("/get_job_queue", methods=["GET"])
+    def on_api_get_job_queue(self):
+        """
+        :return: the running job, queued jobs in execution order and recently finished jobs;
+                 whether data processing is paused while printing
+        """
+        if self.job_queue is None:
+            flask.abort(503, description="job queue not available yet")
+        return flask.jsonify({"jobs": [j.to_dict() for j in self.job_queue.jobs()],
+                              "data_processing_paused": self.data_processing_runner.is_paused()})
+
+    @octoprint.plugin.BlueprintPlugin.route("/cancel_job", methods=["POST"])
+    def on_api_cancel_job(self):
+        """
+        Removes a queued job or aborts the running one.
+
+        Arguments (JSON):
+          - job: job id
+        """
+        job_id: str = str((flask.request.json or {}).get("job", ""))
+        if self.job_queue is None:
+            flask.abort(503, description="job queue not available yet")
+        running = self.job_queue.running()
+        if running is not None and running.job_id == job_id:
+            if JobKind.RECORDING == running.kind:
+                self.data_recording_runner.stop()
+            else:
+                self.data_processing_runner.stop()
+        else:
+            try:
+                self.job_queue.cancel(job_id)
+            except KeyError:
+                flask.abort(404, description=f"no job {job_id}")
+            except ValueError as e:
+                flask.abort(409, description=str(e))
         response = flask.jsonify(message="OK")
         response.status_code = 202
         return response
 
+    @octoprint.plugin.BlueprintPlugin.route("/move_job", methods=["POST"])
+    def on_api_move_job(self):
+        """
+        Changes the execution order of a queued job.
+
+        Arguments (JSON):
+          - job: job id
+          - index: new position among the queued jobs, 0 runs next
+        """
+        data = flask.request.json or {}
+        job_id: str = str(data.get("job", ""))
+        if self.job_queue is None:
+            flask.abort(503, description="job queue not available yet")
+        try:
+            index = int(data.get("index"))
+        except (TypeError, ValueError):
+            flask.abort(400, description="invalid index")
+        try:
+            self.job_queue.move(job_id, index)
+        except KeyError:
+            flask.abort(404, description=f"no job {job_id}")
+        except ValueError as e:
+            flask.abort(409, description=str(e))
+        self._dispatch_jobs()
+        return flask.jsonify(message="OK")
+
     @octoprint.plugin.BlueprintPlugin.route("/get_estimate", methods=["GET"])
     def on_api_get_estimate(self):
         return flask.jsonify({f"estimate": self._estimate_duration()})
@@ -141,32 +338,252 @@ class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
     def on_api_get_parameters(self):
         return flask.jsonify({f"parameters": self._get_parameter_dict(flask.request.args)})
 
-    @octoprint.plugin.BlueprintPlugin.route("/get_files_listing", methods=["GET"])
-    def on_api_get_files_listing(self):
+    # listings are served by ListingHandler (see route_hook) off the web server's thread
+
+    def _list_files(self, _args: Dict[str, str]) -> Dict[str, Any]:
         fs = FileSelector(os.path.join(self.get_plugin_data_folder(), ".*"))
         files_details = fs.filter()
-        return flask.jsonify({f"files": files_details})
+        return {f"files": files_details}
 
-    @octoprint.plugin.BlueprintPlugin.route("/get_stream_files_listing", methods=["GET"])
-    def on_api_get_stream_files_listing(self):
-        fs = FileSelector(os.path.join(self.get_plugin_data_folder(), f"{self.OUTPUT_STREAM_FILE_NAME_PREFIX}-.*\\.tsv$"))
+    def _list_stream_files(self, _args: Dict[str, str]) -> Dict[str, Any]:
+        fs = FileSelector(os.path.join(self.get_plugin_data_folder(), f"{self.OUTPUT_STREAM_FILE_NAME_PREFIX}-.*{DATA_FILE_PATTERN}"))
         files = fs.filter()
-        files_details = [StreamMeta(f, FilenameMetaStream().from_filename(f.filename_ext)) for f in files]
-        return flask.jsonify({f"stream_files": files_details})
+        files_details = [StreamMeta(f, FilenameMetaStream().from_filename(uncompressed_name(f.filename_ext)), self._stat_file(f), self._read_summary(f.filename_ext)) for f in files]
+        return {f"stream_files": files_details}
 
-    @octoprint.plugin.BlueprintPlugin.route("/get_fft_files_listing", methods=["GET"])
-    def on_api_get_fft_files_listing(self):
-        fs = FileSelector(os.path.join(self.get_plugin_data_folder(), f"{self.OUTPUT_FFT_FILE_NAME_PREFIX}-.*\\.tsv$"))
+    def _list_fft_files(self, _args: Dict[str, str]) -> Dict[str, Any]:
+        fs = FileSelector(os.path.join(self.get_plugin_data_folder(), f"{self.OUTPUT_FFT_FILE_NAME_PREFIX}-.*{DATA_FILE_PATTERN}"))
         files = fs.filter()
-        files_details = [FftMeta(f, FilenameMetaFft().from_filename(f.filename_ext)) for f in files]
-        return flask.jsonify({f"fft_files": files_details})
-
-    @octoprint.plugin.BlueprintPlugin.route("/get_data_listing", methods=["GET"])
-    def on_api_get_data_listing(self):
-        fs_stream = FileSelector(os.path.join(self.get_plugin_data_folder(), f"{self.OUTPUT_STREAM_FILE_NAME_PREFIX}-.*\\.tsv$"))
-        fs_fft = FileSelector(os.path.join(self.get_plugin_data_folder(), f"{self.OUTPUT_FFT_FILE_NAME_PREFIX}-.*\\.tsv$"))
-        files_meta_data_stream: List[Tuple[File, FilenameMetaStream]] = [(f, FilenameMetaStream().from_filename(f.filename_ext)) for f in fs_stream.filter()]
-        files_meta_data_fft: List[Tuple[File, FilenameMetaFft]] = [(f, FilenameMetaFft().from_filename(f.filename_ext)) for f in fs_fft.filter()]
+        files_details = [FftMeta(f, FilenameMetaFft().from_filename(uncompressed_name(f.filename_ext)), self._stat_file(f)) for f in files]
+        return {f"fft_files": files_details}
+
+    def _list_data(self, _args: Dict[str, str]) -> Dict[str, Any]:
+        return {f"data_sets": self._get_data_sets()}
+
+    def _list_runs(self, _args: Dict[str, str]) -> Dict[str, Any]:
+        runs: Dict[str, RunSummary] = {
+            run_hash: RunSummary(run.started, run.stopped, len(run.sequences), sum([len(s.streams) for s in run.sequences.values()]))
+            for run_hash, run in self._get_data_sets(with_details=False).runs.items()}
+        return {f"runs": runs}
+
+    def _list_run(self, args: Dict[str, str]) -> Dict[str, Any]:
+        run_hash: Optional[str] = args.get("run")
+        if not run_hash:
+            raise ListingError(400, "missing argument: run")
+        data_sets = self._get_data_sets(run_hash=run_hash)
+        if run_hash not in data_sets.runs.keys():
+            raise ListingError(404, f"unknown run {run_hash}")
+        if self.retention_manager is not None:
+            self.retention_manager.mark_viewed(run_hash)
+        return {f"run": data_sets.runs[run_hash]}
+
+    def _list_stored_runs(self, _args: Dict[str, str]) -> Dict[str, Any]:
+        storage_sync = self.storage_sync
+        if storage_sync is None:
+            raise ListingError(404, "no shared storage configured")
+        try:
+            stored_runs = storage_sync.list_runs()
+        except StorageError as e:
+            raise ListingError(502, f"shared storage not available: {e}")
+        local_runs = self._get_data_sets(with_details=False).runs.keys()
+        runs: Dict[str, StoredRunSummary] = {
+            run_hash: StoredRunSummary(len(files), sum(f.size for f in files), run_hash in local_runs)
+            for run_hash, files in stored_runs.items()}
+        return {f"stored_runs": runs}
+
+    def _compare_ffts(self, args: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Spectra of several streams and/or runs resampled to one frequency grid.
+
+        Arguments:
+          - axis: FFT axis to compare: "x", "y" or "z"
+          - streams: comma separated stream file names, i.e. "axxel-30f9c95c-20231127-235625233-s000-ax-f010-z015.tsv"
+          - runs: comma separated run hashes; the spectra of all streams of a run are averaged
+          - resolution_hz: optional grid step, defaults to the coarsest bin width
+        """
+        from octoprint_accelerometer.fft_comparison import compare_spectra, MIN_FFT_COMPARISON_RESOLUTION_HZ
+
+        axis: str = args.get("axis", "x")
+        if axis not in ["x", "y", "z"]:
+            raise ListingError(400, f"invalid axis {axis}")
+        streams: List[str] = [s for s in args.get("streams", "").split(",") if s]
+        runs: List[str] = [r for r in args.get("runs", "").split(",") if r]
+        try:
+            resolution_hz: Optional[float] = float(args["resolution_hz"]) if "resolution_hz" in args else None
+        except ValueError:
+            raise ListingError(400, f"invalid resolution_hz {args['resolution_hz']}")
+        if resolution_hz is not None and not resolution_hz >= MIN_FFT_COMPARISON_RESOLUTION_HZ:
+            raise ListingError(400, f"resolution_hz must be at least {MIN_FFT_COMPARISON_RESOLUTION_HZ}")
+
+        series: Dict[str, List[str]] = {}
+        for stream in streams:
+            stream_prefix = f"{self.OUTPUT_STREAM_FILE_NAME_PREFIX}-"
+            if os.path.basename(stream) != stream or not stream.startswith(stream_prefix) or not re.search(DATA_FILE_PATTERN, stream):
+                raise ListingError(400, f"invalid stream {stream}")
+            fft_file = f"{self.OUTPUT_FFT_FILE_NAME_PREFIX}-{data_file_stem(stream)[len(stream_prefix):]}-{axis}.tsv"
+            series[stream] = [resolve_data_file(os.path.join(self.get_plugin_data_folder(), fft_file))]
+        for run_hash in runs:
+            fs = FileSelector(os.path.join(self.get_plugin_data_folder(), f"{self.OUTPUT_FFT_FILE_NAME_PREFIX}-{re.escape(run_hash)}-.*-{axis}{DATA_FILE_PATTERN}"))
+            series[run_hash] = [os.path.join(self.get_plugin_data_folder(), f.filename_ext) for f in fs.filter()]
+
+        missing = [p for paths in series.values() for p in paths if not os.path.isfile(p)]
+        if missing:
+            raise ListingError(404, f"no FFT for {[os.path.basename(p) for p in missing]}")
+
+        return {"fft_comparison": compare_spectra(series, resolution_hz)}
+
+    @octoprint.plugin.BlueprintPlugin.route("/fetch_run", methods=["POST"])
+    def on_api_fetch_run(self):
+        """
+        Downloads all files of a run from shared storage in background, i.e. a run recorded by another printer of the farm;
+        "RUN_FETCHED" is pushed to the UI once done.
+
+        Arguments (JSON):
+          - run: run hash
+        """
+        run_hash: str = (flask.request.json or {}).get("run", "")
+        if not re.fullmatch(r"[0-9a-zA-Z]+", run_hash):
+            flask.abort(400, description=f"invalid run {run_hash}")
+        if self.storage_sync is None:
+            flask.abort(404, description="no shared storage configured")
+        self.storage_sync.fetch_run(run_hash, on_done=self._on_run_fetched)
+        response = flask.jsonify(message="OK")
+        response.status_code = 202
+        return response
+
+    def _on_run_fetched(self, run_hash: str, fetched: int) -> None:
+        self._push_data_to_ui({"RUN_FETCHED": run_hash})
+        if fetched:
+            # derived files not stored by the other printer, i.e. of other FFT algorithms, are computed locally
+            self._queue_job(JobKind.DATA_PROCESSING, self._get_data_processing_parameters_snapshot())
+
+    def _fetch_from_storage(self, file_name: str) -> Optional[str]:
+        storage_sync = self.storage_sync
+        return storage_sync.fetch(file_name) if storage_sync is not None else None
+
+    @octoprint.plugin.BlueprintPlugin.route("/delete_run", methods=["POST"])
+    def on_api_delete_run(self):
+        """
+        Removes all files of a run from the plugin data folder in background; "RUN_DELETED" is pushed to the UI once done.
+        The run is kept in the shared storage unless requested explicitly, since other printers of the farm share it.
+
+        Arguments (JSON):
+          - run: run hash
+          - from_storage: optional, if true the run is removed from the shared storage too; requires the permission to delete files
+        """
+        run_hash: str = (flask.request.json or {}).get("run", "")
+        from_storage: bool = bool((flask.request.json or {}).get("from_storage", False))
+        if not re.fullmatch(r"[0-9a-zA-Z]+", run_hash):
+            flask.abort(400, description=f"invalid run {run_hash}")
+        if from_storage and not Permissions.FILES_DELETE.can():
+            flask.abort(403, description="deleting from the shared storage requires the permission to delete files")
+        if from_storage and self.storage_sync is None:
+            flask.abort(409, description="no shared storage configured")
+        if self.retention_manager is None:
+            flask.abort(503, description="retention manager not available yet")
+        if self.data_recording_runner.is_running() or self.data_processing_runner.is_running():
+            flask.abort(409, description="cannot delete while recording or data processing is running")
+        self.retention_manager.delete_run(run_hash, on_done=lambda deleted_run_hash, _removed: self._push_data_to_ui({"RUN_DELETED": deleted_run_hash}))
+        if from_storage:
+            self.storage_sync.delete_run(run_hash)
+        response = flask.jsonify(message="OK")
+        response.status_code = 202
+        return response
+
+    @octoprint.plugin.BlueprintPlugin.route("/get_spectrogram", methods=["GET"])
+    def on_api_get_spectrogram(self):
+        """
+        Time/frequency tile of the spectrogram of one stream axis.
+
+        Arguments:
+          - stream: stream file name, i.e. "axxel-30f9c95c-20231127-235625233-s000-ax-f010-z015.tsv"
+          - axis: "x", "y" or "z"
+          - start_s, stop_s: optional time range of the tile
+          - max_frequency_hz: optional upper frequency bound of the tile
+          - max_frames, max_bins: optional upper bound of the tile size; larger ranges are max-pooled
+        """
+        args = flask.request.args
+        stream: str = args.get("stream", "")
+        axis: str = args.get("axis", "x")
+        if axis not in ["x", "y", "z"]:
+            flask.abort(400, description=f"invalid axis {axis}")
+        if os.path.basename(stream) != stream or not stream.startswith(f"{self.OUTPUT_STREAM_FILE_NAME_PREFIX}-") or not re.search(DATA_FILE_PATTERN, stream):
+            flask.abort(400, description=f"invalid stream {stream}")
+
+        from octoprint_accelerometer.spectrogram import get_spectrogram_tile, load_spectrogram, spectrogram_file_name
+        path = os.path.join(self.get_plugin_data_folder(), spectrogram_file_name(
+            self.OUTPUT_SPECTROGRAM_FILE_NAME_PREFIX, stream, self.OUTPUT_STREAM_FILE_NAME_PREFIX, self.spectrogram_window_size, self.spectrogram_hop_size, axis))
+        if not os.path.isfile(path):
+            flask.abort(404, description=f"no spectrogram for {stream} axis {axis}")
+
+        tile = get_spectrogram_tile(load_spectrogram(path),
+                                    start_s=args.get("start_s", None, type=float),
+                                    stop_s=args.get("stop_s", None, type=float),
+                                    max_frequency_hz=args.get("max_frequency_hz", None, type=float),
+                                    max_frames=min(args.get("max_frames", 512, type=int), 2048),
+                                    max_bins=min(args.get("max_bins", 256, type=int), 1024))
+        return flask.jsonify({f"spectrogram": tile})
+
+    @octoprint.plugin.BlueprintPlugin.route("/get_fft_variants", methods=["GET"])
+    def on_api_get_fft_variants(self):
+        """
+        Spectra of all axes of one stream, one per decomposition algorithm, so that the UI can switch in between them
+        without further requests.
+
+        Arguments:
+          - stream: stream file name, i.e. "axxel-30f9c95c-20231127-235625233-s000-ax-f010-z015.tsv"
+          - algorithms: optional comma separated algorithms, i.e. "hann,flattop"; all computed ones if omitted
+        """
+        args = flask.request.args
+        stream: str = args.get("stream", "")
+        if os.path.basename(stream) != stream or not stream.startswith(f"{self.OUTPUT_STREAM_FILE_NAME_PREFIX}-") or not re.search(DATA_FILE_PATTERN, stream):
+            flask.abort(400, description=f"invalid stream {stream}")
+        algorithms: Optional[List[str]] = [a for a in args.get("algorithms", "").split(",") if a] or None
+        from octoprint_accelerometer.fft_variants import FFT_WINDOWS, fft_variants_file_name, get_fft_variants
+        unknown = [a for a in algorithms or [] if a not in FFT_WINDOWS]
+        if unknown:
+            flask.abort(400, description=f"unknown algorithms {unknown}, expected any of {list(FFT_WINDOWS.keys())}")
+
+        path = os.path.join(self.get_plugin_data_folder(), fft_variants_file_name(self.OUTPUT_FFT_VARIANTS_FILE_NAME_PREFIX, stream, self.OUTPUT_STREAM_FILE_NAME_PREFIX))
+        if not os.path.isfile(path):
+            flask.abort(404, description=f"no FFT variants for {stream}")
+        return flask.jsonify({f"fft_variants": get_fft_variants(path, algorithms)})
+
+    @octoprint.plugin.BlueprintPlugin.route("/get_feature_trends", methods=["GET"])
+    def on_api_get_feature_trends(self):
+        """
+        Time series of the dominant resonance per stream from the feature catalog.
+
+        Arguments:
+          - axis: FFT axis the features were extracted from: "x", "y" or "z"
+          - since, until: optional recording time bounds in seconds since epoch
+          - run: optional run hash
+        """
+        args = flask.request.args
+        axis: str = args.get("axis", "x")
+        if axis not in ["x", "y", "z"]:
+            flask.abort(400, description=f"invalid axis {axis}")
+        if self.feature_catalog is None:
+            flask.abort(503, description="feature catalog not available yet")
+        trends = self.feature_catalog.query_trends(axis,
+                                                   since_ts=args.get("since", None, type=float),
+                                                   until_ts=args.get("until", None, type=float),
+                                                   run_hash=args.get("run", None))
+        return flask.jsonify({f"feature_trends": trends})
+
+    def _get_data_sets(self, run_hash: Optional[str] = None, with_details: bool = True) -> DataSets:
+        """
+        :param run_hash: restrict to the given run; all runs if None
+        :param with_details: whether to assign FFT files to their streams and to stat the files
+        :return: structured listing of run, sequence, stream and FFT files
+        """
+        run_pattern = ".*" if run_hash is None else f"{re.escape(run_hash)}-.*"
+        # without details FFTs of one axis suffice to find streams whose raw data was evicted
+        fft_pattern = f"{run_pattern}{DATA_FILE_PATTERN}" if with_details else f"{run_pattern}-x{DATA_FILE_PATTERN}"
+        fs_stream = FileSelector(os.path.join(self.get_plugin_data_folder(), f"{self.OUTPUT_STREAM_FILE_NAME_PREFIX}-{run_pattern}{DATA_FILE_PATTERN}"))
+        fs_fft = FileSelector(os.path.join(self.get_plugin_data_folder(), f"{self.OUTPUT_FFT_FILE_NAME_PREFIX}-{fft_pattern}"))
+        files_meta_data_stream: List[Tuple[File, FilenameMetaStream]] = [(f, FilenameMetaStream().from_filename(uncompressed_name(f.filename_ext))) for f in fs_stream.filter()]
+        files_meta_data_fft: List[Tuple[File, FilenameMetaFft]] = [(f, FilenameMetaFft().from_filename(uncompressed_name(f.filename_ext))) for f in fs_fft.filter()]
         data_sets: DataSets = DataSets()
 
         # append all streams
@@ -177,23 +594,28 @@ class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
             if sequence_nr not in data_sets.runs[run_hash].sequences.keys():
                 data_sets.runs[run_hash].sequences[sequence_nr] = SequenceMeta()
             if stream_hash not in data_sets.runs[run_hash].sequences[sequence_nr].streams.keys():
-                data_sets.runs[run_hash].sequences[sequence_nr].streams[stream_hash] = StreamMeta(file_meta, filename_meta)
+                data_sets.runs[run_hash].sequences[sequence_nr].streams[stream_hash] = StreamMeta(
+                    file_meta, filename_meta, self._stat_file(file_meta) if with_details else None, self._read_summary(file_meta.filename_ext) if with_details else None)
 
-        # append all FFTs to their respective stream
+        # append streams whose raw data was evicted by the retention policy, known by their FFTs only
         for file_meta, filename_meta in files_meta_data_fft:
             run_hash, sequence_nr, stream_hash = filename_meta.run_hash, filename_meta.sequence_nr, filename_meta.stream_hash
             if run_hash not in data_sets.runs.keys():
-                self._logger.warning(f"failed to assign orphaned FFT file={file_meta.filename_ext} to run, run_hash={run_hash} unknown")
-                continue
+                data_sets.runs[run_hash] = RunMeta()
             if sequence_nr not in data_sets.runs[run_hash].sequences.keys():
-                self._logger.warning(f"failed to assign orphaned FFT file={file_meta.filename_ext} to sequence, sequence_nr={sequence_nr} unknown")
-                continue
+                data_sets.runs[run_hash].sequences[sequence_nr] = SequenceMeta()
             if stream_hash not in data_sets.runs[run_hash].sequences[sequence_nr].streams.keys():
-                self._logger.warning(f"failed to assign orphaned FFT file={file_meta.filename_ext} to stream, stream_hash={stream_hash} unknown")
-                continue
+                stem = data_file_stem(file_meta.filename_ext).removeprefix(f"{self.OUTPUT_FFT_FILE_NAME_PREFIX}-").removesuffix(f"-{filename_meta.fft_axis}")
+                stream_file = f"{self.OUTPUT_STREAM_FILE_NAME_PREFIX}-{stem}.tsv"
+                data_sets.runs[run_hash].sequences[sequence_nr].streams[stream_hash] = StreamMeta(
+                    None, FilenameMetaStream().from_filename(stream_file), None, self._read_summary(stream_file) if with_details else None, evicted_file=stream_file)
+
+        # append all FFTs to their respective stream
+        for file_meta, filename_meta in files_meta_data_fft if with_details else []:
+            run_hash, sequence_nr, stream_hash = filename_meta.run_hash, filename_meta.sequence_nr, filename_meta.stream_hash
             fft_key: str = filename_meta.fft_axis
             if fft_key not in data_sets.runs[run_hash].sequences[sequence_nr].streams[stream_hash].ffts.keys():
-                data_sets.runs[run_hash].sequences[sequence_nr].streams[stream_hash].ffts[fft_key] = FftMeta(file_meta, filename_meta)
+                data_sets.runs[run_hash].sequences[sequence_nr].streams[stream_hash].ffts[fft_key] = FftMeta(file_meta, filename_meta, self._stat_file(file_meta))
 
         # store first and last timestamp of run
         for run in data_sets.runs.values():
@@ -210,20 +632,69 @@ class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
                         youngest_ts = ts
                         run.stopped = Timestamp(meta.year, meta.month, meta.day, meta.hour, meta.minute, meta.second, meta.milli_second)
 
-        return flask.jsonify({f"data_sets": data_sets})
+        return data_sets
+
+    def _stat_file(self, file: File) -> FileStat:
+        """
+        Size and modification time let clients detect whether their cached copy of a file is still valid.
+        """
+        stat = os.stat(os.path.join(self.get_plugin_data_folder(), file.filename_ext))
+        return FileStat(stat.st_size, stat.st_mtime)
+
+    def _read_summary(self, stream_file_name: str) -> Optional[StreamSummary]:
+        """
+        :return: summary of the stream as written by the recording or post-processing; None if not (yet) computed
+        """
+        from octoprint_accelerometer.stream_summary import read_stream_summary, summary_file_name
+        return read_stream_summary(os.path.join(self.get_plugin_data_folder(), summary_file_name(
+            self.OUTPUT_SUMMARY_FILE_NAME_PREFIX, stream_file_name, self.OUTPUT_STREAM_FILE_NAME_PREFIX)))
+
+    def _run_file_prefixes(self) -> List[str]:
+        """
+        :return: prefixes of all files that belong to a run
+        """
+        return [self.OUTPUT_STREAM_FILE_NAME_PREFIX,
+                self.OUTPUT_FFT_FILE_NAME_PREFIX,
+                self.OUTPUT_SPECTROGRAM_FILE_NAME_PREFIX,
+                self.OUTPUT_FFT_VARIANTS_FILE_NAME_PREFIX,
+                self.OUTPUT_SUMMARY_FILE_NAME_PREFIX]
+
+    def _on_file_served(self, file_name: str) -> None:
+        if self.retention_manager is not None:
+            self.retention_manager.mark_file_viewed(file_name)
 
     def route_hook(self, _server_routes, *_args, **_kwargs):
+        from octoprint.server import app
+
         return [
             (r"/download/(.*)",
-             LargeResponseHandler,
+             DataFileHandler,
              dict(path=self.get_plugin_data_folder(),
-                  mime_type_guesser=lambda *args, **kwargs: "text/plain",
-                  stream_body=True,
-                  as_attachment=False,
                   path_validation=path_validation_factory(
-                      lambda path: not is_hidden_path(path), status_code=404)
+                      lambda path: not is_hidden_path(path), status_code=404),
+                  on_file_served=self._on_file_served,
+                  fetch_missing=self._fetch_from_storage
                   )
-             )
+             ),
+            (r"/(get_files_listing|get_stream_files_listing|get_fft_files_listing|get_data_listing|get_runs_listing|get_run_listing|get_stored_runs_listing|get_fft_comparison)",
+             ListingHandler,
+             dict(listings={"get_files_listing": self._list_files,
+                            "get_stream_files_listing": self._list_stream_files,
+                            "get_fft_files_listing": self._list_fft_files,
+                            "get_data_listing": self._list_data,
+                            "get_runs_listing": self._list_runs,
+                            "get_run_listing": self._list_run,
+                            "get_stored_runs_listing": self._list_stored_runs,
+                            "get_fft_comparison": self._compare_ffts},
+                  executor=self.listing_executor,
+                  access_validation=access_validation_factory(app, permission_validator, Permissions.FILES_LIST))
+             ),
+            (r"/export/([^/]+)\.zip",
+             RunExportHandler,
+             dict(path=self.get_plugin_data_folder(),
+                  file_prefixes=self._run_file_prefixes(),
+                  access_validation=access_validation_factory(app, permission_validator, Permissions.FILES_DOWNLOAD))
+             ),
         ]
 
     def get_template_vars(self):
@@ -274,18 +745,126 @@ class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
             sequence_separation_s=0.1,
             step_separation_s=0.1,
             do_dry_run=False,
+            controller_simulator_enabled=False,
+            controller_simulator_fifo_overflow_after_samples=0,
+            controller_simulator_garbage_response_after_samples=0,
+            chart_renderer="canvas",
+            spectrogram_window_size=128,
+            spectrogram_hop_size=16,
+            fft_algorithms=list(FFT_ALGORITHMS),
+            data_compression_enabled=False,
+            data_compression_level=6,
+            retention_max_size_mb=0,
+            retention_max_age_days=0,
+            data_processing_pause_while_printing=True,
+            adaptive_sweep_fine_step_frequency_hz=1,
+            adaptive_sweep_resonances_count=2,
+            storage_backend="none",
+            storage_directory_path="",
+            storage_s3_bucket="",
+            storage_s3_key_prefix="",
+            storage_s3_endpoint_url="",
+            storage_s3_region="",
+            storage_s3_access_key_id="",
+            storage_s3_secret_access_key="",
         )
 
+    def get_settings_restricted_paths(self):
+        return dict(admin=[["storage_s3_access_key_id"], ["storage_s3_secret_access_key"]])
+
     def on_settings_save(self, data):
         octoprint.plugin.SettingsPlugin.on_settings_save(self, data)
         self._update_members_from_settings()
+        self._update_controller_simulator()
+        if self.retention_manager is not None:
+            self.retention_manager.max_size_mb = self.retention_max_size_mb
+            self.retention_manager.max_age_days = self.retention_max_age_days
+        self._update_storage_sync()
+        self._update_data_processing_throttle()
 
     def on_after_startup(self):
+        startup_ts = time.perf_counter()
         self._update_members_from_settings()
+        self._update_controller_simulator()
         self._update_seen_devices()
+        self.feature_catalog = FeatureCatalog(os.path.join(self.get_plugin_data_folder(), self.FEATURE_CATALOG_FILE_NAME))
+        self.retention_manager = RetentionManager(
+            logger=self._logger,
+            data_dir=self.get_plugin_data_folder(),
+            stream_file_prefix=self.OUTPUT_STREAM_FILE_NAME_PREFIX,
+            file_prefixes=self._run_file_prefixes(),
+            views_file_name=self.RETENTION_VIEWS_FILE_NAME,
+            max_size_mb=self.retention_max_size_mb,
+            max_age_days=self.retention_max_age_days,
+            can_evict=lambda name: self.storage_sync is None or self.storage_sync.is_uploaded(name))
+        self._update_storage_sync()
         self.data_recording_runner = self._construct_new_step_series_runner()
         self.data_processing_runner = self._construct_new_data_processing_runner()
-        self._start_data_processing()
+        self._update_data_processing_throttle()
+        self.job_queue = JobQueue(
+            logger=self._logger,
+            path=os.path.join(self.get_plugin_data_folder(), self.JOB_QUEUE_FILE_NAME),
+            on_change=lambda jobs: self._push_data_to_ui({"JOB_QUEUE": [j.to_dict() for j in jobs]}))
+        # processing imports the analysis modules, thus it is only started if there is anything to process
+        if self._has_unprocessed_streams():
+            self._queue_job(JobKind.DATA_PROCESSING, self._get_data_processing_parameters_snapshot())
+        else:
+            self._dispatch_jobs()
+        self._logger.info(f"startup: import took {self.import_duration_s or 0.0:.3f}s, "
+                          f"after startup took {time.perf_counter() - startup_ts:.3f}s, {format_resource_usage()}")
+
+    def on_shutdown(self):
+        self.listing_executor.shutdown()
+        if self.storage_sync is not None:
+            self.storage_sync.shutdown()
+        # persists the views of all runs, so that eviction ranks them correctly after restart
+        if self.retention_manager is not None:
+            self.retention_manager.shutdown()
+
+    def _stream_stems(self) -> List[str]:
+        stream_prefix = f"{self.OUTPUT_STREAM_FILE_NAME_PREFIX}-"
+        return sorted({data_file_stem(f) for f in os.listdir(self.get_plugin_data_folder())
+                       if f.startswith(stream_prefix) and not is_hidden_path(f) and re.search(DATA_FILE_PATTERN, f)})
+
+    def _persist_processed_streams(self, parameters: Dict[str, Any]) -> None:
+        """
+        Records the streams all processing steps completed for, along with the processing parameters.
+
+        :param parameters: parameters the processing ran with
+        """
+        path = os.path.join(self.get_plugin_data_folder(), self.PROCESSED_STREAMS_FILE_NAME)
+        temp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+        try:
+            with open(temp_path, "w") as file:
+                json.dump(dict(parameters=parameters, streams=self._stream_stems()), file)
+            os.replace(temp_path, path)
+        except OSError as e:
+            self._logger.warning(f"failed to persist processed streams: {e}")
+
+    def _has_unprocessed_streams(self) -> bool:
+        """
+        Cheap check on file names only, against the streams recorded by the last finished processing:
+        a stream not processed since, or processing parameters that changed since, require processing.
+        This covers all steps, i.e. summaries, spectrograms, FFT variants of the enabled algorithms and the feature catalog.
+        """
+        stream_stems = self._stream_stems()
+        if not stream_stems:
+            return False
+        try:
+            with open(os.path.join(self.get_plugin_data_folder(), self.PROCESSED_STREAMS_FILE_NAME), "r") as file:
+                processed = json.load(file)
+            if processed["parameters"] != self._get_data_processing_parameters_snapshot():
+                return True
+            processed_stems = set(processed["streams"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return True
+        return any(stem not in processed_stems for stem in stream_stems)
+
+    def on_event(self, event, payload):
+        if Events.PRINTER_STATE_CHANGED == event:
+            self._update_data_processing_throttle()
+            # queued recordings wait for the printer to become ready
+            self._dispatch_jobs()
 
     def get_assets(self):
         return {"js": ["js/octoprint_accelerometer.js",
@@ -340,6 +919,8 @@ class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
             if hasattr(self, k):
                 self._update_member_from_str_value(k, v)
         self._compute_start_points()
+        if self.controller_simulator is not None:
+            self.controller_simulator.output_data_rate_hz = self.sensor_output_data_rate_hz
 
     def _update_members_from_settings(self) -> None:
         self._logger.debug("xxx update from settings ...")
@@ -375,9 +956,52 @@ class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
         self.sequence_separation_s = self._settings.get_float(["sequence_separation_s"])
         self.step_separation_s = self._settings.get_float(["step_separation_s"])
         self.do_dry_run = self._settings.get_boolean(["do_dry_run"])
+        self.controller_simulator_enabled = self._settings.get_boolean(["controller_simulator_enabled"])
+        self.controller_simulator_fifo_overflow_after_samples = self._settings.get_int(["controller_simulator_fifo_overflow_after_samples"])
+        self.controller_simulator_garbage_response_after_samples = self._settings.get_int(["controller_simulator_garbage_response_after_samples"])
+        self.spectrogram_window_size = self._settings.get_int(["spectrogram_window_size"])
+        self.spectrogram_hop_size = self._settings.get_int(["spectrogram_hop_size"])
+        # unknown algorithms are reported by the runner, validating here would import the analysis modules on startup
+        self.fft_algorithms = [a for a in self._settings.get(["fft_algorithms"]) if a in FFT_ALGORITHMS]
+        self.data_compression_enabled = self._settings.get_boolean(["data_compression_enabled"])
+        self.data_compression_level = self._settings.get_int(["data_compression_level"])
+        self.retention_max_size_mb = self._settings.get_int(["retention_max_size_mb"])
+        self.retention_max_age_days = self._settings.get_int(["retention_max_age_days"])
+        self.data_processing_pause_while_printing = self._settings.get_boolean(["data_processing_pause_while_printing"])
+        self.adaptive_sweep_fine_step_frequency_hz = self._settings.get_int(["adaptive_sweep_fine_step_frequency_hz"])
+        self.adaptive_sweep_resonances_count = self._settings.get_int(["adaptive_sweep_resonances_count"])
+        self.storage_backend = self._settings.get(["storage_backend"])
+        self.storage_directory_path = self._settings.get(["storage_directory_path"])
+        self.storage_s3_bucket = self._settings.get(["storage_s3_bucket"])
+        self.storage_s3_key_prefix = self._settings.get(["storage_s3_key_prefix"])
+        self.storage_s3_endpoint_url = self._settings.get(["storage_s3_endpoint_url"])
+        self.storage_s3_region = self._settings.get(["storage_s3_region"])
+        self.storage_s3_access_key_id = self._settings.get(["storage_s3_access_key_id"])
+        self.storage_s3_secret_access_key = self._settings.get(["storage_s3_secret_access_key"])
 
         self._compute_start_points()
 
+    def _update_controller_simulator(self) -> None:
+        """
+        Starts, reconfigures or stops the controller simulator according to the current settings.
+        """
+        if not self.controller_simulator_enabled:
+            if self.controller_simulator is not None:
+                self.controller_simulator.stop()
+                self.controller_simulator = None
+            return
+
+        if self.controller_simulator is None:
+            self.controller_simulator = ControllerSimulator(logger=self._logger)
+        self.controller_simulator.output_data_rate_hz = self.sensor_output_data_rate_hz
+        self.controller_simulator.fifo_overflow_after_samples = self.controller_simulator_fifo_overflow_after_samples
+        self.controller_simulator.garbage_response_after_samples = self.controller_simulator_garbage_response_after_samples
+        try:
+            self.controller_simulator.start()
+        except (ImportError, OSError) as e:
+            self._logger.error(f"controller simulator disabled: {e}")
+            self.controller_simulator = None
+
     def _compute_start_points(self) -> None:
         self.axis_x_sampling_start = Point3D(self.anchor_point_coord_x_mm - int(self.distance_x_mm // 2),
                                              self.anchor_point_coord_y_mm,
@@ -439,7 +1063,17 @@ class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
             output_dir=self.get_plugin_data_folder(),
             output_file_prefix=self.OUTPUT_FFT_FILE_NAME_PREFIX,
             output_overwrite=False,
-            do_dry_run=False)
+            do_dry_run=False,
+            summary_output_file_prefix=self.OUTPUT_SUMMARY_FILE_NAME_PREFIX,
+            spectrogram_output_file_prefix=self.OUTPUT_SPECTROGRAM_FILE_NAME_PREFIX,
+            spectrogram_window_size=self.spectrogram_window_size,
+            spectrogram_hop_size=self.spectrogram_hop_size,
+            fft_variants_output_file_prefix=self.OUTPUT_FFT_VARIANTS_FILE_NAME_PREFIX,
+            fft_algorithms=self.fft_algorithms,
+            feature_catalog=self.feature_catalog,
+            compression_enabled=self.data_compression_enabled,
+            compression_level=self.data_compression_level,
+            on_progress_callback=lambda progress: self._push_data_to_ui({"DATA_PROCESSING_PROGRESS": dataclasses.asdict(progress)}))
 
     def _construct_new_step_series_runner(self) -> RecordStepSeriesRunner:
         return RecordStepSeriesRunner(
@@ -463,10 +1097,11 @@ class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
             step_zeta_em2=self.step_zeta_em2,
             output_file_prefix=self.OUTPUT_STREAM_FILE_NAME_PREFIX,
             output_dir=self.get_plugin_data_folder(),
+            summary_file_prefix=self.OUTPUT_SUMMARY_FILE_NAME_PREFIX,
             do_dry_run=self.do_dry_run)
 
-    def _push_data_to_ui(self, data: Dict[str, str]):
-        self._plugin_manager.send_plugin_message(self._identifier, data)
+    def _push_data_to_ui(self, data: Dict[str, Any]):
+        self.ui_event_bus.publish(data)
 
     def _push_recording_event_to_ui(self, event: RecordingEventType):
         self._push_data_to_ui({RecordingEventType.__name__: event.name})
@@ -476,10 +1111,36 @@ class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
 
     def on_recording_callback(self, event: RecordingEventType):
         self._push_recording_event_to_ui(event)
+        if RecordingEventType.PROCESSING == event:
+            self.storage_pause_gate.pause()
         if RecordingEventType.PROCESSING_FINISHED == event:
             last_run_duration_s = self.data_recording_runner.get_last_run_duration_s()
             if last_run_duration_s:
                 self._push_data_to_ui({"LAST_DATA_RECORDING_DURATION_S": f"{last_run_duration_s}"})
+            if self.controller_simulator is not None:
+                self._logger.info(f"controller simulator statistics: {self.controller_simulator.statistics}, "
+                                  f"samples_per_s={self.controller_simulator.statistics.samples_per_s}")
+
+        if event in [RecordingEventType.PROCESSING_FINISHED, RecordingEventType.FIFO_OVERRUN, RecordingEventType.UNHANDLED_EXCEPTION, RecordingEventType.ABORTED]:
+            try:
+                # refined while the job is still running, so that no other job is started meanwhile;
+                # fine sweeps are queued before the data processing, so that they are started next
+                job = self.job_queue.running() if self.job_queue is not None else None
+                if RecordingEventType.PROCESSING_FINISHED == event and job is not None and JobKind.RECORDING == job.kind and job.parameters.get("adaptive_sweep"):
+                    self._refine_adaptive_sweep(job)
+            except Exception as e:
+                self._logger.exception(f"failed to refine adaptive sweep: {e}")
+            finally:
+                recording_job = self._finish_job(JobKind.RECORDING, event.name, RecordingEventType.PROCESSING_FINISHED == event, RecordingEventType.ABORTED == event)
+                self.storage_pause_gate.resume()
+                if self.storage_sync is not None:
+                    self.storage_sync.schedule_upload()
+                # streams recorded so far are processed in any case, even if the recording did not finish;
+                # a data processing job that is queued or running picks them up already
+                if recording_job is not None and self.job_queue.pending(JobKind.DATA_PROCESSING) is None:
+                    self._queue_job(JobKind.DATA_PROCESSING, self._get_data_processing_parameters_snapshot())
+                else:
+                    self._dispatch_jobs()
 
     def on_data_processing_callback(self, event: DataProcessingEventType):
         self._push_data_processing_event_to_ui(event)
@@ -496,44 +1157,212 @@ class OctoprintAccelerometerPlugin(octoprint.plugin.StartupPlugin,
             if skipped is not None:
                 self._push_data_to_ui({"FILES_SKIPPED_COUNT": f"{skipped}"})
 
-    def _start_recording(self):
+            self._logger.info(f"data processing finished: {format_resource_usage()}")
+            if self.storage_sync is not None:
+                self.storage_sync.schedule_upload()
+
+            # streams of a run being recorded must not be evicted; processing outputs may have been rewritten in place
+            if self.retention_manager is not None and not self.data_recording_runner.is_running():
+                self.retention_manager.enforce(
+                    on_done=lambda evicted_runs: self._push_data_to_ui({"RUNS_EVICTED": ",".join(evicted_runs)}) if evicted_runs else None,
+                    restat_prefixes=[p for p in self._run_file_prefixes() if p != self.OUTPUT_STREAM_FILE_NAME_PREFIX])
+
+        if event in [DataProcessingEventType.PROCESSING_FINISHED, DataProcessingEventType.UNHANDLED_EXCEPTION, DataProcessingEventType.ABORTED]:
+            job = self.job_queue.running() if self.job_queue is not None else None
+            if DataProcessingEventType.PROCESSING_FINISHED == event and job is not None and JobKind.DATA_PROCESSING == job.kind:
+                self._persist_processed_streams(job.parameters)
+            self._finish_job(JobKind.DATA_PROCESSING, event.name, DataProcessingEventType.PROCESSING_FINISHED == event, DataProcessingEventType.ABORTED == event)
+            self._dispatch_jobs()
+
+    def _get_recording_parameters_snapshot(self, overrides: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        :param overrides: parameters that differ from the current ones
+        :return: current recording parameters updated by overrides
+        :raises KeyError: if an override is no recording parameter
+        :raises ValueError: if an override cannot be converted to the parameter's type
+        """
+        parameters: Dict[str, Any] = {p: getattr(self, p) for p in self._get_ui_exposed_parameters() if p not in ["devices_seen", "device"]}
+        for k, v in overrides.items():
+            if k not in parameters:
+                raise KeyError(k)
+            parameters[k] = type(parameters[k])(v)
+        return parameters
+
+    def _get_data_processing_parameters_snapshot(self) -> Dict[str, Any]:
+        return dict(spectrogram_window_size=self.spectrogram_window_size,
+                    spectrogram_hop_size=self.spectrogram_hop_size,
+                    fft_algorithms=list(self.fft_algorithms),
+                    data_compression_enabled=self.data_compression_enabled,
+                    data_compression_level=self.data_compression_level)
+
+    def _queue_job(self, kind: JobKind, parameters: Dict[str, Any], priority: Optional[int] = None) -> Job:
+        # data processing handles all unprocessed streams at once: one queued job suffices
+        job = self.job_queue.enqueue(kind, parameters, priority, unique=JobKind.DATA_PROCESSING == kind)
+        self._dispatch_jobs()
+        return job
+
+    def _finish_job(self, kind: JobKind, result: str, finished: bool, aborted: bool) -> Optional[Job]:
+        if self.job_queue is None:
+            return None
+        return self.job_queue.finish(kind, JobState.FINISHED if finished else JobState.ABORTED if aborted else JobState.FAILED, result)
+
+    def _get_streams_recorded_since(self, since_ts: float) -> List[str]:
+        fs = FileSelector(os.path.join(self.get_plugin_data_folder(), f"{self.OUTPUT_STREAM_FILE_NAME_PREFIX}-.*{DATA_FILE_PATTERN}"))
+        return [f.filename_ext for f in fs.filter() if os.stat(os.path.join(self.get_plugin_data_folder(), f.filename_ext)).st_mtime >= since_ts]
+
+    def _refine_adaptive_sweep(self, job: Job) -> None:
+        """
+        Second pass of an adaptive sweep: measures the response of each frequency of the coarse sweep at its excitation
+        frequency and queues fine sweeps only around the strongest resonances.
+        Fine sweeps inherit the parameters and priority of the coarse sweep and are not refined further.
+        Invoked from the recording worker once the coarse sweep is recorded, before its job is finished.
+
+        :param job: running coarse sweep whose recording just finished
+        """
+        from octoprint_accelerometer.adaptive_sweep import find_resonances, plan_refinement, sweep_responses
+
+        adaptive: Dict[str, int] = job.parameters["adaptive_sweep"]
+        responses = sweep_responses(self._logger, self.get_plugin_data_folder(), self._get_streams_recorded_since(job.started_ts or 0.0))
+        # the strongest resonances of each axis; fine sweeps record all axes of the coarse sweep
+        resonances = sorted({f for axis_responses in responses.values() for f in find_resonances(axis_responses, adaptive["resonances_count"])})
+        sweeps = plan_refinement(resonances,
+                                 job.parameters["step_frequency_hz"],
+                                 adaptive["fine_step_frequency_hz"],
+                                 job.parameters["start_frequency_hz"],
+                                 job.parameters["stop_frequency_hz"])
+        for sweep in sweeps:
+            parameters = {k: v for k, v in job.parameters.items() if k != "adaptive_sweep"}
+            parameters.update(start_frequency_hz=sweep.start_frequency_hz,
+                              stop_frequency_hz=sweep.stop_frequency_hz,
+                              step_frequency_hz=sweep.step_frequency_hz,
+                              data_remove_before_run=False,
+                              adaptive_sweep_of=job.job_id)
+            self.job_queue.enqueue(JobKind.RECORDING, parameters, job.priority)
+
+        coarse_count = len({f for axis_responses in responses.values() for f in axis_responses})
+        fine_count = sum(s.frequencies_count() for s in sweeps)
+        dense_count = (job.parameters["stop_frequency_hz"] - job.parameters["start_frequency_hz"]) // max(1, adaptive["fine_step_frequency_hz"]) + 1
+        self._logger.info(f"adaptive sweep {job.job_id}: resonances at {resonances} Hz, "
+                          f"{coarse_count} coarse and {fine_count} fine frequencies instead of {dense_count} at fine resolution")
+        self._push_data_to_ui({"ADAPTIVE_SWEEP": dict(job_id=job.job_id,
+                                                      resonances_hz=resonances,
+                                                      fine_sweeps=[dataclasses.asdict(s) for s in sweeps],
+                                                      frequencies_count=coarse_count + fine_count,
+                                                      dense_frequencies_count=dense_count)})
+
+    def _is_job_runnable(self, job: Job) -> bool:
+        if JobKind.RECORDING == job.kind:
+            return self._printer.is_operational() and not self._printer.is_printing()
+        return True
+
+    def _dispatch_jobs(self) -> None:
+        """
+        Starts the next runnable job unless a job is running already.
+        Recordings wait in the queue while the printer is not ready; jobs queued behind are started meanwhile.
+        """
+        if self.job_queue is None:
+            return
+        with self._job_dispatch_lock:
+            if self.data_recording_runner.is_running() or self.data_processing_runner.is_running():
+                return
+            job = self.job_queue.start_next(self._is_job_runnable)
+        if job is None:
+            return
+        if JobKind.RECORDING == job.kind:
+            self._start_recording(job.parameters)
+        else:
+            self._start_data_processing(job.parameters)
+
+    def _update_storage_sync(self) -> None:
+        """
+        (Re-)constructs the storage sync if the storage settings changed; files not stored yet are uploaded then.
+        """
+        storage_settings = (self.storage_backend, self.storage_directory_path,
+                            self.storage_s3_bucket, self.storage_s3_key_prefix, self.storage_s3_endpoint_url, self.storage_s3_region,
+                            self.storage_s3_access_key_id, self.storage_s3_secret_access_key)
+        if storage_settings == self._storage_settings:
+            return
+        self._storage_settings = storage_settings
+        if self.storage_sync is not None:
+            self.storage_sync.shutdown()
+            self.storage_sync = None
+        try:
+            backend = create_storage_backend(*storage_settings)
+        except StorageError as e:
+            self._logger.error(f"shared storage disabled: {e}")
+            return
+        if backend is None:
+            return
+        self.storage_sync = StorageSync(
+            logger=self._logger,
+            backend=backend,
+            data_dir=self.get_plugin_data_folder(),
+            file_prefixes=self._run_file_prefixes(),
+            manifest_file_name=self.STORAGE_MANIFEST_FILE_NAME,
+            pause_gate=self.storage_pause_gate)
+        self._logger.info(f"shared storage: {self.storage_backend}")
+        self.storage_sync.schedule_upload()
+
+    def _update_data_processing_throttle(self) -> None:
+        """
+        Pauses data processing while a print is active, so that it does not compete with the printer communication;
+        resumes it once the printer is idle.
+        """
+        if self.data_processing_runner is None:
+            return
+        pause = self.data_processing_pause_while_printing and (self._printer.is_printing() or self._printer.is_paused())
+        if pause == self.data_processing_runner.is_paused():
+            return
+        if pause:
+            self.data_processing_runner.pause()
+        else:
+            self.data_processing_runner.resume()
+        self._logger.info(f"data processing {'paused while printing' if pause else 'resumed'}")
+        self._push_data_to_ui({"DATA_PROCESSING_PAUSED": pause})
+
+    def _start_recording(self, parameters: Dict[str, Any]):
+        """
+        :param parameters: snapshot as taken by :meth:`_get_recording_parameters_snapshot`
+        """
         self._push_recording_event_to_ui(RecordingEventType.STARTING)
 
         self._update_seen_devices()
         self.data_recording_runner.controller_serial_device = self.device
-        self.data_recording_runner.controller_record_timelapse_s = self.recording_timespan_s
-        self.data_recording_runner.sensor_odr_hz = self.sensor_output_data_rate_hz
+        self.data_recording_runner.controller_record_timelapse_s = parameters["recording_timespan_s"]
+        self.data_recording_runner.sensor_odr_hz = parameters["sensor_output_data_rate_hz"]
 
         # todo acceleration
         # todo speed
 
-        self.data_recording_runner.start_frequency_hz = self.start_frequency_hz
-        self.data_recording_runner.stop_frequency_hz = self.stop_frequency_hz
-        self.data_recording_runner.step_frequency_hz = self.step_frequency_hz
+        self.data_recording_runner.start_frequency_hz = parameters["start_frequency_hz"]
+        self.data_recording_runner.stop_frequency_hz = parameters["stop_frequency_hz"]
+        self.data_recording_runner.step_frequency_hz = parameters["step_frequency_hz"]
 
-        self.data_recording_runner.start_zeta_em2 = self.start_zeta_em2
-        self.data_recording_runner.stop_zeta_em2 = self.stop_zeta_em2
-        self.data_recording_runner.step_zeta_em2 = self.step_zeta_em2
+        self.data_recording_runner.start_zeta_em2 = parameters["start_zeta_em2"]
+        self.data_recording_runner.stop_zeta_em2 = parameters["stop_zeta_em2"]
+        self.data_recording_runner.step_zeta_em2 = parameters["step_zeta_em2"]
 
-        self.data_recording_runner.gcode_step_count = self.step_count
-        self.data_recording_runner.gcode_sequence_count = self.sequence_count
-        self.data_recording_runner.gcode_start_point_mm = (self.anchor_point_coord_x_mm, self.anchor_point_coord_y_mm, self.anchor_point_coord_z_mm)
-        self.data_recording_runner.gcode_axis = self._get_selected_axis_str()
-        self.data_recording_runner.gcode_distance_mm = self.distance_x_mm  # todo: x y z distances
+        self.data_recording_runner.gcode_step_count = parameters["step_count"]
+        self.data_recording_runner.gcode_sequence_count = parameters["sequence_count"]
+        self.data_recording_runner.gcode_start_point_mm = (parameters["anchor_point_coord_x_mm"], parameters["anchor_point_coord_y_mm"], parameters["anchor_point_coord_z_mm"])
+        self.data_recording_runner.gcode_axis = convert_axis_from_str("".join([ax for ax in "xyz" if parameters[f"do_sample_{ax}"]]))
+        self.data_recording_runner.gcode_distance_mm = parameters["distance_x_mm"]  # todo: x y z distances
 
-        self.data_recording_runner.do_dry_run = self.do_dry_run
+        self.data_recording_runner.do_dry_run = parameters["do_dry_run"]
 
-        if not self.data_recording_runner.is_running():
-            self.data_recording_runner.run()
-        else:
-            self._logger.warning("requested recording but recording task is still running")
+        self.data_recording_runner.run()
 
     def _abort_recording(self):
         self.data_recording_runner.stop()
 
-    def _start_data_processing(self):
+    def _start_data_processing(self, parameters: Dict[str, Any]):
+        """
+        :param parameters: snapshot as taken by :meth:`_get_data_processing_parameters_snapshot`
+        """
         self._push_data_processing_event_to_ui(DataProcessingEventType.STARTING)
-        if not self.data_processing_runner.is_running():
-            self.data_processing_runner.run()
-        else:
-            self._logger.warning("requested data processing but task is still running")
+        self.data_processing_runner.spectrogram_window_size = parameters["spectrogram_window_size"]
+        self.data_processing_runner.spectrogram_hop_size = parameters["spectrogram_hop_size"]
+        self.data_processing_runner.fft_algorithms = parameters.get("fft_algorithms", [])
+        self.data_processing_runner.compression_enabled = parameters["data_compression_enabled"]
+        self.data_processing_runner.compression_level = parameters["data_compression_level"]
+        self.data_processing_runner.run()
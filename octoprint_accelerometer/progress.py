@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+from dataclasses import replace
+from typing import Callable, Optional
+
+from octoprint_accelerometer.transfer_types import ProcessingProgress
+
+PROGRESS_REPORT_INTERVAL_S: float = 0.25
+"progress is reported at most that often, except at the beginning and end of each step"
+
+
+class ProgressTracker:
+    """
+    Collects the progress of a processing task that runs several steps one after the other, each over a list of files.
+
+    The task calls :meth:`begin_step` before each step, the step reports its file count by :meth:`set_files_total`
+    and calls :meth:`advance` before each file. Snapshots are reported rate limited to ``on_progress``
+    and can be polled by :meth:`snapshot` from any thread.
+    """
+
+    def __init__(self, on_progress: Optional[Callable[[ProcessingProgress], None]] = None):
+        """
+        :param on_progress: invoked from the processing thread with a snapshot of the progress
+        """
+        self.on_progress: Optional[Callable[[ProcessingProgress], None]] = on_progress
+        self._lock: threading.Lock = threading.Lock()
+        self._progress: ProcessingProgress = ProcessingProgress()
+        self._start_ts: float = 0.0
+        self._step_start_ts: float = 0.0
+        self._step_bytes_done: int = 0
+        self._current_file_bytes: int = 0
+        self._last_report_ts: float = 0.0
+
+    def snapshot(self) -> ProcessingProgress:
+        with self._lock:
+            progress = replace(self._progress)
+            if progress.running:
+                self._update_rates(progress, time.monotonic())
+            return progress
+
+    def _update_rates(self, progress: ProcessingProgress, now: float) -> None:
+        progress.elapsed_s = now - self._start_ts
+        step_elapsed_s = now - self._step_start_ts
+        if step_elapsed_s <= 0:
+            return
+        progress.files_per_s = progress.files_done / step_elapsed_s
+        progress.mb_per_s = self._step_bytes_done / (1024 * 1024) / step_elapsed_s
+        if progress.files_total is not None and progress.files_per_s > 0:
+            progress.eta_s = max(0, progress.files_total - progress.files_done) / progress.files_per_s
+        else:
+            progress.eta_s = None
+
+    def _report(self, force: bool = False) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_report_ts < PROGRESS_REPORT_INTERVAL_S:
+                return
+            self._last_report_ts = now
+            if self._progress.running:
+                self._update_rates(self._progress, now)
+            progress = replace(self._progress)
+        if self.on_progress is not None:
+            self.on_progress(progress)
+
+    def start(self, steps_count: int) -> None:
+        with self._lock:
+            self._start_ts = time.monotonic()
+            self._progress = ProcessingProgress(running=True, steps_count=steps_count)
+
+    def begin_step(self, step: str, step_index: int) -> None:
+        with self._lock:
+            self._step_start_ts = time.monotonic()
+            self._step_bytes_done = 0
+            self._current_file_bytes = 0
+            self._progress = replace(self._progress, step=step, step_index=step_index, files_done=0, files_total=None, current_file="",
+                                     files_per_s=0.0, mb_per_s=0.0, eta_s=None)
+        self._report(force=True)
+
+    def set_files_total(self, files_total: int) -> None:
+        with self._lock:
+            self._progress.files_total = files_total
+
+    def advance(self, file_name: str, path: Optional[str] = None) -> None:
+        """
+        Marks the previous file of the step done and file_name as current one.
+
+        :param path: file to account the throughput by its size
+        """
+        try:
+            size = os.path.getsize(path) if path is not None else 0
+        except OSError:
+            size = 0
+        with self._lock:
+            if self._progress.current_file:
+                self._progress.files_done += 1
+                self._step_bytes_done += self._current_file_bytes
+            self._progress.current_file = file_name
+            self._current_file_bytes = size
+        self._report()
+
+    def finish(self) -> None:
+        with self._lock:
+            if self._progress.current_file:
+                self._progress.files_done += 1
+                self._step_bytes_done += self._current_file_bytes
+            self._update_rates(self._progress, time.monotonic())
+            self._progress.running = False
+            self._progress.current_file = ""
+            self._progress.eta_s = None
+        self._report(force=True)
@@ -1,85 +1,77 @@
 import threading
 import time
 import traceback
+from concurrent.futures import Future
 from logging import Logger
 from typing import List, Literal, Callable, Optional
 from typing import Tuple
 
 from octoprint.printer import PrinterInterface
-from py3dpaxxel.controller.api import ErrorFifoOverflow, ErrorUnknownResponse
-from py3dpaxxel.controller.constants import OutputDataRateFromHz
-from py3dpaxxel.sampling_tasks.exception_task_wrapper import ExceptionTaskWrapper
-from py3dpaxxel.sampling_tasks.steps_series_runner import SamplingStepsSeriesRunner
 
 from octoprint_accelerometer.event_types import RecordingEventType
 from octoprint_accelerometer.py3dpaxxel_octo import Py3dpAxxelOcto
+from octoprint_accelerometer.worker import Worker
 
 
-class RecordStepSeriesTask(Callable):
+class RecordStepSeriesTask(Callable[[], RecordingEventType]):
     """
-    Wrapper that handles callbacks on task finished. Meant to be run by :class:`threading.Thread`.
+    Task run by a :class:`Worker`.
+
+    Once the runner returned, the written streams are summarized before the task returns its final event,
+    so that listings requested in response to the event already include the summaries.
     """
 
     def __init__(self,
                  logger: Logger,
                  runner: Callable,
-                 on_event_callback: Optional[Callable[[RecordingEventType.PROCESSING], None]]) -> None:
+                 summary_runner: Optional[Callable[[], Tuple[int, int, int, int]]]) -> None:
         self.logger: Logger = logger
         self.runner: Callable = runner
-        self.on_event_callback: Optional[Callable[[RecordingEventType.PROCESSING], None]] = on_event_callback
+        self.summary_runner: Optional[Callable[[], Tuple[int, int, int, int]]] = summary_runner
+
+    def __call__(self) -> RecordingEventType:
+        event = self._run()
+        self._summarize_streams()
+        return event
+
+    def _run(self) -> RecordingEventType:
+        from py3dpaxxel.controller.api import ErrorFifoOverflow, ErrorUnknownResponse
 
-    def __call__(self) -> None:
         try:
             ret = self.runner()
             if 0 == ret:
-                self._send_on_event_callback(RecordingEventType.PROCESSING_FINISHED)
+                return RecordingEventType.PROCESSING_FINISHED
             elif -1 == ret:
-                self._send_on_event_callback(RecordingEventType.ABORTED)
+                return RecordingEventType.ABORTED
             else:
-                self._send_on_event_callback(RecordingEventType.UNHANDLED_EXCEPTION)
+                return RecordingEventType.UNHANDLED_EXCEPTION
         except ErrorFifoOverflow as e:
             self.logger.error("controller reported FiFo overrun")
             self.logger.error(str(e))
             traceback.print_exception(e)
-            self._send_on_event_callback(RecordingEventType.FIFO_OVERRUN)
+            return RecordingEventType.FIFO_OVERRUN
 
         except ErrorUnknownResponse as e:
             self.logger.error("unknown response from controller")
             self.logger.error(str(e))
             traceback.print_exception(e)
-            self._send_on_event_callback(RecordingEventType.UNHANDLED_EXCEPTION)
+            return RecordingEventType.UNHANDLED_EXCEPTION
 
         except Exception as e:
             self.logger.error("unknown controller API error")
             self.logger.error(str(e))
             traceback.print_exception(e)
-            self._send_on_event_callback(RecordingEventType.UNHANDLED_EXCEPTION)
+            return RecordingEventType.UNHANDLED_EXCEPTION
 
-    def _send_on_event_callback(self, event: RecordingEventType):
-        if self.on_event_callback:
-            self.on_event_callback(event)
-
-
-class RecordStepSeriesBackgroundTask:
-    """
-    Task wrapper to catch exceptions when a task is run by :class:`threading.Thread` so that exceptions can be exposed to the parent thread.
-    """
-
-    def __init__(self, logger: Logger, task: RecordStepSeriesTask) -> None:
-        self.logger: Logger = logger
-        self.task: RecordStepSeriesTask = task
-        self.exception_wrapper: ExceptionTaskWrapper = ExceptionTaskWrapper(target=task)
-        self.thread: threading.Thread = threading.Thread(name="recording_series", target=self.exception_wrapper)
-        self.thread.daemon = True
-
-    def is_alive(self):
-        return self.thread.is_alive()
-
-    def start(self) -> None:
-        self.thread.start()
-
-    def join(self) -> None:
-        self.thread.join()
+    def _summarize_streams(self) -> None:
+        if not self.summary_runner:
+            return
+        try:
+            _ret, total, processed, _skipped = self.summary_runner()
+            self.logger.debug(f"summarized {processed} of {total} streams")
+        except Exception as e:
+            self.logger.error("failed to summarize streams")
+            self.logger.error(str(e))
 
 
 class RecordStepSeriesRunner:
@@ -108,6 +100,7 @@ class RecordStepSeriesRunner:
                  step_zeta_em2: int,
                  output_file_prefix: str,
                  output_dir: str,
+                 summary_file_prefix: str,
                  do_dry_run: bool,
                  do_abort_flag: threading.Event = threading.Event()):
         self.controller_response_error: bool = False
@@ -133,9 +126,10 @@ class RecordStepSeriesRunner:
         self._step_zeta_em2: int = step_zeta_em2
         self._output_file_prefix: str = output_file_prefix
         self._output_dir: str = output_dir
+        self._summary_file_prefix: str = summary_file_prefix
         self._do_dry_run: bool = do_dry_run
         self._do_abort_flag: threading.Event = do_abort_flag
-        self._background_task: Optional[RecordStepSeriesBackgroundTask] = None
+        self._worker: Worker = Worker(logger=logger, name="recording_series", abort_flag=do_abort_flag)
         self._background_task_start_timestamp: Optional[float] = None
         self._background_task_stop_timestamp: Optional[float] = None
 
@@ -275,6 +269,14 @@ class RecordStepSeriesRunner:
     def output_dir(self, output_dir: str):
         self._output_dir = output_dir
 
+    @property
+    def summary_file_prefix(self) -> str:
+        return self._summary_file_prefix
+
+    @summary_file_prefix.setter
+    def summary_file_prefix(self, summary_file_prefix: str):
+        self._summary_file_prefix = summary_file_prefix
+
     @property
     def do_dry_run(self) -> bool:
         return self._do_dry_run
@@ -284,7 +286,7 @@ class RecordStepSeriesRunner:
         self._do_dry_run = do_dry_run
 
     def is_running(self) -> bool:
-        return True if self._background_task is not None and self._background_task.is_alive() else False
+        return self._worker.is_busy()
 
     def task_execution_had_errors(self) -> bool:
         return self.controller_response_error or self.controller_response_error or self.unhandled_exception
@@ -293,96 +295,91 @@ class RecordStepSeriesRunner:
         if self.on_event_callback:
             self.on_event_callback(event)
 
-    def _send_on_thread_event_callback(self, event: RecordingEventType):
-        if event == RecordingEventType.PROCESSING_FINISHED:
-            self._thread_stop_timestamp = time.time()
-
-        if self.on_event_callback:
-            self.on_event_callback(event)
+    def _on_task_done(self, future: Future) -> None:
+        """
+        Invoked by the worker thread once the task returned; the worker is not running anymore at this point.
+        """
+        self._background_task_stop_timestamp = time.time()
+        try:
+            event = future.result()
+        except Exception as _e:
+            event = RecordingEventType.UNHANDLED_EXCEPTION
 
-        # TODO: force an early thread termination not by just terminating run().
-        #  Reason: Thread.is_alive() takes up to 30 seconds after run() terminated
-        #  to report not-alive. This works but sounds like a bug though.
-        if event in [RecordingEventType.PROCESSING_FINISHED,
-                     RecordingEventType.FIFO_OVERRUN,
-                     RecordingEventType.UNHANDLED_EXCEPTION,
-                     RecordingEventType.ABORTED]:
-            self.logger.info("recording thread terminated")
-            raise SystemExit()
+        self.logger.info(f"recording done: {event.name}")
+        self._send_on_event_callback(event)
 
     def stop(self) -> None:
-        self._do_abort_flag.set()
+        """
+        Requests the task to abort and returns immediately; ABORTED is sent once the task returned.
+        """
         self._send_on_event_callback(RecordingEventType.ABORTING)
-        if self._background_task:
-            try:
-                self._background_task.join()
-            except RuntimeError as _e:
-                self.logger.info("no running thread that can be stopped")
-            self._background_task = None
-        self._background_task_stop_timestamp = time.time()
-        self._send_on_event_callback(RecordingEventType.ABORTED)
+        if not self._worker.abort():
+            self.logger.info("no running task that can be stopped")
+            self._send_on_event_callback(RecordingEventType.ABORTED)
 
     def get_last_run_duration_s(self) -> Optional[float]:
         """
-        Returns the last known duration.
-
-        Note: Whenever this method is called, make sure to assert that the thread is not running.
-
-        This is-running check is skipped here on purpose.
-        Normally the child thread is the caller itself.
-        The call propagated indirectly through the plugin's callback that most likely called this method again.
-        In that case the thread is always running.
-
-        :return: the last known duration; None if unknown of thread is still running
+        :return: the last known duration; None if unknown or still running
         """
-        return None if not self._thread_stop_timestamp or not self._background_task_start_timestamp else self._thread_stop_timestamp - self._background_task_start_timestamp
+        return None if not self._background_task_stop_timestamp or not self._background_task_start_timestamp else self._background_task_stop_timestamp - self._background_task_start_timestamp
 
     def run(self) -> None:
-        py3dpaxxel_octo = Py3dpAxxelOcto(self.printer, self.logger)
         self.controller_fifo_overrun_error = False
         self.controller_response_error = False
         self.unhandled_exception = False
-        self._do_abort_flag.clear()
         self._background_task_stop_timestamp = None
 
-        if not self.printer.is_operational():
-            self.logger.warning("received request to start recording but printer is not operational")
-            return
-
+        # every failure to start must send an event, otherwise the job is never finished
         try:
+            # the sampling and summary modules pull in numpy, they are imported with the first recording
+            from py3dpaxxel.controller.constants import OutputDataRateFromHz
+            from py3dpaxxel.sampling_tasks.steps_series_runner import SamplingStepsSeriesRunner
+
+            from octoprint_accelerometer.stream_summary import StreamSummaryRunner
+
+            py3dpaxxel_octo = Py3dpAxxelOcto(self.printer, self.logger)
+
+            if not self.printer.is_operational():
+                self.logger.warning("received request to start recording but printer is not operational")
+                self._send_on_event_callback(RecordingEventType.UNHANDLED_EXCEPTION)
+                return
+
             self.logger.info("start recording ...")
-            self._background_task = RecordStepSeriesBackgroundTask(
+            task = RecordStepSeriesTask(
                 logger=self.logger,
-                task=RecordStepSeriesTask(
+                runner=SamplingStepsSeriesRunner(
+                    octoprint_api=py3dpaxxel_octo,
+                    controller_serial_device=self.controller_serial_device,
+                    controller_record_timelapse_s=self.controller_record_timelapse_s,
+                    controller_decode_timeout_s=self.controller_decode_timeout_s,
+                    sensor_odr=OutputDataRateFromHz[self.sensor_odr_hz],
+                    gcode_start_point_mm=self.gcode_start_point_mm,
+                    gcode_axis=self.gcode_axis,
+                    gcode_distance_mm=self.gcode_distance_mm,
+                    gcode_step_repeat_count=self.gcode_step_count,
+                    gcode_sequence_repeat_count=self.gcode_sequence_count,
+                    fx_start_hz=self.start_frequency_hz,
+                    fx_stop_hz=self.stop_frequency_hz,
+                    fx_step_hz=self.step_frequency_hz,
+                    zeta_start_em2=self.start_zeta_em2,
+                    zeta_stop_em2=self.start_zeta_em2,
+                    zeta_step_em2=self.step_zeta_em2,
+                    output_file_prefix=self.output_file_prefix,
+                    output_dir=self.output_dir,
+                    do_dry_run=self.do_dry_run,
+                    do_abort_flag=self._do_abort_flag),
+                summary_runner=StreamSummaryRunner(
                     logger=self.logger,
-                    runner=SamplingStepsSeriesRunner(
-                        octoprint_api=py3dpaxxel_octo,
-                        controller_serial_device=self.controller_serial_device,
-                        controller_record_timelapse_s=self.controller_record_timelapse_s,
-                        controller_decode_timeout_s=self.controller_decode_timeout_s,
-                        sensor_odr=OutputDataRateFromHz[self.sensor_odr_hz],
-                        gcode_start_point_mm=self.gcode_start_point_mm,
-                        gcode_axis=self.gcode_axis,
-                        gcode_distance_mm=self.gcode_distance_mm,
-                        gcode_step_repeat_count=self.gcode_step_count,
-                        gcode_sequence_repeat_count=self.gcode_sequence_count,
-                        fx_start_hz=self.start_frequency_hz,
-                        fx_stop_hz=self.stop_frequency_hz,
-                        fx_step_hz=self.step_frequency_hz,
-                        zeta_start_em2=self.start_zeta_em2,
-                        zeta_stop_em2=self.start_zeta_em2,
-                        zeta_step_em2=self.step_zeta_em2,
-                        output_file_prefix=self.output_file_prefix,
-                        output_dir=self.output_dir,
-                        do_dry_run=self.do_dry_run,
-                        do_abort_flag=self._do_abort_flag),
-                    on_event_callback=self._send_on_thread_event_callback))
+                    input_dir=self.output_dir,
+                    input_file_prefix=self.output_file_prefix,
+                    output_dir=self.output_dir,
+                    output_file_prefix=self.summary_file_prefix))
             self._send_on_event_callback(RecordingEventType.PROCESSING)
             self._background_task_start_timestamp = time.time()
-            self._background_task.start()
+            self._worker.submit(task).add_done_callback(self._on_task_done)
 
         except Exception as e:
             self.unhandled_exception = True
-            self.logger.error("railed to start recording thread")
+            self.logger.error("railed to start recording task")
             self.logger.error(str(e))
             self._send_on_event_callback(RecordingEventType.UNHANDLED_EXCEPTION)
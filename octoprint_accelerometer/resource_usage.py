@@ -0,0 +1,34 @@
+import os
+import sys
+from typing import List, Optional
+
+ANALYSIS_MODULES: List[str] = ["numpy",
+                               "py3dpaxxel.data_decomposition.decompose_runner",
+                               "octoprint_accelerometer.fft_variants",
+                               "octoprint_accelerometer.spectrogram",
+                               "octoprint_accelerometer.stream_summary"]
+"modules imported on first use only, they dominate the plugin's memory footprint"
+
+
+def resident_memory_mb() -> Optional[float]:
+    """
+    :return: resident set size of the OctoPrint process; None if not available on this platform
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def loaded_analysis_modules() -> List[str]:
+    """
+    :return: analysis modules that have been imported so far
+    """
+    return [m for m in ANALYSIS_MODULES if m in sys.modules]
+
+
+def format_resource_usage() -> str:
+    rss_mb = resident_memory_mb()
+    return f"rss={'n/a' if rss_mb is None else f'{rss_mb:.1f}MB'}, analysis modules loaded={loaded_analysis_modules() or 'none'}"
@@ -0,0 +1,228 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging import Logger
+from typing import Callable, Dict, List, Optional, Set
+
+VIEW_PERSIST_INTERVAL_S: float = 60.0
+"a run's view timestamp is written to disk at most once per interval"
+
+
+class RetentionManager:
+    """
+    Keeps the data folder within a size quota and removes raw data of runs older than a maximum age.
+
+    Raw streams of the least recently viewed runs are evicted first.
+    FFTs, spectrograms and summaries are kept, so that evicted runs can still be browsed and compared.
+    Runs without view are ranked by their most recent file modification.
+
+    The quota covers all files of the data folder, including the hidden feature catalog, job queue and manifests,
+    although only raw streams are evicted.
+    The folder is listed once per enforcement; only file names not seen before are stat'ed, removed names are dropped.
+    Files that may be rewritten in place, i.e. merged FFT variants, are stat'ed again when enforcement is requested so.
+    Non-run files, i.e. the catalog database, are stat'ed on every enforcement, since they grow in place.
+    Enforcement and deletion run on one background worker, so they never block the caller nor run concurrently.
+    """
+
+    def __init__(self,
+                 logger: Logger,
+                 data_dir: str,
+                 stream_file_prefix: str,
+                 file_prefixes: List[str],
+                 views_file_name: str,
+                 max_size_mb: int,
+                 max_age_days: int,
+                 can_evict: Optional[Callable[[str], bool]] = None):
+        """
+        :param data_dir: plugin data folder
+        :param stream_file_prefix: prefix of raw stream files, the only files ever evicted
+        :param file_prefixes: prefixes of all files that belong to a run, i.e. streams, FFTs, spectrograms and summaries
+        :param views_file_name: hidden file within data_dir that persists the last view per run
+        :param max_size_mb: size quota of the data folder; 0 disables the quota
+        :param max_age_days: raw streams of runs not modified nor viewed for longer are evicted; 0 disables the age limit
+        :param can_evict: invoked with the file name of each eviction candidate; i.e. streams not uploaded to shared storage yet are kept
+        """
+        self.logger: Logger = logger
+        self.data_dir: str = data_dir
+        self.stream_file_prefix: str = stream_file_prefix
+        self.file_prefixes: List[str] = file_prefixes
+        self.views_path: str = os.path.join(data_dir, views_file_name)
+        self.max_size_mb: int = max_size_mb
+        self.max_age_days: int = max_age_days
+        self.can_evict: Optional[Callable[[str], bool]] = can_evict
+
+        self._run_file_pattern = re.compile(f"^({'|'.join(re.escape(p) for p in file_prefixes)})-([0-9a-zA-Z]+)-.*$")
+        self._lock: threading.Lock = threading.Lock()
+        self._sizes: Dict[str, int] = {}
+        "file name -> size of all files accounted so far"
+        self._mtimes: Dict[str, float] = {}
+        "file name -> modification time when accounted"
+        self._size_total: int = 0
+        self._views: Dict[str, float] = self._load_views()
+        self._views_persisted: Dict[str, float] = dict(self._views)
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="axxel-retention")
+
+    @property
+    def size_total_bytes(self) -> int:
+        return self._size_total
+
+    def _load_views(self) -> Dict[str, float]:
+        try:
+            with open(self.views_path, "r") as file:
+                return {str(k): float(v) for k, v in json.load(file).items()}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _persist_views(self) -> None:
+        temp_path = os.path.join(os.path.dirname(self.views_path), f".{os.path.basename(self.views_path)}.tmp")
+        with self._lock:
+            views = dict(self._views)
+        try:
+            with open(temp_path, "w") as file:
+                json.dump(views, file)
+            os.replace(temp_path, self.views_path)
+            self._views_persisted = views
+        except OSError as e:
+            self.logger.warning(f"failed to persist run views: {e}")
+
+    def mark_viewed(self, run_hash: str) -> None:
+        """
+        Records that a run was looked at; cheap enough to be called on every request.
+        """
+        now = time.time()
+        with self._lock:
+            self._views[run_hash] = now
+        if now - self._views_persisted.get(run_hash, 0.0) >= VIEW_PERSIST_INTERVAL_S:
+            self._executor.submit(self._persist_views)
+
+    def mark_file_viewed(self, file_name: str) -> None:
+        match = self._run_file_pattern.match(file_name)
+        if match:
+            self.mark_viewed(match.group(2))
+
+    def _account(self, restat_prefixes: Optional[List[str]] = None) -> None:
+        """
+        Lists the data folder, stats files not accounted yet and forgets removed ones.
+
+        :param restat_prefixes: prefixes of run files to stat again although already accounted, since they may have been rewritten
+        """
+        names: Set[str] = {e.name for e in os.scandir(self.data_dir) if e.is_file()}
+        with self._lock:
+            for name in [n for n in self._sizes if n not in names]:
+                self._size_total -= self._sizes.pop(name)
+                self._mtimes.pop(name, None)
+            restat_names = [n for n in self._sizes
+                            if not self._run_file_pattern.match(n) or any(n.startswith(f"{p}-") for p in restat_prefixes or [])]
+            for name in list(names - self._sizes.keys()) + restat_names:
+                try:
+                    stat = os.stat(os.path.join(self.data_dir, name))
+                except OSError:
+                    continue
+                self._size_total += stat.st_size - self._sizes.get(name, 0)
+                self._sizes[name] = stat.st_size
+                self._mtimes[name] = stat.st_mtime
+
+    def _remove_files(self, names: List[str]) -> int:
+        """
+        :return: count of removed files
+        """
+        removed = 0
+        for name in names:
+            try:
+                os.remove(os.path.join(self.data_dir, name))
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.logger.warning(f"failed to remove {name}: {e}")
+                continue
+            with self._lock:
+                self._size_total -= self._sizes.pop(name, 0)
+                self._mtimes.pop(name, None)
+        return removed
+
+    def _files_by_run(self) -> Dict[str, List[str]]:
+        runs: Dict[str, List[str]] = {}
+        with self._lock:
+            for name in self._sizes:
+                match = self._run_file_pattern.match(name)
+                if match:
+                    runs.setdefault(match.group(2), []).append(name)
+        return runs
+
+    def _last_activity(self, run_hash: str, names: List[str]) -> float:
+        with self._lock:
+            return max([self._views.get(run_hash, 0.0)] + [self._mtimes.get(n, 0.0) for n in names])
+
+    def _enforce(self, restat_prefixes: Optional[List[str]]) -> List[str]:
+        self._account(restat_prefixes)
+        runs = self._files_by_run()
+        streams_by_run = {run_hash: [n for n in names if n.startswith(f"{self.stream_file_prefix}-") and (self.can_evict is None or self.can_evict(n))]
+                          for run_hash, names in runs.items()}
+        candidates = sorted([r for r, streams in streams_by_run.items() if streams], key=lambda r: self._last_activity(r, runs[r]))
+
+        evicted_runs: List[str] = []
+        if self.max_age_days > 0:
+            oldest_allowed = time.time() - self.max_age_days * 24 * 3600
+            for run_hash in [r for r in candidates if self._last_activity(r, runs[r]) < oldest_allowed]:
+                self._remove_files(streams_by_run[run_hash])
+                evicted_runs.append(run_hash)
+        if self.max_size_mb > 0:
+            for run_hash in [r for r in candidates if r not in evicted_runs]:
+                if self._size_total <= self.max_size_mb * 1024 * 1024:
+                    break
+                self._remove_files(streams_by_run[run_hash])
+                evicted_runs.append(run_hash)
+
+        if evicted_runs:
+            self.logger.info(f"retention: evicted raw streams of runs {evicted_runs}, data folder now {self._size_total} bytes")
+        return evicted_runs
+
+    def enforce(self, on_done: Optional[Callable[[List[str]], None]] = None, restat_prefixes: Optional[List[str]] = None) -> Future:
+        """
+        Evicts raw streams in background until the folder fits the quota and no run exceeds the maximum age.
+        Must not be called while recording, since streams of the current run may be evicted otherwise.
+
+        :param on_done: invoked from the background worker with the hashes of all runs whose streams were evicted
+        :param restat_prefixes: prefixes of files rewritten in place since the last enforcement, their sizes are accounted again
+        """
+        def task():
+            evicted_runs: List[str] = []
+            try:
+                evicted_runs = self._enforce(restat_prefixes)
+            except Exception as e:
+                self.logger.exception(f"retention enforcement failed: {e}")
+            if on_done is not None:
+                on_done(evicted_runs)
+        return self._executor.submit(task)
+
+    def delete_run(self, run_hash: str, on_done: Optional[Callable[[str, int], None]] = None) -> Future:
+        """
+        Removes all files of a run in background.
+
+        :param on_done: invoked from the background worker with run hash and count of removed files
+        """
+        def task():
+            removed = 0
+            try:
+                self._account()
+                removed = self._remove_files(self._files_by_run().get(run_hash, []))
+                with self._lock:
+                    self._views.pop(run_hash, None)
+                self._persist_views()
+                self.logger.info(f"retention: deleted run {run_hash}, {removed} files")
+            except Exception as e:
+                self.logger.exception(f"failed to delete run {run_hash}: {e}")
+            if on_done is not None:
+                on_done(run_hash, removed)
+        return self._executor.submit(task)
+
+    def shutdown(self) -> None:
+        """
+        Drops pending tasks, waits for the running one and persists all views.
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._persist_views()
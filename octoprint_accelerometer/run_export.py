@@ -0,0 +1,135 @@
+import io
+import json
+import os
+import re
+import zipfile
+from typing import IO, Callable, List, Optional
+
+import tornado.web
+from tornado.ioloop import IOLoop
+from tornado.iostream import StreamClosedError
+
+from octoprint_accelerometer.data_io import data_file_stem, load_columns, load_stream_meta, open_data_file, uncompressed_name
+
+EXPORT_CHUNK_SIZE_BYTES: int = 64 * 1024
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Unseekable file object that collects whatever :class:`zipfile.ZipFile` writes until it is popped.
+    Zip entries are written with data descriptors then, so the archive never needs to be rewound.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position: int = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class RunExportHandler(tornado.web.RequestHandler):
+    """
+    Streams a zip archive of all files of one run, i.e. GET ``export/30f9c95c.zip``.
+
+    The archive is built while it is sent, so neither the archive nor a whole data file is ever held in memory
+    and nothing is written to the SD card.
+    File reads, compression and conversion run on an executor, only sending runs on the web server's thread.
+
+    Compressed data files are decompressed into the archive, so its content does not depend on how files are stored.
+
+    Arguments:
+      - format: "tsv" (default) exports data files as text, "npz" converts stream and FFT files to numpy archives on the fly
+        (one array per column; stream meta data is stored as JSON string in "meta")
+    """
+
+    def initialize(self, path: str, file_prefixes: List[str], access_validation: Optional[Callable] = None):
+        self._path: str = path
+        self._file_prefixes: List[str] = file_prefixes
+        self._access_validation: Optional[Callable] = access_validation
+
+    def _run_files(self, run_hash: str) -> List[str]:
+        pattern = re.compile(f"^({'|'.join(re.escape(p) for p in self._file_prefixes)})-{re.escape(run_hash)}-.*$")
+        return sorted(f for f in os.listdir(self._path) if pattern.match(f))
+
+    @staticmethod
+    def _write_npz_entry(archive: zipfile.ZipFile, file_name: str, file_path: str) -> None:
+        """
+        One file's columns are held in memory for the conversion.
+        """
+        import numpy as np
+        columns = load_columns(file_path)
+        meta = load_stream_meta(file_path)
+        if meta:
+            columns["meta"] = np.array(json.dumps(meta))
+        buffer = io.BytesIO()
+        np.savez(buffer, **columns)
+        archive.writestr(f"{data_file_stem(file_name)}.npz", buffer.getvalue())
+
+    @staticmethod
+    def _copy_chunk(source: IO[bytes], target: IO[bytes]) -> bool:
+        """
+        :return: whether a chunk was copied; False once the source is exhausted
+        """
+        chunk = source.read(EXPORT_CHUNK_SIZE_BYTES)
+        if chunk:
+            target.write(chunk)
+        return len(chunk) > 0
+
+    async def _send(self, sink: _ChunkSink) -> None:
+        data = sink.pop()
+        if data:
+            self.write(data)
+            await self.flush()
+
+    async def get(self, run_hash: str):
+        if self._access_validation is not None:
+            self._access_validation(self.request)
+
+        export_format = self.get_argument("format", "tsv")
+        if export_format not in ["tsv", "npz"]:
+            raise tornado.web.HTTPError(400, f"invalid format {export_format}")
+        if not re.fullmatch(r"[0-9a-zA-Z]+", run_hash):
+            raise tornado.web.HTTPError(400, f"invalid run {run_hash}")
+
+        files = self._run_files(run_hash)
+        if len(files) == 0:
+            raise tornado.web.HTTPError(404)
+
+        self.set_header("Content-Type", "application/zip")
+        self.set_header("Content-Disposition", f"attachment; filename=\"run-{run_hash}{'-npz' if export_format == 'npz' else ''}.zip\"")
+
+        loop = IOLoop.current()
+        sink = _ChunkSink()
+        try:
+            with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+                for file_name in files:
+                    file_path = os.path.join(self._path, file_name)
+                    entry_name = uncompressed_name(file_name)
+                    if export_format == "npz" and entry_name.endswith(".tsv"):
+                        await loop.run_in_executor(None, self._write_npz_entry, archive, file_name, file_path)
+                        await self._send(sink)
+                        continue
+
+                    with open_data_file(file_path, "rb") as source, archive.open(entry_name, mode="w", force_zip64=True) as target:
+                        while await loop.run_in_executor(None, self._copy_chunk, source, target):
+                            await self._send(sink)
+                    await self._send(sink)
+            await self._send(sink)
+        except StreamClosedError:
+            return
+        self.finish()
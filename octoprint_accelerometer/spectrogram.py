@@ -0,0 +1,164 @@
+import functools
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from octoprint_accelerometer.data_io import FileVersion, data_file_stem, file_version
+from octoprint_accelerometer.stream_quality import UniformWindowSlicer
+
+
+@dataclass
+class Spectrogram:
+    frequency_hz: np.ndarray
+    "bin frequencies, shape (bins,)"
+    time_s: np.ndarray
+    "window centers relative to the first sample, shape (frames,)"
+    magnitude: np.ndarray
+    "amplitude spectrum per window, shape (frames, bins)"
+
+
+@dataclass
+class SpectrogramTile:
+    frequency_hz: List[float] = field(default_factory=lambda: ([]))
+    time_s: List[float] = field(default_factory=lambda: ([]))
+    magnitude: List[List[float]] = field(default_factory=lambda: ([]))
+    "one row of bins per frame, max-pooled to the requested tile size"
+    magnitude_max: float = 0.0
+    "maximum over the whole spectrogram (not only this tile), so that tiles share one color scale"
+
+
+def _frame_magnitudes(frames: np.ndarray, window: np.ndarray) -> np.ndarray:
+    """
+    :param frames: samples per window, window size along the last axis
+    :return: amplitude spectrum per window, each window's mean removed first
+    """
+    frames = frames - np.mean(frames, axis=-1, keepdims=True)
+    return (np.abs(np.fft.rfft(frames * window, axis=-1)) * (2.0 / np.sum(window))).astype(np.float32)
+
+
+def compute_spectrogram(samples: np.ndarray, sample_rate_hz: float, window_size: int, hop_size: int) -> Spectrogram:
+    """
+    Short-time Fourier transform of one axis.
+    All windows are computed at once on a strided view of the samples.
+
+    :param samples: acceleration of one axis
+    :param sample_rate_hz: output data rate the samples were recorded at
+    :param window_size: samples per window
+    :param hop_size: samples in between the start of consecutive windows
+    :return: amplitude spectrum per window; no frames if there are less samples than one window
+    """
+    frequency_hz = np.fft.rfftfreq(window_size, d=1.0 / sample_rate_hz).astype(np.float32)
+    if len(samples) < window_size:
+        return Spectrogram(frequency_hz, np.empty(0, dtype=np.float32), np.empty((0, len(frequency_hz)), dtype=np.float32))
+
+    frames = np.lib.stride_tricks.sliding_window_view(samples, window_size)[::hop_size]
+    time_s = (np.arange(len(frames)) * hop_size + window_size / 2.0) / sample_rate_hz
+    return Spectrogram(frequency_hz, time_s.astype(np.float32), _frame_magnitudes(frames, np.hanning(window_size)))
+
+
+class SpectrogramAccumulator:
+    """
+    Short-time Fourier transform of several axes, fed chunk by chunk.
+    Windows are carried across chunk boundaries (see :class:`UniformWindowSlicer`), so the result equals
+    :func:`compute_spectrogram` of the whole uniformly sampled stream while only one chunk is held in memory.
+    """
+
+    def __init__(self, axes: List[str], sample_rate_hz: float, window_size: int, hop_size: int):
+        self.axes: List[str] = axes
+        self.sample_rate_hz: float = sample_rate_hz
+        self.window_size: int = window_size
+        self.hop_size: int = hop_size
+        self._window: np.ndarray = np.hanning(window_size)
+        self._slicer: UniformWindowSlicer = UniformWindowSlicer(axes, window_size, hop_size)
+        self._magnitudes: List[np.ndarray] = []
+        "amplitude spectra per chunk, shape (axes, frames, bins)"
+
+    def feed(self, columns: Dict[str, np.ndarray]) -> None:
+        """
+        :param columns: next rows of the stream, at least "sample" and the axes; need not be uniformly sampled
+        """
+        frames = self._slicer.feed(columns)
+        if frames.shape[1] > 0:
+            self._magnitudes.append(_frame_magnitudes(frames, self._window))
+
+    def result(self) -> Dict[str, Spectrogram]:
+        """
+        :return: spectrogram per axis; no frames if less samples than one window were fed
+        """
+        frequency_hz = np.fft.rfftfreq(self.window_size, d=1.0 / self.sample_rate_hz).astype(np.float32)
+        magnitude = np.concatenate(self._magnitudes, axis=1) if self._magnitudes else np.empty((len(self.axes), 0, len(frequency_hz)), dtype=np.float32)
+        time_s = ((np.arange(magnitude.shape[1]) * self.hop_size + self.window_size / 2.0) / self.sample_rate_hz).astype(np.float32)
+        return {axis: Spectrogram(frequency_hz, time_s, magnitude[index]) for index, axis in enumerate(self.axes)}
+
+
+def save_spectrogram(path: str, spectrogram: Spectrogram) -> None:
+    """
+    Writes to a temporary file first, so that an interrupted write never leaves a file that counts as already processed.
+    """
+    temp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    with open(temp_path, "wb") as file:
+        np.savez_compressed(file, frequency_hz=spectrogram.frequency_hz, time_s=spectrogram.time_s, magnitude=spectrogram.magnitude)
+    os.replace(temp_path, path)
+
+
+def load_spectrogram(path: str) -> Spectrogram:
+    return _load_spectrogram_cached(file_version(path))
+
+
+@functools.lru_cache(maxsize=8)
+def _load_spectrogram_cached(version: FileVersion) -> Spectrogram:
+    with np.load(version[0]) as data:
+        return Spectrogram(data["frequency_hz"], data["time_s"], data["magnitude"])
+
+
+def _max_pool_indices(length: int, max_length: int) -> np.ndarray:
+    """
+    :return: start index of each pooled group
+    """
+    group_size = max(1, int(np.ceil(length / max_length))) if max_length > 0 else 1
+    return np.arange(0, length, group_size)
+
+
+def get_spectrogram_tile(spectrogram: Spectrogram,
+                         start_s: Optional[float] = None,
+                         stop_s: Optional[float] = None,
+                         max_frequency_hz: Optional[float] = None,
+                         max_frames: int = 512,
+                         max_bins: int = 256) -> SpectrogramTile:
+    """
+    Cuts a time/frequency range out of a spectrogram and reduces it to at most max_frames x max_bins cells.
+    Cells are max-pooled so that short ringing stays visible when zoomed out.
+
+    :param spectrogram: full spectrogram
+    :param start_s: first window center to include; from the beginning if None
+    :param stop_s: last window center to include; until the end if None
+    :param max_frequency_hz: highest bin to include; all bins if None
+    :param max_frames: upper bound of rows in the tile
+    :param max_bins: upper bound of columns in the tile
+    :return: pooled tile; each cell is labeled by the time and frequency of its first frame and bin
+    """
+    time_s, frequency_hz, magnitude = spectrogram.time_s, spectrogram.frequency_hz, spectrogram.magnitude
+    first = 0 if start_s is None else int(np.searchsorted(time_s, start_s, side="left"))
+    last = len(time_s) if stop_s is None else int(np.searchsorted(time_s, stop_s, side="right"))
+    bins = len(frequency_hz) if max_frequency_hz is None else int(np.searchsorted(frequency_hz, max_frequency_hz, side="right"))
+    cut = magnitude[first:last, :bins]
+    if cut.size == 0:
+        return SpectrogramTile(magnitude_max=float(np.max(magnitude)) if magnitude.size else 0.0)
+
+    frame_indices = _max_pool_indices(cut.shape[0], max_frames)
+    bin_indices = _max_pool_indices(cut.shape[1], max_bins)
+    pooled = np.maximum.reduceat(np.maximum.reduceat(cut, frame_indices, axis=0), bin_indices, axis=1)
+    return SpectrogramTile(frequency_hz=frequency_hz[:bins][bin_indices].tolist(),
+                           time_s=time_s[first:last][frame_indices].tolist(),
+                           magnitude=pooled.tolist(),
+                           magnitude_max=float(np.max(magnitude)))
+
+
+def spectrogram_file_name(output_file_prefix: str, stream_file_name: str, input_file_prefix: str, window_size: int, hop_size: int, axis: str) -> str:
+    """
+    :return: i.e. "stft-30f9c95c-20231127-235625233-s000-ax-f010-z015-w256-h032-x.npz" for stream "axxel-30f9c95c-20231127-235625233-s000-ax-f010-z015.tsv"
+    """
+    stem = data_file_stem(stream_file_name).removeprefix(f"{input_file_prefix}-")
+    return f"{output_file_prefix}-{stem}-w{window_size:03d}-h{hop_size:03d}-{axis}.npz"
@@ -3,203 +3,726 @@
 // @see: https://observablehq.com/@d3/gallery?utm_source=d3js-org&utm_medium=hero&utm_campaign=try-observable
 
 const FILE_DOWNLOAD_URL = "plugin/octoprint_accelerometer/download";
-const DATA_SET_URL = "plugin/octoprint_accelerometer/get_data_listing";
+const RUNS_URL = "plugin/octoprint_accelerometer/get_runs_listing";
+const RUN_URL = "plugin/octoprint_accelerometer/get_run_listing";
+const FFT_COMPARISON_URL = "plugin/octoprint_accelerometer/get_fft_comparison";
+const SPECTROGRAM_URL = "plugin/octoprint_accelerometer/get_spectrogram";
+const FFT_VARIANTS_URL = "plugin/octoprint_accelerometer/get_fft_variants";
+const RUN_EXPORT_URL = "plugin/octoprint_accelerometer/export";
+const DELETE_RUN_URL = "plugin/octoprint_accelerometer/delete_run";
 const DIV_ID_DATA_SET_VIS = "tab_plugin_octoprint_data_set_vis";
 const DIV_ID_DATA_SET_VIS_HEADER = "tab_plugin_octoprint_data_set_vis_header";
 const DIV_ID_ACCELERATION_VIS = "tab_plugin_octoprint_acceleration_vis";
 const DIV_ID_FFT_VIS = "tab_plugin_octoprint_fft_vis";
+const DIV_ID_SPECTROGRAM_VIS = "tab_plugin_octoprint_spectrogram_vis";
+const DATA_PARSER_WORKER_URL = "plugin/octoprint_accelerometer/static/js/datavis_worker.js";
+const DATA_CACHE_DB_NAME = "octoprint_accelerometer";
+const DATA_CACHE_BUDGET_BYTES = 64 * 1024 * 1024;
 
 /**
+ * visualisation settings, updated by the tab view model from the plugin settings
+ * - renderer: "canvas" draws the series to a canvas, "svg" builds one SVG path per series
+ */
+const OctoAxxelVisSettings = {
+    renderer: "canvas",
+};
+
+/**
+ * Browser side LRU cache of parsed (columnar) files in IndexedDB.
+ * Recorded files never change, hence entries are keyed by filename plus server reported size and modification time.
+ *
+ * Two object stores are kept: "columns" holds the parsed payload, "entries" only its size and last access time,
+ * so that eviction can walk the access-time index without loading any payload.
+ */
+class OctoAxxelDataCache {
+
+    static #db = undefined;
+
+    /**
+     * @param {{file: {filename_ext: str}, stat: {size_bytes: int, modified_ts: float}}} fileMeta - stream or FFT node from the data listing
+     * @return {str|undefined} - cache key; undefined if the file is not cacheable
+     */
+    static keyOf(fileMeta) {
+        if (!fileMeta || !fileMeta.file || !fileMeta.stat) { return undefined; }
+        return fileMeta.file.filename_ext + "|" + fileMeta.stat.size_bytes + "|" + fileMeta.stat.modified_ts;
+    }
+
+    static #request(request) {
+        return new Promise((resolve, reject) => {
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+
+    static async #open() {
+        if (OctoAxxelDataCache.#db === undefined) {
+            const request = indexedDB.open(DATA_CACHE_DB_NAME, 1);
+            request.onupgradeneeded = () => {
+                const db = request.result;
+                db.createObjectStore("columns");
+                db.createObjectStore("entries", {keyPath: "key"}).createIndex("accessed", "accessed");
+            };
+            OctoAxxelDataCache.#db = OctoAxxelDataCache.#request(request);
+        }
+        return OctoAxxelDataCache.#db;
+    }
+
+    /**
+     * @param {str} key - see keyOf()
+     * @return {Promise<{length: int, meta: {...}|undefined, columns: {str: Float32Array}}|undefined>}
+     */
+    static async get(key) {
+        try {
+            const db = await OctoAxxelDataCache.#open();
+            const transaction = db.transaction(["columns", "entries"], "readwrite");
+            const value = await OctoAxxelDataCache.#request(transaction.objectStore("columns").get(key));
+            if (value !== undefined) {
+                const entries = transaction.objectStore("entries");
+                const entry = await OctoAxxelDataCache.#request(entries.get(key));
+                if (entry !== undefined) {
+                    entry.accessed = Date.now();
+                    entries.put(entry);
+                }
+            }
+            return value;
+        } catch (error) {
+            console.warn("data cache lookup failed: " + error);
+            return undefined;
+        }
+    }
+
+    /**
+     * @param {str} key - see keyOf()
+     * @param {{length: int, meta: {...}|undefined, columns: {str: Float32Array}}} value - parsed file
+     */
+    static async put(key, value) {
+        try {
+            const bytes = Object.values(value.columns).reduce((sum, column) => sum + column.byteLength, 0);
+            const db = await OctoAxxelDataCache.#open();
+            const transaction = db.transaction(["columns", "entries"], "readwrite");
+            transaction.objectStore("columns").put(value, key);
+            transaction.objectStore("entries").put({key: key, bytes: bytes, accessed: Date.now()});
+            await OctoAxxelDataCache.#evict(transaction);
+        } catch (error) {
+            console.warn("data cache store failed: " + error);
+        }
+    }
+
+    /**
+     * Drops least recently accessed entries until the cache fits into DATA_CACHE_BUDGET_BYTES.
+     */
+    static async #evict(transaction) {
+        const entries = transaction.objectStore("entries");
+        const all = await OctoAxxelDataCache.#request(entries.index("accessed").getAll());
+        let total = all.reduce((sum, entry) => sum + entry.bytes, 0);
+        for (const entry of all) {
+            if (total <= DATA_CACHE_BUDGET_BYTES) { break; }
+            entries.delete(entry.key);
+            transaction.objectStore("columns").delete(entry.key);
+            total -= entry.bytes;
+        }
+    }
+}
+
+/**
+ * Delegates download and parsing of stream and FFT files to a web worker (see datavis_worker.js).
+ * Parsed files are columnar: one Float32Array per column, transferred from the worker without copying.
+ */
+class OctoAxxelDataParser {
+
+    static #instance = undefined;
+
+    /**
+     * @return {OctoAxxelDataParser} - shared parser, so that only one worker is spawned
+     */
+    static instance() {
+        if (OctoAxxelDataParser.#instance === undefined) { OctoAxxelDataParser.#instance = new OctoAxxelDataParser(); }
+        return OctoAxxelDataParser.#instance;
+    }
+
+    constructor() {
+        this.worker = new Worker(DATA_PARSER_WORKER_URL);
+        this.nextId = 0;
+        this.pending = new Map();
+        this.worker.onmessage = (event) => {
+            const {id, error} = event.data;
+            const request = this.pending.get(id);
+            if (request === undefined) { return; }
+            this.pending.delete(id);
+            if (error !== undefined) { request.reject(new Error(error)); }
+            else { request.resolve(event.data); }
+        };
+    }
+
+    /**
+     * @param {"stream"|"fft"} kind - file type
+     * @param {str} fileUrl - URL of tabular separated file
+     * @param {char} separator - tabular separator (single character)
+     * @param {str|undefined} cacheKey - see OctoAxxelDataCache.keyOf(); skips the cache if undefined
+     * @return {Promise<{length: int, meta: {...}|undefined, columns: {str: Float32Array}}>}
+     */
+    async parse(kind, fileUrl, separator = " ", cacheKey = undefined) {
+        if (cacheKey !== undefined) {
+            const cached = await OctoAxxelDataCache.get(cacheKey);
+            if (cached !== undefined) { return cached; }
+        }
+        const parsed = await this.parseUncached(kind, fileUrl, separator);
+        if (cacheKey !== undefined) { OctoAxxelDataCache.put(cacheKey, parsed); }
+        return parsed;
+    }
+
+    parseUncached(kind, fileUrl, separator) {
+        const id = this.nextId++;
+        // the worker resolves relative URLs against its own location
+        const url = new URL(fileUrl, document.baseURI).href;
+        return new Promise((resolve, reject) => {
+            this.pending.set(id, {resolve: resolve, reject: reject});
+            this.worker.postMessage({id: id, kind: kind, url: url, separator: separator});
+        });
+    }
+}
+
+/**
+ * Indented tree of runs, sequences and streams.
+ *
+ * Only runs are fetched initially; sequences and streams of a run are fetched when the run is expanded.
+ * Rows are rendered virtually: just the rows within the scroll viewport (plus a small overscan) exist in the DOM,
+ * so first paint and memory do not depend on the archive size.
+ *
  * blueprint: https://observablehq.com/@d3/indented-tree?intent=fork
  */
 class OctoAxxelDataSetVis {
 
+    static ROW_HEIGHT_PX = 17;
+    static OVERSCAN_ROWS = 10;
+    static WIDTH_PX = 220;
+
+    // expanded state survives re-plotting, i.e. after data processing finished
+    static #expandedRuns = new Set();
+    static #expandedSequences = new Set();
+    static #runDetails = new Map();
+
     /**
-     * @param {str} dataSetUrl - URL for GET request, i.e. "plugin/octoprint_accelerometer/get_data_listing"
-     * @return {{ name: str, children: [...], data: {...} }}
+     * @param {str} runsUrl - URL for GET request, i.e. "plugin/octoprint_accelerometer/get_runs_listing"
+     * @return {[{runHash: str, name: str, sequencesCount: int, streamsCount: int}]}
      */
-    async fetchData(dataSetUrl) {
-        const response = await fetch(dataSetUrl);
+    async fetchRuns(runsUrl) {
+        const response = await fetch(runsUrl);
         const rawData = await response.json();
-        const rootNode = rawData["data_sets"]["runs"]
-
-        // flatten data from structured to hierarchy (dict of "name", "children"): https://d3js.org/d3-hierarchy/hierarchy#hierarchy
-        // also append node attributes to "data" of each hierarchy node
         const runs = [];
-        for (const runHash in rootNode) {
-            const runNode = rootNode[runHash];
-            const sequencesNode = runNode["sequences"];
-
-            const sequences = [];
-            for (const sequenceId in sequencesNode) {
-                const streamsNode = sequencesNode[sequenceId]["streams"];
-
-                const streams = [];
-                for (const streamHash in streamsNode) {
-                    const streamNode = streamsNode[streamHash];
-
-                    const ffts = [];
-                    for (const fftId in streamNode["fft"]) {
-                        const fftNode = streamNode["fft"][fftId];
-                        const fftNodeText = fftNode["fft_axis"].toUpperCase() + " 𝑓=" + fftNode["sequence_frequency_hz"] + "Hz zeta=" + fftNode["sequence_zeta_em2"] * 0.01;
-                        ffts.push({name: fftNodeText, data: {"fft": fftNode}});
-                    }
-                    const streamNodeMeta = streamNode["meta"];
-                    const streamNodeText = streamNodeMeta["sequence_axis"].toUpperCase() + "-Axis 𝑓=" + streamNodeMeta["sequence_frequency_hz"] + "Hz ζ=" + streamNodeMeta["sequence_zeta_em2"] * 0.01;
-                    // Note: FFT children are not going to be plotted in the tree, so this those go to "data.children" rather than "children".
-                    streams.push({name: streamNodeText, children: [], data: {"stream": streamNode, "children": ffts}});
-                }
-                sequences.push({name: "seq=" + sequenceId, children: streams, data: {"series": "-"}});
-            }
-            const ts = "" + runNode.started.year +
-                "." + runNode.started.month.toString().padStart(2,"0") +
-                "." + runNode.started.day.toString().padStart(2,"0") +
-                " " + runNode.started.hour.toString().padStart(2,"0") +
-                ":" + runNode.started.minute.toString().padStart(2,"0") +
-                ":" + runNode.started.second.toString().padStart(2,"0") +
-                "." + runNode.started.milli_second.toString().padStart(3,"0");
-            runs.push({name: ts, children: sequences, data: {"run": "-"}});
+        for (const runHash in rawData["runs"]) {
+            const runNode = rawData["runs"][runHash];
+            runs.push({
+                runHash: runHash,
+                name: OctoAxxelDataSetVis.timestampToString(runNode.started),
+                sequencesCount: runNode.sequences_count,
+                streamsCount: runNode.streams_count,
+            });
         }
-        const data = {name: "/", children: runs, data: {"root": "-"}};
-        return data;
+        return runs;
     }
 
     /**
-     * @param {{ name: str, children: [...], data: {...} }}: data - chart data to plot
+     * @param {str} runUrl - URL for GET request, i.e. "plugin/octoprint_accelerometer/get_run_listing"
+     * @param {str} runHash - run to fetch
+     * @return {[{sequenceId: str, name: str, streams: [{name: str, stream: {...}, summaryText: str}]}]}
      */
-    async computeChart(data) {
-        const format = d3.format("");
-        const nodeSize = 17;
-        const root = d3.hierarchy(data).eachBefore((i => d => d.index = i++)(0));
-        const nodes = root.descendants();
-        const width = 220;
-        const height = (nodes.length + 1) * nodeSize;
-        const headerHeight = "0em";
-
-        const constColumns = [
-            { label: "/ Run  /  Sequence  /  Stream", anchor: "start", x: "1em" },
-            //{ label: "Run", anchor: "end", x: "5em" },
-            //{ label: "Seq.", anchor: "end", x: "7.2em" },
-            //{ label: "Stream", anchor: "end", x: "10.7em" },
-            { label: "Count", anchor: "end", x: "17.75em" },
-        ];
-
-        const computedColumns = [
-            {
-                value: d => d.children ? 0 : 1,
-                format: (value, d) => d.children ? format(value) : "-",
-                x: "20em"
+    async fetchRun(runUrl, runHash) {
+        const response = await fetch(runUrl + "?run=" + encodeURIComponent(runHash));
+        const rawData = await response.json();
+        const sequencesNode = rawData["run"]["sequences"];
+
+        const sequences = [];
+        for (const sequenceId in sequencesNode) {
+            const streamsNode = sequencesNode[sequenceId]["streams"];
+            const streams = [];
+            for (const streamHash in streamsNode) {
+                const streamNode = streamsNode[streamHash];
+                const streamNodeMeta = streamNode["meta"];
+                const streamNodeText = streamNodeMeta["sequence_axis"].toUpperCase() + "-Axis 𝑓=" + streamNodeMeta["sequence_frequency_hz"] + "Hz ζ=" + streamNodeMeta["sequence_zeta_em2"] * 0.01;
+                const summary = streamNode["summary"];
+                const evictedText = streamNode.file ? "" : "raw data removed, FFTs kept";
+                const flawed = summary && (!summary.complete || (summary.quality && summary.quality.flags.length > 0));
+                streams.push({name: (flawed ? "⚠ " : "") + (evictedText ? "✂ " : "") + streamNodeText, stream: streamNode,
+                              summaryText: [evictedText, OctoAxxelDataSetVis.summaryToString(summary)].filter(t => t).join("\n")});
             }
-        ];
+            sequences.push({sequenceId: sequenceId, name: "seq=" + sequenceId, streams: streams});
+        }
+        return sequences;
+    }
 
-        const svg = d3.create("svg")
-            .attr("width", width)
-            .attr("height", height)
-            .attr("viewBox", [-nodeSize / 2, -nodeSize, width, height])
-            .attr("style", "max-width: 100%; height: auto; font: 10px sans-serif; overflow: visible;");
+    /**
+     * @param {{samples_count: int, output_data_rate_hz: float|null, complete: bool, axes: {str: {min: float, max: float, rms: float}},
+     *          quality: {dropped_samples: int, gaps_count: int, duplicate_samples: int, out_of_order_samples: int, seq_mismatches: int,
+     *                    effective_output_data_rate_hz: float|null, flags: [str]}|null}|null} summary
+     * @return {str} - multi-line text; empty if no summary was computed yet
+     */
+    static summaryToString(summary) {
+        if (!summary) { return ""; }
+        const lines = ["samples: " + summary.samples_count +
+                       (summary.output_data_rate_hz ? " @ " + summary.output_data_rate_hz + "Hz" : "") +
+                       (summary.complete ? "" : " (incomplete)")];
+        for (const axis in summary.axes) {
+            const a = summary.axes[axis];
+            lines.push(axis.toUpperCase() + ": min=" + Math.round(a.min) + " max=" + Math.round(a.max) + " rms=" + Math.round(a.rms) + "mg");
+        }
+        const q = summary.quality;
+        if (q && q.flags.length > 0) {
+            const issues = [];
+            if (q.dropped_samples > 0) { issues.push(q.dropped_samples + " dropped in " + q.gaps_count + " gaps"); }
+            if (q.duplicate_samples > 0) { issues.push(q.duplicate_samples + " duplicated"); }
+            if (q.out_of_order_samples > 0) { issues.push(q.out_of_order_samples + " out of order"); }
+            if (q.seq_mismatches > 0) { issues.push(q.seq_mismatches + " sequence mismatches"); }
+            lines.push("⚠ samples " + issues.join(", ") +
+                       (q.effective_output_data_rate_hz ? ", effective " + Number(q.effective_output_data_rate_hz).toFixed(1) + "Hz" : "") +
+                       "; FFT assumes uniform sampling");
+        }
+        return lines.join("\n");
+    }
 
-        const headerSvg = d3.create("svg")
-            .attr("width", width)
-            .attr("height", headerHeight)
-            .attr("style", "max-width: 100%; height: auto; font: 10px sans-serif; overflow: visible;");
+    static timestampToString(ts) {
+        if (!ts) { return "-"; }
+        return "" + ts.year +
+            "." + ts.month.toString().padStart(2,"0") +
+            "." + ts.day.toString().padStart(2,"0") +
+            " " + ts.hour.toString().padStart(2,"0") +
+            ":" + ts.minute.toString().padStart(2,"0") +
+            ":" + ts.second.toString().padStart(2,"0") +
+            "." + ts.milli_second.toString().padStart(3,"0");
+    }
 
-        const link = svg.append("g")
-            .attr("fill", "none")
-            .attr("stroke", "#999")
-        .selectAll()
-        .data(root.links())
-        .join("path")
-            .attr("d", d => `
-                M${d.source.depth * nodeSize},${d.source.index * nodeSize}
-                V${d.target.index * nodeSize}
-                h${nodeSize}
-          `);
-
-        const node = svg.append("g")
-            .selectAll()
-            .data(nodes)
-            .join("g")
-                .attr("transform", d => `translate(0,${d.index * nodeSize})`);
-
-        node.append("circle")
-            .attr("cx", d => d.depth * nodeSize)
-            .attr("r", 2.5)
-            .attr("fill", d => d.children ? "#999" : null);
-
-        node.append("text")
-            .attr("dy", "0.32em")
-            .attr("x", d => d.depth * nodeSize + 6)
-            .attr("filename", d => {
-                if ("stream" in d.data.data)
-                return d.data.data.stream.file.filename_ext;
-                return undefined;})
-            .attr("fft_files", d => {
-                if ("stream" in d.data.data)
-                    return JSON.stringify({
-                        "x": d.data.data.stream.ffts.x.file.filename_ext,
-                        "y": d.data.data.stream.ffts.y.file.filename_ext,
-                        "z": d.data.data.stream.ffts.z.file.filename_ext});
-                return undefined;
-            })
-            .attr("nodeType", d => {
-                if ("root" in d.data.data) return "root";
-                if ("run" in d.data.data) return "run";
-                if ("series" in d.data.data) return "series";
-                if ("stream" in d.data.data) return "stream";
-                return undefined;})
-            .text(d => d.data.name)
-            .on("pointerenter", event => {
-                if (event.target.getAttribute("nodeType") === "stream")
-                    event.target.setAttribute("style", "font-weight:bold;cursor: pointer;");})
-            .on("pointerleave", event => {
-                if (event.target.getAttribute("nodeType") === "stream")
-                    event.target.setAttribute("style", "font-weight:normal;cursor: default;");})
-            .on("click", event => {
-                const nodeType = event.target.getAttribute("nodeType");
-                if (nodeType === "stream") {
-                    const fileName = event.target.getAttribute("filename");
-                    const fftFiles = JSON.parse(event.target.getAttribute("fft_files"));
-                    (async () => new OctoAxxelAccelerationVis().plot(fileName))();
-                    (async () => new OctoAxxelFftVis().plot(fftFiles))();
+    /**
+     * Flattens the expanded part of the tree into rows.
+     *
+     * @return {[{depth: int, name: str, count: int|undefined, nodeType: str, key: str, expandable: bool, expanded: bool, title: str,
+     *           stream: {...}|undefined, comparisonKey: str|undefined}]}
+     */
+    computeRows() {
+        const rows = [];
+        for (const run of this.runs) {
+            const runKey = run.runHash;
+            const runExpanded = OctoAxxelDataSetVis.#expandedRuns.has(runKey);
+            rows.push({depth: 0, name: run.name, count: run.sequencesCount, nodeType: "run", key: runKey,
+                       expandable: true, expanded: runExpanded, title: "run: " + run.name, comparisonKey: "run:" + runKey});
+            const sequences = OctoAxxelDataSetVis.#runDetails.get(runKey);
+            if (!runExpanded || sequences === undefined) { continue; }
+
+            for (const sequence of sequences) {
+                const sequenceKey = runKey + "/" + sequence.sequenceId;
+                const sequenceExpanded = OctoAxxelDataSetVis.#expandedSequences.has(sequenceKey);
+                rows.push({depth: 1, name: sequence.name, count: sequence.streams.length, nodeType: "series", key: sequenceKey,
+                           expandable: true, expanded: sequenceExpanded, title: "run: " + run.name + " | " + sequence.name});
+                if (!sequenceExpanded) { continue; }
+
+                for (const stream of sequence.streams) {
+                    rows.push({depth: 2, name: stream.name, count: undefined, nodeType: "stream", key: sequenceKey + "/" + stream.name,
+                               expandable: false, expanded: false,
+                               title: "run: " + run.name + " | " + sequence.name + " | " + stream.name + (stream.summaryText ? "\n" + stream.summaryText : ""),
+                               stream: stream.stream, comparisonKey: "stream:" + OctoAxxelDataSetVis.streamFileName(stream.stream)});
                 }
-            });
+            }
+        }
+        return rows;
+    }
 
-        node.append("title")
-            .text(d => {
-                const path = d.ancestors().reverse().map(d => d.data.name);
-                let text = (path.length >= 2) ? "run: " + path[1] : "";
-                text += (path.length >= 3) ? " | " + path[2] : "";
-                text += (path.length >= 4) ? " | " + path[3] : "";
-                return text;
-                });
-
-        for (const {value, format, x} of computedColumns) {
-            node.append("text")
-                .attr("dy", "0.32em")
-                .attr("x", x)
-                .attr("text-anchor", "end")
-                .attr("fill", d => d.children ? null : "#555")
-                .text(d => d.children ? d.children.length : "-");
+    async toggle(row) {
+        if (row.nodeType === "run") {
+            if (OctoAxxelDataSetVis.#expandedRuns.has(row.key)) {
+                OctoAxxelDataSetVis.#expandedRuns.delete(row.key);
+            } else {
+                OctoAxxelDataSetVis.#expandedRuns.add(row.key);
+                if (!OctoAxxelDataSetVis.#runDetails.has(row.key)) {
+                    OctoAxxelDataSetVis.#runDetails.set(row.key, await this.fetchRun(RUN_URL, row.key));
+                }
+            }
+        } else if (row.nodeType === "series") {
+            if (OctoAxxelDataSetVis.#expandedSequences.has(row.key)) { OctoAxxelDataSetVis.#expandedSequences.delete(row.key); }
+            else { OctoAxxelDataSetVis.#expandedSequences.add(row.key); }
         }
+        this.rows = this.computeRows();
+        this.renderRows();
+    }
 
-        for (const {label, anchor, x} of constColumns) {
-            headerSvg.append("text")
-                .attr("dy", "0.32em")
-                .attr("y", 0)
-                .attr("x", x)
-                .attr("text-anchor", anchor)
-                .attr("font-weight", "bold")
-                .text(label);
+    /**
+     * @param {{file: {filename_ext: str}|null, evicted_file: str|null}} stream - stream node from the run listing
+     * @return {str} - stream file name, also if its raw data was removed by the retention policy
+     */
+    static streamFileName(stream) {
+        return stream.file ? stream.file.filename_ext : stream.evicted_file;
+    }
+
+    select(row) {
+        const stream = row.stream;
+        const fileName = OctoAxxelDataSetVis.streamFileName(stream);
+        const fftFiles = {};
+        const fftCacheKeys = {};
+        for (const axis of ["x", "y", "z"]) {
+            if (!stream.ffts[axis]) { continue; }
+            fftFiles[axis] = stream.ffts[axis].file.filename_ext;
+            fftCacheKeys[axis] = OctoAxxelDataCache.keyOf(stream.ffts[axis]);
         }
+        if (stream.file) { (async () => new OctoAxxelAccelerationVis().plot(fileName, OctoAxxelDataCache.keyOf(stream)))(); }
+        OctoAxxelFftVis.forgetVariants();
+        (async () => new OctoAxxelFftVis().plot(fftFiles, fftCacheKeys, fileName))();
+        (async () => new OctoAxxelSpectrogramVis().plot(fileName, stream.meta.sequence_axis))();
+    }
 
-        return [headerSvg.node(), svg.node()]
+    /**
+     * Adds the run or stream of the row to the FFT comparison, or removes it if already compared.
+     */
+    compare(row) {
+        OctoAxxelFftComparisonVis.toggle(row.comparisonKey, row.title.split("\n")[0]);
+        this.renderRows();
+        (async () => new OctoAxxelFftComparisonVis().plot())();
+    }
+
+    /**
+     * Requests deletion of all files of the run of the row. Deletion runs in background, the tree is re-plotted once the plugin reports "RUN_DELETED".
+     */
+    deleteRun(row) {
+        if (!confirm("Delete all files of run " + row.name + "?")) { return; }
+        OctoPrint.postJson(DELETE_RUN_URL, {run: row.key})
+            .fail(response => alert("failed to delete run: " + (response.responseJSON ? response.responseJSON.error : response.statusText)));
+    }
+
+    computeHeader() {
+        const nodeSize = OctoAxxelDataSetVis.ROW_HEIGHT_PX;
+        const header = d3.create("div")
+            .attr("style", `position: relative; width: ${OctoAxxelDataSetVis.WIDTH_PX}px; height: ${nodeSize}px; font: bold 10px sans-serif;`);
+        header.append("span")
+            .attr("style", "position: absolute; left: 1em;")
+            .attr("title", "click: plot stream, ctrl+click: add run or stream to FFT comparison")
+            .text("/ Run  /  Sequence  /  Stream");
+        header.append("span")
+            .attr("style", "position: absolute; right: 0;")
+            .text("Count");
+        return header.node();
+    }
+
+    /**
+     * (Re-)creates the DOM rows within the viewport of the scroll container.
+     */
+    renderRows() {
+        const nodeSize = OctoAxxelDataSetVis.ROW_HEIGHT_PX;
+        const overscan = OctoAxxelDataSetVis.OVERSCAN_ROWS;
+        const viewport = this.container;
+        const first = Math.max(0, Math.floor(viewport.scrollTop / nodeSize) - overscan);
+        const last = Math.min(this.rows.length, Math.ceil((viewport.scrollTop + viewport.clientHeight) / nodeSize) + overscan);
+
+        this.rowsContainer.style("height", `${this.rows.length * nodeSize}px`);
+        this.rowsContainer.selectAll("div.octo-axxel-tree-row")
+            .data(this.rows.slice(first, last), row => row.key)
+            .join(enter => {
+                const row = enter.append("div")
+                    .attr("class", "octo-axxel-tree-row")
+                    .style("position", "absolute")
+                    .style("left", "0")
+                    .style("right", "0")
+                    .style("height", `${nodeSize}px`)
+                    .style("line-height", `${nodeSize}px`)
+                    .style("white-space", "nowrap");
+                row.append("span").attr("class", "octo-axxel-tree-label");
+                row.append("a").attr("class", "octo-axxel-tree-export")
+                    .style("position", "absolute")
+                    .style("right", "3em")
+                    .attr("title", "download all files of this run as zip")
+                    .text("⤓");
+                row.append("a").attr("class", "octo-axxel-tree-delete")
+                    .style("position", "absolute")
+                    .style("right", "4.5em")
+                    .style("cursor", "pointer")
+                    .attr("title", "delete all files of this run")
+                    .text("✕");
+                row.append("span").attr("class", "octo-axxel-tree-count")
+                    .style("position", "absolute")
+                    .style("right", "0")
+                    .style("color", "#555");
+                return row;
+            })
+            .style("top", (row, idx) => `${(first + idx) * nodeSize}px`)
+            .attr("title", row => row.title)
+            .call(rows => rows.select(".octo-axxel-tree-label")
+                .style("padding-left", row => `${row.depth * nodeSize}px`)
+                .style("cursor", row => row.nodeType === "stream" || row.expandable ? "pointer" : "default")
+                .text(row => (row.expandable ? (row.expanded ? "▾ " : "▸ ") : "• ") + row.name)
+                .on("pointerenter", (event, row) => { if (row.nodeType === "stream") { event.target.style.fontWeight = "bold"; } })
+                .on("pointerleave", (event) => { event.target.style.fontWeight = "normal"; })
+                .style("color", row => OctoAxxelFftComparisonVis.has(row.comparisonKey) ? "SteelBlue" : null)
+                .on("click", (event, row) => {
+                    if ((event.ctrlKey || event.metaKey) && row.comparisonKey !== undefined) { this.compare(row); }
+                    else if (row.expandable) { this.toggle(row); }
+                    else if (row.nodeType === "stream") { this.select(row); }
+                }))
+            .call(rows => rows.select(".octo-axxel-tree-export")
+                .style("display", row => row.nodeType === "run" ? null : "none")
+                .attr("href", row => row.nodeType === "run" ? RUN_EXPORT_URL + "/" + encodeURIComponent(row.key) + ".zip" : null))
+            .call(rows => rows.select(".octo-axxel-tree-delete")
+                .style("display", row => row.nodeType === "run" ? null : "none")
+                .on("click", (event, row) => { this.deleteRun(row); }))
+            .call(rows => rows.select(".octo-axxel-tree-count")
+                .text(row => row.count === undefined ? "-" : row.count));
     }
 
     async plot() {
-        const data = await this.fetchData(DATA_SET_URL);
-        const [header, chart] = await this.computeChart(data);
-        document.querySelector("#" + DIV_ID_DATA_SET_VIS_HEADER).replaceChildren(header);
-        document.querySelector("#" + DIV_ID_DATA_SET_VIS).replaceChildren(chart);
+        this.runs = await this.fetchRuns(RUNS_URL);
+
+        // refresh details of expanded runs, drop state of vanished runs
+        const runHashes = new Set(this.runs.map(run => run.runHash));
+        for (const runHash of [...OctoAxxelDataSetVis.#runDetails.keys()]) {
+            if (!runHashes.has(runHash) || !OctoAxxelDataSetVis.#expandedRuns.has(runHash)) { OctoAxxelDataSetVis.#runDetails.delete(runHash); }
+        }
+        for (const runHash of OctoAxxelDataSetVis.#expandedRuns) {
+            if (runHashes.has(runHash)) { OctoAxxelDataSetVis.#runDetails.set(runHash, await this.fetchRun(RUN_URL, runHash)); }
+            else { OctoAxxelDataSetVis.#expandedRuns.delete(runHash); }
+        }
+
+        this.rows = this.computeRows();
+        this.container = document.querySelector("#" + DIV_ID_DATA_SET_VIS);
+        this.rowsContainer = d3.create("div")
+            .attr("style", `position: relative; width: ${OctoAxxelDataSetVis.WIDTH_PX}px; font: 10px sans-serif;`);
+
+        document.querySelector("#" + DIV_ID_DATA_SET_VIS_HEADER).replaceChildren(this.computeHeader());
+        this.container.replaceChildren(this.rowsContainer.node());
+
+        let frameRequested = false;
+        this.container.onscroll = () => {
+            if (frameRequested) { return; }
+            frameRequested = true;
+            requestAnimationFrame(() => { frameRequested = false; this.renderRows(); });
+        };
+        this.renderRows();
+    }
+}
+
+/**
+ * Line chart that draws its series to a canvas while axes and the interactive tip are kept in an SVG overlay.
+ * Each frame only touches the samples within the visible domain and reduces them to first/min/max/last per pixel column,
+ * so drawing cost is bound by the chart width rather than the sample count.
+ *
+ * blueprints:
+ * - https://observablehq.com/@d3/zoomable-bar-chart?intent=fork
+ * - https://observablehq.com/@d3/multi-line-chart/2?intent=fork
+ */
+class OctoAxxelCanvasLineChart {
+
+    /**
+     * @param {Float32Array|Float64Array} xValues - ascending x values shared by all series
+     * @param {[{key: str, values: Float32Array|Float64Array, color: str}]} series - y values per series, same length as xValues
+     * @param {str} xLabel - x axis label
+     * @param {str} yLabel - y axis label
+     * @param {function(str, float, float): [str, str, str]} tipText - text lines of the tip for series key, x and y value
+     */
+    constructor(xValues, series, xLabel, yLabel, tipText) {
+        this.xValues = xValues;
+        this.series = series;
+        this.xLabel = xLabel;
+        this.yLabel = yLabel;
+        this.tipText = tipText;
+        this.width = 640;
+        this.height = 400;
+        this.marginTop = 20;
+        this.marginRight = 20;
+        this.marginBottom = 30;
+        this.marginLeft = 40;
+    }
+
+    render() {
+        const format = d3.format("+r");
+        const {width, height, marginTop, marginRight, marginBottom, marginLeft, xValues, series} = this;
+        const length = xValues.length;
+        const dpr = window.devicePixelRatio || 1;
+
+        let yMin = Infinity;
+        let yMax = -Infinity;
+        for (const s of series) {
+            for (let idx = 0; idx < length; idx++) {
+                const v = s.values[idx];
+                if (v < yMin) { yMin = v; }
+                if (v > yMax) { yMax = v; }
+            }
+        }
+
+        const xScale = d3.scaleLinear()
+            .domain(length > 0 ? [xValues[0], xValues[length - 1]] : [0, 1]).nice()
+            .range([marginLeft, width - marginRight]);
+        const xAxis = d3.axisBottom(xScale).ticks(width / 80, format).tickSizeOuter(0);
+
+        const yScale = d3.scaleLinear()
+            .domain(length > 0 ? [yMin, yMax] : [0, 1]).nice()
+            .range([height - marginBottom, marginTop]);
+        const yAxis = d3.axisLeft(yScale).ticks(height / 40, format).tickSizeOuter(0);
+
+        const container = d3.create("div")
+            .attr("style", `position: relative; width: ${width}px; height: ${height}px;`);
+
+        const canvas = container.append("canvas")
+            .attr("width", width * dpr)
+            .attr("height", height * dpr)
+            .attr("style", `position: absolute; left: 0; top: 0; width: ${width}px; height: ${height}px;`);
+        const context = canvas.node().getContext("2d");
+        context.scale(dpr, dpr);
+
+        const svg = container.append("svg")
+            .attr("width", width)
+            .attr("height", height)
+            .attr("viewBox", [0, 0, width, height])
+            .attr("style", "position: absolute; left: 0; top: 0; overflow: visible; font: 10px sans-serif;");
+
+        const clipId = "clip-canvas-" + Math.random().toString(36).slice(2);
+        svg.append("defs").append("clipPath")
+            .attr("id", clipId)
+            .append("rect")
+            .attr("x", marginLeft - 15)
+            .attr("width", width - marginLeft - marginRight + 30)
+            .attr("height", height);
+
+        const xAxisGroup = svg.append("g")
+            .attr("clip-path", `url(#${clipId})`)
+            .attr("transform", `translate(0,${height - marginBottom})`)
+            .call(xAxis)
+            .call(g => g.select(".domain").remove());
+
+        svg.append("text")
+            .attr("x", width / 2)
+            .attr("y", height)
+            .attr("fill", "currentColor")
+            .attr("text-anchor", "start")
+            .text(this.xLabel);
+
+        svg.append("g")
+            .attr("transform", `translate(${marginLeft},0)`)
+            .call(yAxis)
+            .call(g => g.select(".domain").remove())
+            .call(g => g.selectAll(".tick line").clone()
+                .attr("x2", width - marginLeft - marginRight)
+                .attr("stroke-opacity", 0.1))
+            .call(g => g.append("text")
+                .attr("x", -marginLeft)
+                .attr("y", 10)
+                .attr("fill", "currentColor")
+                .attr("text-anchor", "start")
+                .text(this.yLabel));
+
+        let highlighted = null;
+
+        const draw = () => {
+            context.clearRect(0, 0, width, height);
+            context.save();
+            context.beginPath();
+            context.rect(marginLeft, 0, width - marginLeft - marginRight, height);
+            context.clip();
+            context.lineWidth = 0.75;
+
+            // zoom rewrites the range, not the domain: the visible interval is what maps onto the plot area
+            const x0 = xScale.invert(marginLeft);
+            const x1 = xScale.invert(width - marginRight);
+            const first = Math.max(0, d3.bisectLeft(xValues, x0) - 1);
+            const last = Math.min(length, d3.bisectRight(xValues, x1) + 1);
+
+            for (const s of series) {
+                const values = s.values;
+                context.strokeStyle = (highlighted === null || highlighted === s.key) ? s.color : "#ddd";
+                context.beginPath();
+
+                // per pixel column keep the first, min, max and last point
+                let column = NaN, columnFirst = 0, columnMin = 0, columnMax = 0, columnLast = 0, started = false;
+                const flushColumn = () => {
+                    if (!started) { context.moveTo(column, columnFirst); started = true; }
+                    else { context.lineTo(column, columnFirst); }
+                    if (columnMin !== columnMax) {
+                        context.lineTo(column, columnMin);
+                        context.lineTo(column, columnMax);
+                    }
+                    context.lineTo(column, columnLast);
+                };
+
+                for (let idx = first; idx < last; idx++) {
+                    const px = Math.round(xScale(xValues[idx]));
+                    const py = yScale(values[idx]);
+                    if (px !== column) {
+                        if (!isNaN(column)) { flushColumn(); }
+                        column = px;
+                        columnFirst = columnMin = columnMax = columnLast = py;
+                    } else {
+                        if (py < columnMin) { columnMin = py; }
+                        if (py > columnMax) { columnMax = py; }
+                        columnLast = py;
+                    }
+                }
+                if (!isNaN(column)) { flushColumn(); }
+                context.stroke();
+            }
+            context.restore();
+        };
+
+        let frameRequested = false;
+        const requestDraw = () => {
+            if (frameRequested) { return; }
+            frameRequested = true;
+            requestAnimationFrame(() => { frameRequested = false; draw(); });
+        };
+
+        // invisible layer for the interactive tip
+        const dot = svg.append("g")
+            .attr("display", "none");
+        dot.append("circle")
+            .attr("r", 2.5);
+        const tipLines = [-24, -16, -8].map(y => dot.append("text")
+            .attr("text-anchor", "left")
+            .attr("y", y));
+
+        const pointerentered = () => {
+            dot.attr("display", null);
+        };
+
+        const pointerleft = () => {
+            highlighted = null;
+            dot.attr("display", "none");
+            svg.node().value = null;
+            svg.dispatch("input", {bubbles: true});
+            requestDraw();
+        };
+
+        const pointermoved = (event) => {
+            if (length === 0) { return; }
+            const [xm, ym] = d3.pointer(event, svg.node());
+
+            // nearest sample in x, then nearest series in y
+            let idx = Math.min(length - 1, d3.bisectLeft(xValues, xScale.invert(xm)));
+            if (idx > 0 && Math.abs(xScale(xValues[idx - 1]) - xm) < Math.abs(xScale(xValues[idx]) - xm)) { idx--; }
+            const nearest = d3.least(series, s => Math.abs(yScale(s.values[idx]) - ym));
+            const xValue = xValues[idx];
+            const yValue = nearest.values[idx];
+
+            if (highlighted !== nearest.key) {
+                highlighted = nearest.key;
+                requestDraw();
+            }
+
+            dot.attr("transform", `translate(${xScale(xValue)},${yScale(yValue)})`);
+            this.tipText(nearest.key, xValue, yValue).forEach((text, line) => tipLines[line].text(text));
+            svg.property("value", [xValue, yValue, nearest.key]).dispatch("input", {bubbles: true});
+        };
+
+        svg
+            .on("pointerenter", pointerentered)
+            .on("pointerleave", pointerleft)
+            .on("pointermove", pointermoved);
+
+        const extent = [[marginLeft, marginTop], [width - marginRight, height - marginTop]];
+        svg.call(d3.zoom()
+            .scaleExtent([1, 1024])
+            .translateExtent(extent)
+            .extent(extent)
+            .on("zoom", (event) => {
+                xScale.range([marginLeft, width - marginRight].map(d => event.transform.applyX(d)));
+                xAxisGroup.call(xAxis).call(g => g.select(".domain").remove());
+                requestDraw();
+                if (event.sourceEvent) { pointermoved(event.sourceEvent); }
+            }));
+
+        draw();
+        return container.node();
     }
 }
 
@@ -216,46 +739,15 @@ class OctoAxxelAccelerationVis {
     /**
      * @param {str} fileUrl - URL of tabular separated file, i.e. "plugin/octoprint_accelerometer/download/axxel-30f9c95c-20231127-235625233-s000-ax-f010-z015.tsv"
      * @param {char} separator - tabular separator (single character)
-     * @return {[{seq: float, sample: float, x: float, y: float, z: float}]}
+     * @param {str|undefined} cacheKey - see OctoAxxelDataCache.keyOf()
+     * @return {{length: int, meta: {...}, columns: {seq: Float32Array, sample: Float32Array, timestamp_ms: Float32Array, x: Float32Array, y: Float32Array, z: Float32Array}}}
      */
-    async fetchData(fileUrl, separator = " ") {
-        const text = await d3.text(fileUrl);
-
-        // parse meta data which is the very last line of a complete stream
-        let meta = undefined;
-        const lines = text.split("\n");
-        for (let idx = lines.length - 1; idx > lines.length - 3; idx--) {
-            const line = lines[idx];
-            if (line.startsWith("#")) {
-                try {
-                    let metaStr = line.replace(/(^.*#\s*)/, "");
-                    meta = JSON.parse(metaStr);
-                    const odrToFloat = (odr) => parseFloat(odr.replace(/(^ODR)/, ""));
-                    meta.rate = odrToFloat(meta.rate);
-                    break;
-                } catch {
-                    console.error("failed to parse metadata from " + fileUrl);
-                }
-            }
-        }
-
-        const dsv = d3.dsvFormat(" ").parse(text, (line) => {
-                return {
-                    seq: parseFloat(line.seq),
-                    sample: parseFloat(line.sample),
-                    timestamp_ms: parseFloat(line.sample) * 1000 / meta.rate,
-                    x: parseFloat(line.x),
-                    y: parseFloat(line.y),
-                    z: parseFloat(line.z),
-                };
-            }
-        );
-
-        return dsv;
+    async fetchData(fileUrl, separator = " ", cacheKey = undefined) {
+        return OctoAxxelDataParser.instance().parse("stream", fileUrl, separator, cacheKey);
     }
 
     /**
-     * @param {[{seq: float, sample: float, x: float, y: float, z: float}]}: data - chart data to plot
+     * @param {{length: int, columns: {timestamp_ms: Float32Array, x: Float32Array, y: Float32Array, z: Float32Array}}}: data - chart data to plot
      */
     async computeChart(data) {
         const format = d3.format("+r");
@@ -266,15 +758,18 @@ class OctoAxxelAccelerationVis {
         const marginBottom = 30;
         const marginLeft = 40;
 
+        const {timestamp_ms: timestamps, x: xs, y: ys, z: zs} = data.columns;
+        const indices = d3.range(data.length);
+
         // declare the x scale (time domain)
         const xScale = d3.scaleLinear()
-            .domain(d3.extent(data, d => d.timestamp_ms)).nice()
+            .domain(d3.extent(timestamps)).nice()
             .range([marginLeft, width - marginRight]);
         const xAxis = d3.axisBottom(xScale).ticks(width / 80, format).tickSizeOuter(0);
 
         // declare the y scale (acceleration domain)
         const yScale = d3.scaleLinear()
-            .domain([d3.min(data, d => Math.min(d.x, d.y, d.z)), d3.max(data, d => Math.max(d.x, d.y, d.z))]).nice()
+            .domain([Math.min(d3.min(xs), d3.min(ys), d3.min(zs)), Math.max(d3.max(xs), d3.max(ys), d3.max(zs))]).nice()
             .range([height - marginBottom, marginTop]);
         const yAxis = d3.axisLeft(yScale).ticks(height / 40, format).tickSizeOuter(0);
 
@@ -323,30 +818,30 @@ class OctoAxxelAccelerationVis {
                 .text("↑ Acceleration [mg]"));
 
         // draw the lines
-        const xLine = d3.line(d => xScale(d.timestamp_ms), d => yScale(d.x));
-        const yLine = d3.line(d => xScale(d.timestamp_ms), d => yScale(d.y));
-        const zLine = d3.line(d => xScale(d.timestamp_ms), d => yScale(d.z));
+        const xLine = d3.line(i => xScale(timestamps[i]), i => yScale(xs[i]));
+        const yLine = d3.line(i => xScale(timestamps[i]), i => yScale(ys[i]));
+        const zLine = d3.line(i => xScale(timestamps[i]), i => yScale(zs[i]));
 
         const pathX = svg.append("path")
             .attr("fill", "none")
             .attr("stroke", "Tomato")
             .attr("stroke-width", 0.75)
             .attr("clip-path", "url(#clip0815)")
-            .attr("d", xLine(data));
+            .attr("d", xLine(indices));
 
         const pathY = svg.append("path")
             .attr("fill", "none")
             .attr("stroke", "MediumSeaGreen")
             .attr("stroke-width", 0.75)
             .attr("clip-path", "url(#clip0815)")
-            .attr("d", yLine(data));
+            .attr("d", yLine(indices));
 
         const pathZ = svg.append("path")
             .attr("fill", "none")
             .attr("stroke", "SteelBlue")
             .attr("stroke-width", 0.75)
             .attr("clip-path", "url(#clip0815)")
-            .attr("d", zLine(data));
+            .attr("d", zLine(indices));
 
         // invisible layer for the interactive tip
         const dot = svg.append("g")
@@ -383,9 +878,9 @@ class OctoAxxelAccelerationVis {
         }
 
         const pointermoved = (event) => {
-            const points = data.map(d => [xScale(d.timestamp_ms), yScale(d.x), "x"])
-                .concat(data.map(d => [xScale(d.timestamp_ms), yScale(d.y), "y"]))
-                .concat(data.map(d => [xScale(d.timestamp_ms), yScale(d.z), "z"]));
+            const points = indices.map(i => [xScale(timestamps[i]), yScale(xs[i]), "x"])
+                .concat(indices.map(i => [xScale(timestamps[i]), yScale(ys[i]), "y"]))
+                .concat(indices.map(i => [xScale(timestamps[i]), yScale(zs[i]), "z"]));
 
             const [xm, ym] = d3.pointer(event);
             const i = d3.leastIndex(points, ([x, y]) => Math.hypot(x - xm, y - ym));
@@ -417,9 +912,9 @@ class OctoAxxelAccelerationVis {
                 svg.selectAll(".x-axis").call(xAxis);
 
                 // zooms lines
-                pathX.attr("d", xLine(data));
-                pathY.attr("d", yLine(data));
-                pathZ.attr("d", zLine(data));
+                pathX.attr("d", xLine(indices));
+                pathY.attr("d", yLine(indices));
+                pathZ.attr("d", zLine(indices));
 
                 // update pointer
                 pointermoved(event);
@@ -438,58 +933,117 @@ class OctoAxxelAccelerationVis {
         return svg.node();
     }
 
-    async plot(fileName) {
-        const data = await this.fetchData(FILE_DOWNLOAD_URL + "/" + fileName);
-        const chart = await this.computeChart(data);
+    /**
+     * @param {{length: int, columns: {timestamp_ms: Float32Array, x: Float32Array, y: Float32Array, z: Float32Array}}}: data - chart data to plot
+     */
+    async computeCanvasChart(data) {
+        return new OctoAxxelCanvasLineChart(
+            data.columns.timestamp_ms,
+            [{key: "x", values: data.columns.x, color: "Tomato"},
+             {key: "y", values: data.columns.y, color: "MediumSeaGreen"},
+             {key: "z", values: data.columns.z, color: "SteelBlue"}],
+            "Time [ms] →",
+            "↑ Acceleration [mg]",
+            (axis, x, y) => ["axis: " + axis.toUpperCase(), "time: " + Math.round(x) + "ms", "acc: " + Math.round(y) + "mg"]
+        ).render();
+    }
+
+    async plot(fileName, cacheKey = undefined) {
+        const data = await this.fetchData(FILE_DOWNLOAD_URL + "/" + fileName, " ", cacheKey);
+        const chart = OctoAxxelVisSettings.renderer === "svg" ? await this.computeChart(data) : await this.computeCanvasChart(data);
         document.querySelector("#" + DIV_ID_ACCELERATION_VIS).replaceChildren(chart);
     }
 }
 
 class OctoAxxelFftVis {
 
+    // decomposition algorithm to plot; "" plots the FFT files of the decomposition
+    static algorithm = "";
+    // arguments of the last plot, so that switching the algorithm re-plots the same stream
+    static #lastPlot = undefined;
+    // spectra of all algorithms of the last plotted stream: switching the algorithm does not request them again
+    static #variants = {streamFileName: undefined, data: undefined};
+
+    /**
+     * Requests the spectra again on the next plot, i.e. if algorithms were added by the data processing meanwhile.
+     */
+    static forgetVariants() {
+        OctoAxxelFftVis.#variants = {streamFileName: undefined, data: undefined};
+    }
+
+    /**
+     * Re-plots the last plotted stream, i.e. after the algorithm changed.
+     */
+    static replot() {
+        if (OctoAxxelFftVis.#lastPlot === undefined) { return; }
+        const {fileNames, cacheKeys, streamFileName} = OctoAxxelFftVis.#lastPlot;
+        (async () => new OctoAxxelFftVis().plot(fileNames, cacheKeys, streamFileName))();
+    }
+
+    /**
+     * @param {str} variantsUrl - URL for GET request, i.e. "plugin/octoprint_accelerometer/get_fft_variants"
+     * @param {str} streamFileName - i.e. "axxel-30f9c95c-20231127-235625233-s000-ax-f010-z015.tsv"
+     * @param {str} algorithm - i.e. "hann"
+     * @return {{length: int, columns: {frequency_hz: Float32Array, fft_x: Float32Array, fft_y: Float32Array, fft_z: Float32Array}}|undefined} - undefined if not (yet) computed
+     */
+    async fetchVariant(variantsUrl, streamFileName, algorithm) {
+        const variants = OctoAxxelFftVis.#variants;
+        if (variants.streamFileName !== streamFileName) {
+            const response = await fetch(variantsUrl + "?" + new URLSearchParams({stream: streamFileName}).toString());
+            variants.streamFileName = streamFileName;
+            variants.data = response.ok ? (await response.json())["fft_variants"] : undefined;
+        }
+        const amplitudes = variants.data ? variants.data.amplitudes[algorithm] : undefined;
+        if (amplitudes === undefined) { return undefined; }
+        return {
+            length: variants.data.frequency_hz.length,
+            columns: {
+                frequency_hz: Float32Array.from(variants.data.frequency_hz),
+                fft_x: Float32Array.from(amplitudes.x),
+                fft_y: Float32Array.from(amplitudes.y),
+                fft_z: Float32Array.from(amplitudes.z),
+            }
+        };
+    }
+
     /**
      * @param {{"x": str, "y": str, "z": str]} fileUrls - URL of tabular separated file,
      * i.e. {"x": "plugin/octoprint_accelerometer/download/fft-30f9c95c-20231127-235625233-s000-ax-f010-z015-x.tsv",
      *       "y": "plugin/octoprint_accelerometer/download/fft-30f9c95c-20231127-235625233-s000-ax-f010-z015-y.tsv",
      *       "z": "plugin/octoprint_accelerometer/download/fft-30f9c95c-20231127-235625233-s000-ax-f010-z015-z.tsv"}
      * @param {char} separator - tabular separator (single character)
-     * @return {[{frequency_hz: float, fft_x: float, fft_y: float, fft_z: float}]}
+     * @param {{"x": str, "y": str, "z": str}} cacheKeys - see OctoAxxelDataCache.keyOf()
+     * @return {{length: int, columns: {frequency_hz: Float32Array, fft_x: Float32Array, fft_y: Float32Array, fft_z: Float32Array}}}
      */
-    async fetchData(fileUrls, separator = " ") {
-        const rawData = {};
-        const data = []
-
-        for (const fileUrlKey in fileUrls) {
-            const fileUrl = fileUrls[fileUrlKey];
-            const axisFft = await d3.dsv(separator, fileUrl, (line) => {
-                return {
-                        frequency_hz: parseFloat(line.freq_hz),
-                        fft: parseFloat(line.fft),
-                };
-            });
-            rawData[fileUrlKey] = axisFft;
-        }
+    async fetchData(fileUrls, separator = " ", cacheKeys = {}) {
+        const parser = OctoAxxelDataParser.instance();
+        const [x, y, z] = await Promise.all(["x", "y", "z"].map(axis => parser.parse("fft", fileUrls[axis], separator, cacheKeys[axis])));
 
         // assume each axis/file has the same frequency domain (same length and same frequencies)
-        if (Object.keys(rawData.x).length == Object.keys(rawData.y).length &&
-            Object.keys(rawData.x).length == Object.keys(rawData.z).length) {
-            for (let idx = 0; idx < rawData.x.length; idx++) {
-                const x = rawData.x[idx];
-                const y = rawData.y[idx];
-                const z = rawData.z[idx];
-                if (x.frequency_hz !== y.frequency_hz || y.frequency_hz !== z.frequency_hz) {
-                    console.warn("fft mismatch: x.frequency_hz: " + x.fft + " y.frequency_hz: " + y.fft + " z.frequency_hz: " + z.fft);
+        let length = 0;
+        if (x.length === y.length && x.length === z.length) {
+            const fx = x.columns.frequency_hz, fy = y.columns.frequency_hz, fz = z.columns.frequency_hz;
+            for (; length < x.length; length++) {
+                if (fx[length] !== fy[length] || fy[length] !== fz[length]) {
+                    console.warn("fft mismatch: x.frequency_hz: " + fx[length] + " y.frequency_hz: " + fy[length] + " z.frequency_hz: " + fz[length]);
                     break;
                 }
-                data.push({"frequency_hz": x.frequency_hz, "fft_x": x.fft, "fft_y": y.fft, "fft_z": z.fft});
             }
         }
 
-        return data;
+        return {
+            length: length,
+            columns: {
+                frequency_hz: x.columns.frequency_hz.subarray(0, length),
+                fft_x: x.columns.fft.subarray(0, length),
+                fft_y: y.columns.fft.subarray(0, length),
+                fft_z: z.columns.fft.subarray(0, length),
+            }
+        };
     }
 
     /**
-     * @param {[{frequency_hz: float, fft_x: float, fft_y: float, fft_z: float}]}: data - chart data to plot
+     * @param {{length: int, columns: {frequency_hz: Float32Array, fft_x: Float32Array, fft_y: Float32Array, fft_z: Float32Array}}}: data - chart data to plot
      */
     async computeChart(data) {
         const format = d3.format("+r");
@@ -500,15 +1054,18 @@ class OctoAxxelFftVis {
         const marginBottom = 30;
         const marginLeft = 40;
 
+        const {frequency_hz: frequencies, fft_x: xs, fft_y: ys, fft_z: zs} = data.columns;
+        const indices = d3.range(data.length);
+
         // declare the x scale (time domain)
         const xScale = d3.scaleLinear()
-            .domain(d3.extent(data, d => d.frequency_hz)).nice()
+            .domain(d3.extent(frequencies)).nice()
             .range([marginLeft, width - marginRight]);
         const xAxis = d3.axisBottom(xScale).ticks(width / 80, format).tickSizeOuter(0);
 
         // declare the y scale (acceleration domain)
         const yScale = d3.scaleLinear()
-            .domain([d3.min(data, d => Math.min(d.fft_x, d.fft_y, d.fft_z)), d3.max(data, d => Math.max(d.fft_x, d.fft_y, d.fft_z))]).nice()
+            .domain([Math.min(d3.min(xs), d3.min(ys), d3.min(zs)), Math.max(d3.max(xs), d3.max(ys), d3.max(zs))]).nice()
             .range([height - marginBottom, marginTop]);
         const yAxis = d3.axisLeft(yScale).ticks(height / 40, format)
 
@@ -557,30 +1114,30 @@ class OctoAxxelFftVis {
                 .text("↑ FFT"));
 
         // draw the lines
-        const xLine = d3.line(d => xScale(d.frequency_hz), d => yScale(d.fft_x));
-        const yLine = d3.line(d => xScale(d.frequency_hz), d => yScale(d.fft_y));
-        const zLine = d3.line(d => xScale(d.frequency_hz), d => yScale(d.fft_z));
+        const xLine = d3.line(i => xScale(frequencies[i]), i => yScale(xs[i]));
+        const yLine = d3.line(i => xScale(frequencies[i]), i => yScale(ys[i]));
+        const zLine = d3.line(i => xScale(frequencies[i]), i => yScale(zs[i]));
 
         const pathX = svg.append("path")
             .attr("fill", "none")
             .attr("stroke", "Tomato")
             .attr("stroke-width", 0.75)
             .attr("clip-path", "url(#clip1317)")
-            .attr("d", xLine(data));
+            .attr("d", xLine(indices));
 
         const pathY = svg.append("path")
             .attr("fill", "none")
             .attr("stroke", "MediumSeaGreen")
             .attr("stroke-width", 0.75)
             .attr("clip-path", "url(#clip1317)")
-            .attr("d", yLine(data));
+            .attr("d", yLine(indices));
 
         const pathZ = svg.append("path")
             .attr("fill", "none")
             .attr("stroke", "SteelBlue")
             .attr("stroke-width", 0.75)
             .attr("clip-path", "url(#clip1317)")
-            .attr("d", zLine(data));
+            .attr("d", zLine(indices));
 
         // invisible layer for the interactive tip
         const dot = svg.append("g")
@@ -617,9 +1174,9 @@ class OctoAxxelFftVis {
         }
 
         const pointermoved = (event) => {
-            const points = data.map(d => [xScale(d.frequency_hz), yScale(d.fft_x), "x"])
-                .concat(data.map(d => [xScale(d.frequency_hz), yScale(d.fft_y), "y"]))
-                .concat(data.map(d => [xScale(d.frequency_hz), yScale(d.fft_z), "z"]));
+            const points = indices.map(i => [xScale(frequencies[i]), yScale(xs[i]), "x"])
+                .concat(indices.map(i => [xScale(frequencies[i]), yScale(ys[i]), "y"]))
+                .concat(indices.map(i => [xScale(frequencies[i]), yScale(zs[i]), "z"]));
             const [xm, ym] = d3.pointer(event);
             const i = d3.leastIndex(points, ([x, y]) => Math.hypot(x - xm, y - ym));
             const [x, y, axis] = points[i];
@@ -650,9 +1207,9 @@ class OctoAxxelFftVis {
                 svg.selectAll(".x-axis").call(xAxis);
 
                 // zooms lines
-                pathX.attr("d", xLine(data));
-                pathY.attr("d", yLine(data));
-                pathZ.attr("d", zLine(data));
+                pathX.attr("d", xLine(indices));
+                pathY.attr("d", yLine(indices));
+                pathZ.attr("d", zLine(indices));
 
                 // update pointer
                 pointermoved(event);
@@ -671,14 +1228,325 @@ class OctoAxxelFftVis {
         return svg.node();
     }
 
-    async plot(fileNames) {
-        const fileUrls = {};
-        for (const axis in fileNames) { fileUrls[axis] = FILE_DOWNLOAD_URL + "/" + fileNames[axis]; }
-        const data = await this.fetchData(fileUrls);
-        const chart = await this.computeChart(data);
+    /**
+     * @param {{length: int, columns: {frequency_hz: Float32Array, fft_x: Float32Array, fft_y: Float32Array, fft_z: Float32Array}}}: data - chart data to plot
+     */
+    async computeCanvasChart(data) {
+        return new OctoAxxelCanvasLineChart(
+            data.columns.frequency_hz,
+            [{key: "x", values: data.columns.fft_x, color: "Tomato"},
+             {key: "y", values: data.columns.fft_y, color: "MediumSeaGreen"},
+             {key: "z", values: data.columns.fft_z, color: "SteelBlue"}],
+            "Frequency [Hz] →",
+            "↑ FFT",
+            (axis, x, y) => ["axis: " + axis.toUpperCase(), "𝑓: " + Math.round(x) + "Hz", "FFT: " + Math.round(y)]
+        ).render();
+    }
+
+    /**
+     * Plots the spectra of the selected algorithm; falls back to the FFT files of the decomposition if that algorithm
+     * was not computed for the stream.
+     */
+    async plot(fileNames, cacheKeys = {}, streamFileName = undefined) {
+        OctoAxxelFftVis.#lastPlot = {fileNames: fileNames, cacheKeys: cacheKeys, streamFileName: streamFileName};
+        let data = undefined;
+        if (OctoAxxelFftVis.algorithm !== "" && streamFileName !== undefined) {
+            data = await this.fetchVariant(FFT_VARIANTS_URL, streamFileName, OctoAxxelFftVis.algorithm);
+        }
+        if (data === undefined) {
+            const fileUrls = {};
+            for (const axis in fileNames) { fileUrls[axis] = FILE_DOWNLOAD_URL + "/" + fileNames[axis]; }
+            data = await this.fetchData(fileUrls, " ", cacheKeys);
+        }
+        const chart = OctoAxxelVisSettings.renderer === "svg" ? await this.computeChart(data) : await this.computeCanvasChart(data);
         document.querySelector("#" + DIV_ID_FFT_VIS).replaceChildren(chart);
     }
 }
 
+/**
+ * Overlays the spectra of several runs and/or streams of one axis in the FFT chart.
+ * The plugin resamples all spectra to one shared frequency grid, so runs with different output data rate or
+ * recording timespan can be compared.
+ */
+class OctoAxxelFftComparisonVis {
+
+    static COLORS = d3.schemeCategory10;
+
+    // compared runs and streams survive re-plotting; maps comparison key ("run:<hash>" or "stream:<file>") to label
+    static #compared = new Map();
+    static axis = "x";
+
+    static has(comparisonKey) {
+        return comparisonKey !== undefined && OctoAxxelFftComparisonVis.#compared.has(comparisonKey);
+    }
+
+    static toggle(comparisonKey, label) {
+        if (OctoAxxelFftComparisonVis.#compared.has(comparisonKey)) { OctoAxxelFftComparisonVis.#compared.delete(comparisonKey); }
+        else { OctoAxxelFftComparisonVis.#compared.set(comparisonKey, label); }
+    }
+
+    static clear() {
+        OctoAxxelFftComparisonVis.#compared.clear();
+    }
+
+    static isEmpty() {
+        return OctoAxxelFftComparisonVis.#compared.size === 0;
+    }
+
+    /**
+     * @param {str} comparisonUrl - URL for GET request, i.e. "plugin/octoprint_accelerometer/get_fft_comparison"
+     * @param {str} axis - "x", "y" or "z"
+     * @return {{length: int, columns: {frequency_hz: Float64Array}, series: [{key: str, values: Float64Array}]}}
+     */
+    async fetchData(comparisonUrl, axis) {
+        const streams = [];
+        const runs = [];
+        for (const comparisonKey of OctoAxxelFftComparisonVis.#compared.keys()) {
+            const [kind, id] = [comparisonKey.substring(0, comparisonKey.indexOf(":")), comparisonKey.substring(comparisonKey.indexOf(":") + 1)];
+            if (kind === "run") { runs.push(id); } else { streams.push(id); }
+        }
+
+        const query = new URLSearchParams({axis: axis, streams: streams.join(","), runs: runs.join(",")});
+        const response = await fetch(comparisonUrl + "?" + query.toString());
+        if (!response.ok) { throw new Error("HTTP " + response.status + " for " + comparisonUrl); }
+        const rawData = (await response.json())["fft_comparison"];
+
+        const series = [];
+        for (const [comparisonKey, label] of OctoAxxelFftComparisonVis.#compared) {
+            const id = comparisonKey.substring(comparisonKey.indexOf(":") + 1);
+            const values = rawData.series[id];
+            if (values === undefined) { continue; }
+            series.push({key: label, values: Float64Array.from(values, v => v === null ? NaN : v)});
+        }
+        return {length: rawData.frequency_hz.length, columns: {frequency_hz: Float64Array.from(rawData.frequency_hz)}, series: series};
+    }
+
+    /**
+     * Plots the compared spectra; the chart is always drawn to a canvas as the number of series is not bound.
+     */
+    async plot() {
+        const div = document.querySelector("#" + DIV_ID_FFT_VIS);
+        if (OctoAxxelFftComparisonVis.isEmpty()) {
+            div.replaceChildren();
+            return;
+        }
+
+        const axis = OctoAxxelFftComparisonVis.axis;
+        const data = await this.fetchData(FFT_COMPARISON_URL, axis);
+        const colors = OctoAxxelFftComparisonVis.COLORS;
+        const chart = new OctoAxxelCanvasLineChart(
+            data.columns.frequency_hz,
+            data.series.map((s, idx) => ({key: s.key, values: s.values, color: colors[idx % colors.length]})),
+            "Frequency [Hz] →",
+            "↑ FFT " + axis.toUpperCase(),
+            (key, x, y) => [key, "𝑓: " + Math.round(x) + "Hz", "FFT: " + Math.round(y)]
+        ).render();
+        div.replaceChildren(chart);
+    }
+}
+
+/**
+ * Time-frequency heatmap of one stream axis.
+ * The plugin serves the spectrogram as max-pooled tiles: the initial tile spans the whole stream,
+ * zooming in fetches a finer tile of the visible time range once the gesture ended.
+ *
+ * blueprint: https://observablehq.com/@d3/zoomable-raster-vector?intent=fork
+ */
+class OctoAxxelSpectrogramVis {
+
+    constructor() {
+        this.width = 640;
+        this.height = 300;
+        this.marginTop = 20;
+        this.marginRight = 20;
+        this.marginBottom = 30;
+        this.marginLeft = 40;
+    }
+
+    /**
+     * @param {str} spectrogramUrl - URL for GET request, i.e. "plugin/octoprint_accelerometer/get_spectrogram"
+     * @param {str} streamFileName - i.e. "axxel-30f9c95c-20231127-235625233-s000-ax-f010-z015.tsv"
+     * @param {str} axis - "x", "y" or "z"
+     * @param {{startS: float, stopS: float, maxFrames: int, maxBins: int}} range - optional tile range and size
+     * @return {{frequency_hz: [float], time_s: [float], magnitude: [[float]], magnitude_max: float}|undefined} - undefined if not (yet) computed
+     */
+    async fetchTile(spectrogramUrl, streamFileName, axis, range = {}) {
+        const query = new URLSearchParams({stream: streamFileName, axis: axis});
+        if (range.startS !== undefined) { query.set("start_s", range.startS); }
+        if (range.stopS !== undefined) { query.set("stop_s", range.stopS); }
+        if (range.maxFrames !== undefined) { query.set("max_frames", range.maxFrames); }
+        if (range.maxBins !== undefined) { query.set("max_bins", range.maxBins); }
+        const response = await fetch(spectrogramUrl + "?" + query.toString());
+        if (!response.ok) { return undefined; }
+        return (await response.json())["spectrogram"];
+    }
+
+    /**
+     * @return {HTMLCanvasElement} - one pixel per cell, highest frequency in the top row
+     */
+    static tileToImage(tile, color) {
+        const frames = tile.time_s.length;
+        const bins = tile.frequency_hz.length;
+        const image = document.createElement("canvas");
+        image.width = frames;
+        image.height = bins;
+        const context = image.getContext("2d");
+        const pixels = context.createImageData(frames, bins);
+
+        // look-up table instead of one color interpolation per cell
+        const [domainMin, domainMax] = color.domain();
+        const lutSize = 1024;
+        const lut = d3.range(lutSize).map(idx => d3.rgb(color(domainMin + (domainMax - domainMin) * idx / (lutSize - 1))));
+        const lutIndex = (value) => Math.max(0, Math.min(lutSize - 1, Math.round((value - domainMin) / (domainMax - domainMin) * (lutSize - 1))));
+
+        for (let frame = 0; frame < frames; frame++) {
+            const row = tile.magnitude[frame];
+            for (let bin = 0; bin < bins; bin++) {
+                const rgb = lut[lutIndex(row[bin])];
+                const offset = ((bins - 1 - bin) * frames + frame) * 4;
+                pixels.data[offset] = rgb.r;
+                pixels.data[offset + 1] = rgb.g;
+                pixels.data[offset + 2] = rgb.b;
+                pixels.data[offset + 3] = 255;
+            }
+        }
+        context.putImageData(pixels, 0, 0);
+        return image;
+    }
+
+    /**
+     * @return {[float, float]} - time span covered by the tile's cells
+     */
+    static tileExtent(values) {
+        const step = values.length > 1 ? values[1] - values[0] : 0;
+        return [values[0], values[values.length - 1] + step];
+    }
+
+    render(tile, streamFileName, axis) {
+        const {width, height, marginTop, marginRight, marginBottom, marginLeft} = this;
+        const dpr = window.devicePixelRatio || 1;
+        const plotWidth = width - marginLeft - marginRight;
+
+        const color = d3.scaleSequentialSqrt(d3.interpolateViridis).domain([0, tile.magnitude_max || 1]);
+        const xScale = d3.scaleLinear()
+            .domain(OctoAxxelSpectrogramVis.tileExtent(tile.time_s))
+            .range([marginLeft, width - marginRight]);
+        const xScaleOrigin = xScale.copy();
+        const xAxis = d3.axisBottom(xScale).ticks(width / 80).tickSizeOuter(0);
+        const yScale = d3.scaleLinear()
+            .domain(OctoAxxelSpectrogramVis.tileExtent(tile.frequency_hz))
+            .range([height - marginBottom, marginTop]);
+        const yAxis = d3.axisLeft(yScale).ticks(height / 40).tickSizeOuter(0);
+
+        const container = d3.create("div")
+            .attr("style", `position: relative; width: ${width}px; height: ${height}px;`);
+        const canvas = container.append("canvas")
+            .attr("width", width * dpr)
+            .attr("height", height * dpr)
+            .attr("style", `position: absolute; left: 0; top: 0; width: ${width}px; height: ${height}px;`);
+        const context = canvas.node().getContext("2d");
+        context.scale(dpr, dpr);
+
+        const svg = container.append("svg")
+            .attr("width", width)
+            .attr("height", height)
+            .attr("viewBox", [0, 0, width, height])
+            .attr("style", "position: absolute; left: 0; top: 0; overflow: visible; font: 10px sans-serif;");
+
+        const xAxisGroup = svg.append("g")
+            .attr("transform", `translate(0,${height - marginBottom})`)
+            .call(xAxis);
+
+        svg.append("text")
+            .attr("x", width / 2)
+            .attr("y", height)
+            .attr("fill", "currentColor")
+            .attr("text-anchor", "start")
+            .text("Time [s] →");
+
+        svg.append("g")
+            .attr("transform", `translate(${marginLeft},0)`)
+            .call(yAxis)
+            .call(g => g.append("text")
+                .attr("x", -marginLeft)
+                .attr("y", 10)
+                .attr("fill", "currentColor")
+                .attr("text-anchor", "start")
+                .text("↑ 𝑓 [Hz] " + axis.toUpperCase()));
+
+        let current = {tile: tile, image: OctoAxxelSpectrogramVis.tileToImage(tile, color)};
+
+        const draw = () => {
+            const [t0, t1] = OctoAxxelSpectrogramVis.tileExtent(current.tile.time_s);
+            context.clearRect(0, 0, width, height);
+            context.save();
+            context.beginPath();
+            context.rect(marginLeft, marginTop, plotWidth, height - marginTop - marginBottom);
+            context.clip();
+            context.imageSmoothingEnabled = false;
+            context.drawImage(current.image, xScale(t0), marginTop, xScale(t1) - xScale(t0), height - marginTop - marginBottom);
+            context.restore();
+        };
+
+        // invisible layer for the interactive tip
+        const dot = svg.append("g")
+            .attr("display", "none");
+        const tipLines = [-24, -16, -8].map(y => dot.append("text")
+            .attr("fill", "white")
+            .attr("text-anchor", "left")
+            .attr("y", y));
+
+        svg
+            .on("pointerenter", () => dot.attr("display", null))
+            .on("pointerleave", () => dot.attr("display", "none"))
+            .on("pointermove", (event) => {
+                const [xm, ym] = d3.pointer(event, svg.node());
+                const times = current.tile.time_s;
+                const frequencies = current.tile.frequency_hz;
+                const frame = Math.max(0, d3.bisectRight(times, xScale.invert(xm)) - 1);
+                const bin = Math.max(0, d3.bisectRight(frequencies, yScale.invert(ym)) - 1);
+                if (times.length === 0 || frequencies.length === 0) { return; }
+                dot.attr("transform", `translate(${xm},${ym})`);
+                tipLines[0].text("time: " + Math.round(times[frame] * 1000) + "ms");
+                tipLines[1].text("𝑓: " + Math.round(frequencies[bin]) + "Hz");
+                tipLines[2].text("mag: " + Math.round(current.tile.magnitude[frame][bin]));
+            });
+
+        // zoom scales the current tile immediately, a finer tile replaces it once the gesture ended
+        let request = 0;
+        const extent = [[marginLeft, marginTop], [width - marginRight, height - marginBottom]];
+        svg.call(d3.zoom()
+            .scaleExtent([1, 256])
+            .translateExtent(extent)
+            .extent(extent)
+            .on("zoom", (event) => {
+                xScale.domain(event.transform.rescaleX(xScaleOrigin).domain());
+                xAxisGroup.call(xAxis);
+                requestAnimationFrame(draw);
+            })
+            .on("end", async () => {
+                const [startS, stopS] = xScale.domain();
+                const requested = ++request;
+                const finer = await this.fetchTile(SPECTROGRAM_URL, streamFileName, axis, {startS: startS, stopS: stopS, maxFrames: plotWidth});
+                if (requested !== request || finer === undefined || finer.time_s.length === 0) { return; }
+                current = {tile: finer, image: OctoAxxelSpectrogramVis.tileToImage(finer, color)};
+                requestAnimationFrame(draw);
+            }));
+
+        draw();
+        return container.node();
+    }
+
+    async plot(streamFileName, axis) {
+        const div = document.querySelector("#" + DIV_ID_SPECTROGRAM_VIS);
+        const tile = await this.fetchTile(SPECTROGRAM_URL, streamFileName, axis, {maxFrames: this.width - this.marginLeft - this.marginRight});
+        if (tile === undefined || tile.time_s.length === 0) {
+            div.replaceChildren();
+            return;
+        }
+        div.replaceChildren(this.render(tile, streamFileName, axis));
+    }
+}
+
 // render data-set tree on load
 (async () => new OctoAxxelDataSetVis().plot())();
@@ -0,0 +1,98 @@
+"use strict";
+
+/**
+ * Web worker that downloads and parses stream and FFT files off the UI thread.
+ *
+ * request:  {id: int, kind: "stream"|"fft", url: str, separator: char}
+ * response: {id: int, length: int, meta: {...}|undefined, columns: {name: Float32Array, ...}}
+ *           or {id: int, error: str}
+ *
+ * Column buffers are transferred, not copied.
+ */
+
+/**
+ * @param {str} text - whole file content
+ * @param {char} separator - column separator (single character)
+ * @return {{header: [str], lines: [str], meta: {...}|undefined}} - data lines without header and comments
+ */
+function splitLines(text, separator) {
+    const lines = [];
+    let header = undefined;
+    let meta = undefined;
+    let start = 0;
+
+    while (start < text.length) {
+        let end = text.indexOf("\n", start);
+        if (end === -1) { end = text.length; }
+        const line = text.substring(start, end).trim();
+        start = end + 1;
+
+        if (line.length === 0) { continue; }
+        if (line.startsWith("#")) {
+            // meta data is the very last line of a complete stream
+            try { meta = JSON.parse(line.replace(/(^.*#\s*)/, "")); } catch { meta = undefined; }
+            continue;
+        }
+        if (header === undefined) { header = line.split(separator); continue; }
+        lines.push(line);
+    }
+    return {header: header || [], lines: lines, meta: meta};
+}
+
+/**
+ * @param {[str]} header - column names as in file
+ * @param {[str]} lines - data lines
+ * @param {char} separator - column separator (single character)
+ * @param {{str: str}} wanted - maps column name in file to name of the resulting column
+ * @return {{str: Float32Array}}
+ */
+function parseColumns(header, lines, separator, wanted) {
+    const columns = {};
+    const indices = [];
+    for (const [fileName, columnName] of Object.entries(wanted)) {
+        columns[columnName] = new Float32Array(lines.length);
+        indices.push([header.indexOf(fileName), columns[columnName]]);
+    }
+
+    for (let row = 0; row < lines.length; row++) {
+        const fields = lines[row].split(separator);
+        for (const [index, column] of indices) {
+            column[row] = index >= 0 ? parseFloat(fields[index]) : NaN;
+        }
+    }
+    return columns;
+}
+
+function parseStream(text, separator) {
+    const {header, lines, meta} = splitLines(text, separator);
+    const columns = parseColumns(header, lines, separator, {seq: "seq", sample: "sample", x: "x", y: "y", z: "z"});
+
+    if (meta !== undefined && typeof meta.rate === "string") {
+        meta.rate = parseFloat(meta.rate.replace(/(^ODR)/, ""));
+    }
+    const rate = meta !== undefined ? meta.rate : NaN;
+    const timestamp = new Float32Array(lines.length);
+    for (let row = 0; row < lines.length; row++) { timestamp[row] = columns.sample[row] * 1000 / rate; }
+    columns.timestamp_ms = timestamp;
+
+    return {length: lines.length, meta: meta, columns: columns};
+}
+
+function parseFft(text, separator) {
+    const {header, lines, meta} = splitLines(text, separator);
+    return {length: lines.length, meta: meta, columns: parseColumns(header, lines, separator, {freq_hz: "frequency_hz", fft: "fft"})};
+}
+
+self.onmessage = async (event) => {
+    const {id, kind, url, separator} = event.data;
+    try {
+        const response = await fetch(url);
+        if (!response.ok) { throw new Error("HTTP " + response.status + " for " + url); }
+        const text = await response.text();
+        const parsed = kind === "fft" ? parseFft(text, separator) : parseStream(text, separator);
+        parsed.id = id;
+        self.postMessage(parsed, Object.values(parsed.columns).map(column => column.buffer));
+    } catch (error) {
+        self.postMessage({id: id, error: String(error)});
+    }
+};
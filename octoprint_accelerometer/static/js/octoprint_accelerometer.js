@@ -21,11 +21,15 @@ $(function() {
     function pluginGetStreamFilesListing(names_list) { return requestGet("get_stream_files_listing"); }
     function pluginGetFftFilesListing(names_list) { return requestGet("get_fft_files_listing"); }
     function pluginGetDataListing(names_list) { return requestGet("get_data_listing"); }
+    function pluginGetJobQueue() { return requestGet("get_job_queue"); }
+    function pluginGetProcessingProgress() { return requestGet("get_processing_progress"); }
 
-    function pluginDoStartRecording() { return requestPost("start_recording"); };
+    function pluginDoStartRecording(adaptive) { return requestPost("start_recording", {"adaptive": adaptive}); };
     function pluginDoAbortRecording() { return requestPost("abort_recording"); };
     function pluginDoSetValues(values_dict) { return requestPost("set_values", values_dict); };
     function pluginDoStartDataProcessing(values_dict) { return requestPost("start_data_processing", {}); };
+    function pluginDoCancelJob(job_id) { return requestPost("cancel_job", {"job": job_id}); };
+    function pluginDoMoveJob(job_id, index) { return requestPost("move_job", {"job": job_id, "index": index}); };
 
     /**
      * helper
@@ -39,6 +43,23 @@ $(function() {
         return minutes_fraction + seconds_fraction;
     };
 
+    function processingProgressToReadableString(progress) {
+        if (!progress || !progress.running) { return ""; }
+        let text = "Step " + (progress.step_index + 1) + "/" + progress.steps_count + " " + progress.step;
+        if (progress.files_total !== null) { text += ": " + progress.files_done + "/" + progress.files_total + " files"; }
+        if (progress.current_file) { text += ", " + progress.current_file; }
+        text += " (" + Number(progress.files_per_s).toFixed(1) + " files/s, " + Number(progress.mb_per_s).toFixed(2) + " MB/s";
+        if (progress.eta_s !== null) { text += ", " + (secondsToReadableString(progress.eta_s) || "0s") + " left"; }
+        return text + ")";
+    };
+
+    function adaptiveSweepToReadableString(sweep) {
+        if (sweep.resonances_hz.length === 0) { return "Adaptive sweep " + sweep.job_id + ": no resonance found"; }
+        const ranges = sweep.fine_sweeps.map(s => s.start_frequency_hz + "-" + s.stop_frequency_hz + "Hz/" + s.step_frequency_hz + "Hz");
+        return "Adaptive sweep " + sweep.job_id + ": resonances at " + sweep.resonances_hz.join(", ") + "Hz, refining " + ranges.join(", ") +
+               " (" + sweep.frequencies_count + " instead of " + sweep.dense_frequencies_count + " frequencies)";
+    };
+
     function effectiveSteps(start, stop, increment) {
         return Math.floor((stop - start) / increment);
     };
@@ -106,6 +127,13 @@ $(function() {
         self.ui_last_data_processing_total_files_count = ko.observable();
 		self.ui_last_data_processing_processed_files_count = ko.observable();
 		self.ui_last_data_processing_skipped_files_count = ko.observable();
+        self.ui_fft_comparison_axis = ko.observable("x");
+        self.ui_fft_algorithm = ko.observable("");
+        self.ui_job_queue = ko.observableArray([]);
+        self.ui_data_processing_paused = ko.observable(false);
+        self.ui_data_processing_progress_str = ko.observable("");
+        self.ui_adaptive_sweep = ko.observable(false);
+        self.ui_adaptive_sweep_str = ko.observable("");
 
         self.onStartupComplete = () => {
             self.plugin_settings = self.settings.settings.plugins.octoprint_accelerometer;
@@ -201,24 +229,36 @@ $(function() {
                 );
             }
 
+            // chart renderer is a pure UI setting
+            OctoAxxelVisSettings.renderer = self.plugin_settings.chart_renderer();
+            self.plugin_settings.chart_renderer.subscribe((new_value) => { OctoAxxelVisSettings.renderer = new_value; });
+            self.ui_fft_algorithm.subscribe((new_value) => {
+                OctoAxxelFftVis.algorithm = new_value;
+                OctoAxxelFftVis.replot();
+            });
+            self.ui_fft_comparison_axis.subscribe((new_value) => {
+                OctoAxxelFftComparisonVis.axis = new_value;
+                if (!OctoAxxelFftComparisonVis.isEmpty()) { new OctoAxxelFftComparisonVis().plot(); }
+            });
+
             // initially fetch data from plugin
             const getPluginData = () => {
                 if (!self.login_state.hasPermission(self.access.permissions.CONNECTION)) { return; }
                 self.requestPluginEstimation();
                 self.requestAllParameters();
                 self.requestStreamFilesListing();
+                self.requestJobQueue();
+                self.requestProcessingProgress();
             }
             getPluginData();
         };
 
+        // recordings are queued and started by the plugin once the printer is ready
         self.startRecording = () => {
             if (self.printer_state.isOperational() &&
-               !self.printer_state.isPrinting() &&
-               !self.printer_state.isCancelling() &&
-               !self.printer_state.isPausing() &&
                 self.login_state.hasPermission(self.access.permissions.PRINT))
             {
-                pluginDoStartRecording();
+                pluginDoStartRecording(self.ui_adaptive_sweep());
             }
         };
 
@@ -229,6 +269,20 @@ $(function() {
             }
         };
 
+        self.cancelJob = (job) => {
+            if (self.login_state.hasPermission(self.access.permissions.PRINT)) { pluginDoCancelJob(job.job_id); }
+        };
+
+        self.moveJobToFront = (job) => {
+            if (self.login_state.hasPermission(self.access.permissions.PRINT)) { pluginDoMoveJob(job.job_id, 0); }
+        };
+
+        self.clearFftComparison = () => {
+            OctoAxxelFftComparisonVis.clear();
+            new OctoAxxelFftComparisonVis().plot();
+            new OctoAxxelDataSetVis().plot();
+        };
+
         /**
          * plugin API
          */
@@ -277,6 +331,11 @@ $(function() {
         self.requestPluginEstimation   = () => pluginGetEstimate().done(self.updateUiFromGetResponse);
         self.requestAllParameters      = () => pluginGetAllParameters().done(self.updateUiFromGetResponse);
         self.requestStreamFilesListing = () => pluginGetStreamFilesListing().done(self.updateUiStreamFilesFromGetResponse);
+        self.requestProcessingProgress = () => pluginGetProcessingProgress().done((response) => self.ui_data_processing_progress_str(processingProgressToReadableString(response.progress)));
+        self.requestJobQueue           = () => pluginGetJobQueue().done((response) => {
+            self.ui_job_queue(response.jobs);
+            self.ui_data_processing_paused(response.data_processing_paused);
+        });
 
         self.updateUiStreamFilesFromGetResponse = (response) => {
             if (Object.hasOwn(response, "stream_files")) {
@@ -367,9 +426,6 @@ $(function() {
 			if ("RecordingEventType" in data) {
 			    const recording_event = data["RecordingEventType"];
 			    self.ui_recording_state(recording_event);
-			    if (["PROCESSING_FINISHED", "UNHANDLED_EXCEPTION", "ABORTED"].includes(recording_event)) {
-			        pluginDoStartDataProcessing();
-			    }
 			}
 			if ("DataProcessingEventType" in data) {
 			    const processing_event=data["DataProcessingEventType"];
@@ -378,6 +434,13 @@ $(function() {
 			        (async () => new OctoAxxelDataSetVis().plot())();
 			    }
 			}
+			if ("DATA_PROCESSING_PROGRESS" in data) { self.ui_data_processing_progress_str(processingProgressToReadableString(data["DATA_PROCESSING_PROGRESS"])); }
+			if ("DATA_PROCESSING_PAUSED" in data) { self.ui_data_processing_paused(data["DATA_PROCESSING_PAUSED"]); }
+			if ("JOB_QUEUE" in data) { self.ui_job_queue(data["JOB_QUEUE"]); }
+			if ("ADAPTIVE_SWEEP" in data) { self.ui_adaptive_sweep_str(adaptiveSweepToReadableString(data["ADAPTIVE_SWEEP"])); }
+			if ("RUN_DELETED" in data || "RUNS_EVICTED" in data || "RUN_FETCHED" in data) {
+			    (async () => new OctoAxxelDataSetVis().plot())();
+			}
 			if ("LAST_DATA_RECORDING_DURATION_S" in data) { self.ui_last_data_recording_duration_str(secondsToReadableString(data["LAST_DATA_RECORDING_DURATION_S"])) }
 			if ("LAST_DATA_PROCESSING_DURATION_S" in data) { self.ui_last_data_processing_duration_str(secondsToReadableString(data["LAST_DATA_PROCESSING_DURATION_S"])) }
 			if ("FILES_TOTAL_COUNT" in data) { self.ui_last_data_processing_total_files_count(data["FILES_TOTAL_COUNT"]) }
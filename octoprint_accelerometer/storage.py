@@ -0,0 +1,418 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from logging import Logger
+from typing import Callable, Dict, List, Optional, Tuple
+
+from octoprint_accelerometer.data_io import COMPRESSED_FILE_EXT
+from octoprint_accelerometer.worker import PauseGate
+
+STORAGE_BACKENDS: List[str] = ["none", "directory", "s3"]
+"none keeps data in the plugin data folder only"
+
+UPLOAD_BATCH_WINDOW_S: float = 2.0
+"uploads scheduled within that window are transferred as one batch"
+
+UPLOAD_BATCH_SIZE: int = 32
+"files uploaded in between two manifest writes and pause checks"
+
+
+class StorageError(Exception):
+    pass
+
+
+@dataclass
+class StoredFile:
+    name: str
+    size: int
+
+
+class StorageBackend(ABC):
+    """
+    Flat namespace of data files, shared by all OctoPrint instances of a printer farm.
+
+    Names are data file names as found in the plugin data folder, i.e. "axxel-30f9c95c-20231127-235625233-s000-ax-f010-z015.tsv".
+    Run hashes are random, so files of different printers do not collide.
+    All methods block and raise :class:`StorageError`.
+    """
+
+    @abstractmethod
+    def list(self, prefix: str = "") -> List[StoredFile]:
+        pass
+
+    @abstractmethod
+    def upload(self, local_path: str, name: str) -> None:
+        pass
+
+    @abstractmethod
+    def download(self, name: str, local_path: str) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, name: str) -> None:
+        pass
+
+
+class DirectoryBackend(StorageBackend):
+    """
+    Directory shared in between OctoPrint instances, i.e. a network mount; also serves as local stand-in for an object store.
+    """
+
+    def __init__(self, root: str):
+        if not root or not os.path.isdir(root):
+            raise StorageError(f"storage directory {root} does not exist")
+        self.root: str = root
+
+    def list(self, prefix: str = "") -> List[StoredFile]:
+        try:
+            return [StoredFile(e.name, e.stat().st_size) for e in os.scandir(self.root)
+                    if e.name.startswith(prefix) and not e.name.startswith(".") and e.is_file()]
+        except OSError as e:
+            raise StorageError(str(e)) from e
+
+    def upload(self, local_path: str, name: str) -> None:
+        temp_path = os.path.join(self.root, f".{name}.tmp")
+        try:
+            shutil.copyfile(local_path, temp_path)
+            os.replace(temp_path, os.path.join(self.root, name))
+        except OSError as e:
+            raise StorageError(str(e)) from e
+
+    def download(self, name: str, local_path: str) -> None:
+        try:
+            shutil.copyfile(os.path.join(self.root, name), local_path)
+        except OSError as e:
+            raise StorageError(str(e)) from e
+
+    def delete(self, name: str) -> None:
+        try:
+            os.remove(os.path.join(self.root, name))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            raise StorageError(str(e)) from e
+
+
+class S3Backend(StorageBackend):
+    """
+    S3 compatible object store, i.e. AWS S3 or MinIO. Requires the optional dependency boto3.
+    """
+
+    def __init__(self,
+                 bucket: str,
+                 key_prefix: str = "",
+                 endpoint_url: str = "",
+                 region: str = "",
+                 access_key_id: str = "",
+                 secret_access_key: str = ""):
+        """
+        :param key_prefix: object keys are "<key_prefix>/<name>"; separates farms sharing one bucket
+        :param endpoint_url: i.e. "http://minio.local:9000"; AWS if empty
+        :param access_key_id: boto3's credential chain (environment, config files) is used if empty
+        """
+        try:
+            import boto3
+            import botocore.exceptions
+        except ImportError as e:
+            raise StorageError("the S3 storage backend requires boto3, install it in OctoPrint's python environment") from e
+        if not bucket:
+            raise StorageError("no S3 bucket configured")
+        self._client_error = botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError
+        self.bucket: str = bucket
+        self.key_prefix: str = key_prefix.strip("/")
+        self._client = boto3.client("s3",
+                                    endpoint_url=endpoint_url or None,
+                                    region_name=region or None,
+                                    aws_access_key_id=access_key_id or None,
+                                    aws_secret_access_key=secret_access_key or None)
+
+    def _key(self, name: str) -> str:
+        return f"{self.key_prefix}/{name}" if self.key_prefix else name
+
+    def list(self, prefix: str = "") -> List[StoredFile]:
+        key_prefix = self._key(prefix)
+        files: List[StoredFile] = []
+        try:
+            for page in self._client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=key_prefix):
+                for obj in page.get("Contents", []):
+                    name = obj["Key"][len(self._key("")):]
+                    if "/" not in name:
+                        files.append(StoredFile(name, obj["Size"]))
+        except self._client_error as e:
+            raise StorageError(str(e)) from e
+        return files
+
+    def upload(self, local_path: str, name: str) -> None:
+        try:
+            self._client.upload_file(local_path, self.bucket, self._key(name))
+        except self._client_error as e:
+            raise StorageError(str(e)) from e
+
+    def download(self, name: str, local_path: str) -> None:
+        try:
+            self._client.download_file(self.bucket, self._key(name), local_path)
+        except self._client_error as e:
+            raise StorageError(str(e)) from e
+
+    def delete(self, name: str) -> None:
+        try:
+            self._client.delete_object(Bucket=self.bucket, Key=self._key(name))
+        except self._client_error as e:
+            raise StorageError(str(e)) from e
+
+
+class StorageSync:
+    """
+    Mirrors the run files of the plugin data folder to a shared storage backend.
+
+    Recording and post-processing keep writing to the data folder, which thus serves as write-back cache:
+    uploads run in background batches after a recording or processing run, and pause while the pause gate is closed,
+    so that they never compete with capturing.
+    Files missing in the data folder, i.e. raw streams evicted by the retention policy or runs of other printers,
+    are fetched from the backend on demand.
+
+    Uploaded file versions are persisted in a manifest, so that files are not uploaded again after a restart.
+    """
+
+    def __init__(self,
+                 logger: Logger,
+                 backend: StorageBackend,
+                 data_dir: str,
+                 file_prefixes: List[str],
+                 manifest_file_name: str,
+                 pause_gate: Optional[PauseGate] = None,
+                 batch_window_s: float = UPLOAD_BATCH_WINDOW_S,
+                 batch_size: int = UPLOAD_BATCH_SIZE):
+        """
+        :param file_prefixes: prefixes of all files that belong to a run, i.e. streams, FFTs, spectrograms and summaries
+        :param manifest_file_name: hidden file within data_dir that persists the uploaded file versions
+        :param pause_gate: waited for before each upload batch
+        """
+        self.logger: Logger = logger
+        self.backend: StorageBackend = backend
+        self.data_dir: str = data_dir
+        self.manifest_path: str = os.path.join(data_dir, manifest_file_name)
+        self.pause_gate: PauseGate = pause_gate if pause_gate is not None else PauseGate()
+        self.batch_window_s: float = batch_window_s
+        self.batch_size: int = batch_size
+
+        self._run_file_pattern = re.compile(f"^({'|'.join(re.escape(p) for p in file_prefixes)})-([0-9a-zA-Z]+)-.*$")
+        self._lock: threading.Lock = threading.Lock()
+        self._uploaded: Dict[str, Tuple[int, float]] = self._load_manifest()
+        "file name -> size and modification time of the uploaded version"
+        self._upload_scheduled: Optional[Future] = None
+        "upload run not started yet, which serves all upload requests in the meantime"
+        self._do_abort_flag: threading.Event = threading.Event()
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="axxel-storage")
+
+    def _load_manifest(self) -> Dict[str, Tuple[int, float]]:
+        try:
+            with open(self.manifest_path, "r") as file:
+                return {str(k): (int(v[0]), float(v[1])) for k, v in json.load(file).items()}
+        except (OSError, ValueError, AttributeError, TypeError, IndexError):
+            return {}
+
+    def _persist_manifest(self) -> None:
+        temp_path = os.path.join(os.path.dirname(self.manifest_path), f".{os.path.basename(self.manifest_path)}.tmp")
+        with self._lock:
+            uploaded = {k: list(v) for k, v in self._uploaded.items()}
+        try:
+            with open(temp_path, "w") as file:
+                json.dump(uploaded, file)
+            os.replace(temp_path, self.manifest_path)
+        except OSError as e:
+            self.logger.warning(f"failed to persist storage manifest: {e}")
+
+    def is_uploaded(self, name: str) -> bool:
+        """
+        :return: whether the file's current version is stored in the backend, thus may be removed from the data folder
+        """
+        try:
+            stat = os.stat(os.path.join(self.data_dir, name))
+        except OSError:
+            return False
+        with self._lock:
+            return self._uploaded.get(name) == (stat.st_size, stat.st_mtime)
+
+    def _pending_uploads(self) -> List[str]:
+        pending: List[str] = []
+        for entry in os.scandir(self.data_dir):
+            if not self._run_file_pattern.match(entry.name) or not entry.is_file():
+                continue
+            stat = entry.stat()
+            with self._lock:
+                if self._uploaded.get(entry.name) != (stat.st_size, stat.st_mtime):
+                    pending.append(entry.name)
+        return sorted(pending)
+
+    def _upload_pending(self) -> None:
+        with self._lock:
+            self._upload_scheduled = None
+        pending = self._pending_uploads()
+        uploaded_count = 0
+        for offset in range(0, len(pending), self.batch_size):
+            self.pause_gate.wait(self._do_abort_flag)
+            if self._do_abort_flag.is_set():
+                break
+            for name in pending[offset:offset + self.batch_size]:
+                path = os.path.join(self.data_dir, name)
+                try:
+                    stat = os.stat(path)
+                    self.backend.upload(path, name)
+                except FileNotFoundError:
+                    continue
+                except (OSError, StorageError) as e:
+                    # retried with the next upload run
+                    self.logger.warning(f"failed to upload {name}: {e}")
+                    continue
+                with self._lock:
+                    self._uploaded[name] = (stat.st_size, stat.st_mtime)
+                uploaded_count += 1
+                self._forget_replaced(name)
+            self._persist_manifest()
+        if pending:
+            self.logger.info(f"storage: uploaded {uploaded_count} of {len(pending)} files")
+
+    def _forget_replaced(self, name: str) -> None:
+        """
+        A compressed file replaces its uncompressed version, which is removed from the backend then.
+        """
+        if not name.endswith(COMPRESSED_FILE_EXT):
+            return
+        replaced = name[:-len(COMPRESSED_FILE_EXT)]
+        with self._lock:
+            if replaced not in self._uploaded or os.path.exists(os.path.join(self.data_dir, replaced)):
+                return
+        try:
+            self.backend.delete(replaced)
+        except StorageError as e:
+            self.logger.warning(f"failed to remove {replaced} from storage: {e}")
+            return
+        with self._lock:
+            self._uploaded.pop(replaced, None)
+
+    def schedule_upload(self) -> Future:
+        """
+        Uploads new and modified run files in background. Calls within the batch window share one upload run.
+
+        :return: future of the upload run that serves this call
+        """
+        def task():
+            time.sleep(self.batch_window_s)
+            try:
+                self._upload_pending()
+            except Exception as e:
+                self.logger.exception(f"storage upload failed: {e}")
+
+        with self._lock:
+            if self._upload_scheduled is None:
+                self._upload_scheduled = self._executor.submit(task)
+            return self._upload_scheduled
+
+    def fetch(self, name: str) -> Optional[str]:
+        """
+        Downloads a file missing in the data folder. Blocks, thus must not be called from the web server's thread.
+
+        :return: path of the file in the data folder; None if the backend does not store it either
+        """
+        path = os.path.join(self.data_dir, name)
+        if os.path.isfile(path):
+            return path
+        if not self._run_file_pattern.match(name):
+            return None
+        temp_path = os.path.join(self.data_dir, f".{name}.tmp")
+        try:
+            self.backend.download(name, temp_path)
+            os.replace(temp_path, path)
+        except (OSError, StorageError) as e:
+            self.logger.debug(f"failed to fetch {name}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+        stat = os.stat(path)
+        with self._lock:
+            self._uploaded[name] = (stat.st_size, stat.st_mtime)
+        return path
+
+    def list_runs(self) -> Dict[str, List[StoredFile]]:
+        """
+        Blocks, thus must not be called from the web server's thread.
+
+        :return: run hash -> files stored in the backend
+        :raises StorageError: if the backend cannot be listed
+        """
+        runs: Dict[str, List[StoredFile]] = {}
+        for stored_file in self.backend.list():
+            match = self._run_file_pattern.match(stored_file.name)
+            if match:
+                runs.setdefault(match.group(2), []).append(stored_file)
+        return runs
+
+    def fetch_run(self, run_hash: str, on_done: Optional[Callable[[str, int], None]] = None) -> Future:
+        """
+        Downloads all files of a run not in the data folder yet, i.e. a run recorded by another printer, in background.
+
+        :param on_done: invoked from the background worker with run hash and count of fetched files
+        """
+        def task():
+            fetched = 0
+            try:
+                for stored_file in self.list_runs().get(run_hash, []):
+                    if not os.path.exists(os.path.join(self.data_dir, stored_file.name)) and self.fetch(stored_file.name) is not None:
+                        fetched += 1
+                self._persist_manifest()
+                self.logger.info(f"storage: fetched {fetched} files of run {run_hash}")
+            except Exception as e:
+                self.logger.exception(f"failed to fetch run {run_hash}: {e}")
+            if on_done is not None:
+                on_done(run_hash, fetched)
+        return self._executor.submit(task)
+
+    def delete_run(self, run_hash: str) -> Future:
+        """
+        Removes all files of a run from the backend in background.
+        """
+        def task():
+            try:
+                stored_files = self.list_runs().get(run_hash, [])
+                for stored_file in stored_files:
+                    self.backend.delete(stored_file.name)
+                    with self._lock:
+                        self._uploaded.pop(stored_file.name, None)
+                self._persist_manifest()
+                self.logger.info(f"storage: deleted run {run_hash}, {len(stored_files)} files")
+            except Exception as e:
+                self.logger.exception(f"failed to delete run {run_hash} from storage: {e}")
+        return self._executor.submit(task)
+
+    def shutdown(self) -> None:
+        self._do_abort_flag.set()
+        self._executor.shutdown(wait=False)
+
+
+def create_storage_backend(kind: str,
+                           directory_path: str = "",
+                           s3_bucket: str = "",
+                           s3_key_prefix: str = "",
+                           s3_endpoint_url: str = "",
+                           s3_region: str = "",
+                           s3_access_key_id: str = "",
+                           s3_secret_access_key: str = "") -> Optional[StorageBackend]:
+    """
+    :param kind: one of :data:`STORAGE_BACKENDS`
+    :return: None for "none"
+    :raises StorageError: if the backend is unknown or cannot be constructed
+    """
+    if "none" == kind:
+        return None
+    elif "directory" == kind:
+        return DirectoryBackend(directory_path)
+    elif "s3" == kind:
+        return S3Backend(s3_bucket, s3_key_prefix, s3_endpoint_url, s3_region, s3_access_key_id, s3_secret_access_key)
+    raise StorageError(f"unknown storage backend {kind}, expected any of {STORAGE_BACKENDS}")
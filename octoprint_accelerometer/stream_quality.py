@@ -0,0 +1,116 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from octoprint_accelerometer.transfer_types import StreamQuality
+
+SEQ_MODULUS: int = 256
+"the seq column is the controller's 8 bit sequence counter, it wraps around"
+
+
+def check_stream_sampling(seq: np.ndarray, sample: np.ndarray, output_data_rate_hz: Optional[float]) -> StreamQuality:
+    """
+    Checks the sample counter for gaps, duplicates and disorder, and cross-checks it with the sequence counter.
+
+    The sample counter is the stream's time base (t = sample / output data rate): it advances with every sample the
+    sensor took, so samples lost on their way to the file leave gaps in it rather than shifting later samples in time.
+
+    :param seq: sequence counter column
+    :param sample: sample counter column
+    :param output_data_rate_hz: nominal rate as stored in the stream meta data; None if unknown
+    """
+    if len(sample) < 2:
+        return StreamQuality(effective_output_data_rate_hz=output_data_rate_hz)
+
+    samples = sample.astype(np.int64)
+    steps = np.diff(samples)
+    # gaps are searched in order, so that swapped samples do not count as dropped ones
+    distinct = np.unique(samples)
+    gaps = np.diff(distinct)
+    gaps = gaps[gaps > 1] - 1
+    quality = StreamQuality(dropped_samples=int(np.sum(gaps)),
+                            gaps_count=len(gaps),
+                            max_gap_samples=int(np.max(gaps)) if len(gaps) else 0,
+                            duplicate_samples=len(samples) - len(distinct),
+                            out_of_order_samples=int(np.count_nonzero(steps < 0)),
+                            seq_mismatches=int(np.count_nonzero((np.diff(seq.astype(np.int64)) - steps) % SEQ_MODULUS)))
+    quality.coverage = len(distinct) / (int(distinct[-1] - distinct[0]) + 1)
+    quality.effective_output_data_rate_hz = output_data_rate_hz * quality.coverage if output_data_rate_hz is not None else None
+
+    flags: List[str] = []
+    for flag, count in [("dropped_samples", quality.dropped_samples),
+                        ("duplicate_samples", quality.duplicate_samples),
+                        ("out_of_order_samples", quality.out_of_order_samples),
+                        ("seq_mismatches", quality.seq_mismatches)]:
+        if count > 0:
+            flags.append(flag)
+    quality.flags = flags
+    return quality
+
+
+def resample_uniform(columns: Dict[str, np.ndarray], axes: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Puts the samples of a stream on a uniform grid of consecutive sample numbers, as assumed by spectral analysis:
+    rows are ordered by sample number, duplicates are dropped (the first one is kept), gaps are linearly interpolated.
+    Sane streams are returned as loaded.
+
+    :param columns: stream columns as loaded, at least "sample" and the given axes
+    :param axes: names of the columns to resample, i.e. ["x", "y", "z"]
+    :return: arrays "sample" and the given axes
+    """
+    sample = columns["sample"]
+    if len(sample) < 2 or np.all(np.diff(sample) == 1):
+        return columns
+
+    order = np.argsort(sample, kind="stable")
+    ordered = sample[order]
+    keep = np.concatenate(([True], np.diff(ordered) != 0))
+    known = ordered[keep]
+    grid = np.arange(known[0], known[-1] + 1, dtype=np.float64)
+    resampled: Dict[str, np.ndarray] = {"sample": grid}
+    for axis in axes:
+        resampled[axis] = np.interp(grid, known, columns[axis][order][keep])
+    return resampled
+
+
+class UniformWindowSlicer:
+    """
+    Cuts a stream fed chunk by chunk into windows of consecutive samples, hop_size samples apart.
+
+    Each chunk is put on the uniform grid of :func:`resample_uniform` together with the samples carried over from the
+    previous chunk: the samples of windows not complete yet, or at least the last sample, so that gaps at chunk
+    boundaries are filled as well. Windows thus start at the same samples as if the stream was sliced as a whole.
+    """
+
+    def __init__(self, axes: List[str], window_size: int, hop_size: int):
+        self.axes: List[str] = axes
+        self.window_size: int = window_size
+        self.hop_size: int = hop_size
+        self._pending: Optional[Dict[str, np.ndarray]] = None
+        self._next_start: Optional[float] = None
+        "sample number the next window starts at"
+
+    def feed(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        :param columns: next rows of the stream, at least "sample" and the axes; need not be uniformly sampled
+        :return: all windows complete now, shape (axes, windows, window_size); a view, valid until the next call
+        """
+        if self._pending is not None:
+            columns = {name: np.concatenate((self._pending[name], columns[name])) for name in self._pending.keys()}
+        columns = resample_uniform(columns, self.axes)
+        count = len(columns["sample"])
+        if 0 == count:
+            return np.empty((len(self.axes), 0, self.window_size))
+
+        if self._next_start is None:
+            self._next_start = float(columns["sample"][0])
+        # the grid is uniform, thus sample numbers map to indices directly
+        first = int(self._next_start - columns["sample"][0])
+        samples = np.vstack([columns[axis] for axis in self.axes])[:, first:]
+        windows_count = max(0, (samples.shape[1] - self.window_size) // self.hop_size + 1)
+        self._next_start += windows_count * self.hop_size
+        rest = first + windows_count * self.hop_size
+        self._pending = {name: columns[name][min(rest, count - 1):] for name in ["sample", *self.axes]}
+        if 0 == windows_count:
+            return np.empty((len(self.axes), 0, self.window_size))
+        return np.lib.stride_tricks.sliding_window_view(samples, self.window_size, axis=1)[:, ::self.hop_size][:, :windows_count]
@@ -0,0 +1,148 @@
+import functools
+import json
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from octoprint_accelerometer.data_io import FileVersion, file_version, open_data_file, output_data_rate_hz_from_str
+
+OFFSET_INDEX_STRIDE_LINES: int = 256
+"one index entry per that many data lines; a slice reads at most that many lines in excess"
+
+SLICE_CHUNK_SIZE_BYTES: int = 64 * 1024
+
+
+@dataclass
+class StreamOffsetIndex:
+    header: bytes
+    "column header line"
+    meta_line: bytes
+    "trailing meta data comment line; empty if the stream is incomplete"
+    sample_column: int
+    "column index of the sample number"
+    samples: np.ndarray
+    "sample number of every OFFSET_INDEX_STRIDE_LINES-th data line"
+    offsets: np.ndarray
+    "byte offset of these lines in the uncompressed file"
+    data_end: int
+    "byte offset right after the last data line"
+    is_ascending: bool
+    "whether the sample numbers of all data lines ascend; otherwise the index can not be searched and slices scan the whole stream"
+
+    @property
+    def output_data_rate_hz(self) -> Optional[float]:
+        try:
+            meta = json.loads(self.meta_line.decode().lstrip("# \t"))
+            return output_data_rate_hz_from_str(meta["rate"])
+        except (ValueError, KeyError, TypeError):
+            return None
+
+
+def build_stream_offset_index(path: str) -> StreamOffsetIndex:
+    """
+    Scans a stream file once and records the byte offset of every OFFSET_INDEX_STRIDE_LINES-th data line.
+
+    :param path: plain or compressed stream file
+    """
+    header, meta_line = b"", b""
+    sample_column = -1
+    samples: List[int] = []
+    offsets: List[int] = []
+    offset, data_end, data_lines = 0, 0, 0
+    is_ascending = True
+    previous_sample: Optional[float] = None
+    with open_data_file(path, "rb") as file:
+        for line in file:
+            line_offset = offset
+            offset += len(line)
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if stripped.startswith(b"#"):
+                meta_line = line
+                continue
+            if not header:
+                header = line
+                names = stripped.split()
+                if b"sample" not in names:
+                    raise ValueError(f"no sample column in {path}, header is {stripped}")
+                sample_column = names.index(b"sample")
+                continue
+            sample = float(stripped.split()[sample_column])
+            if previous_sample is not None and sample < previous_sample:
+                is_ascending = False
+            previous_sample = sample
+            if data_lines % OFFSET_INDEX_STRIDE_LINES == 0:
+                samples.append(int(sample))
+                offsets.append(line_offset)
+            data_lines += 1
+            data_end = offset
+    return StreamOffsetIndex(header, meta_line, sample_column, np.array(samples, dtype=np.int64), np.array(offsets, dtype=np.int64), data_end, is_ascending)
+
+
+def get_stream_offset_index(path: str) -> StreamOffsetIndex:
+    return _get_stream_offset_index_cached(file_version(path))
+
+
+@functools.lru_cache(maxsize=32)
+def _get_stream_offset_index_cached(version: FileVersion) -> StreamOffsetIndex:
+    return build_stream_offset_index(version[0])
+
+
+def read_stream_slice(path: str, start_ms: Optional[float], end_ms: Optional[float]) -> Iterator[bytes]:
+    """
+    Reads the data lines of a time window of a stream, framed as a stream file of its own (header, data lines, meta data).
+    Times are relative to sample number 0, i.e. t = sample / output data rate, as plotted by the acceleration chart.
+
+    Only the lines of the window (plus at most one index stride) are read from disk.
+    Compressed streams are decompressed up to the window, since gzip cannot seek otherwise.
+    Streams with sample numbers out of order are scanned as a whole.
+    The offset index is built on the first slice of a stream, so call this off the web server's thread.
+
+    :param path: plain or compressed stream file
+    :param start_ms: first point in time to include; from the beginning if None
+    :param end_ms: last point in time to include; until the end if None
+    :return: chunks of the sliced stream
+    :raises ValueError: if the stream has no meta data to map times to sample numbers
+    """
+    index = get_stream_offset_index(path)
+    rate_hz = index.output_data_rate_hz
+    if rate_hz is None:
+        raise ValueError("stream without output data rate can not be sliced by time")
+    first_sample = None if start_ms is None else start_ms * rate_hz / 1000.0
+    last_sample = None if end_ms is None else end_ms * rate_hz / 1000.0
+
+    yield index.header
+    if len(index.offsets) > 0:
+        entry = 0 if first_sample is None or not index.is_ascending \
+            else max(0, int(np.searchsorted(index.samples, first_sample, side="right")) - 1)
+        with open_data_file(path, "rb") as file:
+            file.seek(int(index.offsets[entry]))
+            position = int(index.offsets[entry])
+            chunk: List[bytes] = []
+            chunk_size = 0
+            while position < index.data_end:
+                line = file.readline()
+                if not line:
+                    break
+                position += len(line)
+                fields = line.split()
+                if not fields or fields[0].startswith(b"#"):
+                    continue
+                sample = float(fields[index.sample_column])
+                if first_sample is not None and sample < first_sample:
+                    continue
+                if last_sample is not None and sample > last_sample:
+                    if index.is_ascending:
+                        break
+                    continue
+                chunk.append(line)
+                chunk_size += len(line)
+                if chunk_size >= SLICE_CHUNK_SIZE_BYTES:
+                    yield b"".join(chunk)
+                    chunk, chunk_size = [], 0
+            if chunk:
+                yield b"".join(chunk)
+    if index.meta_line:
+        yield index.meta_line if index.meta_line.endswith(b"\n") else index.meta_line + b"\n"
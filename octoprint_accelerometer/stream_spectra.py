@@ -0,0 +1,128 @@
+import os
+import threading
+from logging import Logger
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from py3dpaxxel.storage.file_filter import FileSelector
+
+from octoprint_accelerometer.data_io import DATA_FILE_PATTERN, iter_columns, load_stream_meta, output_data_rate_hz_from_str
+from octoprint_accelerometer.fft_variants import (FFT_MAX_SAMPLES_IN_MEMORY, FFT_SEGMENT_SIZE, FFT_VARIANT_AXES, FFT_WINDOWS, FftVariantsAccumulator,
+                                                  fft_variants_file_name, load_fft_variants, save_fft_variants)
+from octoprint_accelerometer.progress import ProgressTracker
+from octoprint_accelerometer.spectrogram import SpectrogramAccumulator, save_spectrogram, spectrogram_file_name
+from octoprint_accelerometer.worker import PauseGate
+
+
+class StreamSpectraRunner:
+    """
+    Computes the spectrogram of each axis and the FFT variants of each stream file in a single chunked pass over its samples.
+    Only missing outputs are computed: streams with all spectrograms and variants are not read at all, algorithms
+    requested later are added to the existing variants file.
+    Meant to be run after the FFT decomposition within the same post-processing task.
+    """
+
+    def __init__(self,
+                 logger: Logger,
+                 input_dir: str,
+                 input_file_prefix: str,
+                 output_dir: str,
+                 spectrogram_output_file_prefix: str,
+                 window_size: int,
+                 hop_size: int,
+                 fft_variants_output_file_prefix: str,
+                 algorithms: List[str],
+                 do_abort_flag: threading.Event,
+                 pause_gate: Optional[PauseGate] = None,
+                 progress: Optional[ProgressTracker] = None,
+                 max_samples_in_memory: int = FFT_MAX_SAMPLES_IN_MEMORY,
+                 segment_size: int = FFT_SEGMENT_SIZE):
+        """
+        :param window_size: samples per spectrogram window; spectrograms are skipped if less than 2
+        :param hop_size: samples in between the start of consecutive spectrogram windows; spectrograms are skipped if less than 1
+        :param algorithms: windows the FFT variants are computed for, see :data:`FFT_WINDOWS`; none if empty
+        """
+        self.logger: Logger = logger
+        self.input_dir: str = input_dir
+        self.input_file_prefix: str = input_file_prefix
+        self.output_dir: str = output_dir
+        self.spectrogram_output_file_prefix: str = spectrogram_output_file_prefix
+        self.window_size: int = window_size
+        self.hop_size: int = hop_size
+        self.fft_variants_output_file_prefix: str = fft_variants_output_file_prefix
+        self.algorithms: List[str] = algorithms
+        self.do_abort_flag: threading.Event = do_abort_flag
+        self.pause_gate: Optional[PauseGate] = pause_gate
+        self.progress: Optional[ProgressTracker] = progress
+        self.max_samples_in_memory: int = max(max_samples_in_memory, segment_size)
+        self.segment_size: int = segment_size
+
+    def _missing_spectrograms(self, stream_file_name: str) -> Dict[str, str]:
+        """
+        :return: axis -> output path of all spectrograms if one is missing; empty if all are present or spectrograms are disabled
+        """
+        if self.window_size < 2 or self.hop_size < 1:
+            return {}
+        out_paths = {axis: os.path.join(self.output_dir, spectrogram_file_name(
+            self.spectrogram_output_file_prefix, stream_file_name, self.input_file_prefix, self.window_size, self.hop_size, axis)) for axis in FFT_VARIANT_AXES}
+        return {} if all(os.path.isfile(p) for p in out_paths.values()) else out_paths
+
+    def __call__(self) -> Tuple[int, int, int, int]:
+        """
+        :return: tuple of return code (0 on success, -1 if aborted), total, processed and skipped stream count
+        """
+        if self.window_size < 2 or self.hop_size < 1:
+            self.logger.warning(f"skip spectrograms: invalid window size {self.window_size} or hop size {self.hop_size}")
+        unknown = [a for a in self.algorithms if a not in FFT_WINDOWS]
+        if unknown:
+            self.logger.warning(f"skip unknown FFT algorithms {unknown}")
+        algorithms = [a for a in self.algorithms if a in FFT_WINDOWS]
+
+        streams = FileSelector(os.path.join(self.input_dir, f"{self.input_file_prefix}-.*{DATA_FILE_PATTERN}")).filter()
+        if self.progress is not None:
+            self.progress.set_files_total(len(streams))
+        processed, skipped = 0, 0
+
+        for stream in streams:
+            if self.pause_gate is not None:
+                self.pause_gate.wait(self.do_abort_flag)
+            if self.do_abort_flag.is_set():
+                return -1, len(streams), processed, skipped
+            if self.progress is not None:
+                self.progress.advance(stream.filename_ext, os.path.join(self.input_dir, stream.filename_ext))
+
+            spectrogram_paths = self._missing_spectrograms(stream.filename_ext)
+            variants_path = os.path.join(self.output_dir, fft_variants_file_name(self.fft_variants_output_file_prefix, stream.filename_ext, self.input_file_prefix))
+            existing = load_fft_variants(variants_path) if algorithms and os.path.isfile(variants_path) else None
+            missing = [a for a in algorithms if existing is None or a not in existing.amplitudes]
+            if not spectrogram_paths and not missing:
+                skipped += 1
+                continue
+
+            stream_path = os.path.join(self.input_dir, stream.filename_ext)
+            meta = load_stream_meta(stream_path)
+            if "rate" not in meta:
+                self.logger.warning(f"skip spectra of incomplete stream {stream.filename_ext}: no meta data")
+                skipped += 1
+                continue
+
+            sample_rate_hz = output_data_rate_hz_from_str(meta["rate"])
+            spectrograms = SpectrogramAccumulator(FFT_VARIANT_AXES, sample_rate_hz, self.window_size, self.hop_size) if spectrogram_paths else None
+            variants = FftVariantsAccumulator(sample_rate_hz, missing, self.max_samples_in_memory, self.segment_size) if missing else None
+            for chunk in iter_columns(stream_path, ["sample", *FFT_VARIANT_AXES]):
+                if spectrograms is not None:
+                    spectrograms.feed(chunk)
+                if variants is not None:
+                    variants.feed(chunk)
+
+            if spectrograms is not None:
+                for axis, spectrogram in spectrograms.result().items():
+                    save_spectrogram(spectrogram_paths[axis], spectrogram)
+            if variants is not None:
+                result = variants.result()
+                if existing is not None and np.array_equal(existing.frequency_hz, result.frequency_hz) and existing.segments_count == result.segments_count:
+                    result.amplitudes = {**existing.amplitudes, **result.amplitudes}
+                save_fft_variants(variants_path, result)
+            processed += 1
+
+        return 0, len(streams), processed, skipped
@@ -0,0 +1,150 @@
+import dataclasses
+import functools
+import json
+import os
+import threading
+from logging import Logger
+from typing import List, Optional, Tuple
+
+import numpy as np
+from py3dpaxxel.storage.file_filter import FileSelector
+
+from octoprint_accelerometer.data_io import DATA_FILE_PATTERN, FileVersion, data_file_stem, file_version, iter_columns, load_stream_meta, output_data_rate_hz_from_str
+from octoprint_accelerometer.progress import ProgressTracker
+from octoprint_accelerometer.stream_quality import check_stream_sampling
+from octoprint_accelerometer.transfer_types import AxisSummary, StreamQuality, StreamSummary
+from octoprint_accelerometer.worker import PauseGate
+
+
+def compute_stream_summary(path: str) -> StreamSummary:
+    """
+    Reads the stream chunk by chunk; only the sample and sequence counters are kept for the quality check.
+
+    :param path: stream file as written by the recording
+    :return: sample count, output data rate, completeness, min/max/RMS per axis and sampling quality
+    """
+    meta = load_stream_meta(path)
+    output_data_rate_hz = output_data_rate_hz_from_str(meta["rate"]) if "rate" in meta else None
+    axes_min = {axis: np.inf for axis in ["x", "y", "z"]}
+    axes_max = {axis: -np.inf for axis in ["x", "y", "z"]}
+    axes_square_sum = {axis: 0.0 for axis in ["x", "y", "z"]}
+    seq_chunks: List[np.ndarray] = []
+    sample_chunks: List[np.ndarray] = []
+    for chunk in iter_columns(path, ["seq", "sample", "x", "y", "z"]):
+        if len(chunk["sample"]) == 0:
+            continue
+        for axis in axes_min.keys():
+            axes_min[axis] = min(axes_min[axis], float(np.min(chunk[axis])))
+            axes_max[axis] = max(axes_max[axis], float(np.max(chunk[axis])))
+            axes_square_sum[axis] += float(np.sum(np.square(chunk[axis])))
+        seq_chunks.append(chunk["seq"].astype(np.int16))
+        sample_chunks.append(chunk["sample"].astype(np.int64))
+
+    seq = np.concatenate(seq_chunks) if seq_chunks else np.empty(0, dtype=np.int16)
+    sample = np.concatenate(sample_chunks) if sample_chunks else np.empty(0, dtype=np.int64)
+    axes = {axis: AxisSummary(axes_min[axis], axes_max[axis], float(np.sqrt(axes_square_sum[axis] / len(sample))))
+            for axis in ["x", "y", "z"] if len(sample) > 0}
+    return StreamSummary(samples_count=len(sample),
+                         output_data_rate_hz=output_data_rate_hz,
+                         complete="rate" in meta,
+                         axes=axes,
+                         quality=check_stream_sampling(seq, sample, output_data_rate_hz))
+
+
+def summary_file_name(output_file_prefix: str, stream_file_name: str, input_file_prefix: str) -> str:
+    """
+    :return: i.e. "summary-30f9c95c-20231127-235625233-s000-ax-f010-z015.json" for stream "axxel-30f9c95c-20231127-235625233-s000-ax-f010-z015.tsv"
+    """
+    stem = data_file_stem(stream_file_name).removeprefix(f"{input_file_prefix}-")
+    return f"{output_file_prefix}-{stem}.json"
+
+
+def write_stream_summary(path: str, summary: StreamSummary) -> None:
+    """
+    Writes to a temporary file first, so that readers never see a partially written summary.
+    """
+    temp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    with open(temp_path, "w") as file:
+        json.dump(dataclasses.asdict(summary), file)
+    os.replace(temp_path, path)
+
+
+def read_stream_summary(path: str) -> Optional[StreamSummary]:
+    """
+    :return: summary; None if not (yet) computed or unreadable
+    """
+    try:
+        return _read_stream_summary_cached(file_version(path))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+@functools.lru_cache(maxsize=1024)
+def _read_stream_summary_cached(version: FileVersion) -> StreamSummary:
+    with open(version[0], "r") as file:
+        data = json.load(file)
+    data["axes"] = {axis: AxisSummary(**values) for axis, values in data.get("axes", {}).items()}
+    data["quality"] = StreamQuality(**data["quality"]) if data.get("quality") is not None else None
+    return StreamSummary(**data)
+
+
+class StreamSummaryRunner:
+    """
+    Summarizes each stream that has no summary yet or was modified after its summary was written.
+
+    Invoked by the recording task right after the streams were written and again by post-processing,
+    which backfills streams recorded before summaries existed.
+    """
+
+    def __init__(self,
+                 logger: Logger,
+                 input_dir: str,
+                 input_file_prefix: str,
+                 output_dir: str,
+                 output_file_prefix: str,
+                 do_abort_flag: Optional[threading.Event] = None,
+                 pause_gate: Optional[PauseGate] = None,
+                 progress: Optional[ProgressTracker] = None):
+        self.logger: Logger = logger
+        self.input_dir: str = input_dir
+        self.input_file_prefix: str = input_file_prefix
+        self.output_dir: str = output_dir
+        self.output_file_prefix: str = output_file_prefix
+        self.do_abort_flag: Optional[threading.Event] = do_abort_flag
+        self.pause_gate: Optional[PauseGate] = pause_gate
+        self.progress: Optional[ProgressTracker] = progress
+
+    def __call__(self) -> Tuple[int, int, int, int]:
+        """
+        :return: tuple of return code (0 on success, -1 if aborted), total, processed and skipped stream count
+        """
+        streams = FileSelector(os.path.join(self.input_dir, f"{self.input_file_prefix}-.*{DATA_FILE_PATTERN}")).filter()
+        if self.progress is not None:
+            self.progress.set_files_total(len(streams))
+        processed, skipped = 0, 0
+
+        for stream in streams:
+            if self.pause_gate is not None:
+                self.pause_gate.wait(self.do_abort_flag)
+            if self.do_abort_flag is not None and self.do_abort_flag.is_set():
+                return -1, len(streams), processed, skipped
+            if self.progress is not None:
+                self.progress.advance(stream.filename_ext, os.path.join(self.input_dir, stream.filename_ext))
+
+            stream_path = os.path.join(self.input_dir, stream.filename_ext)
+            out_path = os.path.join(self.output_dir, summary_file_name(self.output_file_prefix, stream.filename_ext, self.input_file_prefix))
+            if os.path.isfile(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(stream_path):
+                # summaries written before the sampling was checked are recomputed once
+                summary = read_stream_summary(out_path)
+                if summary is not None and summary.quality is not None:
+                    skipped += 1
+                    continue
+
+            try:
+                write_stream_summary(out_path, compute_stream_summary(stream_path))
+                processed += 1
+            except ValueError as e:
+                self.logger.warning(f"failed to summarize stream {stream.filename_ext}: {e}")
+                skipped += 1
+
+        return 0, len(streams), processed, skipped
@@ -1,21 +1,68 @@
 from dataclasses import dataclass, field
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from py3dpaxxel.storage.file_filter import File
 from py3dpaxxel.storage.filename_meta import FilenameMetaStream, FilenameMetaFft
 
 
+@dataclass
+class FileStat:
+    size_bytes: int = 0
+    modified_ts: float = 0.0
+
+
+@dataclass
+class AxisSummary:
+    min: float = 0.0
+    max: float = 0.0
+    rms: float = 0.0
+
+
+@dataclass
+class StreamQuality:
+    dropped_samples: int = 0
+    "samples missing in between, according to the sample counter"
+    gaps_count: int = 0
+    max_gap_samples: int = 0
+    duplicate_samples: int = 0
+    out_of_order_samples: int = 0
+    seq_mismatches: int = 0
+    "rows whose transfer sequence counter does not advance along with the sample counter"
+    coverage: float = 1.0
+    "received distinct samples relative to the span of the sample counter"
+    effective_output_data_rate_hz: Optional[float] = None
+    "rate of the received samples; below the nominal rate if samples were dropped"
+    flags: List[str] = field(default_factory=lambda: ([]))
+    "i.e. dropped_samples, duplicate_samples; empty if the stream is sane"
+
+
+@dataclass
+class StreamSummary:
+    samples_count: int = 0
+    output_data_rate_hz: Optional[float] = None
+    complete: bool = False
+    "whether the stream was closed with its meta data line, i.e. the recording was not interrupted"
+    axes: Dict[str, AxisSummary] = field(default_factory=lambda: ({}))
+    quality: Optional[StreamQuality] = None
+    "None for summaries written before the sampling was checked"
+
+
 @dataclass
 class FftMeta:
     file: Optional[File] = None  # = File()
     meta: Optional[FilenameMetaFft] = None  # = FilenameMetaStream()
+    stat: Optional[FileStat] = None  # = FileStat()
 
 
 @dataclass
 class StreamMeta:
     file: Optional[File] = None  # = File()
     meta: Optional[FilenameMetaStream] = None  # = FilenameMetaStream()
+    stat: Optional[FileStat] = None  # = FileStat()
+    summary: Optional[StreamSummary] = None  # = StreamSummary()
     ffts: Dict[str, FftMeta] = field(default_factory=lambda: ({}))
+    evicted_file: Optional[str] = None
+    "name of the stream file if its raw data was removed by the retention policy (file is None then); FFTs and summary remain"
 
 
 @dataclass
@@ -41,6 +88,59 @@ class RunMeta:
     sequences: Dict[int, SequenceMeta] = field(default_factory=lambda: ({}))
 
 
+@dataclass
+class RunSummary:
+    started: Optional[Timestamp] = None  # Timestamp()
+    stopped: Optional[Timestamp] = None  # Timestamp()
+    sequences_count: int = 0
+    streams_count: int = 0
+
+
+@dataclass
+class StoredRunSummary:
+    files_count: int = 0
+    size_bytes: int = 0
+    cached: bool = False
+    "whether the run is in the plugin data folder too"
+
+
 @dataclass
 class DataSets:
     runs: Dict[str, RunMeta] = field(default_factory=lambda: ({}))
+
+
+@dataclass
+class FeatureTrends:
+    recorded_ts: List[float] = field(default_factory=lambda: ([]))
+    run_hash: List[str] = field(default_factory=lambda: ([]))
+    stream_file: List[str] = field(default_factory=lambda: ([]))
+    sequence_axis: List[str] = field(default_factory=lambda: ([]))
+    sequence_frequency_hz: List[int] = field(default_factory=lambda: ([]))
+    sequence_zeta_em2: List[int] = field(default_factory=lambda: ([]))
+    output_data_rate_hz: List[Optional[float]] = field(default_factory=lambda: ([]))
+    peak_frequency_hz: List[Optional[float]] = field(default_factory=lambda: ([]))
+    peak_amplitude: List[Optional[float]] = field(default_factory=lambda: ([]))
+    damping_ratio: List[Optional[float]] = field(default_factory=lambda: ([]))
+
+
+@dataclass
+class ProcessingProgress:
+    running: bool = False
+    step: str = ""
+    "name of the current processing step, i.e. spectrograms"
+    step_index: int = 0
+    "0-based index of the current step"
+    steps_count: int = 0
+    files_done: int = 0
+    "files of the current step handled so far, processed or skipped"
+    files_total: Optional[int] = None
+    "files of the current step; None until known"
+    current_file: str = ""
+    elapsed_s: float = 0.0
+    "since processing started"
+    files_per_s: float = 0.0
+    "throughput of the current step"
+    mb_per_s: float = 0.0
+    "throughput of the current step"
+    eta_s: Optional[float] = None
+    "estimated remaining time of the current step; None if unknown"
@@ -0,0 +1,94 @@
+import threading
+import time
+from logging import Logger
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+UI_EVENT_BATCH_WINDOW_S: float = 0.05
+"messages published within that window are sent as one"
+
+
+class UiEventBus:
+    """
+    Coalesces plugin messages to the UI.
+
+    Each key of a published message is a topic. Topics published within the batch window are merged into one payload.
+    A state topic published again before it was sent replaces its pending value, i.e. only the latest state is sent.
+    State topics with a minimum interval are held back until the interval since they were last sent has elapsed.
+    Event topics are never replaced: all pending events are sent in the order published,
+    an event is moved to a payload of its own if its topic is already part of the current one.
+
+    Messages are sent from a background thread, thus publishing never blocks on the websocket connections.
+    """
+
+    def __init__(self,
+                 logger: Logger,
+                 send: Callable[[Dict[str, Any]], None],
+                 min_intervals_s: Optional[Dict[str, float]] = None,
+                 event_topics: Optional[List[str]] = None,
+                 batch_window_s: float = UI_EVENT_BATCH_WINDOW_S):
+        """
+        :param send: sends one payload to all clients
+        :param min_intervals_s: state topic -> minimum interval in between two payloads carrying that topic
+        :param event_topics: topics whose every message is sent; all other topics are state topics
+        """
+        self.logger: Logger = logger
+        self.send: Callable[[Dict[str, Any]], None] = send
+        self.min_intervals_s: Dict[str, float] = min_intervals_s if min_intervals_s is not None else {}
+        self.event_topics: Set[str] = set(event_topics) if event_topics is not None else set()
+        self.batch_window_s: float = batch_window_s
+        self._condition: threading.Condition = threading.Condition()
+        self._pending: Dict[str, Any] = {}
+        self._pending_since: Dict[str, float] = {}
+        self._last_sent: Dict[str, float] = {}
+        self._events: List[Tuple[str, Any]] = []
+        "pending events in order of publishing"
+        self._events_since: float = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self, data: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        with self._condition:
+            for topic, value in data.items():
+                if topic in self.event_topics:
+                    if not self._events:
+                        self._events_since = now
+                    self._events.append((topic, value))
+                    continue
+                self._pending[topic] = value
+                self._pending_since.setdefault(topic, now)
+            if self._thread is None:
+                self._thread = threading.Thread(name="axxel-ui-events", target=self._loop, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _due_ts(self, topic: str) -> float:
+        return max(self._pending_since[topic] + self.batch_window_s,
+                   self._last_sent.get(topic, float("-inf")) + self.min_intervals_s.get(topic, 0.0))
+
+    def _loop(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._events:
+                    self._condition.wait()
+                now = time.monotonic()
+                due_ts = min([self._due_ts(topic) for topic in self._pending] +
+                             ([self._events_since + self.batch_window_s] if self._events else []))
+                if due_ts > now:
+                    self._condition.wait(due_ts - now)
+                    continue
+                # once a batch is due, it takes along all pending topics not held back by their interval and all events
+                payloads: List[Dict[str, Any]] = [{}]
+                for topic in [t for t in self._pending if self._last_sent.get(t, float("-inf")) + self.min_intervals_s.get(t, 0.0) <= now]:
+                    payloads[0][topic] = self._pending.pop(topic)
+                    del self._pending_since[topic]
+                    self._last_sent[topic] = now
+                for topic, value in self._events:
+                    if topic in payloads[-1]:
+                        payloads.append({})
+                    payloads[-1][topic] = value
+                self._events = []
+            for payload in [p for p in payloads if p]:
+                try:
+                    self.send(payload)
+                except Exception as e:
+                    self.logger.warning(f"failed to send plugin message: {e}")
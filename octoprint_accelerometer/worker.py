@@ -0,0 +1,144 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from enum import IntEnum
+from logging import Logger
+from typing import Any, Callable, Optional, Tuple
+
+
+class WorkerState(IntEnum):
+    IDLE = 0
+    "no task was submitted yet"
+    RUNNING = 1
+    "a task is executed"
+    ABORTING = 2
+    "a task is executed, abort was requested"
+    DONE = 3
+    "the last task returned or raised"
+
+
+PAUSE_POLL_INTERVAL_S: float = 0.5
+"while paused, the abort flag is checked at least that often"
+
+
+class PauseGate:
+    """
+    Lets long-running tasks step back, i.e. while a print is active.
+
+    Tasks call :meth:`wait` in between work items; it returns immediately unless paused.
+    """
+
+    def __init__(self):
+        self._open: threading.Event = threading.Event()
+        self._open.set()
+
+    def pause(self) -> None:
+        self._open.clear()
+
+    def resume(self) -> None:
+        self._open.set()
+
+    def is_paused(self) -> bool:
+        return not self._open.is_set()
+
+    def wait(self, abort_flag: Optional[threading.Event] = None) -> None:
+        """
+        Blocks while paused; returns early once abort_flag is set.
+        """
+        while not self._open.wait(PAUSE_POLL_INTERVAL_S):
+            if abort_flag is not None and abort_flag.is_set():
+                return
+
+
+class Worker:
+    """
+    Executes one task at a time on a long-lived daemon thread that is reused for all tasks.
+
+    The state turns DONE before the task's future resolves, so callbacks attached to the future
+    already see the worker as not running and may submit the next task right away.
+
+    The thread is started on construction rather than on the first submit: on Linux a thread inherits the niceness
+    of the thread that starts it, and a task may well be submitted from the completion callback of a lowered worker.
+    """
+
+    def __init__(self, logger: Logger, name: str, abort_flag: threading.Event, niceness: int = 0):
+        """
+        :param name: thread name
+        :param abort_flag: flag polled by the tasks; set on abort, cleared on submit
+        :param niceness: increment of the thread's scheduling niceness, so that the thread yields the CPU to the
+                         web server and the printer communication; has no effect if the system is idle otherwise
+        """
+        self.logger: Logger = logger
+        self.name: str = name
+        self.abort_flag: threading.Event = abort_flag
+        self.niceness: int = niceness
+        self._lock: threading.Lock = threading.Lock()
+        self._state: WorkerState = WorkerState.IDLE
+        self._tasks: "queue.SimpleQueue[Tuple[Callable[[], Any], Future]]" = queue.SimpleQueue()
+        self._thread: threading.Thread = threading.Thread(name=self.name, target=self._loop, daemon=True)
+        self._thread.start()
+
+    @property
+    def state(self) -> WorkerState:
+        return self._state
+
+    def is_busy(self) -> bool:
+        return self._state in [WorkerState.RUNNING, WorkerState.ABORTING]
+
+    def submit(self, task: Callable[[], Any]) -> Future:
+        """
+        :return: future of the task's return value
+        :raises RuntimeError: if a task is still executed
+        """
+        with self._lock:
+            if self.is_busy():
+                raise RuntimeError(f"worker {self.name} is busy")
+            self.abort_flag.clear()
+            self._state = WorkerState.RUNNING
+            future: Future = Future()
+            self._tasks.put((task, future))
+        return future
+
+    def abort(self) -> bool:
+        """
+        Requests the running task to abort and returns immediately; the task's future resolves once it returned.
+
+        :return: True if a task was running, False if there was nothing to abort
+        """
+        with self._lock:
+            if self._state != WorkerState.RUNNING:
+                return self._state == WorkerState.ABORTING
+            self._state = WorkerState.ABORTING
+            self.abort_flag.set()
+        return True
+
+    def _lower_priority(self) -> None:
+        # on Linux the niceness applies to the calling thread and the threads it starts later on, not to the process
+        if self.niceness <= 0 or not hasattr(os, "setpriority") or not hasattr(threading, "get_native_id"):
+            return
+        try:
+            thread_id = threading.get_native_id()
+            os.setpriority(os.PRIO_PROCESS, thread_id, os.getpriority(os.PRIO_PROCESS, thread_id) + self.niceness)
+        except OSError as e:
+            self.logger.warning(f"worker {self.name}: failed to lower priority: {e}")
+
+    def _loop(self) -> None:
+        self._lower_priority()
+        while True:
+            task, future = self._tasks.get()
+            if not future.set_running_or_notify_cancel():
+                with self._lock:
+                    self._state = WorkerState.DONE
+                continue
+            try:
+                result = task()
+            except BaseException as e:
+                self.logger.exception(f"worker {self.name}: task raised {e}")
+                with self._lock:
+                    self._state = WorkerState.DONE
+                future.set_exception(e)
+                continue
+            with self._lock:
+                self._state = WorkerState.DONE
+            future.set_result(result)
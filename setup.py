@@ -37,7 +37,8 @@ plugin_ignored_packages = []
 #     additional_setup_parameters = {"dependency_links": ["https://github.com/someUser/someRepo/archive/master.zip#egg=someDependency-dev"]}
 # "python_requires": ">=3,<4" blocks installation on Python 2 systems, to prevent confused users and provide a helpful error.
 # Remove it if you would like to support Python 2 as well as 3 (not recommended).
-additional_setup_parameters = {"python_requires": ">=3.9,<4"}
+# boto3 is only needed for shared storage on an S3 compatible object store: pip install "...[s3]"
+additional_setup_parameters = {"python_requires": ">=3.9,<4", "extras_require": {"s3": ["boto3"]}}
 
 ########################################################################################################################
 
@@ -0,0 +1,65 @@
+import pytest
+
+# the plugin package depends on py3dpaxxel
+pytest.importorskip("py3dpaxxel")
+np = pytest.importorskip("numpy")
+
+from octoprint_accelerometer.adaptive_sweep import SweepRange, find_resonances, plan_refinement, stream_response  # noqa: E402
+
+
+def test_resonances_are_the_strongest_local_maxima():
+    responses = {10: 1.0, 20: 3.0, 30: 2.0, 40: 2.5, 50: 5.0, 60: 4.0, 70: 0.5, 80: 0.7}
+
+    assert find_resonances(responses, 3) == [50, 20, 80]
+    assert find_resonances(responses, 10) == [50, 20, 80]
+    assert find_resonances(responses, 1) == [50]
+
+
+def test_plateau_counts_once_and_edges_count():
+    # 20 and 30 respond equally: the plateau's last frequency is taken
+    assert find_resonances({10: 1.0, 20: 2.0, 30: 2.0, 40: 1.0}, 5) == [30]
+    assert find_resonances({10: 3.0, 20: 2.0, 30: 1.0}, 5) == [10]
+    assert find_resonances({10: 1.0}, 5) == [10]
+    assert find_resonances({}, 5) == []
+
+
+def test_refinement_sweeps_one_coarse_step_around_each_resonance():
+    assert plan_refinement([50], 10, 2, 10, 200) == [SweepRange(42, 58, 2)]
+    assert SweepRange(42, 58, 2).frequencies_count() == 9
+
+
+def test_overlapping_and_adjacent_refinements_are_merged():
+    # 50 and 60 overlap, 150 stands alone; the ranges around 50 and 68 are one fine step apart, those around 50 and 70 two
+    assert plan_refinement([150, 60, 50], 10, 2, 10, 200) == [SweepRange(42, 68, 2), SweepRange(142, 158, 2)]
+    assert plan_refinement([50, 68], 10, 2, 10, 200) == [SweepRange(42, 76, 2)]
+    assert plan_refinement([50, 70], 10, 2, 10, 200) == [SweepRange(42, 58, 2), SweepRange(62, 78, 2)]
+
+
+def test_refinement_is_clamped_to_the_sweep_limits():
+    assert plan_refinement([10, 200], 10, 3, 10, 200) == [SweepRange(10, 16, 3), SweepRange(193, 199, 3)]
+
+
+def test_no_refinement_unless_the_fine_step_is_finer():
+    assert plan_refinement([50], 10, 10, 10, 200) == []
+    assert plan_refinement([50], 10, 0, 10, 200) == []
+
+
+def test_stream_response_at_the_excitation_frequency(tmp_path):
+    t = np.arange(4000) / 800.0
+    path = tmp_path / "axxel-aaaa1111-20231127-235625233-s000-ay-f037-z015.tsv"
+    with open(path, "w") as file:
+        file.write("seq sample x y z\n")
+        for row in range(4000):
+            file.write(f"{row % 256} {row} 0.0 {0.8 * np.sin(2 * np.pi * 37.0 * t[row]):.6f} 0.0\n")
+        file.write("# {\"rate\": \"ODR800\"}\n")
+
+    assert stream_response(str(path), "y", 37.0) == pytest.approx(0.8, rel=0.01)
+    assert stream_response(str(path), "x", 37.0) == pytest.approx(0.0, abs=1e-6)
+
+
+def test_incomplete_stream_has_no_response(tmp_path):
+    path = tmp_path / "axxel-aaaa1111-20231127-235625233-s000-ay-f037-z015.tsv"
+    with open(path, "w") as file:
+        file.write("seq sample x y z\n0 0 0.0 0.0 0.0\n")
+
+    assert stream_response(str(path), "y", 37.0) is None
@@ -0,0 +1,78 @@
+import logging
+import os
+import threading
+from typing import List
+
+import pytest
+
+# the plugin package depends on py3dpaxxel, the simulator encodes frames with its transport definitions
+pytest.importorskip("py3dpaxxel.controller.transfer_types")
+
+from octoprint_accelerometer.controller_simulator import ControllerSimulator  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def simulator():
+    controller_simulator = ControllerSimulator(logger, output_data_rate_hz=800)
+    controller_simulator.start()
+    yield controller_simulator
+    controller_simulator.stop()
+
+
+def test_unsupported_output_data_rate_falls_back_to_nearest():
+    controller_simulator = ControllerSimulator(logger, output_data_rate_hz=1000)
+    assert controller_simulator.output_data_rate_hz == 800
+    controller_simulator.output_data_rate_hz = 3000
+    assert controller_simulator.output_data_rate_hz == 3200
+
+
+def test_records_step_series_through_serial_client(simulator, tmp_path):
+    """
+    Records a short series with py3dpaxxel's runner and serial client against the simulator's pty.
+    """
+    from py3dpaxxel.controller.constants import OutputDataRateFromHz
+    from py3dpaxxel.octoprint.api import OctoApi
+    from py3dpaxxel.sampling_tasks.steps_series_runner import SamplingStepsSeriesRunner
+
+    class GcodeSink(OctoApi):
+        def __init__(self):
+            self.commands: List[str] = []
+
+        def send_commands(self, commands: List[str]) -> int:
+            self.commands.extend(commands)
+            return 0
+
+    gcode_sink = GcodeSink()
+    ret = SamplingStepsSeriesRunner(
+        octoprint_api=gcode_sink,
+        controller_serial_device=simulator.device,
+        controller_record_timelapse_s=0.2,
+        controller_decode_timeout_s=2.0,
+        sensor_odr=OutputDataRateFromHz[800],
+        gcode_start_point_mm=(100, 100, 20),
+        gcode_axis=["x"],
+        gcode_distance_mm=10,
+        gcode_step_repeat_count=1,
+        gcode_sequence_repeat_count=1,
+        fx_start_hz=10,
+        fx_stop_hz=20,
+        fx_step_hz=10,
+        zeta_start_em2=15,
+        zeta_stop_em2=15,
+        zeta_step_em2=5,
+        output_file_prefix="axxel",
+        output_dir=str(tmp_path),
+        do_dry_run=False,
+        do_abort_flag=threading.Event())()
+
+    assert ret == 0
+    assert len(gcode_sink.commands) > 0
+    assert simulator.statistics.samples_sent > 0
+    assert simulator.statistics.fifo_overruns == 0
+    streams = [f for f in os.listdir(tmp_path) if f.startswith("axxel-")]
+    assert len(streams) > 0
+    for stream in streams:
+        with open(tmp_path / stream) as file:
+            assert any(line and not line.startswith("#") for line in file.read().splitlines())
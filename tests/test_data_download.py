@@ -0,0 +1,75 @@
+import gzip
+import os
+import tempfile
+
+import pytest
+
+# the plugin package depends on py3dpaxxel
+pytest.importorskip("py3dpaxxel")
+
+import tornado.web  # noqa: E402
+from tornado.testing import AsyncHTTPTestCase  # noqa: E402
+
+from octoprint_accelerometer.data_download import DataFileHandler  # noqa: E402
+
+PLAIN: str = "fft-aaaa1111-20231127-235625233-s000-ax-f010-z015-x.tsv"
+COMPRESSED: str = "axxel-aaaa1111-20231127-235625233-s000-ax-f010-z015.tsv.gz"
+CONTENT: bytes = b"".join(f"{i} {i * 2} {i * 3}\n".encode() for i in range(1000))
+
+
+class DataFileHandlerTest(AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.data_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.data_dir, PLAIN), "wb") as file:
+            file.write(CONTENT)
+        with gzip.open(os.path.join(self.data_dir, COMPRESSED), "wb") as file:
+            file.write(CONTENT)
+        return tornado.web.Application([(r"/download/(.*)", DataFileHandler, dict(path=self.data_dir))])
+
+    def assert_head_matches_get(self, name: str, headers: dict):
+        get = self.fetch(f"/download/{name}", headers=headers, decompress_response=False)
+        head = self.fetch(f"/download/{name}", method="HEAD", headers=headers, decompress_response=False)
+
+        self.assertEqual(head.code, get.code)
+        self.assertEqual(head.body, b"")
+        for header in ["Content-Length", "Accept-Ranges", "Content-Encoding", "Content-Range", "Last-Modified"]:
+            self.assertEqual(head.headers.get(header), get.headers.get(header), header)
+        return get
+
+    def test_plain_file(self):
+        get = self.assert_head_matches_get(PLAIN, {})
+        self.assertEqual(get.body, CONTENT)
+        self.assertEqual(get.headers["Content-Length"], str(len(CONTENT)))
+        self.assertEqual(get.headers["Accept-Ranges"], "bytes")
+
+    def test_plain_file_encoded_on_the_fly(self):
+        get = self.assert_head_matches_get(PLAIN, {"Accept-Encoding": "gzip"})
+        self.assertEqual(gzip.decompress(get.body), CONTENT)
+        self.assertEqual(get.headers["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", get.headers)
+
+    def test_byte_range(self):
+        get = self.assert_head_matches_get(PLAIN, {"Range": "bytes=10-19"})
+        self.assertEqual(get.code, 206)
+        self.assertEqual(get.body, CONTENT[10:20])
+        self.assertEqual(get.headers["Content-Range"], f"bytes 10-19/{len(CONTENT)}")
+
+    def test_unsatisfiable_byte_range(self):
+        get = self.assert_head_matches_get(PLAIN, {"Range": f"bytes={len(CONTENT)}-"})
+        self.assertEqual(get.code, 416)
+        self.assertEqual(get.headers["Content-Range"], f"bytes */{len(CONTENT)}")
+
+    def test_compressed_file(self):
+        get = self.assert_head_matches_get(COMPRESSED, {"Accept-Encoding": "gzip"})
+        self.assertEqual(gzip.decompress(get.body), CONTENT)
+        self.assertEqual(get.headers["Content-Length"], str(os.path.getsize(os.path.join(self.data_dir, COMPRESSED))))
+        self.assertNotIn("Accept-Ranges", get.headers)
+
+        get = self.assert_head_matches_get(COMPRESSED, {})
+        self.assertEqual(get.body, CONTENT)
+        self.assertNotIn("Content-Encoding", get.headers)
+
+    def test_missing_file(self):
+        self.assertEqual(self.fetch("/download/missing.tsv", method="HEAD").code, 404)
+        self.assertEqual(self.fetch("/download/..%2Fescape.tsv").code, 404)
@@ -0,0 +1,73 @@
+import logging
+import os
+import threading
+from typing import List
+
+import pytest
+
+# the plugin package depends on py3dpaxxel
+decompose_runner = pytest.importorskip("py3dpaxxel.data_decomposition.decompose_runner")
+
+from octoprint_accelerometer.data_post_process import DECOMPOSE_STAGING_DIR_NAME, StreamDecomposeRunner  # noqa: E402
+
+STREAMS: List[str] = [f"axxel-aaaa1111-20231127-235625233-s{i:03d}-ax-f010-z015.tsv" for i in range(3)]
+
+
+class FakeDecomposeRunner:
+    """
+    Writes the FFTs of all streams in the input folder, as py3dpaxxel does, and records the streams it saw.
+    """
+    calls: List[List[str]] = []
+
+    def __init__(self, input_dir: str, input_file_prefix: str, output_dir: str, output_file_prefix: str, **_kwargs):
+        self.input_dir = input_dir
+        self.input_file_prefix = input_file_prefix
+        self.output_dir = output_dir
+        self.output_file_prefix = output_file_prefix
+
+    def __call__(self):
+        streams = sorted(n for n in os.listdir(self.input_dir) if n.startswith(f"{self.input_file_prefix}-"))
+        FakeDecomposeRunner.calls.append(streams)
+        for stream in streams:
+            for axis in ["x", "y", "z"]:
+                name = f"{self.output_file_prefix}-{stream[len(self.input_file_prefix) + 1:-len('.tsv')]}-{axis}.tsv"
+                with open(os.path.join(self.output_dir, name), "w") as file:
+                    file.write("freq mag\n")
+        return 0, len(streams), len(streams), 0
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(decompose_runner, "DataDecomposeRunner", FakeDecomposeRunner)
+    FakeDecomposeRunner.calls = []
+    for name in STREAMS:
+        with open(tmp_path / name, "w") as file:
+            file.write("sample x y z\n0 1 2 3\n")
+    return tmp_path
+
+
+def make_runner(data_dir, do_abort_flag: threading.Event = None) -> StreamDecomposeRunner:
+    return StreamDecomposeRunner(logging.getLogger(__name__), str(data_dir), "axxel", "fft", str(data_dir), "fft",
+                                 do_abort_flag=do_abort_flag if do_abort_flag is not None else threading.Event())
+
+
+def test_decomposes_each_pending_stream_alone(data_dir):
+    with open(data_dir / f"fft-{STREAMS[1][len('axxel-'):-len('.tsv')]}-x.tsv", "w") as file:
+        file.write("freq mag\n")
+
+    assert make_runner(data_dir)() == (0, 3, 2, 1)
+    assert FakeDecomposeRunner.calls == [[STREAMS[0]], [STREAMS[2]]]
+    assert os.listdir(data_dir / DECOMPOSE_STAGING_DIR_NAME) == []
+    assert all(os.path.exists(data_dir / name) for name in STREAMS)
+
+    FakeDecomposeRunner.calls = []
+    assert make_runner(data_dir)() == (0, 3, 0, 3)
+    assert FakeDecomposeRunner.calls == []
+
+
+def test_abort_stops_before_the_next_stream(data_dir):
+    do_abort_flag = threading.Event()
+    do_abort_flag.set()
+
+    assert make_runner(data_dir, do_abort_flag)() == (-1, 3, 0, 0)
+    assert FakeDecomposeRunner.calls == []
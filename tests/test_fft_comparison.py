@@ -0,0 +1,55 @@
+import pytest
+
+# the plugin package depends on py3dpaxxel
+pytest.importorskip("py3dpaxxel")
+np = pytest.importorskip("numpy")
+
+from octoprint_accelerometer.fft_comparison import compare_spectra  # noqa: E402
+
+
+def write_fft(path, frequency_hz, amplitude) -> str:
+    with open(path, "w") as file:
+        file.write("freq_hz fft\n")
+        for f, a in zip(frequency_hz, amplitude):
+            file.write(f"{f} {a}\n")
+    return str(path)
+
+
+def test_grid_uses_the_coarsest_bins_up_to_the_lowest_maximum_frequency(tmp_path):
+    # 1 Hz bins up to 400 Hz and 0.5 Hz bins up to 200 Hz
+    coarse_f = np.arange(0.0, 400.5, 1.0)
+    fine_f = np.arange(0.0, 200.25, 0.5)
+    coarse = write_fft(tmp_path / "coarse.tsv", coarse_f, 2.0 * coarse_f)
+    fine = write_fft(tmp_path / "fine.tsv", fine_f, np.full(len(fine_f), 3.0))
+
+    comparison = compare_spectra({"coarse": [coarse], "fine": [fine]})
+
+    assert comparison.frequency_hz == pytest.approx(np.arange(0.0, 200.5, 1.0).tolist())
+    assert comparison.series["coarse"] == pytest.approx((2.0 * np.arange(0.0, 200.5, 1.0)).tolist())
+    assert comparison.series["fine"] == pytest.approx([3.0] * 201)
+
+
+def test_requested_resolution_and_averaging_of_a_series(tmp_path):
+    f = np.arange(0.0, 100.5, 1.0)
+    first = write_fft(tmp_path / "first.tsv", f, f)
+    second = write_fft(tmp_path / "second.tsv", f, f + 2.0)
+
+    comparison = compare_spectra({"run": [first, second]}, frequency_resolution_hz=0.25)
+
+    assert comparison.frequency_hz[:3] == pytest.approx([0.0, 0.25, 0.5])
+    assert comparison.frequency_hz[-1] == pytest.approx(100.0)
+    # linear in between the bins, then averaged over both files
+    assert comparison.series["run"][:3] == pytest.approx([1.0, 1.25, 1.5])
+
+
+def test_series_without_spectrum_has_no_values(tmp_path):
+    f = np.arange(0.0, 10.5, 1.0)
+    full = write_fft(tmp_path / "full.tsv", f, f)
+    empty = write_fft(tmp_path / "empty.tsv", [0.0], [1.0])
+
+    comparison = compare_spectra({"full": [full], "empty": [empty]})
+
+    assert len(comparison.frequency_hz) == 11
+    assert comparison.series["empty"] == [None] * 11
+
+    assert compare_spectra({"empty": [empty]}).frequency_hz == []
@@ -0,0 +1,90 @@
+from typing import Dict, List
+
+import pytest
+
+# the plugin package depends on py3dpaxxel
+pytest.importorskip("py3dpaxxel")
+np = pytest.importorskip("numpy")
+
+from octoprint_accelerometer.fft_variants import FFT_VARIANT_AXES, FFT_WINDOWS, SegmentAverager, compute_fft_variants_chunked  # noqa: E402
+
+SAMPLE_RATE_HZ: float = 800.0
+
+
+def make_stream(count: int) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(7)
+    t = np.arange(count) / SAMPLE_RATE_HZ
+    return {"sample": np.arange(count, dtype=np.float64),
+            "x": np.sin(2 * np.pi * 50.0 * t) + 0.1 * rng.standard_normal(count),
+            "y": 0.5 * np.sin(2 * np.pi * 120.0 * t) + 2.0,
+            "z": 0.1 * rng.standard_normal(count)}
+
+
+def welch_reference(columns: Dict[str, np.ndarray], segment_size: int, algorithm: str) -> np.ndarray:
+    """
+    Welch's method on the whole signal: mean removed per segment, segments overlap by half.
+    """
+    window = FFT_WINDOWS[algorithm](segment_size)
+    samples = np.vstack([columns[axis] for axis in FFT_VARIANT_AXES])
+    starts = range(0, samples.shape[1] - segment_size + 1, segment_size // 2)
+    power = np.zeros((len(FFT_VARIANT_AXES), segment_size // 2 + 1))
+    for start in starts:
+        segment = samples[:, start:start + segment_size]
+        segment = segment - np.mean(segment, axis=1, keepdims=True)
+        power += np.square(np.abs(np.fft.rfft(segment * window, axis=1)))
+    return np.sqrt(power / len(starts)) * (2.0 / np.sum(window))
+
+
+def split(columns: Dict[str, np.ndarray], sizes: List[int]) -> List[Dict[str, np.ndarray]]:
+    bounds = np.cumsum([0, *sizes])
+    return [{name: values[first:last] for name, values in columns.items()} for first, last in zip(bounds[:-1], bounds[1:])]
+
+
+@pytest.mark.parametrize("chunk_sizes", [[10000], [1000] * 10, [1, 255, 256, 257, 3000, 6231]])
+def test_segment_averager_matches_welch_on_the_whole_signal(chunk_sizes):
+    columns = make_stream(sum(chunk_sizes))
+    averager = SegmentAverager(512, ["hann", "flattop"])
+    for chunk in split(columns, chunk_sizes):
+        averager.feed(chunk)
+    variants = averager.result(SAMPLE_RATE_HZ)
+
+    assert variants.segments_count == (10000 - 512) // 256 + 1
+    assert variants.frequency_hz[1] == pytest.approx(SAMPLE_RATE_HZ / 512)
+    for algorithm in ["hann", "flattop"]:
+        reference = welch_reference(columns, 512, algorithm)
+        for index, axis in enumerate(FFT_VARIANT_AXES):
+            np.testing.assert_allclose(variants.amplitudes[algorithm][axis], reference[index], rtol=1e-4, atol=1e-6)
+
+
+def test_segment_averager_fills_gaps_at_chunk_boundaries():
+    columns = make_stream(4096)
+    # samples 2000..2009 are lost, the chunk boundary falls right into the gap
+    kept = np.concatenate((np.arange(2000), np.arange(2010, 4096)))
+    lossy = {name: values[kept] for name, values in columns.items()}
+    averager = SegmentAverager(512, ["hann"])
+    for chunk in split(lossy, [2000, 2086]):
+        averager.feed(chunk)
+
+    reference = SegmentAverager(512, ["hann"])
+    reference.feed(lossy)
+    assert averager.segments_count == reference.segments_count == (4096 - 512) // 256 + 1
+    np.testing.assert_allclose(averager.result(SAMPLE_RATE_HZ).amplitudes["hann"]["x"], reference.result(SAMPLE_RATE_HZ).amplitudes["hann"]["x"], rtol=1e-6)
+
+
+def test_chunked_variants_peak_at_the_excitation_frequency(tmp_path):
+    columns = make_stream(20000)
+    path = tmp_path / "axxel-aaaa1111-20231127-235625233-s000-ax-f050-z015.tsv"
+    with open(path, "w") as file:
+        file.write("seq sample x y z\n")
+        for row in range(20000):
+            file.write(f"{row % 256} {row} {columns['x'][row]:.6f} {columns['y'][row]:.6f} {columns['z'][row]:.6f}\n")
+        file.write("# {\"rate\": \"ODR800\"}\n")
+
+    whole = compute_fft_variants_chunked(str(path), SAMPLE_RATE_HZ, ["hann"], max_samples_in_memory=65536)
+    averaged = compute_fft_variants_chunked(str(path), SAMPLE_RATE_HZ, ["hann"], max_samples_in_memory=4096, segment_size=2048)
+
+    assert whole.segments_count == 1
+    assert averaged.segments_count == (20000 - 2048) // 1024 + 1
+    for variants in [whole, averaged]:
+        assert variants.frequency_hz[np.argmax(variants.amplitudes["hann"]["x"])] == pytest.approx(50.0, abs=1.0)
+        assert variants.frequency_hz[np.argmax(variants.amplitudes["hann"]["y"])] == pytest.approx(120.0, abs=1.0)
@@ -0,0 +1,91 @@
+import logging
+import os
+
+import pytest
+
+# the plugin package depends on py3dpaxxel
+pytest.importorskip("py3dpaxxel")
+
+from octoprint_accelerometer.job_queue import JobKind, JobQueue, JobState  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def make_queue(tmp_path) -> JobQueue:
+    return JobQueue(logger, os.path.join(str(tmp_path), ".jobs.json"))
+
+
+def test_queued_jobs_run_by_priority_then_queue_order(tmp_path):
+    queue = make_queue(tmp_path)
+    processing = queue.enqueue(JobKind.DATA_PROCESSING, {})
+    first = queue.enqueue(JobKind.RECORDING, {"run": 1})
+    second = queue.enqueue(JobKind.RECORDING, {"run": 2})
+    urgent = queue.enqueue(JobKind.DATA_PROCESSING, {}, priority=0)
+
+    assert [j.job_id for j in queue.jobs()] == [urgent.job_id, first.job_id, second.job_id, processing.job_id]
+
+    queue.move(processing.job_id, 1)
+    assert [j.job_id for j in queue.jobs()] == [urgent.job_id, processing.job_id, first.job_id, second.job_id]
+
+
+def test_unique_enqueue_returns_the_queued_job(tmp_path):
+    queue = make_queue(tmp_path)
+    job = queue.enqueue(JobKind.DATA_PROCESSING, {"a": 1}, unique=True)
+
+    assert queue.enqueue(JobKind.DATA_PROCESSING, {"a": 2}, unique=True) is job
+    assert len(queue.jobs()) == 1
+
+
+def test_one_job_runs_at_a_time(tmp_path):
+    queue = make_queue(tmp_path)
+    recording = queue.enqueue(JobKind.RECORDING, {})
+    processing = queue.enqueue(JobKind.DATA_PROCESSING, {})
+
+    assert queue.start_next(lambda _job: True) is recording
+    assert queue.start_next(lambda _job: True) is None
+    assert queue.pending(JobKind.RECORDING) is recording
+    assert queue.pending(JobKind.DATA_PROCESSING) is processing
+
+    assert queue.finish(JobKind.DATA_PROCESSING, JobState.FINISHED, "PROCESSING_FINISHED") is None
+    assert queue.finish(JobKind.RECORDING, JobState.FINISHED, "PROCESSING_FINISHED") is recording
+    assert queue.pending(JobKind.RECORDING) is None
+    assert queue.start_next(lambda _job: True) is processing
+
+
+def test_not_runnable_jobs_are_skipped(tmp_path):
+    queue = make_queue(tmp_path)
+    recording = queue.enqueue(JobKind.RECORDING, {})
+    processing = queue.enqueue(JobKind.DATA_PROCESSING, {})
+
+    assert queue.start_next(lambda job: JobKind.RECORDING != job.kind) is processing
+    assert recording.state == JobState.QUEUED
+
+
+def test_jobs_persist_and_running_jobs_are_interrupted_on_load(tmp_path):
+    queue = make_queue(tmp_path)
+    running = queue.enqueue(JobKind.RECORDING, {"frequency_start": 10})
+    queued = queue.enqueue(JobKind.RECORDING, {"frequency_start": 20}, priority=5)
+    cancelled = queue.enqueue(JobKind.DATA_PROCESSING, {})
+    queue.cancel(cancelled.job_id)
+    assert queue.start_next(lambda job: job is running) is running
+
+    reloaded = make_queue(tmp_path)
+    jobs = {j.job_id: j for j in reloaded.jobs()}
+
+    assert jobs[running.job_id].state == JobState.INTERRUPTED
+    assert jobs[queued.job_id].state == JobState.QUEUED
+    assert jobs[queued.job_id].priority == 5
+    assert jobs[queued.job_id].parameters == {"frequency_start": 20}
+    assert jobs[cancelled.job_id].state == JobState.CANCELLED
+    assert reloaded.running() is None
+
+    later = reloaded.enqueue(JobKind.RECORDING, {}, priority=5)
+    assert later.order > queued.order
+    assert reloaded.start_next(lambda _job: True).job_id == queued.job_id
+
+
+def test_corrupt_queue_file_starts_empty(tmp_path):
+    with open(os.path.join(str(tmp_path), ".jobs.json"), "w") as file:
+        file.write("{not json")
+
+    assert make_queue(tmp_path).jobs() == []
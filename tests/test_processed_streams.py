@@ -0,0 +1,86 @@
+import logging
+
+import pytest
+
+# the plugin package depends on py3dpaxxel
+pytest.importorskip("py3dpaxxel")
+
+from octoprint_accelerometer.plugin import OctoprintAccelerometerPlugin  # noqa: E402
+
+STREAM: str = "axxel-aaaa1111-20231127-235625233-s000-ax-f010-z015.tsv"
+OTHER_STREAM: str = "axxel-aaaa1111-20231127-235626233-s001-ax-f020-z015.tsv"
+
+
+@pytest.fixture
+def plugin(tmp_path, monkeypatch):
+    plugin = OctoprintAccelerometerPlugin()
+    plugin._logger = logging.getLogger(__name__)
+    plugin.spectrogram_window_size = 256
+    plugin.spectrogram_hop_size = 32
+    plugin.fft_algorithms = ["hann"]
+    monkeypatch.setattr(plugin, "get_plugin_data_folder", lambda: str(tmp_path))
+    return plugin
+
+
+def test_nothing_to_process_without_streams(plugin, tmp_path):
+    (tmp_path / "fft-aaaa1111-20231127-235625233-s000-ax-f010-z015-x.tsv").write_text("")
+
+    assert not plugin._has_unprocessed_streams()
+
+
+def test_streams_are_unprocessed_until_marked(plugin, tmp_path):
+    (tmp_path / STREAM).write_text("")
+    assert plugin._has_unprocessed_streams()
+
+    plugin._persist_processed_streams(plugin._get_data_processing_parameters_snapshot())
+    assert (tmp_path / plugin.PROCESSED_STREAMS_FILE_NAME).is_file()
+    assert not plugin._has_unprocessed_streams()
+
+
+def test_stream_recorded_after_processing(plugin, tmp_path):
+    (tmp_path / STREAM).write_text("")
+    plugin._persist_processed_streams(plugin._get_data_processing_parameters_snapshot())
+
+    (tmp_path / OTHER_STREAM).write_text("")
+    assert plugin._has_unprocessed_streams()
+
+
+def test_compressed_stream_is_the_same_stream(plugin, tmp_path):
+    (tmp_path / STREAM).write_text("")
+    plugin._persist_processed_streams(plugin._get_data_processing_parameters_snapshot())
+
+    (tmp_path / STREAM).rename(tmp_path / f"{STREAM}.gz")
+    assert not plugin._has_unprocessed_streams()
+
+
+def test_hidden_and_deleted_streams_do_not_count(plugin, tmp_path):
+    (tmp_path / STREAM).write_text("")
+    (tmp_path / OTHER_STREAM).write_text("")
+    plugin._persist_processed_streams(plugin._get_data_processing_parameters_snapshot())
+
+    (tmp_path / OTHER_STREAM).unlink()
+    (tmp_path / f".{OTHER_STREAM}.tmp").write_text("")
+    assert not plugin._has_unprocessed_streams()
+
+
+@pytest.mark.parametrize("parameter, value", [
+    ("spectrogram_window_size", 512),
+    ("spectrogram_hop_size", 64),
+    ("fft_algorithms", ["hann", "flattop"]),
+    ("data_compression_enabled", True),
+    ("data_compression_level", 6),
+])
+def test_changed_processing_parameters(plugin, tmp_path, parameter, value):
+    (tmp_path / STREAM).write_text("")
+    plugin._persist_processed_streams(plugin._get_data_processing_parameters_snapshot())
+
+    setattr(plugin, parameter, value)
+    assert plugin._has_unprocessed_streams()
+
+
+@pytest.mark.parametrize("content", ["", "{", "[]", "{\"parameters\": {}}", "{\"streams\": []}"])
+def test_unreadable_marker(plugin, tmp_path, content):
+    (tmp_path / STREAM).write_text("")
+    (tmp_path / plugin.PROCESSED_STREAMS_FILE_NAME).write_text(content)
+
+    assert plugin._has_unprocessed_streams()
@@ -0,0 +1,114 @@
+import logging
+import os
+import time
+from typing import List
+
+import pytest
+
+# the plugin package depends on py3dpaxxel
+pytest.importorskip("py3dpaxxel")
+
+from octoprint_accelerometer.retention import RetentionManager  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+KIB: int = 1024
+
+
+def stream(run_hash: str) -> str:
+    return f"axxel-{run_hash}-20231127-235625233-s000-ax-f010-z015.tsv"
+
+
+def fft(run_hash: str) -> str:
+    return f"fft-{run_hash}-20231127-235625233-s000-ax-f010-z015-x.tsv"
+
+
+def write(path, size: int, age_s: float = 0.0) -> None:
+    with open(path, "wb") as file:
+        file.write(b"0" * size)
+    ts = time.time() - age_s
+    os.utime(path, (ts, ts))
+
+
+def make_manager(data_dir, max_size_mb: int = 0, max_age_days: int = 0, can_evict=None) -> RetentionManager:
+    return RetentionManager(logger, str(data_dir), "axxel", ["axxel", "fft"], ".retention_views.json",
+                            max_size_mb=max_size_mb, max_age_days=max_age_days, can_evict=can_evict)
+
+
+def enforce(manager: RetentionManager) -> List[str]:
+    evicted: List[List[str]] = []
+    manager.enforce(on_done=evicted.append).result(timeout=10)
+    return evicted[0]
+
+
+def test_quota_evicts_least_recently_active_runs_first(tmp_path):
+    # oldest modification first: c, b, a; each run holds 400 KiB of streams
+    for age_s, run_hash in enumerate(["a", "b", "c"]):
+        write(tmp_path / stream(f"{run_hash}0"), 400 * KIB, age_s=3600 * (age_s + 1))
+        write(tmp_path / fft(f"{run_hash}0"), 1 * KIB, age_s=3600 * (age_s + 1))
+    manager = make_manager(tmp_path, max_size_mb=1)
+    # a view counts as activity: run c is kept although modified least recently
+    manager.mark_viewed("c0")
+
+    assert enforce(manager) == ["b0"]
+    assert not os.path.exists(tmp_path / stream("b0"))
+    assert os.path.exists(tmp_path / fft("b0"))
+    # the views file written for the view is accounted as well
+    assert manager.size_total_bytes == sum(os.path.getsize(tmp_path / n) for n in os.listdir(tmp_path))
+
+    manager.max_size_mb = 0
+    manager.max_age_days = 1
+    assert enforce(manager) == []
+    manager.shutdown()
+
+
+def test_age_limit_evicts_inactive_runs_only(tmp_path):
+    write(tmp_path / stream("old"), KIB, age_s=3 * 24 * 3600)
+    write(tmp_path / stream("viewed"), KIB, age_s=3 * 24 * 3600)
+    write(tmp_path / stream("new"), KIB)
+    manager = make_manager(tmp_path, max_age_days=2)
+    manager.mark_viewed("viewed")
+
+    assert enforce(manager) == ["old"]
+    assert sorted(os.listdir(tmp_path)) == sorted([stream("new"), stream("viewed"), ".retention_views.json"])
+    manager.shutdown()
+
+
+def test_streams_that_cannot_be_evicted_are_kept(tmp_path):
+    write(tmp_path / stream("a0"), 800 * KIB, age_s=7200)
+    write(tmp_path / stream("b0"), 800 * KIB, age_s=3600)
+    manager = make_manager(tmp_path, max_size_mb=1, can_evict=lambda name: "a0" not in name)
+
+    assert enforce(manager) == ["b0"]
+    assert os.path.exists(tmp_path / stream("a0"))
+    manager.shutdown()
+
+
+def test_quota_counts_hidden_non_run_files(tmp_path):
+    write(tmp_path / stream("a0"), 100 * KIB, age_s=3600)
+    write(tmp_path / ".feature_catalog.sqlite", 900 * KIB)
+    os.mkdir(tmp_path / ".decompose")
+    manager = make_manager(tmp_path, max_size_mb=1)
+
+    assert enforce(manager) == []
+    assert manager.size_total_bytes == 1000 * KIB
+
+    # the catalog grows in place
+    write(tmp_path / ".feature_catalog.sqlite", 1000 * KIB)
+    assert enforce(manager) == ["a0"]
+    assert manager.size_total_bytes == 1000 * KIB
+    manager.shutdown()
+
+
+def test_delete_run_removes_all_its_files(tmp_path):
+    write(tmp_path / stream("a0"), KIB)
+    write(tmp_path / fft("a0"), KIB)
+    write(tmp_path / stream("b0"), KIB)
+    manager = make_manager(tmp_path)
+    removed: List[int] = []
+
+    manager.delete_run("a0", on_done=lambda _run_hash, count: removed.append(count)).result(timeout=10)
+
+    assert removed == [2]
+    assert os.path.exists(tmp_path / stream("b0"))
+    manager.shutdown()
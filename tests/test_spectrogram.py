@@ -0,0 +1,84 @@
+import pytest
+
+# the plugin package depends on py3dpaxxel
+pytest.importorskip("py3dpaxxel")
+np = pytest.importorskip("numpy")
+
+from octoprint_accelerometer.spectrogram import Spectrogram, SpectrogramAccumulator, compute_spectrogram, get_spectrogram_tile  # noqa: E402
+
+SAMPLE_RATE_HZ: float = 800.0
+
+
+@pytest.mark.parametrize("window_size,hop_size", [(256, 32), (64, 64), (32, 100)])
+@pytest.mark.parametrize("chunk_size", [1, 97, 1000, 5000])
+def test_chunked_spectrogram_equals_the_whole_stream_one(window_size, hop_size, chunk_size):
+    count = 5000
+    t = np.arange(count) / SAMPLE_RATE_HZ
+    # a chirp, so that misaligned frames would differ
+    x = np.sin(2 * np.pi * (20.0 + 30.0 * t) * t) + 0.5
+    accumulator = SpectrogramAccumulator(["x"], SAMPLE_RATE_HZ, window_size, hop_size)
+    for first in range(0, count, chunk_size):
+        accumulator.feed({"sample": np.arange(first, min(count, first + chunk_size), dtype=np.float64), "x": x[first:first + chunk_size]})
+    chunked = accumulator.result()["x"]
+
+    whole = compute_spectrogram(x, SAMPLE_RATE_HZ, window_size, hop_size)
+    assert chunked.magnitude.shape == whole.magnitude.shape == ((count - window_size) // hop_size + 1, window_size // 2 + 1)
+    np.testing.assert_allclose(chunked.time_s, whole.time_s)
+    np.testing.assert_allclose(chunked.magnitude, whole.magnitude, rtol=1e-5, atol=1e-6)
+
+
+def test_short_stream_has_no_frames():
+    accumulator = SpectrogramAccumulator(["x", "y"], SAMPLE_RATE_HZ, 256, 32)
+    accumulator.feed({"sample": np.arange(100, dtype=np.float64), "x": np.zeros(100), "y": np.zeros(100)})
+
+    spectrogram = accumulator.result()["y"]
+    assert spectrogram.magnitude.shape == (0, 129)
+    assert len(spectrogram.time_s) == 0
+
+
+def make_spectrogram(frames: int, bins: int) -> Spectrogram:
+    magnitude = np.zeros((frames, bins), dtype=np.float32)
+    return Spectrogram(frequency_hz=np.arange(bins, dtype=np.float32) * 2.0,
+                       time_s=np.arange(frames, dtype=np.float32) * 0.1,
+                       magnitude=magnitude)
+
+
+def test_tile_max_pools_so_that_single_peaks_stay_visible():
+    spectrogram = make_spectrogram(100, 40)
+    spectrogram.magnitude[37, 13] = 5.0
+    spectrogram.magnitude[99, 39] = 1.0
+
+    tile = get_spectrogram_tile(spectrogram, max_frames=10, max_bins=8)
+
+    assert len(tile.magnitude) == 10 and len(tile.magnitude[0]) == 8
+    # each cell is labeled by its first frame and bin
+    assert tile.time_s == pytest.approx([i * 1.0 for i in range(10)])
+    assert tile.frequency_hz == pytest.approx([i * 10.0 for i in range(8)])
+    assert tile.magnitude[3][2] == 5.0
+    assert tile.magnitude[9][7] == 1.0
+    assert sum(v for row in tile.magnitude for v in row) == 6.0
+    assert tile.magnitude_max == 5.0
+
+
+def test_tile_cuts_time_and_frequency_range():
+    spectrogram = make_spectrogram(100, 40)
+    spectrogram.magnitude[5, 30] = 7.0
+    spectrogram.magnitude[50, 2] = 3.0
+
+    tile = get_spectrogram_tile(spectrogram, start_s=4.0, stop_s=6.0, max_frequency_hz=20.0)
+
+    assert tile.time_s == pytest.approx([i * 0.1 for i in range(40, 61)])
+    assert tile.frequency_hz == pytest.approx([i * 2.0 for i in range(11)])
+    assert tile.magnitude[10][2] == 3.0
+    # the color scale covers the whole spectrogram
+    assert tile.magnitude_max == 7.0
+
+
+def test_tile_of_an_empty_range():
+    spectrogram = make_spectrogram(10, 4)
+    spectrogram.magnitude[0, 0] = 2.0
+
+    tile = get_spectrogram_tile(spectrogram, start_s=100.0)
+
+    assert tile.magnitude == [] and tile.time_s == []
+    assert tile.magnitude_max == 2.0
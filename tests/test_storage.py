@@ -0,0 +1,228 @@
+import gzip
+import logging
+import os
+import time
+from typing import List
+
+import pytest
+
+# the plugin package depends on py3dpaxxel
+pytest.importorskip("py3dpaxxel")
+
+from octoprint_accelerometer.retention import RetentionManager  # noqa: E402
+from octoprint_accelerometer.storage import DirectoryBackend, S3Backend, StorageBackend, StorageSync, StoredFile  # noqa: E402
+from octoprint_accelerometer.worker import PauseGate  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+FILE_PREFIXES: List[str] = ["axxel", "fft", "stft", "fftv", "summary"]
+STREAM_A: str = "axxel-aaaa1111-20231127-235625233-s000-ax-f010-z015.tsv"
+FFT_A: str = "fft-aaaa1111-20231127-235625233-s000-ax-f010-z015-x.tsv"
+STREAM_B: str = "axxel-bbbb2222-20231128-101010100-s000-ax-f010-z015.tsv"
+
+
+class RecordingBackend(StorageBackend):
+    """
+    Forwards to a backend and records the names of uploaded files.
+    """
+
+    def __init__(self, backend: StorageBackend):
+        self.backend: StorageBackend = backend
+        self.uploads: List[str] = []
+
+    def list(self, prefix: str = "") -> List[StoredFile]:
+        return self.backend.list(prefix)
+
+    def upload(self, local_path: str, name: str) -> None:
+        self.uploads.append(name)
+        self.backend.upload(local_path, name)
+
+    def download(self, name: str, local_path: str) -> None:
+        self.backend.download(name, local_path)
+
+    def delete(self, name: str) -> None:
+        self.backend.delete(name)
+
+
+@pytest.fixture(params=["directory", "s3"])
+def backend(request, tmp_path, monkeypatch):
+    if "directory" == request.param:
+        root = tmp_path / "shared"
+        root.mkdir()
+        yield RecordingBackend(DirectoryBackend(str(root)))
+        return
+
+    moto = pytest.importorskip("moto")
+    pytest.importorskip("boto3")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        import boto3
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="farm")
+        yield RecordingBackend(S3Backend("farm", key_prefix="printers", region="us-east-1"))
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = tmp_path / "data"
+    path.mkdir()
+    return path
+
+
+def make_sync(backend: StorageBackend, data_dir, batch_size: int = 32, pause_gate: PauseGate = None) -> StorageSync:
+    return StorageSync(logger, backend, str(data_dir), FILE_PREFIXES, ".storage_manifest.json",
+                       pause_gate=pause_gate, batch_window_s=0.0, batch_size=batch_size)
+
+
+def write(path, content: str = "sample x y z\n0 1 2 3\n") -> None:
+    with open(path, "w") as file:
+        file.write(content)
+
+
+def stored_names(backend: StorageBackend) -> List[str]:
+    return sorted(f.name for f in backend.list())
+
+
+def test_uploads_run_files_in_batches_and_only_once(backend, data_dir):
+    names = [f"axxel-aaaa1111-20231127-235625233-s{i:03d}-ax-f010-z015.tsv" for i in range(5)]
+    for name in names:
+        write(data_dir / name)
+    write(data_dir / "unrelated.txt")
+    sync = make_sync(backend, data_dir, batch_size=2)
+
+    sync.schedule_upload().result(timeout=10)
+    assert stored_names(backend) == sorted(names)
+    assert all(sync.is_uploaded(n) for n in names)
+
+    # the manifest survives a restart: nothing is uploaded again
+    sync.shutdown()
+    restarted = make_sync(backend, data_dir, batch_size=2)
+    restarted.schedule_upload().result(timeout=10)
+    assert sorted(backend.uploads) == sorted(names)
+    restarted.shutdown()
+
+
+def test_upload_waits_for_the_pause_gate(backend, data_dir):
+    write(data_dir / STREAM_A)
+    pause_gate = PauseGate()
+    pause_gate.pause()
+    sync = make_sync(backend, data_dir, pause_gate=pause_gate)
+
+    future = sync.schedule_upload()
+    time.sleep(0.2)
+    assert not future.done()
+    assert stored_names(backend) == []
+
+    pause_gate.resume()
+    future.result(timeout=10)
+    assert stored_names(backend) == [STREAM_A]
+    sync.shutdown()
+
+
+def test_compressed_file_replaces_its_uploaded_plain_version(backend, data_dir):
+    write(data_dir / STREAM_A)
+    sync = make_sync(backend, data_dir)
+    sync.schedule_upload().result(timeout=10)
+
+    with open(data_dir / STREAM_A, "rb") as source, gzip.open(data_dir / f"{STREAM_A}.gz", "wb") as target:
+        target.write(source.read())
+    os.remove(data_dir / STREAM_A)
+    sync.schedule_upload().result(timeout=10)
+
+    assert stored_names(backend) == [f"{STREAM_A}.gz"]
+    sync.shutdown()
+
+
+def test_retention_evicts_uploaded_streams_only_and_download_fetches_them_back(backend, data_dir):
+    write(data_dir / STREAM_A, "sample x y z\n0 1 2 3\n# {\"rate\": \"ODR800\"}\n")
+    write(data_dir / FFT_A)
+    old_ts = time.time() - 30 * 24 * 3600
+    os.utime(data_dir / STREAM_A, (old_ts, old_ts))
+    os.utime(data_dir / FFT_A, (old_ts, old_ts))
+    sync = make_sync(backend, data_dir)
+    sync.schedule_upload().result(timeout=10)
+
+    # recorded after the upload, thus not stored yet
+    write(data_dir / STREAM_B)
+    os.utime(data_dir / STREAM_B, (old_ts, old_ts))
+
+    evicted: List[List[str]] = []
+    retention = RetentionManager(logger, str(data_dir), "axxel", FILE_PREFIXES, ".retention_views.json",
+                                 max_size_mb=0, max_age_days=1, can_evict=sync.is_uploaded)
+    retention.enforce(on_done=evicted.append).result(timeout=10)
+
+    assert evicted == [["aaaa1111"]]
+    assert not os.path.exists(data_dir / STREAM_A)
+    assert os.path.exists(data_dir / FFT_A)
+    assert os.path.exists(data_dir / STREAM_B)
+
+    path = sync.fetch(STREAM_A)
+    assert path == str(data_dir / STREAM_A)
+    with open(path) as file:
+        assert file.read().startswith("sample x y z\n0 1 2 3\n")
+    assert sync.fetch("axxel-cccc3333-20231129-101010100-s000-ax-f010-z015.tsv") is None
+    assert sync.fetch("../escape.tsv") is None
+    retention.shutdown()
+    sync.shutdown()
+
+
+def test_fetch_run_and_delete_run(backend, data_dir):
+    write(data_dir / STREAM_A)
+    write(data_dir / FFT_A)
+    write(data_dir / STREAM_B)
+    sync = make_sync(backend, data_dir)
+    sync.schedule_upload().result(timeout=10)
+    for name in [STREAM_A, FFT_A]:
+        os.remove(data_dir / name)
+
+    fetched: List[int] = []
+    sync.fetch_run("aaaa1111", on_done=lambda _run_hash, count: fetched.append(count)).result(timeout=10)
+    assert fetched == [2]
+    assert os.path.exists(data_dir / STREAM_A) and os.path.exists(data_dir / FFT_A)
+
+    sync.delete_run("aaaa1111").result(timeout=10)
+    assert stored_names(backend) == [STREAM_B]
+    assert sorted(sync.list_runs().keys()) == ["bbbb2222"]
+    sync.shutdown()
+
+
+def test_download_handler_fetches_missing_files(data_dir, tmp_path):
+    import tornado.web
+    from tornado.testing import AsyncHTTPTestCase
+
+    from octoprint_accelerometer.data_download import DataFileHandler
+
+    root = tmp_path / "shared"
+    root.mkdir()
+    write(root / STREAM_A)
+    sync = make_sync(DirectoryBackend(str(root)), data_dir)
+
+    class DownloadTest(AsyncHTTPTestCase):
+        def get_app(self):
+            return tornado.web.Application([(r"/download/(.*)", DataFileHandler, dict(path=str(data_dir), fetch_missing=sync.fetch))])
+
+        def runTest(self):
+            response = self.fetch(f"/download/{STREAM_A}")
+            assert response.code == 200
+            assert response.body == b"sample x y z\n0 1 2 3\n"
+            assert self.fetch(f"/download/{STREAM_B}").code == 404
+
+    result = DownloadTest().run()
+    assert result is not None and result.wasSuccessful(), result.errors + result.failures
+    assert os.path.exists(data_dir / STREAM_A)
+    sync.shutdown()
+
+
+def test_paused_upload_is_aborted_on_shutdown(data_dir, tmp_path):
+    root = tmp_path / "shared"
+    root.mkdir()
+    write(data_dir / STREAM_A)
+    pause_gate = PauseGate()
+    pause_gate.pause()
+    sync = make_sync(DirectoryBackend(str(root)), data_dir, pause_gate=pause_gate)
+    future = sync.schedule_upload()
+    time.sleep(0.1)
+    sync.shutdown()
+    future.result(timeout=10)
+    assert os.listdir(root) == []
@@ -0,0 +1,76 @@
+import pytest
+
+# the plugin package depends on py3dpaxxel
+pytest.importorskip("py3dpaxxel")
+np = pytest.importorskip("numpy")
+
+from octoprint_accelerometer.stream_quality import SEQ_MODULUS, check_stream_sampling, resample_uniform  # noqa: E402
+
+
+def counters(samples):
+    sample = np.array(samples, dtype=np.float64)
+    return sample.astype(np.int64) % SEQ_MODULUS, sample
+
+
+def test_sane_stream_across_seq_wraps():
+    quality = check_stream_sampling(*counters(range(1000)), 800.0)
+
+    assert quality.flags == []
+    assert quality.dropped_samples == quality.gaps_count == quality.seq_mismatches == 0
+    assert quality.coverage == 1.0
+    assert quality.effective_output_data_rate_hz == 800.0
+
+
+def test_gaps_are_counted_and_measured():
+    samples = [s for s in range(1000) if not 100 <= s < 105 and s != 500]
+    quality = check_stream_sampling(*counters(samples), 800.0)
+
+    assert quality.flags == ["dropped_samples"]
+    assert quality.dropped_samples == 6
+    assert quality.gaps_count == 2
+    assert quality.max_gap_samples == 5
+    # seq and sample counter skip alike, also where seq wraps in between
+    assert quality.seq_mismatches == 0
+    assert quality.coverage == pytest.approx(994 / 1000)
+    assert quality.effective_output_data_rate_hz == pytest.approx(800.0 * 994 / 1000)
+
+
+def test_duplicates_and_disorder_are_no_gaps():
+    samples = list(range(20))
+    samples[10], samples[11] = samples[11], samples[10]
+    samples.insert(5, 4)
+    quality = check_stream_sampling(*counters(samples), None)
+
+    assert quality.flags == ["duplicate_samples", "out_of_order_samples"]
+    assert quality.dropped_samples == 0
+    assert quality.duplicate_samples == 1
+    assert quality.out_of_order_samples == 1
+    assert quality.effective_output_data_rate_hz is None
+
+
+def test_seq_not_advancing_with_the_sample_counter():
+    sample = np.array([0, 1, 2, 5, 6], dtype=np.float64)
+    # the transfer counter runs on although samples were skipped by the sensor
+    seq = np.array([254, 255, 0, 1, 2])
+    quality = check_stream_sampling(seq, sample, 800.0)
+
+    assert quality.seq_mismatches == 1
+    assert "seq_mismatches" in quality.flags
+
+
+def test_short_stream():
+    quality = check_stream_sampling(*counters([7]), 800.0)
+
+    assert quality.flags == []
+    assert quality.effective_output_data_rate_hz == 800.0
+
+
+def test_resample_uniform_orders_drops_duplicates_and_interpolates_gaps():
+    columns = {"sample": np.array([0.0, 2.0, 1.0, 1.0, 4.0]), "x": np.array([0.0, 2.0, 1.0, 9.0, 4.0])}
+
+    resampled = resample_uniform(columns, ["x"])
+
+    assert resampled["sample"].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert resampled["x"].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    sane = {"sample": np.arange(3.0), "x": np.ones(3)}
+    assert resample_uniform(sane, ["x"]) is sane
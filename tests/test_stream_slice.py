@@ -0,0 +1,89 @@
+import gzip
+from typing import List
+
+import pytest
+
+# the plugin package depends on py3dpaxxel
+pytest.importorskip("py3dpaxxel")
+pytest.importorskip("numpy")
+
+from octoprint_accelerometer.stream_slice import OFFSET_INDEX_STRIDE_LINES, build_stream_offset_index, read_stream_slice  # noqa: E402
+
+HEADER: str = "seq sample x y z\n"
+META: str = "# {\"rate\": \"ODR800\"}\n"
+
+
+def stream_lines(samples: List[int]) -> List[str]:
+    # seq is the controller's 8 bit counter and wraps around every 256 samples, the sample counter does not
+    return [f"{sample % 256} {sample} 0.{sample} 1.0 -1.0\n" for sample in samples]
+
+
+def write_stream(path, samples: List[int], meta: str = META, compress: bool = False) -> str:
+    content = HEADER + "".join(stream_lines(samples)) + meta
+    if compress:
+        with gzip.open(path, "wt") as file:
+            file.write(content)
+    else:
+        with open(path, "w") as file:
+            file.write(content)
+    return str(path)
+
+
+def sliced_samples(path: str, start_ms, end_ms) -> List[int]:
+    content = b"".join(read_stream_slice(path, start_ms, end_ms)).decode()
+    lines = content.splitlines(keepends=True)
+    assert lines[0] == HEADER
+    assert lines[-1] == META
+    return [int(line.split()[1]) for line in lines[1:-1]]
+
+
+def test_index_records_every_stride_line(tmp_path):
+    path = write_stream(tmp_path / "axxel.tsv", list(range(1000)))
+    index = build_stream_offset_index(path)
+
+    assert index.is_ascending
+    assert index.sample_column == 1
+    assert index.samples.tolist() == list(range(0, 1000, OFFSET_INDEX_STRIDE_LINES))
+    with open(path, "rb") as file:
+        content = file.read()
+    for sample, offset in zip(index.samples.tolist(), index.offsets.tolist()):
+        assert content[offset:].startswith(stream_lines([sample])[0].encode())
+    assert content[index.data_end:] == META.encode()
+    assert index.output_data_rate_hz == 800.0
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_time_window_maps_to_sample_numbers_across_seq_wraps(tmp_path, compress):
+    path = write_stream(tmp_path / "axxel.tsv.gz" if compress else tmp_path / "axxel.tsv", list(range(2000)), compress=compress)
+
+    # 800 Hz: 1.25 ms per sample
+    assert sliced_samples(path, 500.0, 1000.0) == list(range(400, 801))
+    assert sliced_samples(path, None, 10.0) == list(range(0, 9))
+    assert sliced_samples(path, 2480.0, None) == list(range(1984, 2000))
+    assert sliced_samples(path, 5000.0, None) == []
+
+
+def test_gaps_in_the_sample_counter_are_kept(tmp_path):
+    samples = [s for s in range(1000) if not 300 <= s < 310]
+    path = write_stream(tmp_path / "axxel.tsv", samples)
+
+    assert sliced_samples(path, 370.0, 400.0) == [296, 297, 298, 299, 310, 311, 312, 313, 314, 315, 316, 317, 318, 319, 320]
+
+
+def test_samples_out_of_order_fall_back_to_a_full_scan(tmp_path):
+    samples = list(range(1000))
+    samples[600], samples[601] = samples[601], samples[600]
+    samples.append(100)
+    path = write_stream(tmp_path / "axxel.tsv", samples)
+
+    assert not build_stream_offset_index(path).is_ascending
+    # in file order, including the late sample behind the window's end
+    assert sliced_samples(path, 100.0, 130.0) == list(range(80, 105)) + [100]
+    assert sliced_samples(path, 750.0, 751.25) == [601, 600]
+
+
+def test_stream_without_meta_data_can_not_be_sliced(tmp_path):
+    path = write_stream(tmp_path / "axxel.tsv", list(range(10)), meta="")
+
+    with pytest.raises(ValueError):
+        list(read_stream_slice(path, 0.0, 10.0))
@@ -0,0 +1,76 @@
+import logging
+import os
+import threading
+from typing import List
+
+import pytest
+
+# the plugin package depends on py3dpaxxel
+pytest.importorskip("py3dpaxxel")
+np = pytest.importorskip("numpy")
+
+from octoprint_accelerometer import stream_spectra  # noqa: E402
+from octoprint_accelerometer.fft_variants import load_fft_variants  # noqa: E402
+from octoprint_accelerometer.spectrogram import compute_spectrogram, load_spectrogram  # noqa: E402
+from octoprint_accelerometer.stream_spectra import StreamSpectraRunner  # noqa: E402
+
+STREAM: str = "axxel-aaaa1111-20231127-235625233-s000-ax-f050-z015.tsv"
+STEM: str = "aaaa1111-20231127-235625233-s000-ax-f050-z015"
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    t = np.arange(3000) / 800.0
+    x = np.sin(2 * np.pi * 50.0 * t)
+    with open(tmp_path / STREAM, "w") as file:
+        file.write("seq sample x y z\n")
+        for row in range(3000):
+            file.write(f"{row % 256} {row} {x[row]:.6f} 0.0 1.0\n")
+        file.write("# {\"rate\": \"ODR800\"}\n")
+    return tmp_path
+
+
+@pytest.fixture
+def reads(monkeypatch) -> List[str]:
+    """
+    :return: names of the files read so far
+    """
+    reads: List[str] = []
+    iter_columns = stream_spectra.iter_columns
+
+    def counting_iter_columns(path, *args, **kwargs):
+        reads.append(os.path.basename(path))
+        return iter_columns(path, *args, **kwargs)
+
+    monkeypatch.setattr(stream_spectra, "iter_columns", counting_iter_columns)
+    return reads
+
+
+def make_runner(data_dir, algorithms: List[str]) -> StreamSpectraRunner:
+    return StreamSpectraRunner(logging.getLogger(__name__), str(data_dir), "axxel", str(data_dir), "stft", 256, 64, "fftv", algorithms,
+                               do_abort_flag=threading.Event())
+
+
+def test_spectrograms_and_variants_are_computed_in_one_read(data_dir, reads):
+    assert make_runner(data_dir, ["hann", "blackman"])() == (0, 1, 1, 0)
+
+    assert reads == [STREAM]
+    variants = load_fft_variants(str(data_dir / f"fftv-{STEM}.npz"))
+    assert sorted(variants.amplitudes.keys()) == ["blackman", "hann"]
+    spectrogram = load_spectrogram(str(data_dir / f"stft-{STEM}-w256-h064-x.npz"))
+    t = np.arange(3000) / 800.0
+    reference = compute_spectrogram(np.round(np.sin(2 * np.pi * 50.0 * t), 6), 800.0, 256, 64)
+    np.testing.assert_allclose(spectrogram.magnitude, reference.magnitude, rtol=1e-5, atol=1e-6)
+
+
+def test_only_missing_outputs_are_computed(data_dir, reads):
+    make_runner(data_dir, ["hann"])()
+    spectrogram_mtime = os.path.getmtime(data_dir / f"stft-{STEM}-w256-h064-y.npz")
+
+    assert make_runner(data_dir, ["hann"])() == (0, 1, 0, 1)
+    assert reads == [STREAM]
+
+    assert make_runner(data_dir, ["hann", "flattop"])() == (0, 1, 1, 0)
+    assert reads == [STREAM, STREAM]
+    assert sorted(load_fft_variants(str(data_dir / f"fftv-{STEM}.npz")).amplitudes.keys()) == ["flattop", "hann"]
+    assert os.path.getmtime(data_dir / f"stft-{STEM}-w256-h064-y.npz") == spectrogram_mtime
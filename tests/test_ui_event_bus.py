@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+# the plugin package depends on py3dpaxxel
+pytest.importorskip("py3dpaxxel")
+
+from octoprint_accelerometer.ui_event_bus import UiEventBus  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+class Sink:
+    def __init__(self):
+        self.payloads: List[Dict[str, Any]] = []
+        self.timestamps: List[float] = []
+        self._lock: threading.Lock = threading.Lock()
+
+    def send(self, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self.payloads.append(payload)
+            self.timestamps.append(time.monotonic())
+
+    def wait_for(self, count: int, timeout_s: float = 5.0) -> List[Dict[str, Any]]:
+        deadline = time.monotonic() + timeout_s
+        while len(self.payloads) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # nothing more arrives
+        time.sleep(0.2)
+        return self.payloads
+
+
+def test_state_topics_are_coalesced_to_the_latest_value():
+    sink = Sink()
+    bus = UiEventBus(logger, sink.send, batch_window_s=0.1)
+    for progress in range(5):
+        bus.publish({"PROGRESS": progress})
+    bus.publish({"FILES_TOTAL_COUNT": "3"})
+
+    assert sink.wait_for(1) == [{"PROGRESS": 4, "FILES_TOTAL_COUNT": "3"}]
+
+
+def test_events_are_sent_in_order_and_never_coalesced():
+    sink = Sink()
+    bus = UiEventBus(logger, sink.send, event_topics=["RECORDING_EVENT", "RUN_DELETED"], batch_window_s=0.1)
+    bus.publish({"RECORDING_EVENT": "STARTING"})
+    bus.publish({"PROGRESS": 1})
+    bus.publish({"RECORDING_EVENT": "PROCESSING", "RUN_DELETED": "aaaa1111"})
+    bus.publish({"PROGRESS": 2})
+    bus.publish({"RECORDING_EVENT": "PROCESSING_FINISHED"})
+
+    assert sink.wait_for(3) == [{"PROGRESS": 2, "RECORDING_EVENT": "STARTING"},
+                                {"RECORDING_EVENT": "PROCESSING", "RUN_DELETED": "aaaa1111"},
+                                {"RECORDING_EVENT": "PROCESSING_FINISHED"}]
+
+
+def test_state_topic_is_held_back_for_its_minimum_interval():
+    sink = Sink()
+    bus = UiEventBus(logger, sink.send, min_intervals_s={"PROGRESS": 0.5}, event_topics=["RECORDING_EVENT"], batch_window_s=0.02)
+    bus.publish({"PROGRESS": 1})
+    sink.wait_for(1)
+    bus.publish({"PROGRESS": 2})
+    bus.publish({"RECORDING_EVENT": "PROCESSING"})
+    bus.publish({"PROGRESS": 3})
+
+    payloads = sink.wait_for(3)
+    # events are not held back by the interval of a state topic
+    assert payloads == [{"PROGRESS": 1}, {"RECORDING_EVENT": "PROCESSING"}, {"PROGRESS": 3}]
+    assert sink.timestamps[2] - sink.timestamps[0] >= 0.5
+
+
+def test_failing_send_does_not_stop_the_bus():
+    sent: List[Dict[str, Any]] = []
+
+    def send(payload: Dict[str, Any]) -> None:
+        sent.append(payload)
+        if len(sent) == 1:
+            raise RuntimeError("websocket closed")
+
+    bus = UiEventBus(logger, send, batch_window_s=0.02)
+    bus.publish({"PROGRESS": 1})
+    time.sleep(0.2)
+    bus.publish({"PROGRESS": 2})
+    time.sleep(0.2)
+
+    assert sent == [{"PROGRESS": 1}, {"PROGRESS": 2}]